@@ -0,0 +1,54 @@
+"""Spouštění delších operací (indexace, úklid) mimo GUI vlákno.
+
+Funkce běží v obyčejném vlákně; výsledek nebo chyba se do GUI dostane
+signálem (Qt ho doručí přes frontu událostí hlavního vlákna).
+Funkce si musí vlastní prostředky (např. SQLite spojení) vytvořit sama.
+Úloha bez rodiče (např. z dialogu, který se zavře dřív) se drží
+v BackgroundJob.active, dokud nedoběhne.
+"""
+import threading
+import traceback
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+
+class BackgroundJob(QObject):
+    done = Signal(object)   # návratová hodnota funkce
+    failed = Signal(str)    # text výjimky
+
+    active = set()  # běžící úlohy - Python je nesmí uvolnit, dokud vlákno může emitovat
+
+    def __init__(self, func, parent=None):
+        super().__init__(parent)
+        self.func = func
+        self._thread = None
+        self.done.connect(self._release)
+        self.failed.connect(self._release)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        BackgroundJob.active.add(self)
+        self._thread = threading.Thread(target=self._run, name="BackgroundJob", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _release(self, _result=None):
+        # Až po ostatních slotech téhož signálu - jinak by se úloha uvolnila dřív, než je dostanou
+        QTimer.singleShot(0, self._forget)
+
+    def _forget(self):
+        BackgroundJob.active.discard(self)
+
+    def _run(self):
+        try:
+            result = self.func()
+        except Exception as e:  # Chyba se jen ohlásí, GUI běží dál
+            traceback.print_exc()
+            self.failed.emit(f"{type(e).__name__}: {e}")
+            return
+        self.done.emit(result)
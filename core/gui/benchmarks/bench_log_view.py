@@ -0,0 +1,77 @@
+"""Benchmark log panelu: protlačí 1M řádků přes LogView v offscreen režimu.
+
+Spuštění ze složky core/gui:
+
+    python -m benchmarks.bench_log_view [--lines 1000000] [--batch 500]
+
+Simuluje upovídaný Nextflow: zprávy přicházejí po dávkách a mezi nimi
+běží event loop (flush časovač, překreslení), jako v reálném GUI.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from log_view import LogView
+
+
+def run(lines, batch, capacity):
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        view = LogView(capacity=capacity, flush_interval_ms=50,
+                       spill_path=os.path.join(tmp, "spill.log"))
+        view.resize(800, 300)
+        view.show()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        worst_append = 0.0
+        for first in range(0, lines, batch):
+            t0 = time.perf_counter()
+            for i in range(first, min(first + batch, lines)):
+                if i % 97 == 0:
+                    view.append(f"[stderr] ERROR task {i} failed")
+                elif i % 13 == 0:
+                    view.append(f"WARN slow task {i}")
+                else:
+                    view.append(f"[ab/{i:06x}] Submitted process > FASTQC ({i})")
+            worst_append = max(worst_append, time.perf_counter() - t0)
+            app.processEvents()
+        view.flush()
+        app.processEvents()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        t0 = time.perf_counter()
+        view.search_edit.setText("ERROR")
+        search_time = time.perf_counter() - t0
+        matches = view.proxy.rowCount()
+        view.shutdown()
+        spill_size = os.path.getsize(os.path.join(tmp, "spill.log"))
+
+    print(f"lines:            {lines}")
+    print(f"total time:       {elapsed:.2f} s ({lines / elapsed:,.0f} lines/s)")
+    print(f"worst batch:      {worst_append * 1000:.1f} ms per {batch} appends")
+    print(f"peak memory:      {peak / 2**20:.1f} MiB (capacity {capacity} lines)")
+    print(f"in memory/spill:  {len(view.buffer)} / {view.buffer.spilled} lines ({spill_size / 2**20:.1f} MiB on disk)")
+    print(f"search 'ERROR':   {search_time * 1000:.1f} ms, {matches} matches")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Push many lines through LogView.")
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--capacity", type=int, default=10000)
+    args = parser.parse_args(argv)
+    run(args.lines, args.batch, args.capacity)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Výkonnostní sada: katalogy 100-10k modulů a workflow až 1000 kroků, offscreen Qt.
+
+Spuštění ze složky core/gui (stačí Linux bez displeje):
+
+    python -m benchmarks.bench_suite                  # porovná s uloženou baseline
+    python -m benchmarks.bench_suite --save-baseline  # uloží aktuální výsledky jako baseline
+    python -m benchmarks.bench_suite --quick          # menší velikosti (rychlá kontrola)
+
+Měří load_modules (bez cache a s cache), MainWindow.generate_pipeline,
+otevření PipelineSettingsDialog, show_module_info (první vykreslení
+i z cache) a simulaci rozvrhu nejmenšího workflow s 10k vzorky. Čas je medián z opakování, špičková paměť se měří zvlášť
+přes tracemalloc (zpomaluje). Vše běží v dočasné složce - syntetický
+katalog se zapisuje do modules/ a pipeline do core/gui/workflows/ v ní.
+
+Regrese (návratový kód 1) = čas nebo paměť nad baseline * práh
+a zároveň nad absolutní tolerancí (šum u krátkých měření). Baseline
+platí jen pro stroj, na kterém vznikla, proto se do repozitáře neukládá.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+import main_window
+from module_registry import ModuleRegistry, load_modules
+from pipeline_compiler import DEFAULT_PIPELINE_PATH, config_path_for
+from schedule_sim import simulate
+from benchmarks.synthetic import write_catalog, make_workflow, workflow_params
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+CATALOG_SIZES = (100, 1000, 10000)
+WORKFLOW_STEPS = (10, 100, 1000)
+QUICK_CATALOG_SIZES = (100, 1000)
+QUICK_WORKFLOW_STEPS = (10, 100)
+INFO_SAMPLE = 200  # kolik modulů projde show_module_info
+SIM_SAMPLES = 10000
+SIM_CORES = 64
+TIME_TOLERANCE = 0.005  # s
+MEMORY_TOLERANCE = 2 ** 20  # B
+
+
+def measure(func, setup=None, repeat=5):
+    """(medián času v s, špičková paměť v B); setup() běží před každým opakováním mimo měření."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def bench_catalog(app, workdir, size, repeat, results):
+    """load_modules a show_module_info nad katalogem size modulů; vrací MainWindow nad ním."""
+    modules_dir = os.path.join(workdir, "modules")
+    shutil.rmtree(modules_dir, ignore_errors=True)
+    names = write_catalog(modules_dir, size)
+    cache_path = ModuleRegistry(modules_dir).cache_path
+
+    def drop_cache():
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+
+    results[f"load_modules cold, {size} modules"] = measure(
+        lambda: load_modules(modules_dir), drop_cache, max(1, repeat // 2))
+    load_modules(modules_dir)
+    results[f"load_modules cached, {size} modules"] = measure(lambda: load_modules(modules_dir), repeat=repeat)
+
+    window = main_window.MainWindow()  # načte modules/ ze složky spuštění
+    window.show()
+    app.processEvents()
+    sample = names[:INFO_SAMPLE]
+
+    def clear_info_cache():
+        window.invalidate_module_info(list(window.module_info_cache))
+        app.processEvents()
+
+    def show_all():
+        for name in sample:
+            window.show_module_info(name)
+
+    seconds, peak = measure(show_all, clear_info_cache, repeat)
+    results[f"show_module_info first view, {size} modules (per module)"] = (seconds / len(sample), peak)
+    show_all()
+    seconds, peak = measure(show_all, repeat=repeat)
+    results[f"show_module_info cached, {size} modules (per module)"] = (seconds / len(sample), peak)
+    return window, names
+
+
+def bench_workflow(app, window, names, steps, repeat, results, simulate_samples=0):
+    window.set_project_state(make_workflow(names, steps), {})
+    window.workflow_params.update(workflow_params(window.workflow_graph, window.module_info))
+
+    def remove_outputs():
+        for path in (DEFAULT_PIPELINE_PATH, config_path_for(DEFAULT_PIPELINE_PATH)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    results[f"generate_pipeline, {steps} steps"] = measure(window.generate_pipeline, remove_outputs, repeat)
+
+    def open_dialog():
+        dialog = main_window.PipelineSettingsDialog(
+            window.workflow_graph.nodes, window.module_info, window.workflow_params, window)
+        dialog.show()
+        app.processEvents()
+        dialog.deleteLater()
+
+    results[f"PipelineSettingsDialog open, {steps} steps"] = measure(
+        open_dialog, app.processEvents, repeat)
+
+    if simulate_samples:
+        # První modul čte vzorky z globu, další kroky pak běží pro každý vzorek zvlášť
+        params = {**window.workflow_params}
+        first = window.workflow_graph.topological_order()[0]
+        params[first] = {**params[first], window.module_info[first].input_ids[0]: "/data/*.fastq.gz"}
+        samples = [2 ** 31] * simulate_samples
+        results[f"schedule simulation, {steps} steps, {simulate_samples} samples"] = measure(
+            lambda: simulate(window.workflow_graph, window.module_info, params, SIM_CORES, None, samples), repeat=repeat)
+
+
+def compare(results, baseline, time_threshold, memory_threshold):
+    """[(název, popis regrese)]"""
+    regressions = []
+    for name, (seconds, peak) in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if seconds > base["seconds"] * time_threshold and seconds - base["seconds"] > TIME_TOLERANCE:
+            regressions.append((name, f"time {format_time(base['seconds'])} -> {format_time(seconds)}"))
+        if peak > base["peak"] * memory_threshold and peak - base["peak"] > MEMORY_TOLERANCE:
+            regressions.append((name, f"memory {format_bytes(base['peak'])} -> {format_bytes(peak)}"))
+    return regressions
+
+
+def format_time(seconds):
+    return f"{seconds * 1000:.2f} ms" if seconds < 1 else f"{seconds:.2f} s"
+
+
+def format_bytes(size):
+    return f"{size / 2 ** 20:.1f} MiB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark catalog loading, pipeline generation and dialogs.")
+    parser.add_argument("--catalogs", type=lambda s: [int(x) for x in s.split(",")],
+                        help=f"catalog sizes (default {','.join(map(str, CATALOG_SIZES))})")
+    parser.add_argument("--steps", type=lambda s: [int(x) for x in s.split(",")],
+                        help=f"workflow sizes (default {','.join(map(str, WORKFLOW_STEPS))})")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast check")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--time-threshold", type=float, default=1.25, help="allowed slowdown factor")
+    parser.add_argument("--memory-threshold", type=float, default=1.25, help="allowed peak memory growth factor")
+    args = parser.parse_args(argv)
+
+    catalogs = sorted(args.catalogs or (QUICK_CATALOG_SIZES if args.quick else CATALOG_SIZES))
+    steps = sorted(args.steps or (QUICK_WORKFLOW_STEPS if args.quick else WORKFLOW_STEPS))
+    if steps and steps[-1] > catalogs[-1]:
+        parser.error("workflow steps cannot exceed the largest catalog (each step is a different module)")
+    baseline_path = os.path.abspath(args.baseline)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = {}
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="pipeline_bench_") as workdir:
+        # Cache modulů, historie a deník projektu jdou do dočasné složky, ne do ~/.cache
+        os.environ["XDG_CACHE_HOME"] = os.path.join(workdir, "cache")
+        os.chdir(workdir)
+        try:
+            window = names = None
+            for size in catalogs:
+                if window is not None:
+                    window.close()
+                    window.deleteLater()
+                print(f"Catalog of {size} modules...", file=sys.stderr)
+                window, names = bench_catalog(app, workdir, size, args.repeat, results)
+            for count in steps:
+                print(f"Workflow of {count} steps...", file=sys.stderr)
+                bench_workflow(app, window, names, count, args.repeat, results,
+                               SIM_SAMPLES if count == steps[0] else 0)
+            window.close()
+        finally:
+            os.chdir(previous_dir)
+
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(f"{'benchmark':<62} {'time':>10} {'baseline':>10} {'peak mem':>10} {'baseline':>10}")
+    for name, (seconds, peak) in results.items():
+        base = baseline.get(name, {})
+        print(f"{name:<62} {format_time(seconds):>10} "
+              f"{format_time(base['seconds']) if base else '-':>10} {format_bytes(peak):>10} "
+              f"{format_bytes(base['peak']) if base else '-':>10}")
+
+    if args.save_baseline:
+        baseline.update({name: {"seconds": seconds, "peak": peak} for name, (seconds, peak) in results.items()})
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+    if not baseline:
+        print(f"No baseline at {baseline_path}, run with --save-baseline first.")
+        return 0
+    regressions = compare(results, baseline, args.time_threshold, args.memory_threshold)
+    for name, message in regressions:
+        print(f"REGRESSION {name}: {message}")
+    if not regressions:
+        print(f"No regressions (thresholds: time x{args.time_threshold}, memory x{args.memory_threshold}).")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Generátory syntetických katalogů modulů a workflow pro benchmarky.
+
+Katalog střídá všechny formáty JSON definic z modules/ (params jako
+seznam i starý slovník parameters, vstupy/výstupy jako řetězce
+i slovníky), aby se měřila i normalizace starého formátu.
+"""
+import os
+import json
+import random
+
+from pipeline_compiler import bind_inputs
+from workflow_graph import WorkflowGraph
+
+
+EXTENSIONS = ("bam", "fastq.gz", "vcf", "bed", "fa", "txt")
+WORDS = ("align", "sort", "filter", "count", "merge", "call", "trim", "index", "qc", "annotate",
+         "dedup", "split", "stats", "convert", "assemble", "quantify")
+
+
+def module_name(i):
+    return f"SYN {WORDS[i % len(WORDS)].upper()} {i:05d}"
+
+
+def module_definition(i, rng):
+    """JSON definice i-tého modulu; formát se střídá podle i % 4."""
+    style = i % 4
+    n_inputs = 1 if style == 1 else rng.randint(1, 3)
+    inputs = [f"in{k}_{i}.{rng.choice(EXTENSIONS)}" for k in range(n_inputs)]
+    outputs = [f"out{k}_{i}.{rng.choice(EXTENSIONS)}" for k in range(rng.randint(1, 2))]
+    params = [(f"--opt{k}", rng.choice(("int", "str", "float")), str(rng.randint(0, 100)),
+               f"Option {k} of {WORDS[(i + k) % len(WORDS)]}") for k in range(rng.randint(5, 40))]
+    placeholders = " ".join("{%s}" % param_id for param_id, _, _, _ in params[:5])
+    data = {
+        "name": module_name(i),
+        "description": f"Synthetic {WORDS[i % len(WORDS)]} tool number {i} for benchmarks.",
+        "container": f"quay.io/biocontainers/syn{i % 50}:1.0--0",
+        "command": f"syn{i} {placeholders} " + " ".join("{%s}" % input_id for input_id in inputs)
+                   + " > {%s}" % outputs[0] + "".join(" && touch {%s}" % path for path in outputs[1:]),
+    }
+    if style in (0, 3):
+        data["input"] = [{"id": input_id, "variable": f"in{k}"} for k, input_id in enumerate(inputs)]
+    else:
+        data["input"] = inputs
+    if style == 0:
+        data["output"] = [{"path": path, "emit": f"out{k}"} for k, path in enumerate(outputs)]
+        data["params"] = [{"id": param_id, "type": param_type, "default": default, "description": description}
+                          for param_id, param_type, default, description in params]
+    else:
+        data["output"] = outputs
+        data["parameters"] = {param_id: {"type": param_type, "default": default, "description": description}
+                              for param_id, param_type, default, description in params}
+    if i % 3 == 0:
+        data["resources"] = {"cpus": rng.choice((1, 2, 4, 8)), "memory": f"{rng.choice((1, 2, 8, 16))} GB"}
+    return data
+
+
+def write_catalog(directory, count, seed=1):
+    """Zapíše count JSON definic do složky; vrací [názvy modulů]."""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    names = []
+    for i in range(count):
+        data = module_definition(i, rng)
+        with open(os.path.join(directory, f"syn_{i:05d}.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        names.append(data["name"])
+    return names
+
+
+def make_workflow(names, steps, seed=1, fan_in=0.2, window=8):
+    """DAG z prvních steps modulů: každý krok čte výstup některého z posledních window kroků,
+    část kroků i druhý vstup (fan-in)."""
+    rng = random.Random(seed)
+    nodes = names[:steps]
+    graph = WorkflowGraph(nodes)
+    for i in range(1, len(nodes)):
+        sources = rng.sample(range(max(0, i - window), i), min(i, 2 if rng.random() < fan_in else 1))
+        for j in sources:
+            graph.add_edge(nodes[j], nodes[i])
+    return graph
+
+
+def workflow_params(graph, module_info):
+    """Hodnoty jako z PipelineSettingsDialog: parametry a soubory pro nepropojené vstupy."""
+    params = {"_general_output_dir": "results"}
+    for name in graph.nodes:
+        spec = module_info[name]
+        # Hrany bez určeného vstupu jdou všechny do prvního volného vstupu, ostatní dostanou soubor
+        values = {input_id: f"/data/{input_id}"
+                  for input_id, _, edges, _ in bind_inputs(name, spec, {}, graph.upstream(name)) if not edges}
+        values.update(spec.param_defaults())
+        params[name] = values
+    return params
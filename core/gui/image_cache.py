@@ -0,0 +1,258 @@
+"""Předstahování container image pro pipeline a lokální cache s LRU úklidem.
+
+Image se zjistí z vygenerovaného main.nf (řádky `container '...'`), takže
+se počítá i se spojenými procesy a gather kroky. Stahují se souběžně
+(omezený počet vláken), aby první běh nečekal na každý task zvlášť.
+
+- docker: image zůstávají v úložišti dockeru, index si jen pamatuje
+  velikost a poslední použití (úklid = docker rmi),
+- singularity: SIF soubory ve složce cache se jmény, která hledá Nextflow
+  (singularity.cacheDir v nextflow.config), úklid = smazání souboru.
+
+Příkazy se dají podvrhnout proměnnými DOCKER / SINGULARITY (testy bez sítě).
+
+Bez GUI (ze složky core/gui):
+
+    python -m image_cache core/gui/workflows/main.nf --engine singularity --workers 4 --cap 50GB
+"""
+import os
+import re
+import sys
+import time
+import sqlite3
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from module_registry import user_cache_dir
+from pipeline_compiler import parse_memory, read_pipeline, image_cache_dir, DEFAULT_PIPELINE_PATH
+from work_cache import format_size
+
+
+ENGINES = ("docker", "singularity")
+PROGRAM_VARIABLES = {"docker": "DOCKER", "singularity": "SINGULARITY"}
+DEFAULT_WORKERS = 4
+PULL_TIMEOUT = 3600  # s
+
+_CONTAINER_RE = re.compile(r"^\s*container\s+'([^']+)'", re.MULTILINE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    engine TEXT, image TEXT, path TEXT, size INTEGER, pulled REAL, last_used REAL,
+    PRIMARY KEY (engine, image)
+);
+"""
+
+
+def default_db_path():
+    return os.path.join(user_cache_dir(), "image_cache.sqlite")
+
+
+def images_in_script(script):
+    """Všechny image použité ve skriptu, v pořadí prvního výskytu."""
+    return list(dict.fromkeys(_CONTAINER_RE.findall(script or "")))
+
+
+def sif_name(image):
+    """Název SIF souboru, pod kterým ho Nextflow hledá v singularity.cacheDir."""
+    name = image.split("://", 1)[-1]
+    return re.sub(r"[/:]", "-", name) + ".img"
+
+
+class PullResult:
+    __slots__ = ("image", "status", "seconds", "error")
+
+    def __init__(self, image, status, seconds=0.0, error=""):
+        self.image = image
+        self.status = status    # "cached" / "pulled" / "failed"
+        self.seconds = seconds
+        self.error = error
+
+
+class ImageCache:
+    def __init__(self, engine, image_dir=None, db_path=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown container engine '{engine}', use one of: {', '.join(ENGINES)}")
+        self.engine = engine
+        # Proměnná se čte až tady, aby ji šlo nastavit i po importu modulu
+        self.program = os.environ.get(PROGRAM_VARIABLES[engine]) or engine
+        self.image_dir = os.path.abspath(image_dir or image_cache_dir({}))
+        self.db_path = db_path or default_db_path()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ---------- Stahování (běží ve vláknech, bez SQLite) ----------
+
+    def _run(self, args, timeout=PULL_TIMEOUT):
+        return subprocess.run([self.program, *args], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              text=True, timeout=timeout)
+
+    def local_path(self, image):
+        return os.path.join(self.image_dir, sif_name(image)) if self.engine == "singularity" else ""
+
+    def is_present(self, image):
+        if self.engine == "singularity":
+            return os.path.isfile(self.local_path(image))
+        try:
+            return self._run(["image", "inspect", image], timeout=60).returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+
+    def image_size(self, image):
+        if self.engine == "singularity":
+            try:
+                return os.path.getsize(self.local_path(image))
+            except OSError:
+                return 0
+        try:
+            result = self._run(["image", "inspect", "--format", "{{.Size}}", image], timeout=60)
+        except (OSError, subprocess.TimeoutExpired):
+            return 0
+        value = result.stdout.strip()
+        return int(value) if result.returncode == 0 and value.isdigit() else 0
+
+    def pull(self, image):
+        """Stáhne image, pokud v cache není; vrací PullResult."""
+        start = time.perf_counter()
+        if self.is_present(image):
+            return PullResult(image, "cached")
+        if self.engine == "singularity":
+            os.makedirs(self.image_dir, exist_ok=True)
+            path = self.local_path(image)
+            # Do dočasného souboru - Nextflow nesmí najít napůl stažený SIF
+            tmp_path = f"{path}.{os.getpid()}.pulling"
+            args = ["pull", "--force", tmp_path, image if "://" in image else f"docker://{image}"]
+        else:
+            tmp_path = path = None
+            args = ["pull", image]
+        try:
+            result = self._run(args)
+            if result.returncode != 0:
+                lines = result.stdout.strip().splitlines()
+                return PullResult(image, "failed", time.perf_counter() - start,
+                                  lines[-1] if lines else f"exit code {result.returncode}")
+            if tmp_path:
+                os.replace(tmp_path, path)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            return PullResult(image, "failed", time.perf_counter() - start, str(e))
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return PullResult(image, "pulled", time.perf_counter() - start)
+
+    def prefetch(self, images, workers=DEFAULT_WORKERS, on_result=None):
+        """Stáhne chybějící image souběžně; vrací [PullResult] v pořadí dokončení."""
+        results = []
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [pool.submit(self.pull, image) for image in images]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if on_result:
+                    on_result(result)
+        self._record(images, results)
+        return results
+
+    # ---------- Index a LRU úklid ----------
+
+    def _record(self, images, results):
+        now = time.time()
+        status = {r.image: r.status for r in results}
+        with self.conn:
+            for image in images:
+                if status.get(image) == "failed":
+                    continue
+                self.conn.execute(
+                    "INSERT INTO images (engine, image, path, size, pulled, last_used) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(engine, image) DO UPDATE SET last_used = excluded.last_used, "
+                    "size = excluded.size, path = excluded.path, "
+                    "pulled = CASE WHEN ? = 'pulled' THEN excluded.pulled ELSE pulled END",
+                    (self.engine, image, self.local_path(image), self.image_size(image), now, now,
+                     status.get(image)))
+
+    def images(self):
+        """[(image, velikost, poslední použití)] od nejdéle nepoužitého."""
+        return self.conn.execute(
+            "SELECT image, size, last_used FROM images WHERE engine = ? ORDER BY last_used",
+            (self.engine,)).fetchall()
+
+    def total_size(self):
+        return sum(size or 0 for _, size, _ in self.images())
+
+    def evict(self, cap, protect=(), dry_run=False):
+        """Maže nejdéle nepoužité image, dokud cache nezmenší pod cap; vrací [(image, velikost)]."""
+        total = self.total_size()
+        evicted = []
+        for image, size, _ in self.images():
+            if total <= cap:
+                break
+            if image in protect:
+                continue
+            if not dry_run and not self._remove(image):
+                continue
+            evicted.append((image, size or 0))
+            total -= size or 0
+        if not dry_run:
+            with self.conn:
+                self.conn.executemany("DELETE FROM images WHERE engine = ? AND image = ?",
+                                      [(self.engine, image) for image, _ in evicted])
+        return evicted
+
+    def _remove(self, image):
+        if self.engine == "singularity":
+            try:
+                os.remove(self.local_path(image))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                return False
+            return True
+        try:
+            result = self._run(["rmi", image], timeout=300)
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        # Image, které už docker nezná, se z indexu taky vyřadí
+        return result.returncode == 0 or "No such image" in result.stdout
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="image_cache", description="Prefetch container images for a pipeline.")
+    parser.add_argument("script", nargs="?", default=DEFAULT_PIPELINE_PATH, help="generated main.nf")
+    parser.add_argument("--engine", choices=ENGINES, default="docker")
+    parser.add_argument("--image-dir", help="directory for Singularity images")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel pulls")
+    parser.add_argument("--cap", help="evict least recently used images above this size, e.g. 50GB")
+    parser.add_argument("--db", help="image index database path")
+    args = parser.parse_args(argv)
+
+    images = images_in_script(read_pipeline(args.script))
+    if not images:
+        print(f"No container images in {args.script}")
+        return 0
+    cache = ImageCache(args.engine, args.image_dir, args.db)
+    try:
+        start = time.perf_counter()
+        results = cache.prefetch(images, args.workers, on_result=lambda r: print(
+            f"{r.status:<7} {r.image}" + (f" ({r.seconds:.1f} s)" if r.status == "pulled" else "")
+            + (f": {r.error}" if r.error else "")))
+        ready = sum(1 for r in results if r.status != "failed")
+        print(f"{ready} of {len(images)} images ready in {time.perf_counter() - start:.1f} s, "
+              f"cache {format_size(cache.total_size())}")
+        if args.cap:
+            cap = parse_memory(args.cap)
+            if cap is None:
+                parser.error(f"Invalid cap: {args.cap}")
+            for image, size in cache.evict(cap, protect=images):
+                print(f"Evicted {image} ({format_size(size)})")
+    finally:
+        cache.close()
+    return 1 if any(r.status == "failed" for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""Soupis vstupní složky (manifest) pro výběr vstupů po celých složkách.
+
+Složka se prochází souběžně (os.scandir v několika vláknech, každé
+vlákno jednu podsložku) - na síťovém disku se tak čeká na víc výpisů
+najednou. Manifest drží jen názvy a velikosti souborů po složkách
+a ukládá se do cache spolu s mtime každé složky. Při dalším otevření se
+složky jen stat-nou a znovu se vypíšou jen ty, jejichž mtime se změnil
+(přidaný / smazaný / přejmenovaný soubor). Změnu velikosti souboru
+přepsaného na místě mtime složky nezachytí.
+
+Bez GUI (ze složky core/gui):
+
+    python -m input_manifest /data/run42 --pattern "*.fastq.gz"
+"""
+import os
+import re
+import sys
+import time
+import pickle
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from module_registry import user_cache_dir
+from work_cache import format_size
+
+
+CACHE_VERSION = 1
+DEFAULT_WORKERS = 8
+READS_EXTENSIONS = (".fastq.gz", ".fq.gz", ".fastq", ".fq")
+
+# sample_R1.fastq.gz, sample_1.fq.gz, sample_S1_L001_R1_001.fastq.gz, sample.R2.fastq
+_READ_RE = re.compile(r"^(?P<sample>.+?)(?P<sep>[._-])(?P<tag>R?)(?P<read>[12])(?P<tail>_001)?"
+                      r"(?P<ext>\.(?:fastq|fq)(?:\.gz)?)$")
+
+
+def default_cache_path(root):
+    key = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(user_cache_dir(), "manifests", f"manifest-{key}.pickle")
+
+
+def input_pattern(input_id):
+    """Vzor souborů pro vstup modulu ve vybrané složce ('reads.fastq.gz' -> '*.fastq.gz').
+
+    Vstup, který je sám složkou ('genome_index/'), vrací '' - použije se celá složka.
+    """
+    input_id = str(input_id or "")
+    if input_id.endswith("/"):
+        return ""
+    if any(ch in input_id for ch in "*?[{"):
+        return input_id
+    name = os.path.basename(input_id)
+    return "*" + name[name.index("."):] if "." in name else "*"
+
+
+def scan_root(path):
+    """Složka, kterou je třeba projít pro cestu nebo vzor ('/data/run/*.fq.gz' -> '/data/run').
+
+    Vrací (složka, vzor relativně k ní) nebo None, pokud cesta není složka ani vzor ve složce.
+    """
+    path = str(path or "").strip()
+    if not path or "://" in path:
+        return None
+    parts = path.split("/")
+    fixed = next((i for i, part in enumerate(parts) if any(ch in part for ch in "*?[{")), len(parts))
+    root = "/".join(parts[:fixed]) or ("/" if path.startswith("/") else ".")
+    if not os.path.isdir(root):
+        return None
+    return os.path.abspath(root), "/".join(parts[fixed:])
+
+
+def _glob_regex(pattern):
+    """Regulární výraz pro relativní cestu: '*' a '?' nepřekročí '/', '**/' libovolné podsložky."""
+    parts = []
+    for token in re.split(r"(\*\*/|\*\*|\*|\?)", pattern):
+        if token == "**/":
+            parts.append("(?:.*/)?")
+        elif token == "**":
+            parts.append(".*")
+        elif token == "*":
+            parts.append("[^/]*")
+        elif token == "?":
+            parts.append("[^/]")
+        else:
+            parts.append(re.escape(token))
+    return "".join(parts)
+
+
+def _expand_braces(pattern):
+    """'*_R{1,2}.fq' -> ['*_R1.fq', '*_R2.fq']"""
+    match = re.search(r"\{([^{}]*)\}", pattern)
+    if not match:
+        return [pattern]
+    return [expanded for option in match.group(1).split(",")
+            for expanded in _expand_braces(pattern[:match.start()] + option + pattern[match.end():])]
+
+
+def _scan_dir(path, cached=None):
+    """(mtime_ns, ((název, velikost), ...), (podsložky, ...)); beze změny mtime vrátí cached."""
+    mtime = os.stat(path).st_mtime_ns
+    if cached is not None and cached[0] == mtime:
+        return cached
+    files, subdirs = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                # Odkazy na složky se neprocházejí (smyčky), odkazy na soubory ano
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.is_file():
+                    files.append((entry.name, entry.stat().st_size))
+            except OSError:
+                continue
+    files.sort()
+    subdirs.sort()
+    return mtime, tuple(files), tuple(subdirs)
+
+
+class InputManifest:
+    """Soubory jedné složky a jejích podsložek.
+
+    dirs      -- {relativní složka ('' = kořen): (mtime_ns, soubory, podsložky)}
+    rescanned -- kolik složek se při načtení skutečně vypsalo (0 = vše z cache)
+    """
+
+    def __init__(self, root, dirs, rescanned=0, elapsed=0.0):
+        self.root = os.path.abspath(root)
+        self.dirs = dirs
+        self.rescanned = rescanned
+        self.elapsed = elapsed
+        self._pairs = None
+
+    def files(self):
+        """[(relativní cesta, velikost)] všech souborů"""
+        result = []
+        for directory, (_, files, _) in self.dirs.items():
+            prefix = directory + "/" if directory else ""
+            result.extend((prefix + name, size) for name, size in files)
+        return result
+
+    @property
+    def file_count(self):
+        return sum(len(files) for _, files, _ in self.dirs.values())
+
+    @property
+    def total_size(self):
+        return sum(size for _, files, _ in self.dirs.values() for _, size in files)
+
+    def match(self, pattern):
+        """[(relativní cesta, velikost)] souborů odpovídajících vzoru relativnímu ke kořeni.
+
+        Vzor se vyhodnocuje jako v Nextflow: '*.fq.gz' jen v kořeni,
+        '**/*.fq.gz' ve všech podsložkách, '{1,2}' jako alternativy.
+        """
+        if not pattern:
+            return self.files()
+        regex = re.compile("(?:" + "|".join(_glob_regex(p) for p in _expand_braces(pattern)) + r")\Z")
+        return [(path, size) for path, size in self.files() if regex.match(path)]
+
+    def read_pairs(self):
+        """Spáruje FASTQ soubory na R1/R2 podle názvu.
+
+        Vrací (páry {vzorek: (R1, R2)}, nespárované [cesta], vzor pro
+        Channel.fromFilePairs nebo None). Vzorek = složka + název bez
+        označení čtení; vzor je nejčastější tvar názvu mezi páry.
+        Výsledek se pamatuje (GUI ho nechá spočítat už ve vlákně skenu).
+        """
+        if self._pairs is None:
+            self._pairs = self._find_pairs()
+        return self._pairs
+
+    def _find_pairs(self):
+        reads = {}  # (složka, vzorek, tvar názvu) -> {1: cesta, 2: cesta}
+        unpaired = []
+        for directory, (_, files, _) in self.dirs.items():
+            prefix = directory + "/" if directory else ""
+            for name, _ in files:
+                if not name.endswith(READS_EXTENSIONS):
+                    continue
+                match = _READ_RE.match(name)
+                if not match:
+                    unpaired.append(prefix + name)
+                    continue
+                shape = f"{match['sep']}{match['tag']}{{1,2}}{match['tail'] or ''}{match['ext']}"
+                reads.setdefault((directory, match["sample"], shape), {})[int(match["read"])] = prefix + name
+        pairs, shapes, pair_dirs = {}, {}, set()
+        for (directory, sample, shape), found in reads.items():
+            if len(found) < 2:
+                unpaired.extend(found.values())
+                continue
+            pairs[f"{directory}/{sample}" if directory else sample] = (found[1], found[2])
+            shapes[shape] = shapes.get(shape, 0) + 1
+            pair_dirs.add(directory)
+        pattern = None
+        if shapes:
+            shape = max(shapes, key=shapes.get)
+            if len(pair_dirs) == 1:
+                base = os.path.join(self.root, next(iter(pair_dirs)))
+            else:
+                base = os.path.join(self.root, "**")  # fromFilePairs prochází i podsložky
+            pattern = os.path.join(base, "*" + shape)  # absolutní - rovnou do Sample Sheet
+        return pairs, sorted(unpaired), pattern
+
+    def describe(self, pattern=None):
+        """Krátký souhrn pro GUI ('1,200 files (340.5 GB), ...'); s pattern jen odpovídající soubory.
+
+        pattern '' = všechny soubory bez párování čtení (vstup je celá složka).
+        """
+        if pattern is not None:
+            matched = self.match(pattern)
+            what = f"files matching {pattern}" if pattern else "files"
+            return f"{len(matched):,} {what} ({format_size(sum(size for _, size in matched))})"
+        text = f"{self.file_count:,} files ({format_size(self.total_size)})"
+        pairs, unpaired, _ = self.read_pairs()
+        if pairs or unpaired:
+            text += f", {len(pairs):,} paired-end samples"
+            if unpaired:
+                text += f", {len(unpaired):,} unpaired FASTQ files"
+        return text
+
+
+def _load_cached(cache_path, root):
+    try:
+        with open(cache_path, "rb") as f:
+            version, cached_root, dirs = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+        return {}
+    return dirs if version == CACHE_VERSION and cached_root == root else {}
+
+
+def _save_cached(cache_path, root, dirs):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump((CACHE_VERSION, root, dirs), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # cache je jen zrychlení
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def scan_directory(root, workers=DEFAULT_WORKERS, recursive=True, cache_path=None, use_cache=True):
+    """Manifest složky root; složky beze změny mtime se převezmou z cache.
+
+    Každá složka se vypisuje v samostatném vláknu, podsložky se zařadí,
+    jakmile je rodič hotový. Nepřístupné podsložky se přeskočí.
+    """
+    start = time.perf_counter()
+    root = os.path.abspath(root)
+    if not os.path.isdir(root):
+        raise NotADirectoryError(f"{root} is not a directory")
+    if cache_path is None:
+        cache_path = default_cache_path(root)
+    cached = _load_cached(cache_path, root) if use_cache else {}
+
+    dirs, rescanned = {}, 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        def submit(relative):
+            path = os.path.join(root, relative) if relative else root
+            return pool.submit(_scan_dir, path, cached.get(relative))
+
+        pending = {submit(""): ""}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                relative = pending.pop(future)
+                try:
+                    entry = future.result()
+                except OSError:
+                    if not relative:
+                        raise
+                    continue
+                if entry is not cached.get(relative):
+                    rescanned += 1
+                dirs[relative] = entry
+                if recursive:
+                    for name in entry[2]:
+                        child = f"{relative}/{name}" if relative else name
+                        pending[submit(child)] = child
+
+    if use_cache and (rescanned or len(dirs) != len(cached)):
+        _save_cached(cache_path, root, dirs)
+    return InputManifest(root, dirs, rescanned, time.perf_counter() - start)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="input_manifest", description="Scan an input directory.")
+    parser.add_argument("directory")
+    parser.add_argument("--pattern", action="append", default=[], help="count files matching this pattern")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--no-cache", action="store_true", help="ignore and do not update the cached manifest")
+    args = parser.parse_args(argv)
+
+    try:
+        manifest = scan_directory(args.directory, args.workers, use_cache=not args.no_cache)
+    except OSError as e:
+        print(f"input_manifest: {e}", file=sys.stderr)
+        return 1
+    print(manifest.describe())
+    for pattern in args.pattern:
+        print(manifest.describe(pattern))
+    _, _, pair_pattern = manifest.read_pairs()
+    if pair_pattern:
+        print(f"Read pairs: {pair_pattern}")
+    print(f"{len(manifest.dirs)} directories, {manifest.rescanned} listed, "
+          f"scanned in {manifest.elapsed * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
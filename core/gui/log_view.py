@@ -0,0 +1,347 @@
+"""Log panel pro velké množství zpráv.
+
+Zprávy se nejdřív jen uloží do fronty, do view se propíší dávkově
+časovačem. Paměť drží jen posledních N řádků v kruhovém bufferu,
+starší řádky se odkládají do souboru na disku. Filtr podle závažnosti
+a hledání pracují nad modelem (proxy), dokument se nepřekresluje celý.
+
+Soubor relace se při řádném ukončení smaže; soubory starší než
+SPILL_MAX_AGE (po pádu) se smažou při dalším startu.
+"""
+import glob
+import os
+import re
+import time
+
+from PySide6.QtCore import (
+    Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel, QTimer
+)
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QTableView, QComboBox, QLineEdit, QLabel,
+    QAbstractItemView, QHeaderView
+)
+
+from module_registry import user_cache_dir
+
+
+DEBUG, INFO, WARNING, ERROR = range(4)
+SEVERITY_NAMES = ["DEBUG", "INFO", "WARN", "ERROR"]
+SEVERITY_COLORS = {WARNING: QColor("#B8860B"), ERROR: QColor("#D32F2F"), DEBUG: QColor("#808080")}
+
+SPILL_MAX_AGE = 7 * 24 * 3600  # s
+SPILL_PATTERN = "session-*.log"
+
+_SEVERITY_RE = re.compile(r"\b(ERROR|ERR|FATAL|WARN|WARNING|DEBUG|TRACE)\b")
+_SEVERITY_MAP = {"ERROR": ERROR, "ERR": ERROR, "FATAL": ERROR, "WARN": WARNING,
+                 "WARNING": WARNING, "DEBUG": DEBUG, "TRACE": DEBUG}
+
+
+def classify(line):
+    """Odhadne závažnost řádku podle klíčových slov (ERROR, WARN, DEBUG...)"""
+    head = line[:200]
+    if "ERR" not in head and "WARN" not in head and "DEBUG" not in head \
+            and "TRACE" not in head and "FATAL" not in head:
+        return WARNING if line.startswith("[stderr]") else INFO
+    match = _SEVERITY_RE.search(head)
+    if match:
+        return _SEVERITY_MAP[match.group(1)]
+    if line.startswith("[stderr]"):
+        return WARNING
+    return INFO
+
+
+def prune_spill_files(directory, max_age=SPILL_MAX_AGE, now=None):
+    """Smaže odložené logy starých relací; vrací smazané cesty."""
+    now = time.time() if now is None else now
+    removed = []
+    for path in glob.glob(os.path.join(directory, SPILL_PATTERN)):
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                os.remove(path)
+                removed.append(path)
+        except OSError:
+            continue  # Mezitím smazal jiný proces
+    return removed
+
+
+class LogBuffer:
+    """Kruhový buffer řádků (severity, text) s odkládáním starých řádků do souboru."""
+
+    def __init__(self, capacity=10000, spill_path=None):
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self._items = [None] * capacity
+        self._head = 0
+        self.count = 0
+        self.total = 0     # kolik řádků kdy prošlo bufferem
+        self.spilled = 0   # kolik řádků je jen v souboru
+        self._spill_file = None
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, row):
+        return self._items[(self._head + row) % self.capacity]
+
+    def extend(self, lines):
+        """Přidá řádky, vrátí počet řádků vytlačených ze začátku bufferu."""
+        capacity = self.capacity
+        overflow = max(0, len(lines) - capacity)
+        evicted = max(0, self.count + len(lines) - overflow - capacity)
+        # Soubor drží pořadí: nejdřív starší řádky z bufferu, pak přebytek nové dávky
+        self.drop_front(evicted)
+        if overflow:
+            # Víc řádků než se vejde - přebytek rovnou do souboru
+            self.discard(lines[:overflow])
+            lines = lines[overflow:]
+        items = self._items
+        start = (self._head + self.count) % capacity
+        first_part = lines[:capacity - start]
+        items[start:start + len(first_part)] = first_part
+        if len(first_part) < len(lines):
+            rest = lines[len(first_part):]
+            items[:len(rest)] = rest
+        self.count += len(lines)
+        self.total += len(lines)
+        return evicted
+
+    def discard(self, lines):
+        """Řádky, které se do paměti nevejdou, zapíše rovnou do souboru."""
+        self._spill(lines)
+        self.total += len(lines)
+
+    def drop_front(self, n):
+        """Odloží n nejstarších řádků do souboru a uvolní jejich místo."""
+        if n <= 0:
+            return
+        items, head, capacity = self._items, self._head, self.capacity
+        end = head + n
+        if end <= capacity:
+            dropped = items[head:end]
+            items[head:end] = [None] * n
+        else:
+            dropped = items[head:] + items[:end - capacity]
+            items[head:] = [None] * (capacity - head)
+            items[:end - capacity] = [None] * (end - capacity)
+        self._spill(dropped)
+        self._head = end % capacity
+        self.count -= n
+
+    def clear(self):
+        self._items = [None] * self.capacity
+        self._head = 0
+        self.count = 0
+        self.total = 0
+        self.spilled = 0
+        # Odložené řádky patří k vymazanému logu
+        self.close(remove=True)
+
+    def _spill(self, entries):
+        if not self.spill_path:
+            return
+        if self._spill_file is None:
+            os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+            self._spill_file = open(self.spill_path, "a", encoding="utf-8")
+        self._spill_file.writelines(
+            f"{SEVERITY_NAMES[severity]}\t{text}\n" for severity, text in entries
+        )
+        self.spilled += len(entries)
+
+    def flush(self):
+        if self._spill_file is not None:
+            self._spill_file.flush()
+
+    def close(self, remove=False):
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        if remove and self.spill_path and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+
+class LogModel(QAbstractListModel):
+    def __init__(self, buffer, parent=None):
+        super().__init__(parent)
+        self.buffer = buffer
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.buffer)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        severity, text = self.buffer[index.row()]
+        if role == Qt.DisplayRole:
+            return text
+        if role == Qt.ForegroundRole:
+            return SEVERITY_COLORS.get(severity)
+        if role == Qt.UserRole:
+            return severity
+        return None
+
+    def append_batch(self, entries):
+        """Vloží dávku řádků: nejvýš jedno odebrání ze začátku a jedno vložení na konec."""
+        if not entries:
+            return
+        buffer = self.buffer
+        overflow = max(0, len(entries) - buffer.capacity)
+        evict = max(0, len(buffer) + len(entries) - overflow - buffer.capacity)
+        if evict:
+            self.beginRemoveRows(QModelIndex(), 0, evict - 1)
+            buffer.drop_front(evict)
+            self.endRemoveRows()
+        if overflow:
+            # Starší řádky už jsou v souboru, přebytek dávky jde za ně
+            buffer.discard(entries[:overflow])
+            entries = entries[overflow:]
+        first = len(buffer)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        buffer.extend(entries)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.buffer.clear()
+        self.endResetModel()
+
+
+class LogFilterProxy(QSortFilterProxyModel):
+    """Filtr podle minimální závažnosti a hledaného textu."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.min_severity = DEBUG
+        self.needle = ""
+
+    def is_active(self):
+        return self.min_severity > DEBUG or bool(self.needle)
+
+    def set_min_severity(self, severity):
+        self.min_severity = severity
+        self.invalidateRowsFilter()
+
+    def set_needle(self, needle):
+        self.needle = needle.lower()
+        self.invalidateRowsFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        severity, text = self.sourceModel().buffer[source_row]
+        if severity < self.min_severity:
+            return False
+        return not self.needle or self.needle in text.lower()
+
+
+class LogView(QWidget):
+    """Náhrada QTextEdit pro log: append() jen řadí do fronty, kreslí se dávkově."""
+
+    def __init__(self, parent=None, capacity=10000, flush_interval_ms=100, spill_path=None):
+        super().__init__(parent)
+        if spill_path is None:
+            spill_dir = os.path.join(user_cache_dir(), "logs")
+            prune_spill_files(spill_dir)
+            spill_path = os.path.join(spill_dir, time.strftime("session-%Y%m%d-%H%M%S") + f"-{os.getpid()}.log")
+        self.buffer = LogBuffer(capacity, spill_path)
+        self.model = LogModel(self.buffer, self)
+        self.proxy = LogFilterProxy(self)  # Napojí se na model jen při aktivním filtru
+        self._pending = []
+        self._flush_scheduled = False
+
+        # Tabulka s pevnou výškou řádků: posun na konec ani vkládání neprochází všechny řádky
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.horizontalHeader().hide()
+        self.view.horizontalHeader().setStretchLastSection(True)
+        self.view.verticalHeader().hide()
+        self.view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.view.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 2)
+        self.view.setShowGrid(False)
+        self.view.setWordWrap(False)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        self.severity_combo = QComboBox()
+        self.severity_combo.addItems(["All", "Info+", "Warnings+", "Errors"])
+        self.severity_combo.currentIndexChanged.connect(self.set_min_severity)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search log...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.set_search_text)
+        self.status_label = QLabel()
+
+        toolbar = QHBoxLayout()
+        toolbar.addWidget(self.severity_combo)
+        toolbar.addWidget(self.search_edit, 1)
+        toolbar.addWidget(self.status_label)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(toolbar)
+        layout.addWidget(self.view)
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(flush_interval_ms)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def append(self, message):
+        """Zařadí zprávu (i víceřádkovou) do fronty; view se obnoví při dalším flush."""
+        message = str(message)
+        if "\n" in message or "\r" in message:
+            self._pending.extend((classify(line), line) for line in message.splitlines())
+        else:
+            self._pending.append((classify(message), message))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._flush_timer.start()
+
+    def set_min_severity(self, severity):
+        self.proxy.set_min_severity(severity)
+        self._update_view_model()
+
+    def set_search_text(self, text):
+        self.proxy.set_needle(text)
+        self._update_view_model()
+
+    def _update_view_model(self):
+        # Bez filtru view čte přímo model - proxy by jen zdržovala každou dávku
+        if self.proxy.is_active():
+            if self.proxy.sourceModel() is not self.model:
+                self.proxy.setSourceModel(self.model)
+            model = self.proxy
+        else:
+            model = self.model
+            self.proxy.setSourceModel(None)
+        if self.view.model() is not model:
+            self.view.setModel(model)
+            self.view.scrollToBottom()
+
+    def flush(self):
+        """Propíše frontu do modelu jednou dávkou."""
+        self._flush_scheduled = False
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        scrollbar = self.view.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 2
+        self.model.append_batch(pending)
+        self.buffer.flush()
+        if at_bottom:
+            self.view.scrollToBottom()
+        self.status_label.setText(f"{self.buffer.total} lines ({self.buffer.spilled} on disk)")
+
+    def lines(self):
+        """Texty řádků, které jsou aktuálně v paměti (včetně nezpropsaných)."""
+        return [self.buffer[i][1] for i in range(len(self.buffer))] + [text for _, text in self._pending]
+
+    def clear(self):
+        self._pending = []
+        self.model.clear()
+        self.status_label.setText("")
+
+    def shutdown(self):
+        """Řádné ukončení: soubor s odloženými řádky už není potřeba."""
+        self._flush_timer.stop()
+        self._pending = []
+        self.buffer.close(remove=True)
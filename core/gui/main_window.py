@@ -1,28 +1,49 @@
 import sys
 import os
-import json
+import time
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget,
-    QListWidget, QTextEdit, QLabel, QMenuBar, QTableWidget,
+    QListWidget, QListView, QTextEdit, QLabel, QMenuBar, QTableWidget,
     QTableWidgetItem, QHeaderView, QPushButton,QScrollArea, QFrame,
     QDialog, QFormLayout, QLineEdit, QDialogButtonBox, QFileDialog,
-    QGroupBox
+    QGroupBox, QComboBox, QCheckBox, QTabWidget, QTreeView, QAbstractItemView, QInputDialog,
+    QMessageBox
 )
-from PySide6.QtCore import Qt,QPoint
+from PySide6.QtCore import Qt,QPoint, QFileSystemWatcher, QTimer
+from collections import OrderedDict
 from PySide6.QtWidgets import QMenu
 
+from module_registry import ModuleRegistry
+from pipeline_compiler import (
+    compile_pipeline, write_pipeline, read_pipeline, diff_pipelines, parse_memory,
+    process_name_for, compile_config, config_path_for, process_hashes, PipelineError,
+    image_cache_dir, compressed_intermediates, DEFAULT_PIPELINE_PATH, EXECUTOR_PROFILES, STAGE_IN_MODES,
+    STAGE_OUT_MODES, CONTAINER_ENGINES, IO_PROFILES, INTERMEDIATE_FORMATS, COMPRESSION_THREADS, COMPRESSION_LEVEL
+)
+from nextflow_launcher import NextflowLauncher
+from log_view import LogView
+from sample_sheet import SampleSheetError, validate_sample_sheet
+from background_job import BackgroundJob
+from work_cache import WorkCache, format_size
+from run_history import RunHistory
+from weblog import WeblogReceiver
+from progress_panel import ProgressPanel
+from run_queue_panel import RunQueuePanel
+from schedule_panel import SchedulePanel
+from image_cache import ImageCache, images_in_script
+from module_search import ModuleIndex, SEARCH_LIMIT
+from module_list_model import ModuleListModel, ModuleFilterModel
+from project_store import (
+    ProjectError, ProjectJournal, PROJECT_FILTER, load_project, save_project, check_versions, replay_journal,
+    has_changes, orphaned_journals, remove_journal
+)
+from settings_model import SettingsModel, SettingsFilterModel, SettingsDelegate, SCATTER_BY, SCATTER_SIZE, SCATTER_MODES, INPUT, VALUE
+from input_manifest import InputManifest, scan_directory, scan_root
+from preflight import check_workflow, check_script, errors, ERROR
+from workflow_graph import WorkflowGraph, WorkflowCycleError, link_by_file_type, link_declared_inputs
 
-def load_modules():
-    """Načte všechny JSON moduly ze složky modules/"""
-    module_info = {}
-    if not os.path.exists("modules"):
-        os.makedirs("modules")
-    for file in os.listdir("modules"):
-        if file.endswith(".json"):
-            with open(os.path.join("modules", file), "r", encoding="utf-8") as f:
-                data = json.load(f)
-                module_info[data["name"]] = data
-    return module_info
+
+MODULE_INFO_CACHE_SIZE = 200  # vykreslené detaily modulů (widgety parametrů)
 
 
 class ParameterDialog(QDialog):
@@ -83,70 +104,60 @@ class PipelineSettingsDialog(QDialog):
     def __init__(self, modules, module_info, workflow_params, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Pipeline Settings")
-        self.setMinimumSize(600, 400)
+        self.setMinimumSize(800, 550)
 
-        self.widgets = {}
         self.module_info = module_info
         self.workflow_params = workflow_params
 
         main_layout = QVBoxLayout(self)
-        form_layout = QFormLayout()
-
-        # --- Vstupy a parametry pro každý modul ---
-        for module_name in modules:
-            module_data = self.module_info.get(module_name, {})
-            
-            # Vstupy
-            inputs = module_data.get("input", [])
-            if inputs:
-                group_box = QGroupBox(f"Inputs for {module_name}")
-                group_layout = QFormLayout()
-                
-                for input_def in inputs:
-                    # Zpracování nového i starého formátu
-                    if isinstance(input_def, dict):
-                        input_id = input_def.get("id")
-                    else:
-                        input_id = input_def
-
-                    input_edit = QLineEdit()
-                    # Načtení uložené hodnoty, pokud existuje
-                    if module_name in self.workflow_params and input_id in self.workflow_params[module_name]:
-                        input_edit.setText(self.workflow_params[module_name][input_id])
-
-                    select_button = QPushButton("Select File")
-                    select_button.clicked.connect(lambda _, le=input_edit: self.select_file(le))
-                    
-                    row_layout = QHBoxLayout()
-                    row_layout.addWidget(input_edit)
-                    row_layout.addWidget(select_button)
-                    
-                    group_layout.addRow(f"{input_id}:", row_layout)
-                    self.widgets.setdefault(module_name, {})[input_id] = input_edit
-
-                group_box.setLayout(group_layout)
-                form_layout.addWidget(group_box)
-
-            # Parametry
-            params = module_data.get("params", [])
-            if params:
-                group_box = QGroupBox(f"Parameters for {module_name}")
-                group_layout = QFormLayout()
-
-                for param in params:
-                    param_id = param.get("id")
-                    param_edit = QLineEdit()
-                    # Načtení uložené hodnoty nebo defaultní
-                    default_value = param.get("default", "")
-                    current_value = self.workflow_params.get(module_name, {}).get(param_id, default_value)
-                    param_edit.setText(str(current_value))
-                    
-                    group_layout.addRow(f"{param_id}:", param_edit)
-                    self.widgets.setdefault(module_name, {})[param_id] = param_edit
-                
-                group_box.setLayout(group_layout)
-                form_layout.addWidget(group_box)
+        tabs = QTabWidget()
+
+        # --- Vstupy, parametry, scatter a maxForks modulů: model/view, editory jen pro editovanou buňku ---
+        self.settings_model = SettingsModel(modules, module_info, workflow_params, self)
+        self.settings_filter = SettingsFilterModel(self)
+        self.settings_filter.setSourceModel(self.settings_model)
+        self.settings_view = QTreeView()
+        self.settings_view.setModel(self.settings_filter)
+        self.settings_view.setItemDelegate(SettingsDelegate(self.settings_view))
+        self.settings_view.setUniformRowHeights(True)
+        self.settings_view.setAlternatingRowColors(True)
+        self.settings_view.setEditTriggers(
+            QAbstractItemView.DoubleClicked | QAbstractItemView.SelectedClicked | QAbstractItemView.EditKeyPressed)
+        self.settings_view.header().setSectionResizeMode(QHeaderView.Interactive)
+        self.settings_view.setColumnWidth(0, 220)
+        self.settings_view.setColumnWidth(1, 260)
+        if len(self.settings_model.roots) <= 20:
+            self.settings_view.expandAll()
+        # Vstupy zadané složkou nebo vzorem: počet a velikost souborů ze skenu složky na pozadí
+        self.manifests = {}       # složka -> InputManifest
+        self.scan_jobs = {}       # složka -> BackgroundJob
+        self.scan_callbacks = {}  # složka -> [callback(InputManifest nebo text chyby)]
+        self.sheet_job = None     # kontrola sample sheetu (existence FASTQ souborů) na pozadí
+        self.sheet_path = None    # naposledy kontrolovaný sample sheet
+        self.settings_model.dataChanged.connect(self.on_setting_changed)
+        for root in self.settings_model.roots:
+            for item in root.children:
+                if item.kind == INPUT and item.value:
+                    self.update_input_info(item)
+
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter by module or setting")
+        self.filter_edit.textChanged.connect(self.apply_filter)
+        set_all_button = QPushButton("Set for All Modules...")
+        set_all_button.setToolTip("Set the selected setting to one value in every shown module that has it")
+        set_all_button.clicked.connect(self.set_for_all_modules)
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(self.filter_edit)
+        filter_layout.addWidget(set_all_button)
+
+        modules_layout = QVBoxLayout()
+        modules_layout.addLayout(filter_layout)
+        modules_layout.addWidget(self.settings_view)
+        modules_tab = QWidget()
+        modules_tab.setLayout(modules_layout)
+        tabs.addTab(modules_tab, "Modules")
 
+        form_layout = QFormLayout()
 
         # --- Obecné nastavení ---
         general_group = QGroupBox("General Settings")
@@ -163,34 +174,326 @@ class PipelineSettingsDialog(QDialog):
         out_layout.addWidget(self.output_dir_edit)
         out_layout.addWidget(select_out_button)
         general_layout.addRow("Global Output Directory:", out_layout)
+
+        # Sample sheet (CSV/TSV) nebo vzor párů - jeden běh pro celou kohortu
+        self.sample_sheet_edit = QLineEdit(str(self.workflow_params.get("_general_sample_sheet", "")))
+        self.sample_sheet_edit.setPlaceholderText("samples.csv or data/*_R{1,2}.fastq.gz")
+        self.sample_sheet_edit.editingFinished.connect(self.check_sample_sheet)
+        select_sheet_button = QPushButton("Select Sheet")
+        select_sheet_button.clicked.connect(self.select_sample_sheet)
+        scan_button = QPushButton("Scan Directory")
+        scan_button.setToolTip("Pair R1/R2 reads in a directory and use them as samples")
+        scan_button.clicked.connect(self.scan_sample_directory)
+        sheet_layout = QHBoxLayout()
+        sheet_layout.addWidget(self.sample_sheet_edit)
+        sheet_layout.addWidget(select_sheet_button)
+        sheet_layout.addWidget(scan_button)
+        general_layout.addRow("Sample Sheet:", sheet_layout)
+        self.sample_sheet_label = QLabel()
+        self.sample_sheet_label.setWordWrap(True)
+        general_layout.addRow("", self.sample_sheet_label)
+        self.check_sample_sheet()
+
+        # Rozpočet zdrojů - žádný proces nedostane víc jader/paměti než tolik
+        self.max_cpus_edit = QLineEdit(str(self.workflow_params.get("_general_max_cpus", "")))
+        self.max_cpus_edit.setPlaceholderText("e.g. 16 (empty = no limit)")
+        general_layout.addRow("CPU budget:", self.max_cpus_edit)
+        self.max_memory_edit = QLineEdit(str(self.workflow_params.get("_general_max_memory", "")))
+        self.max_memory_edit.setPlaceholderText("e.g. 64 GB (empty = no limit)")
+        general_layout.addRow("Memory budget:", self.max_memory_edit)
+        self.work_cap_edit = QLineEdit(str(self.workflow_params.get("_general_work_cap", "")))
+        self.work_cap_edit.setPlaceholderText("e.g. 200 GB (empty = never clean work/)")
+        general_layout.addRow("Work directory cap:", self.work_cap_edit)
         
         general_group.setLayout(general_layout)
         form_layout.addWidget(general_group)
 
+        # --- Executor (nextflow.config): profil a omezení odesílání tasků ---
+        executor_group = QGroupBox("Executor")
+        executor_layout = QFormLayout()
+        self.executor_combo = QComboBox()
+        for profile in EXECUTOR_PROFILES:
+            self.executor_combo.addItem(profile, profile)
+        self.executor_combo.setCurrentIndex(
+            max(0, self.executor_combo.findData(self.workflow_params.get("_general_executor", "local"))))
+        executor_layout.addRow("Default profile:", self.executor_combo)
+        self.executor_edits = {}
+        for key, label, placeholder in (
+            ("_general_queue", "Queue / partition:", "SLURM/PBS only, e.g. short"),
+            ("_general_queue_size", "Queue size:", "max. tasks queued at once, e.g. 100"),
+            ("_general_submit_rate", "Submit rate limit:", "e.g. 10/1min"),
+            ("_general_poll_interval", "Poll interval:", "e.g. 30 sec"),
+            ("_general_scratch", "Scratch:", "true, a node-local path like /tmp, or empty"),
+        ):
+            edit = QLineEdit(str(self.workflow_params.get(key, "")))
+            edit.setPlaceholderText(placeholder)
+            executor_layout.addRow(label, edit)
+            self.executor_edits[key] = edit
+        self.stage_in_combo = QComboBox()
+        self.stage_in_combo.addItem("Default", "")
+        for mode in STAGE_IN_MODES:
+            self.stage_in_combo.addItem(mode, mode)
+        self.stage_in_combo.setCurrentIndex(
+            max(0, self.stage_in_combo.findData(self.workflow_params.get("_general_stage_in_mode", ""))))
+        executor_layout.addRow("Stage-in mode:", self.stage_in_combo)
+        self.stage_out_combo = QComboBox()
+        self.stage_out_combo.addItem("Default", "")
+        for mode in STAGE_OUT_MODES:
+            self.stage_out_combo.addItem(mode, mode)
+        self.stage_out_combo.setCurrentIndex(
+            max(0, self.stage_out_combo.findData(self.workflow_params.get("_general_stage_out_mode", ""))))
+        executor_layout.addRow("Stage-out mode:", self.stage_out_combo)
+        executor_group.setLayout(executor_layout)
+        form_layout.addWidget(executor_group)
+
+        # --- I/O profil: komprimované mezivýsledky, publishDir jen pro koncové výstupy ---
+        io_group = QGroupBox("I/O Profile")
+        io_layout = QFormLayout()
+        self.io_profile_combo = QComboBox()
+        self.io_profile_combo.addItem("Off", "")
+        for profile, label in zip(IO_PROFILES, ("Compressed intermediates",
+                                                "Compressed intermediates + node-local scratch")):
+            self.io_profile_combo.addItem(label, profile)
+        self.io_profile_combo.setCurrentIndex(
+            max(0, self.io_profile_combo.findData(self.workflow_params.get("_general_io_profile", ""))))
+        self.io_profile_combo.setToolTip(
+            "SAM intermediates are written as BAM/CRAM where the next module reads them, only final "
+            "outputs are published to the output directory. Node-local scratch also fills in empty "
+            "Scratch / Stage-in / Stage-out settings.")
+        io_layout.addRow("Profile:", self.io_profile_combo)
+        self.intermediate_format_combo = QComboBox()
+        for fmt in INTERMEDIATE_FORMATS:
+            self.intermediate_format_combo.addItem(fmt.upper(), fmt)
+        self.intermediate_format_combo.setCurrentIndex(
+            max(0, self.intermediate_format_combo.findData(
+                self.workflow_params.get("_general_intermediate_format", ""))))
+        io_layout.addRow("Intermediate format:", self.intermediate_format_combo)
+        self.io_edits = {}
+        for key, label, placeholder in (
+            ("_general_reference", "Reference for CRAM:", "reference FASTA, needed only for CRAM"),
+            ("_general_compression_threads", "Compression threads:", f"default {COMPRESSION_THREADS}"),
+            ("_general_compression_level", "Compression level:", f"0-9, default {COMPRESSION_LEVEL}"),
+        ):
+            edit = QLineEdit(str(self.workflow_params.get(key, "")))
+            edit.setPlaceholderText(placeholder)
+            io_layout.addRow(label, edit)
+            self.io_edits[key] = edit
+        io_group.setLayout(io_layout)
+        form_layout.addWidget(io_group)
+
+        # --- Kontejnery: image se před během stáhnou do lokální cache ---
+        containers_group = QGroupBox("Containers")
+        containers_layout = QFormLayout()
+        self.engine_combo = QComboBox()
+        self.engine_combo.addItem("None", "")
+        for engine in CONTAINER_ENGINES:
+            self.engine_combo.addItem(engine, engine)
+        self.engine_combo.setCurrentIndex(
+            max(0, self.engine_combo.findData(self.workflow_params.get("_general_container_engine", ""))))
+        containers_layout.addRow("Engine:", self.engine_combo)
+        self.image_cache_edit = QLineEdit(str(self.workflow_params.get("_general_image_cache", "")))
+        self.image_cache_edit.setPlaceholderText(image_cache_dir({}))
+        containers_layout.addRow("Singularity image cache:", self.image_cache_edit)
+        self.image_cap_edit = QLineEdit(str(self.workflow_params.get("_general_image_cap", "")))
+        self.image_cap_edit.setPlaceholderText("e.g. 100 GB (empty = keep all images)")
+        containers_layout.addRow("Image cache cap:", self.image_cap_edit)
+        containers_group.setLayout(containers_layout)
+        form_layout.addWidget(containers_group)
+
         # --- Tlačítka OK/Cancel ---
         button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         button_box.accepted.connect(self.accept)
         button_box.rejected.connect(self.reject)
 
-        main_layout.addLayout(form_layout)
-        main_layout.addWidget(button_box)
+        general_tab = QWidget()
+        general_tab.setLayout(form_layout)
+        general_scroll = QScrollArea()
+        general_scroll.setWidgetResizable(True)
+        general_scroll.setWidget(general_tab)
+        tabs.addTab(general_scroll, "General")
 
-    def select_file(self, line_edit):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select Input File")
-        if file_path:
-            line_edit.setText(file_path)
+        main_layout.addWidget(tabs)
+        main_layout.addWidget(button_box)
 
     def select_output_dir(self):
         dir_path = QFileDialog.getExistingDirectory(self, "Select Output Directory")
         if dir_path:
             self.output_dir_edit.setText(dir_path)
 
+    def select_sample_sheet(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Select Sample Sheet", "", "Sample sheets (*.csv *.tsv *.txt);;All files (*)"
+        )
+        if file_path:
+            self.sample_sheet_edit.setText(file_path)
+            self.check_sample_sheet(force=True)
+
+    def check_sample_sheet(self, force=False):
+        """Ověří sample sheet po řádcích na pozadí a ukáže jen souhrn (vzorky se nenačítají do widgetů)."""
+        path = self.sample_sheet_edit.text().strip()
+        if path == self.sheet_path and not force:
+            return  # editingFinished přijde i bez změny (ztráta fokusu)
+        self.sheet_path = path
+        if not path or any(ch in path for ch in "*?[{"):
+            self.sample_sheet_label.setText("")
+            return
+
+        def job():
+            try:
+                return path, validate_sample_sheet(path)
+            except SampleSheetError as e:
+                return path, str(e)
+
+        self.sample_sheet_label.setText("Checking sample sheet...")
+        # Bez rodiče - dialog se může zavřít dřív, než kontrola doběhne
+        self.sheet_job = BackgroundJob(job)
+        self.sheet_job.done.connect(self.show_sample_sheet)
+        self.sheet_job.failed.connect(self.sample_sheet_label.setText)
+        self.sheet_job.start()
+
+    def show_sample_sheet(self, result):
+        path, summary = result
+        if path != self.sample_sheet_edit.text().strip():
+            return  # pole se mezitím změnilo
+        if isinstance(summary, str):
+            self.sample_sheet_label.setText(summary)
+            return
+        text = summary.describe()
+        if summary.errors:
+            text += "\n" + "\n".join(summary.errors[:5])
+        self.sample_sheet_label.setText(text)
+
+    def scan_input_directory(self, root, callback):
+        """Manifest složky ze skenu na pozadí; callback(InputManifest nebo text chyby) v GUI vlákně."""
+        manifest = self.manifests.get(root)
+        if manifest is not None:
+            callback(manifest)
+            return
+        self.scan_callbacks.setdefault(root, []).append(callback)
+        if root in self.scan_jobs:
+            return
+
+        def job():
+            manifest = scan_directory(root)
+            manifest.read_pairs()  # párování 10k+ souborů ať neběží v GUI vlákně
+            return manifest
+
+        # Bez rodiče - dialog se může zavřít dřív, než sken doběhne
+        self.scan_jobs[root] = BackgroundJob(job)
+        self.scan_jobs[root].done.connect(self.on_scan_done)
+        self.scan_jobs[root].failed.connect(self.on_scan_failed)
+        self.scan_jobs[root].start()
+
+    def on_scan_done(self, manifest):
+        self.manifests[manifest.root] = manifest
+        self.finish_scan(manifest.root, manifest)
+
+    def on_scan_failed(self, error):
+        for root, job in list(self.scan_jobs.items()):
+            if job is self.sender():
+                self.finish_scan(root, error)
+
+    def finish_scan(self, root, result):
+        self.scan_jobs.pop(root, None)
+        for callback in self.scan_callbacks.pop(root, []):
+            callback(result)
+
+    def on_setting_changed(self, top_left, bottom_right, roles=()):
+        if top_left.column() != VALUE:
+            return
+        item = self.settings_model.row_of(top_left)
+        if item is not None and item.kind == INPUT:
+            self.update_input_info(item)
+
+    def update_input_info(self, item):
+        """Info u vstupu se vzorem nebo složkou: kolik souborů odpovídá a jak jsou velké."""
+        value = item.value.strip()
+        target = scan_root(value) if any(ch in value for ch in "*?[{") or item.key.endswith("/") else None
+        if target is None:
+            self.settings_model.set_info(item, "input file")
+            return
+        root, pattern = target
+        self.settings_model.set_info(item, "scanning directory...")
+
+        def show(result):
+            if item.value.strip() != value:
+                return  # hodnota se mezitím změnila
+            if isinstance(result, InputManifest):
+                self.settings_model.set_info(item, result.describe(pattern))
+            else:
+                self.settings_model.set_info(item, f"cannot scan {root}: {result}")
+
+        self.scan_input_directory(root, show)
+
+    def scan_sample_directory(self):
+        directory = QFileDialog.getExistingDirectory(self, "Select Reads Directory")
+        if not directory:
+            return
+        self.sample_sheet_label.setText(f"Scanning {directory}...")
+        self.scan_input_directory(os.path.abspath(directory), self.show_sample_directory)
+
+    def show_sample_directory(self, result):
+        if not isinstance(result, InputManifest):
+            self.sample_sheet_label.setText(f"Cannot scan directory: {result}")
+            return
+        _, unpaired, pattern = result.read_pairs()
+        text = result.describe()
+        if pattern:
+            # Páry čte Nextflow přes Channel.fromFilePairs (vzor v poli Sample Sheet)
+            self.sample_sheet_edit.setText(pattern)
+            if unpaired:
+                text += f"\n{len(unpaired):,} FASTQ files without a mate do not match {os.path.basename(pattern)}."
+        else:
+            text += "\nNo R1/R2 read pairs found, select a sample sheet instead."
+        self.sample_sheet_label.setText(text)
+
+    def apply_filter(self, text):
+        self.settings_filter.set_filter_text(text)
+        # Reset filtru strom sbalí: shody v nastaveních se rozbalí vždy, celé moduly jen když jich je málo
+        if self.settings_filter.matches_settings() or self.settings_filter.rowCount() <= 20:
+            self.settings_view.expandAll()
+
+    def set_for_all_modules(self):
+        """Hromadná změna: vybrané nastavení dostane stejnou hodnotu ve všech zobrazených modulech."""
+        index = self.settings_view.currentIndex()
+        item = self.settings_model.row_of(self.settings_filter.mapToSource(index)) if index.isValid() else None
+        if item is None or not item.kind:
+            QMessageBox.information(self, "Set for All Modules", "Select a setting row first.")
+            return
+        if item.kind == SCATTER_BY:
+            labels = [label for label, _ in SCATTER_MODES]
+            label, ok = QInputDialog.getItem(self, "Set for All Modules", f"{item.key}:", labels,
+                                             labels.index(item.display_value()) if item.display_value() in labels else 0, False)
+            value = dict(SCATTER_MODES).get(label, "")
+        else:
+            value, ok = QInputDialog.getText(self, "Set for All Modules", f"{item.key}:", text=item.value)
+        if not ok:
+            return
+        # Jen moduly, které zrovna prošly filtrem
+        shown = {self.settings_filter.index(row, 0).data() for row in range(self.settings_filter.rowCount())}
+        changed = self.settings_model.set_for_all(item.key, item.kind, value, shown)
+        self.setWindowTitle(f"Pipeline Settings - {item.key} set in {changed} modules")
+
     def get_all_values(self):
-        result = {}
-        for module_name, widgets in self.widgets.items():
-            result[module_name] = {pname: edit.text() for pname, edit in widgets.items()}
+        result = self.settings_model.values()
         # Přidejte společný výstupní adresář
         result["_general_output_dir"] = self.output_dir_edit.text()
+        result["_general_sample_sheet"] = self.sample_sheet_edit.text().strip()
+        result["_general_max_cpus"] = self.max_cpus_edit.text().strip()
+        result["_general_max_memory"] = self.max_memory_edit.text().strip()
+        result["_general_work_cap"] = self.work_cap_edit.text().strip()
+        result["_general_executor"] = self.executor_combo.currentData()
+        for key, edit in self.executor_edits.items():
+            result[key] = edit.text().strip()
+        result["_general_stage_in_mode"] = self.stage_in_combo.currentData()
+        result["_general_stage_out_mode"] = self.stage_out_combo.currentData()
+        result["_general_io_profile"] = self.io_profile_combo.currentData()
+        result["_general_intermediate_format"] = self.intermediate_format_combo.currentData()
+        for key, edit in self.io_edits.items():
+            result[key] = edit.text().strip()
+        result["_general_container_engine"] = self.engine_combo.currentData()
+        result["_general_image_cache"] = self.image_cache_edit.text().strip()
+        result["_general_image_cap"] = self.image_cap_edit.text().strip()
         return result
 
 
@@ -201,8 +504,12 @@ class MainWindow(QMainWindow):
         self.resize(1200, 700)
 
         # ---- Načíst moduly ----
-        self.module_info = load_modules()
+        self.module_registry = ModuleRegistry()
+        self.module_info = self.module_registry.load()
         self.workflow_params = {}  # inicializace zde
+        self.workflow_graph = WorkflowGraph()  # moduly ve workflow a vazby mezi nimi
+        self.project_path = None  # uložený soubor projektu
+        self.journal = ProjectJournal()  # deník neuložených změn pro obnovu po pádu
 
         # ---- Horní menu ----
         menubar = QMenuBar(self)
@@ -210,22 +517,60 @@ class MainWindow(QMainWindow):
         file_menu.addAction("New", self.new_project)
         file_menu.addAction("Open", self.open_project)
         file_menu.addAction("Save", self.save_project)
+        file_menu.addAction("Save As...", self.save_project_as)
         file_menu.addSeparator()
         file_menu.addAction("Exit", self.close)
 
+        tools_menu = menubar.addMenu("Tools")
+        tools_menu.addAction("Work Directory Usage", self.show_work_usage)
+        tools_menu.addAction("Clean Work Directory", self.clean_work_dir)
+        tools_menu.addAction("Prefetch Container Images", lambda: self.start_prefetch_job(run_after=False))
+        tools_menu.addSeparator()
+        tools_menu.addAction("Run Queue", self.show_run_queue)
+        tools_menu.addAction("Simulate Schedule", self.show_schedule_simulation)
+
         help_menu = menubar.addMenu("Help")
         help_menu.addAction("About", self.show_about)
 
         self.setMenuBar(menubar)
 
-        # ---- Levý panel: seznam modulů ----
-        self.module_list = QListWidget()
-        self.module_list.addItems(self.module_info.keys())
-        self.module_list.itemClicked.connect(self.show_module_info)
-        self.module_list.itemDoubleClicked.connect(self.add_module_to_workflow)
+        # ---- Levý panel: seznam modulů s hledáním ----
+        self.module_index = ModuleIndex(self.module_info)
+        self.module_list_model = ModuleListModel(self.module_info.keys(), self)
+        self.module_filter = ModuleFilterModel(self)
+        self.module_filter.setSourceModel(self.module_list_model)
+        self.module_search = QLineEdit()
+        self.module_search.setPlaceholderText("Search modules (name, description, files, container)")
+        self.module_search.setClearButtonEnabled(True)
+        self.module_search.textChanged.connect(self.filter_modules)
+        self.module_list = QListView()
+        self.module_list.setModel(self.module_filter)
+        self.module_list.setUniformItemSizes(True)
+        self.module_list.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.module_list.selectionModel().currentChanged.connect(
+            lambda index: self.show_module_info(index.data()) if index.isValid() else None)
+        self.module_list.doubleClicked.connect(lambda index: self.add_module_to_workflow(index.data()))
+        self.module_info_cache = OrderedDict()  # {modul: (popis, widget parametrů)}, LRU
+
+        # Sledování změn v modules/ - přenačtou se jen změněné soubory
+        self.module_watcher = QFileSystemWatcher(self)
+        self.module_watcher.addPath(self.module_registry.modules_dir)
+        if self.module_info:
+            self.module_watcher.addPaths([spec.path for spec in self.module_info.values()])
+        if self.module_registry.errors:
+            # I chybné soubory - oprava je má vrátit do katalogu
+            self.module_watcher.addPaths(list(self.module_registry.errors))
+        self.module_watcher.directoryChanged.connect(self.schedule_module_reload)
+        self.module_watcher.fileChanged.connect(self.schedule_module_reload)
+        self._pending_module_paths = set()
+        self._module_reload_timer = QTimer(self)
+        self._module_reload_timer.setSingleShot(True)
+        self._module_reload_timer.setInterval(200)
+        self._module_reload_timer.timeout.connect(self.reload_changed_modules)
 
         left_layout = QVBoxLayout()
         left_layout.addWidget(QLabel("Available Modules"))
+        left_layout.addWidget(self.module_search)
         left_layout.addWidget(self.module_list)
         left_panel = QWidget()
         left_panel.setLayout(left_layout)
@@ -254,19 +599,39 @@ class MainWindow(QMainWindow):
         right_panel = QWidget()
         right_panel.setLayout(right_layout)
 
+        # ---- Průběh běžící pipeline (vedle workflow) ----
+        self.progress_panel = ProgressPanel(self)
+        self.weblog = WeblogReceiver()  # spustí se s prvním během
+
+        # ---- Fronta více běhů (samostatné okno z menu Tools) ----
+        self.run_queue_panel = RunQueuePanel()
+        self.run_queue_panel.log.connect(self.log)
+        self.run_queue_dialog = QDialog(self)
+        self.run_queue_dialog.setWindowTitle("Run Queue")
+        self.run_queue_dialog.resize(800, 450)
+        queue_layout = QVBoxLayout(self.run_queue_dialog)
+        queue_layout.addWidget(self.run_queue_panel)
+
+        # ---- Simulace rozvrhu před spuštěním (okno z menu Tools) ----
+        self.schedule_panel = SchedulePanel(
+            lambda: (self.workflow_graph, dict(self.module_info), self.workflow_params))
+        self.schedule_panel.log.connect(self.log)
+        self.schedule_panel.cost_model_changed.connect(self.set_cost_model)
+        self.schedule_panel.apply_chunks.connect(self.apply_chunk_sizes)
+        self.schedule_dialog = QDialog(self)
+        self.schedule_dialog.setWindowTitle("Schedule Simulation")
+        self.schedule_dialog.resize(900, 550)
+        QVBoxLayout(self.schedule_dialog).addWidget(self.schedule_panel)
+
         # ---- Pravý spodní panel: module info ----
         self.info_description = QTextEdit()
         self.info_description.setReadOnly(True)
 
-        # Kontejner pro parametry
-        self.param_container = QWidget()
-        self.param_layout = QVBoxLayout()
-        self.param_container.setLayout(self.param_layout)
-
-        # Scrollovací oblast (aby se daly parametry posouvat)
+        # Scrollovací oblast (aby se daly parametry posouvat); obsah je widget z module_info_cache
+        self.empty_params = QWidget()
         self.param_scroll = QScrollArea()
         self.param_scroll.setWidgetResizable(True)
-        self.param_scroll.setWidget(self.param_container)
+        self.param_scroll.setWidget(self.empty_params)
 
         info_layout = QVBoxLayout()
         info_layout.addWidget(QLabel("Module Info"))
@@ -278,13 +643,25 @@ class MainWindow(QMainWindow):
         info_panel.setLayout(info_layout)
 
         # ---- Log panel (dole) ----
-        self.log_area = QTextEdit()
-        self.log_area.setReadOnly(True)
+        self.log_area = LogView(self)
+
+        # ---- Spouštění Nextflow (neblokující) ----
+        self.launcher = NextflowLauncher(self)
+        self.launcher.output.connect(self.log)
+        self.launcher.error_output.connect(lambda line: self.log(f"[stderr] {line}"))
+        self.launcher.state_changed.connect(self.on_pipeline_state_changed)
+        self.launcher.finished.connect(self.on_pipeline_finished)
+        self.work_cache_job = None  # Indexace/úklid work/ ve vlákně
+        self.prefetch_job = None  # Stahování container image před během
+        self.module_stats = {}  # {proces: ModuleStats} z historie běhů
+        self.history_job = None
+        self.start_history_job()
 
         # ---- Hlavní rozložení ----
         main_split = QHBoxLayout()
         main_split.addWidget(left_panel, 2)
         main_split.addWidget(right_panel, 3)
+        main_split.addWidget(self.progress_panel, 3)
         main_split.addWidget(info_panel, 4)
 
         top_panel = QWidget()
@@ -307,7 +684,17 @@ class MainWindow(QMainWindow):
         self.btn_end.setStyleSheet("background-color: #F44336; color: white; font-weight: bold;")
         self.btn_end.clicked.connect(self.end_pipeline)
 
+        # -resume: Nextflow přeskočí tasky, jejichž skript a vstupy se nezměnily
+        self.resume_checkbox = QCheckBox("Resume")
+        self.resume_checkbox.setChecked(True)
+        self.resume_checkbox.setToolTip("Run with -resume and reuse cached results of unchanged processes")
+
         pipeline_btn_layout.addWidget(self.btn_run)
+        pipeline_btn_layout.addWidget(self.resume_checkbox)
+        self.btn_queue = QPushButton("Add to Queue")
+        self.btn_queue.setToolTip("Run the compiled pipeline from the run queue under the shared CPU/memory budget")
+        self.btn_queue.clicked.connect(self.queue_pipeline)
+        pipeline_btn_layout.addWidget(self.btn_queue)
         pipeline_btn_layout.addWidget(self.btn_pause)
         pipeline_btn_layout.addWidget(self.btn_end)
         main_layout.addLayout(pipeline_btn_layout)
@@ -319,96 +706,274 @@ class MainWindow(QMainWindow):
         container.setLayout(main_layout)
         self.setCentralWidget(container)
 
+        for path, error in sorted(self.module_registry.errors.items()):
+            self.log(f"Cannot load module {path}: {error}")
+
+        # Obnova po pádu až po zobrazení okna (dotaz je modální)
+        QTimer.singleShot(0, self.recover_autosave)
+
     # ---------- Funkce ----------
 
     def show_workflow_context_menu(self, pos: QPoint):
         item = self.workflow_area.itemAt(pos)
         if item:
+            target = item.text()
             menu = QMenu()
             remove_action = menu.addAction("Delete Module")
+
+            # Napojení vstupu na výstup jiného modulu (hrana DAG)
+            connect_menu = menu.addMenu("Connect input from")
+            target_inputs = self.module_info[target].input_ids if target in self.module_info else []
+            edge_actions = {}
+            for source in self.workflow_graph.nodes:
+                if source == target or source not in self.module_info:
+                    continue
+                source_menu = connect_menu.addMenu(source)
+                for path, emit_name in self.module_info[source].outputs:
+                    output = emit_name or path
+                    for input_id in (target_inputs if len(target_inputs) > 1 else [None]):
+                        label = f"{output} -> {input_id}" if input_id else output
+                        edge_actions[source_menu.addAction(label)] = (source, output, input_id)
+            connect_menu.setEnabled(bool(edge_actions))
+
+            disconnect_menu = menu.addMenu("Disconnect input from")
+            disconnect_actions = {}
+            for edge in self.workflow_graph.upstream(target):
+                disconnect_actions[disconnect_menu.addAction(edge.source)] = edge.source
+            disconnect_menu.setEnabled(bool(disconnect_actions))
+
+            # Roura místo mezisouboru - jen mezi moduly, které deklarují stdout/stdin
+            pipe_menu = menu.addMenu("Pipe input from")
+            pipe_actions = {}
+            target_spec = self.module_info.get(target)
+            for edge in self.workflow_graph.upstream(target):
+                source_spec = self.module_info.get(edge.source)
+                if not (source_spec and target_spec and source_spec.streaming.get("stdout")
+                        and target_spec.streaming.get("stdin")):
+                    continue
+                pipe_action = pipe_menu.addAction(edge.source)
+                pipe_action.setCheckable(True)
+                pipe_action.setChecked(edge.fuse)
+                pipe_actions[pipe_action] = edge.source
+            pipe_menu.setEnabled(bool(pipe_actions))
+
             action = menu.exec(self.workflow_area.mapToGlobal(pos))
             if action == remove_action:
-                row = self.workflow_area.row(item)
-                self.workflow_area.takeItem(row)
-                self.log(f"Module {item.text()} was removed from workflow")
+                self.remove_module_from_workflow(item)
+            elif action in edge_actions:
+                source, output, input_id = edge_actions[action]
+                try:
+                    self.workflow_graph.add_edge(source, target, output, input_id)
+                except WorkflowCycleError as e:
+                    self.log(str(e))
+                    return
+                self.log(f"Module {target} now reads {output} from {source}.")
+                self.update_workflow_tooltips()
+                self.project_changed()
+            elif action in disconnect_actions:
+                self.workflow_graph.remove_edge(disconnect_actions[action], target)
+                self.log(f"Module {target} no longer reads from {disconnect_actions[action]}.")
+                self.update_workflow_tooltips()
+                self.project_changed()
+            elif action in pipe_actions:
+                self.set_pipe(pipe_actions[action], target, action.isChecked())
+
+    def set_pipe(self, source, target, enabled):
+        """Zapne/vypne spojení dvou modulů do jednoho procesu přes rouru."""
+        if enabled:
+            containers = {self.module_info[source].container, self.module_info[target].container} - {""}
+            params = self.workflow_params.setdefault(source, {})
+            if len(containers) > 1 and not params.get("_fused_container"):
+                from PySide6.QtWidgets import QInputDialog
+                image, ok = QInputDialog.getText(
+                    self, "Combined container",
+                    f"{source} and {target} use different containers.\n"
+                    "Container image with both tools:"
+                )
+                if not ok or not image.strip():
+                    return
+                params["_fused_container"] = image.strip()
+        self.workflow_graph.set_fuse(source, target, enabled)
+        if enabled:
+            self.log(f"Output of {source} is piped into {target} (one process, no intermediate file).")
+        else:
+            self.log(f"{target} reads the output of {source} from a file again.")
+        self.update_workflow_tooltips()
+        self.project_changed()
 
     def workflow_key_press_event(self, event):
         if event.key() == Qt.Key_Delete:
             selected_items = self.workflow_area.selectedItems()
             for item in selected_items:
-                row = self.workflow_area.row(item)
-                self.workflow_area.takeItem(row)
-                self.log(f"Module {item.text()} was removed from workflow")
+                self.remove_module_from_workflow(item)
         else:
             QListWidget.keyPressEvent(self.workflow_area, event)
 
+    def remove_module_from_workflow(self, item):
+        row = self.workflow_area.row(item)
+        self.workflow_area.takeItem(row)
+        self.workflow_graph.remove_node(item.text())
+        self.update_workflow_tooltips()
+        self.project_changed()
+        self.log(f"Module {item.text()} was removed from workflow")
 
-    def show_module_info(self, item):
-        """Zobrazí detail vybraného modulu"""
-        name = item.text()
-        data = self.module_info.get(name)
+    def update_workflow_tooltips(self):
+        """Tooltip položky workflow ukazuje, ze kterých modulů čte vstupy"""
+        for i in range(self.workflow_area.count()):
+            item = self.workflow_area.item(i)
+            sources = [f"{e.source} (pipe)" if e.fuse else e.source
+                       for e in self.workflow_graph.upstream(item.text())]
+            item.setToolTip("Inputs from: " + ", ".join(sources) if sources else "")
 
-        if not data:
+
+    def show_module_info(self, name):
+        """Zobrazí detail vybraného modulu (vykreslí se jednou, pak se bere z cache)"""
+        spec = self.module_info.get(name)
+
+        if not spec:
             self.info_description.setPlainText("There are no informations about this module.")
-            # Vyčištění parametrů
-            for i in reversed(range(self.param_layout.count())):
-                widget = self.param_layout.itemAt(i).widget()
-                if widget:
-                    widget.deleteLater()
+            self.set_param_widget(self.empty_params)
             return
 
-        # Zpracování vstupů a výstupů pro zobrazení
-        input_list = data.get("input", [])
-        inputs = ", ".join([d.get("id") if isinstance(d, dict) else str(d) for d in input_list])
+        cached = self.module_info_cache.pop(name, None)
+        if cached is None:
+            cached = (self.render_module_description(spec), self.render_module_params(spec))
+            if len(self.module_info_cache) >= MODULE_INFO_CACHE_SIZE:
+                _, (_, old_widget) = self.module_info_cache.popitem(last=False)
+                old_widget.deleteLater()
+        self.module_info_cache[name] = cached  # naposledy použitý na konec
+        desc, params_widget = cached
+
+        # Statistiky z historie se mění po každém běhu - do cache nepatří
+        stats = self.module_stats.get(process_name_for(name))
+        if stats:
+            desc += f"\nPast runs: {stats.describe()}"
+        self.info_description.setPlainText(desc)
+        self.set_param_widget(params_widget)
 
-        output_list = data.get("output", [])
-        outputs = ", ".join([d.get("path") if isinstance(d, dict) else str(d) for d in output_list])
+    def render_module_description(self, spec):
+        # Zpracování vstupů a výstupů pro zobrazení
+        inputs = ", ".join(str(input_id) for input_id in spec.input_ids)
+        outputs = ", ".join(str(path) for path, _ in spec.outputs)
 
         # Popis + URL + Input/Output
         desc = (
-            f"{data.get('name', 'N/A')}\n\n"
-            f"{data.get('description', '')}\n\n"
+            f"{spec.name}\n\n"
+            f"{spec.description}\n\n"
             f"Input: {inputs}\n"
             f"Output: {outputs}"
         )
-        self.info_description.setPlainText(desc)
-
-        # Parametry
-        # Vyčistit staré parametry
-        for i in reversed(range(self.param_layout.count())):
-            widget = self.param_layout.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-
-        # Přidat nové parametry
-        params = data.get("params", []) # Očekáváme seznam slovníků
+        if spec.resources:
+            resources = ", ".join(f"{key}: {value}" for key, value in spec.resources.items())
+            if spec.threads_param:
+                resources += f" ({spec.threads_param} = task.cpus{' - 1' if spec.extra_threads else ''})"
+            desc += f"\nResources: {resources}"
+        return desc
+
+    def render_module_params(self, spec):
+        """Widget se seznamem parametrů modulu"""
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        params = spec.params
         if params:
-            for param_info in params:
-                param_id = param_info.get("id", "N/A")
-                param_type = param_info.get("type", "str")
-                param_default = param_info.get("default", "None")
-
+            for param_id, param_type, param_default, _ in params:
                 # Detail parametru (název, typ, default)
                 detail_text = f"{param_id} (type: {param_type}, default: {param_default})"
                 detail_label = QLabel(detail_text)
                 detail_label.setStyleSheet("font-weight: bold; margin-top: 10px;")
-                self.param_layout.addWidget(detail_label)
+                layout.addWidget(detail_label)
 
                 # Oddělovací čára
                 line = QFrame()
                 line.setFrameShape(QFrame.HLine)
                 line.setFrameShadow(QFrame.Sunken)
-                self.param_layout.addWidget(line)
+                layout.addWidget(line)
+        else:
+            layout.addWidget(QLabel("No parameters."))
+        return container
+
+    def set_param_widget(self, widget):
+        if self.param_scroll.widget() is not widget:
+            self.param_scroll.takeWidget()  # widget zůstává v cache, jen se skryje
+            self.param_scroll.setWidget(widget)
+
+    def invalidate_module_info(self, names):
+        for name in names:
+            cached = self.module_info_cache.pop(name, None)
+            if cached is None:
+                continue
+            if self.param_scroll.widget() is cached[1]:
+                self.set_param_widget(self.empty_params)
+            cached[1].deleteLater()
+
+    def current_module(self):
+        index = self.module_list.currentIndex()
+        return index.data() if index.isValid() else None
+
+    def filter_modules(self, text):
+        """Filtr seznamu podle indexu (prefixy, překlepy), výsledky podle relevance"""
+        self.module_filter.set_results(self.module_index.search(text, SEARCH_LIMIT))
+
+    def schedule_module_reload(self, path):
+        """Změny z watcheru se sbírají a zpracují najednou (editory ukládají po částech)"""
+        if path != self.module_registry.modules_dir:
+            self._pending_module_paths.add(path)
         else:
-            self.param_layout.addWidget(QLabel("No parameters."))
+            self._pending_module_paths.add(None)
+        self._module_reload_timer.start()
+
+    def reload_changed_modules(self):
+        """Přenačte jen změněné JSON moduly a aktualizuje seznam modulů"""
+        pending, self._pending_module_paths = self._pending_module_paths, set()
+        errors = dict(self.module_registry.errors)
+        if None in pending:
+            changed, removed = self.module_registry.refresh()
+        else:
+            changed, removed = self.module_registry.refresh(pending)
+        for path, error in sorted(self.module_registry.errors.items()):
+            if errors.get(path) != error:
+                self.log(f"Cannot load module {path}: {error}")
+
+        # Některé editory soubor nahradí novým - watcher ho pak přestane sledovat
+        watched = set(self.module_watcher.files())
+        missing = [spec.path for spec in self.module_info.values() if spec.path not in watched]
+        missing += [path for path in self.module_registry.errors if path not in watched]
+        if missing:
+            self.module_watcher.addPaths(missing)
+
+        self.invalidate_module_info(changed | removed)
+        for name in removed:
+            self.module_index.remove(name)
+            self.module_list_model.remove_module(name)
+            self.log(f"Module {name} was removed from catalog.")
+        for name in sorted(changed):
+            if name in self.module_info:
+                self.module_index.update(self.module_info[name])
+            if self.module_list_model.add_module(name):
+                self.log(f"Module {name} was added to catalog.")
+            else:
+                self.log(f"Module {name} was reloaded.")
+        self.filter_modules(self.module_search.text())
 
-    def add_module_to_workflow(self, item):
+        self.update_module_list_stats()
+        current = self.current_module()
+        if current and current in changed | removed:
+            self.show_module_info(current)
+
+    def add_module_to_workflow(self, module_name):
         """Přidá modul do workflow panelu BEZ dialogu pro parametry"""
-        module_name = item.text()
         if self.workflow_area.findItems(module_name, Qt.MatchExactly):
             self.log(f"Module {module_name} is already in workflow.")
             return
         self.workflow_area.addItem(module_name)
+        self.workflow_graph.add_node(module_name)
+        # Stejně jako z CLI: deklarovaný 'workflow_input', jinak podle typu souborů
+        added = link_declared_inputs(self.workflow_graph, module_name, self.module_info)
+        added += link_by_file_type(self.workflow_graph, self.module_info, self.workflow_params, nodes={module_name})
+        for edge in added:
+            self.log(f"Module {edge.target} reads input from {edge.source}.")
+        self.update_workflow_tooltips()
+        self.project_changed()
         self.log(f"Module {module_name} was added to workflow.")
 
     def open_pipeline_settings(self):
@@ -421,18 +986,21 @@ class MainWindow(QMainWindow):
         if dialog.exec():
             all_param_values = dialog.get_all_values()
             for module_name, param_values in all_param_values.items():
+                previous = self.workflow_params.get(module_name)
+                if isinstance(previous, dict):
+                    # Nastavení mimo dialog (např. _fused_container) zůstávají
+                    kept = {k: v for k, v in previous.items() if k.startswith("_")}
+                    param_values = {**kept, **param_values}
                 self.workflow_params[module_name] = param_values
                 self.log(f"Parameters for {module_name} set: {param_values}")
+            self.project_changed()
 
             # --- Shrnutí Docker image ---
             docker_images = []
             missing = []
             for module_name in modules:
                 # Hledat docker image pod oběma klíči
-                docker_image = (
-                    self.module_info[module_name].get("docker_image")
-                    or self.module_info[module_name].get("container")
-                )
+                docker_image = self.module_info[module_name].container
                 if docker_image:
                     docker_images.append(f"{module_name}: {docker_image}")
                 else:
@@ -449,138 +1017,52 @@ class MainWindow(QMainWindow):
 
     def generate_pipeline(self):
         """Generuje validní Nextflow DSL2 skript podle workflow a parametrů z GUI."""
-        modules = [self.workflow_area.item(i).text() for i in range(self.workflow_area.count())]
-        if not modules:
-            self.log("Workflow is empty.")
+        if not self.report_preflight(check_workflow(self.workflow_graph, self.module_info, self.workflow_params),
+                                     "Pipeline not generated"):
+            return
+        try:
+            script = compile_pipeline(self.workflow_graph, self.module_info, self.workflow_params)
+            config = compile_config(self.workflow_params, self.workflow_graph.nodes, process_hashes(script))
+        except PipelineError as e:
+            self.log(str(e))
+            return
+        if not self.report_preflight(check_script(script), "Pipeline not generated"):
             return
 
-        script_lines = [
-            "#!/usr/bin/env nextflow",
-            "",
-            "nextflow.enable.dsl=2",
-            ""
-        ]
-
-        # --- Parametry a kanály pro workflow blok ---
-        workflow_params_lines = []
-        input_channels = {}
-        general_output_dir = self.workflow_params.get("_general_output_dir", "")
-
-        for module_name in modules:
-            module_data = self.module_info[module_name]
-            params = self.workflow_params.get(module_name, {})
-            # Najdi první definovaný vstupní soubor a vytvoř pro něj kanál
-            for input_def in module_data.get("input", []):
-                input_key = input_def if isinstance(input_def, str) else input_def.get("id")
-                if input_key in params and params[input_key]:
-                    channel_name = f"{module_name.upper().replace(' ', '_')}_IN"
-                    workflow_params_lines.append(f"    {channel_name} = Channel.fromPath('{params[input_key]}')")
-                    input_channels[module_name] = channel_name
-                    break
-
-        if general_output_dir:
-             workflow_params_lines.append(f"    params.outdir = '{general_output_dir}'")
-
-
-        # --- Procesy ---
-        for module_name in modules:
-            data = self.module_info[module_name]
-            params = self.workflow_params.get(module_name, {})
-            container = data.get("container", "")
-            command_template = data.get("command", "")
-            process_name = module_name.upper().replace(" ", "_")
-
-            script_lines.append(f"process {process_name} {{")
-            if container:
-                script_lines.append(f"    container '{container}'")
-
-            # --- Input ---
-            script_lines.append("    input:")
-            input_vars = {} # Mapování id vstupu na proměnnou (např. 'reads')
-            for input_def in data.get("input", []):
-                if isinstance(input_def, str): # Jednoduchý formát "input_id"
-                    input_id = input_def
-                    var_name = "input_files"
-                else: # Strukturovaný formát {"id": "...", "variable": "..."
-                    input_id = input_def.get("id")
-                    var_name = input_def.get("variable", "input_files")
-                
-                script_lines.append(f"    path {var_name}")
-                input_vars[input_id] = var_name
-
-            # --- Output ---
-            script_lines.append("    output:")
-            for output_def in data.get("output", []):
-                if isinstance(output_def, dict):
-                    # Nový formát: {"path": "...", "emit": "..."
-                    path = output_def.get("path")
-                    emit_name = output_def.get("emit")
-                    script_lines.append(f"    path '{path}', emit: {emit_name}")
-                else:
-                    # Starý formát: "soubor.txt"
-                    # Vygenerujeme výstup bez 'emit'
-                    script_lines.append(f"    path '{output_def}'")
-
-            # --- Script ---
-            script_lines.append("    script:")
-            command = command_template
-            # Nahrazení zástupných symbolů pro vstupy
-            for input_id, var_name in input_vars.items():
-                command = command.replace(f"{{{input_id}}}", f"${{{var_name}}}")
-            # Nahrazení parametrů
-            for pname, pval in params.items():
-                if f"{{{pname}}}" in command:
-                    command = command.replace(f"{{{pname}}}", str(pval))
-            
-            # Nahrazení obecných zástupných symbolů (např. pro multiqc)
-            command = command.replace("{*}", ".")
-            command = command.replace("{results}", ".")
-
-            script_lines.append('    """')
-            script_lines.append(f"    {command.strip()}")
-            script_lines.append('    """')
-            script_lines.append("}\n")
-
-        # --- Workflow blok ---
-        script_lines.append("workflow {")
-        script_lines.extend(workflow_params_lines)
-        
-        process_outputs = {} # Udržuje výstupy z procesů
-        for module_name in modules:
-            process_name = module_name.upper().replace(" ", "_")
-            module_data = self.module_info[module_name]
-            
-            input_for_call = ""
-            # Zjistíme, zda má modul vlastní definovaný vstupní kanál
-            if module_name in input_channels:
-                input_for_call = input_channels[module_name]
-            else:
-                # Pokud ne, pokusí se najít vstup z předchozích procesů
-                input_source_def = module_data.get("workflow_input", {})
-                source_process = input_source_def.get("process")
-                source_emit = input_source_def.get("emit")
-                collect = input_source_def.get("collect", False)
-
-                if source_process and source_emit and source_process in process_outputs:
-                    input_for_call = f"{process_outputs[source_process]}.{source_emit}"
-                    if collect:
-                        input_for_call += ".collect()"
-
-            call = f"    {process_name}({input_for_call})"
-            script_lines.append(call)
-            process_outputs[module_name] = f"{process_name}.out"
-
-        script_lines.append("}")
-
-        # --- Uložit soubor ---
-        output_dir = os.path.join("core", "gui", "workflows")
-        os.makedirs(output_dir, exist_ok=True)
-        nf_path = os.path.join(output_dir, "main.nf")
-        with open(nf_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(script_lines))
-
-        self.log(f"Pipeline script generated at {nf_path}")
-
+        previous = read_pipeline(DEFAULT_PIPELINE_PATH)
+        if previous == script:
+            self.log(f"Pipeline script {DEFAULT_PIPELINE_PATH} is up to date, nothing will rerun.")
+        else:
+            changed, removed, rerun = diff_pipelines(previous, script)
+            nf_path = write_pipeline(script)
+            self.log(f"Pipeline script generated at {nf_path}")
+            if previous:
+                self.log(f"Changed processes: {', '.join(changed) or 'none'}")
+                downstream = [name for name in rerun if name not in changed]
+                if downstream:
+                    self.log(f"Will also rerun (inputs changed): {', '.join(downstream)}")
+                if removed:
+                    self.log(f"Removed processes: {', '.join(removed)}")
+        for note in compressed_intermediates(self.workflow_graph, self.module_info, self.workflow_params)[2]:
+            self.log(f"I/O profile: {note}")
+        config_path = config_path_for(DEFAULT_PIPELINE_PATH)
+        if read_pipeline(config_path) != config:
+            write_pipeline(config, config_path)
+            self.log(f"Nextflow config generated at {config_path} "
+                     f"(default profile: {self.workflow_params.get('_general_executor') or 'local'})")
+        for level in self.workflow_graph.levels():
+            if len(level) > 1:
+                self.log(f"Running in parallel: {', '.join(level)}")
+
+
+    def report_preflight(self, issues, blocked):
+        """Vypíše nálezy preflight kontroly; False = jsou chyby a akce se nemá provést."""
+        for issue in issues:
+            self.log(f"Preflight {'error' if issue.level == ERROR else 'warning'}: {issue}")
+        if errors(issues):
+            self.log(f"{blocked}: {len(errors(issues))} preflight error(s) above.")
+            return False
+        return True
 
     def log(self, message: str):
         """Vypíše zprávu do log panelu"""
@@ -588,24 +1070,373 @@ class MainWindow(QMainWindow):
 
     # --- Pipeline tlačítka ---
     def run_pipeline(self):
-        self.log("Pipeline started.")
+        if self.launcher.is_running():
+            self.log("Pipeline is already running.")
+            return
+        nf_path = os.path.abspath(DEFAULT_PIPELINE_PATH)
+        if not os.path.exists(nf_path):
+            self.log("No pipeline script found, use Create Pipeline first.")
+            return
+        if self.run_queue_panel.uses_launch_dir(os.path.dirname(nf_path)):
+            self.log("This pipeline is already running from the run queue.")
+            return
+        if self.prefetch_job is not None and self.prefetch_job.is_running():
+            self.log("Container images are still being pulled.")
+            return
+        # Ručně upravený nebo zastaralý main.nf se zkontroluje dřív, než se spustí JVM a stáhnou image
+        if not self.report_preflight(check_script(read_pipeline(nf_path)), "Pipeline not started"):
+            return
+        # S kontejnery se nejdřív stáhnou všechny image najednou, pak teprve běh
+        if self.workflow_params.get("_general_container_engine"):
+            self.start_prefetch_job(run_after=True)
+        else:
+            self.start_pipeline()
+
+    def start_pipeline(self):
+        """Vlastní spuštění Nextflow (po případném stažení image)."""
+        if self.launcher.is_running():
+            return
+        nf_path = os.path.abspath(DEFAULT_PIPELINE_PATH)
+        resume = self.resume_checkbox.isChecked()
+        # Trace soubor pro historii běhů (časy a peak RSS jednotlivých tasků)
+        args = ["-with-trace", f"trace-{time.strftime('%Y%m%d-%H%M%S')}.txt"]
+        # Události tasků pro panel průběhu
+        try:
+            args += ["-with-weblog", self.weblog.start()]
+            self.progress_panel.attach(self.weblog)
+        except OSError as e:
+            self.log(f"Progress panel disabled, cannot start weblog receiver: {e}")
+        self.launcher.start(nf_path, args=args, work_dir=os.path.dirname(nf_path), resume=resume)
+        self.log(f"Pipeline started: nextflow run {DEFAULT_PIPELINE_PATH}{' -resume' if resume else ''}")
+
+    # --- Container image ---
+    def start_prefetch_job(self, run_after):
+        """Stáhne image pipeline do cache v pozadí (a pak případně spustí běh)."""
+        engine = self.workflow_params.get("_general_container_engine")
+        if not engine:
+            self.log("Select a container engine in Pipeline Settings first.")
+            return
+        if self.prefetch_job is not None and self.prefetch_job.is_running():
+            self.log("Container images are already being pulled.")
+            return
+        images = images_in_script(read_pipeline(DEFAULT_PIPELINE_PATH))
+        if not images:
+            self.log("No container images to pull, use Create Pipeline first.")
+            if run_after:
+                self.start_pipeline()
+            return
+        image_dir = image_cache_dir(self.workflow_params)
+        cap = parse_memory(self.workflow_params.get("_general_image_cap"))
+
+        def job():
+            cache = ImageCache(engine, image_dir)
+            try:
+                results = cache.prefetch(images)
+                evicted = cache.evict(cap, protect=images) if cap is not None else []
+                return results, evicted, cache.total_size(), run_after
+            finally:
+                cache.close()
+
+        self.prefetch_job = BackgroundJob(job, self)
+        self.prefetch_job.done.connect(self.on_prefetch_done)
+        self.prefetch_job.failed.connect(self.on_prefetch_failed)
+        self.prefetch_job.start()
+        self.log(f"Pulling {len(images)} container images with {engine}...")
+
+    def on_prefetch_failed(self, error):
+        self.log(f"Container image prefetch failed: {error}")
+
+    def on_prefetch_done(self, result):
+        results, evicted, total, run_after = result
+        failed = [r for r in results if r.status == "failed"]
+        pulled = [r for r in results if r.status == "pulled"]
+        self.log(f"Container images: {len(pulled)} pulled, {len(results) - len(pulled) - len(failed)} cached, "
+                 f"{len(failed)} failed (cache {format_size(total)})")
+        for r in failed:
+            self.log(f"  {r.image}: {r.error}")
+        if evicted:
+            self.log(f"Evicted {len(evicted)} least recently used images "
+                     f"({format_size(sum(size for _, size in evicted))}).")
+        if run_after:
+            if failed:
+                self.log("Pipeline not started, fix the image errors above or disable containers.")
+            else:
+                self.start_pipeline()
+
+    def queue_pipeline(self):
+        """Zařadí zkompilovanou pipeline do fronty (rozpočet běhu z Pipeline Settings)."""
+        nf_path = os.path.abspath(DEFAULT_PIPELINE_PATH)
+        if not os.path.exists(nf_path):
+            self.log("No pipeline script found, use Create Pipeline first.")
+            return
+        if self.launcher.is_running():
+            self.log("The pipeline is already running, wait for it to finish before queueing it.")
+            return
+        if not self.report_preflight(check_script(read_pipeline(nf_path)), "Pipeline not queued"):
+            return
+        cpus = self.workflow_params.get("_general_max_cpus")
+        run = self.run_queue_panel.add_pipeline(
+            nf_path, int(cpus) if str(cpus or "").isdigit() else None,
+            parse_memory(self.workflow_params.get("_general_max_memory")),
+            resume=self.resume_checkbox.isChecked())
+        if run:
+            self.show_run_queue()
+
+    def show_run_queue(self):
+        self.run_queue_dialog.show()
+        self.run_queue_dialog.raise_()
+
+    def show_schedule_simulation(self):
+        self.schedule_panel.load_settings(self.workflow_params)
+        self.schedule_dialog.show()
+        self.schedule_dialog.raise_()
+
+    def set_cost_model(self, path):
+        self.workflow_params["_general_cost_model"] = path
+        self.project_changed()
+
+    def apply_chunk_sizes(self, chunks):
+        """Velikosti částí ze simulace do scatter nastavení modulů (0 = modul se nedělí)."""
+        for module_name, reads in chunks.items():
+            params = self.workflow_params.setdefault(module_name, {})
+            if not reads and not params.get(SCATTER_BY):
+                continue  # nedělí se ani teď
+            params[SCATTER_BY] = "reads" if reads else ""
+            params[SCATTER_SIZE] = str(reads) if reads else ""
+            self.log(f"Scatter for {module_name}: " + (f"{reads} reads per chunk" if reads else "not split"))
+        self.project_changed()
 
     def pause_pipeline(self):
-        self.log("Pipeline paused.")
+        """Pozastaví (SIGSTOP) nebo znovu rozběhne (SIGCONT) běžící pipeline"""
+        if self.launcher.pause():
+            self.log("Pipeline paused.")
+        elif self.launcher.resume():
+            self.log("Pipeline resumed.")
+        else:
+            self.log("No pipeline is running.")
 
     def end_pipeline(self):
-        self.log("Pipeline ended.")
+        if self.launcher.stop():
+            self.log("Stopping pipeline...")
+        else:
+            self.log("No pipeline is running.")
+
+    def on_pipeline_state_changed(self, state):
+        self.btn_pause.setText("Resume pipeline" if state == "paused" else "Pause pipeline")
+        self.btn_run.setEnabled(state == "finished")
+
+    def on_pipeline_finished(self, code):
+        self.log(f"Pipeline finished with exit code {code}.")
+        self.progress_panel.detach()
+        self.start_history_job()
+        # Po běhu se work/ stáhne pod nastavený limit (tasky posledního běhu zůstanou)
+        if parse_memory(self.workflow_params.get("_general_work_cap")) is not None:
+            self.start_work_cache_job(evict=True)
+
+    # --- Work directory ---
+    def show_work_usage(self):
+        self.start_work_cache_job(evict=False)
+
+    def clean_work_dir(self):
+        self.start_work_cache_job(evict=True)
+
+    def start_work_cache_job(self, evict):
+        """Indexace work/ (a případně úklid) v pozadí; výsledek přijde do logu."""
+        if self.work_cache_job is not None and self.work_cache_job.is_running():
+            self.log("Work directory is already being indexed.")
+            return
+        cap = None
+        if evict:
+            if self.launcher.is_running():
+                self.log("Cannot clean the work directory while the pipeline is running.")
+                return
+            cap = parse_memory(self.workflow_params.get("_general_work_cap"))
+            if cap is None:
+                self.log("Set a work directory cap in Pipeline Settings first.")
+                return
+        launch_dir = os.path.dirname(os.path.abspath(DEFAULT_PIPELINE_PATH))
+
+        def job():
+            cache = WorkCache(launch_dir)
+            try:
+                added, removed = cache.refresh()
+                evicted = cache.evict(cap) if cap is not None else None
+                return added, removed, cache.usage_by_process(), cache.total_size(), evicted
+            finally:
+                cache.close()
+
+        self.work_cache_job = BackgroundJob(job, self)
+        self.work_cache_job.done.connect(self.on_work_cache_done)
+        self.work_cache_job.failed.connect(self.on_work_cache_failed)
+        self.work_cache_job.start()
+        self.log("Indexing work directory...")
+
+    def on_work_cache_failed(self, error):
+        self.log(f"Work directory indexing failed: {error}")
+
+    def on_work_cache_done(self, result):
+        added, removed, usage, total, evicted = result
+        self.log(f"Work directory: {format_size(total)} in {sum(n for _, n, _ in usage)} tasks "
+                 f"({added} new, {removed} gone since last scan)")
+        for process, tasks, size in usage:
+            self.log(f"  {process}: {format_size(size)} in {tasks} tasks")
+        if evicted is not None:
+            self.log(f"Evicted {len(evicted)} least recently used tasks "
+                     f"({format_size(sum(size for _, size in evicted))}).")
+
+    # --- Historie běhů ---
+    def start_history_job(self):
+        """Načtení nových logů a trace souborů do historie v pozadí."""
+        if self.history_job is not None and self.history_job.is_running():
+            return
+        launch_dir = os.path.dirname(os.path.abspath(DEFAULT_PIPELINE_PATH))
+
+        def job():
+            history = RunHistory()
+            try:
+                history.ingest(launch_dir)
+                return history.module_stats()
+            finally:
+                history.close()
+
+        self.history_job = BackgroundJob(job, self)
+        self.history_job.done.connect(self.on_history_done)
+        self.history_job.failed.connect(self.on_history_failed)
+        self.history_job.start()
+
+    def on_history_failed(self, error):
+        self.log(f"Run history update failed: {error}")
+
+    def on_history_done(self, stats):
+        self.module_stats = stats
+        self.update_module_list_stats()
+        current = self.current_module()
+        if current:
+            self.show_module_info(current)
+
+    def update_module_list_stats(self):
+        """Tooltip modulu v seznamu = medián času a peak RSS z minulých běhů"""
+        tooltips = {}
+        for name in self.module_list_model.names:
+            stats = self.module_stats.get(process_name_for(name))
+            if stats:
+                tooltips[name] = f"Past runs: {stats.describe()}"
+        self.module_list_model.set_tooltips(tooltips)
+
+    def closeEvent(self, event):
+        # Řádné ukončení - deník pro obnovu po pádu už není potřeba
+        self.journal.close()
+        # Ukončit běžící Nextflow i s jeho tasky, ať nezůstanou osiřelé procesy
+        self.launcher.shutdown()
+        self.weblog.stop()
+        self.run_queue_panel.shutdown()
+        self.log_area.shutdown()
+        super().closeEvent(event)
 
     # ---- Menu funkce ----
     def new_project(self):
-        self.workflow_area.clear()
+        self.set_project_state(WorkflowGraph(), {})
+        self.project_path = None
+        self.journal.start(None, self.workflow_graph, self.workflow_params)
+        self.update_window_title()
         self.log("New project created")
 
     def open_project(self):
-        self.log("TODO: Implementovat načtení projektu")
+        path, _ = QFileDialog.getOpenFileName(self, "Open Project", "", PROJECT_FILTER)
+        if not path:
+            return
+        try:
+            graph, workflow_params, versions = load_project(path)
+        except ProjectError as e:
+            self.log(str(e))
+            return
+        self.set_project_state(graph, workflow_params)
+        self.project_path = path
+        self.journal.start(path, self.workflow_graph, self.workflow_params)
+        self.update_window_title()
+        self.log(f"Project {path} opened ({len(graph.nodes)} modules).")
+        for warning in check_versions(versions, self.module_info):
+            self.log(warning)
 
     def save_project(self):
-        self.log("TODO: Implementovat uložení projektu")
+        if not self.project_path:
+            self.save_project_as()
+            return
+        try:
+            save_project(self.project_path, self.workflow_graph, self.workflow_params, self.module_info)
+        except OSError as e:
+            self.log(f"Cannot save project {self.project_path}: {e}")
+            return
+        # Uložený soubor je nový základ deníku
+        self.journal.start(self.project_path, self.workflow_graph, self.workflow_params)
+        self.update_window_title()
+        self.log(f"Project saved to {self.project_path}")
+
+    def save_project_as(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Project", self.project_path or "project.json",
+                                              PROJECT_FILTER)
+        if path:
+            self.project_path = path
+            self.save_project()
+
+    def set_project_state(self, graph, workflow_params):
+        """Nahradí workflow a parametry (nový, otevřený nebo obnovený projekt)"""
+        self.workflow_graph = graph
+        self.workflow_params = workflow_params
+        self.workflow_area.clear()
+        self.workflow_area.addItems(graph.nodes)
+        self.update_workflow_tooltips()
+
+    def project_changed(self):
+        """Po každé úpravě workflow/parametrů - změna se připíše do deníku"""
+        self.journal.record(self.workflow_graph, self.workflow_params)
+        self.update_window_title()
+
+    def update_window_title(self):
+        name = os.path.basename(self.project_path) if self.project_path else "Untitled"
+        self.setWindowTitle(f"Pipeline Builder - {name}{'*' if self.journal.changes else ''}")
+
+    def recover_autosave(self):
+        """Po pádu nabídne obnovu neuložených změn z deníku"""
+        # Jen deníky instancí, které už neběží; prázdné se rovnou uklidí
+        crashed = []
+        for path in orphaned_journals():
+            if has_changes(path):
+                crashed.append(path)
+            else:
+                remove_journal(path)
+        if crashed:
+            # Nejnovější se nabídne teď, ostatní při dalším spuštění
+            path = crashed[0]
+            answer = QMessageBox.question(
+                self, "Recover Project", "The previous session ended unexpectedly.\n"
+                "Recover unsaved changes from the autosave journal?")
+            if answer == QMessageBox.Yes:
+                try:
+                    graph, workflow_params, base, changes = replay_journal(path)
+                except ProjectError as e:
+                    self.log(f"Recovery failed: {e} (the journal stays in {path})")
+                else:
+                    remove_journal(path)
+                    self.set_project_state(graph, workflow_params)
+                    self.project_path = base
+                    # Nový deník nad stejným základem hned obsahuje obnovené změny
+                    base_graph, base_params = WorkflowGraph(), {}
+                    if base:
+                        try:
+                            base_graph, base_params, _ = load_project(base)
+                        except ProjectError as e:
+                            # Základ mezitím zmizel nebo se změnil - zůstane jen obnovený stav bez souboru
+                            self.log(f"{e}; keeping the recovered workflow as an unsaved project.")
+                            base = self.project_path = None
+                    self.journal.start(base, base_graph, base_params)
+                    self.project_changed()
+                    self.log(f"Recovered {changes} unsaved changes" + (f" to {base}" if base else "") + ".")
+                    return
+            else:
+                remove_journal(path)
+        self.journal.start(self.project_path, self.workflow_graph, self.workflow_params)
+        self.update_window_title()
 
     def show_about(self):
         self.log("Pipeline Builder v0.1 - Created by Altho")
@@ -0,0 +1,74 @@
+"""Model seznamu modulů a proxy, která ho filtruje a řadí podle výsledků ModuleIndex."""
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel
+
+
+class ModuleListModel(QAbstractListModel):
+    def __init__(self, names=(), parent=None):
+        super().__init__(parent)
+        self.names = list(names)
+        self.tooltips = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self.names[index.row()]
+        if role == Qt.DisplayRole:
+            return name
+        if role == Qt.ToolTipRole:
+            return self.tooltips.get(name) or None
+        return None
+
+    def add_module(self, name):
+        if name in self.names:
+            return False
+        row = len(self.names)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.names.append(name)
+        self.endInsertRows()
+        return True
+
+    def remove_module(self, name):
+        if name not in self.names:
+            return False
+        row = self.names.index(name)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.names[row]
+        self.endRemoveRows()
+        return True
+
+    def set_tooltips(self, tooltips):
+        self.tooltips = tooltips
+        if self.names:
+            self.dataChanged.emit(self.index(0), self.index(len(self.names) - 1), [Qt.ToolTipRole])
+
+
+class ModuleFilterModel(QSortFilterProxyModel):
+    """Ukáže jen moduly z výsledku hledání, v pořadí relevance (None = všechny v původním pořadí)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rank = None  # {modul: pořadí ve výsledcích}
+
+    def set_results(self, names):
+        if names is None:
+            self.sort(-1)  # pořadí zdrojového modelu - ještě před zrušením pořadí výsledků
+            self._rank = None
+            self.invalidateFilter()
+            return
+        self._rank = {name: i for i, name in enumerate(names)}
+        # invalidate (ne invalidateFilter) - řádky, které zůstaly vidět, se musí přeřadit taky
+        self.invalidate()
+        self.sort(0)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self._rank is None or self.sourceModel().names[source_row] in self._rank
+
+    def lessThan(self, left, right):
+        # lessThan se volá z Pythonu pro každé porovnání - výsledků má být jen pár set (SEARCH_LIMIT)
+        if self._rank is None:
+            return left.row() < right.row()
+        names = self.sourceModel().names
+        return self._rank[names[left.row()]] < self._rank[names[right.row()]]
@@ -0,0 +1,314 @@
+"""Registr modulů: každý JSON se parsuje jen jednou do normalizované podoby.
+
+Normalizované specifikace se ukládají do cache na disku (klíč = cesta
+k souboru + mtime/velikost, záložně hash obsahu), takže další start
+načte jen soubory, které se mezitím změnily. Metoda refresh() umí
+aktualizovat jednotlivé soubory, na které upozorní watcher v GUI.
+"""
+import os
+import re
+import json
+import pickle
+import hashlib
+
+
+DEFAULT_MODULES_DIR = "modules"
+
+# Parametry, které obvykle určují počet vláken nástroje
+THREAD_PARAM_IDS = ("-t", "-T", "-@", "--threads", "-threads", "--runThreadN", "--cores", "--num-threads")
+# ... z nich ty, které počítají vlákna navíc k hlavnímu (samtools/bcftools -@)
+EXTRA_THREAD_PARAM_IDS = ("-@",)
+CACHE_VERSION = 7
+# Přípony se stejným obsahem
+TYPE_ALIASES = {"fq": "fastq", "fa": "fasta", "fna": "fasta", "yml": "yaml", "tsv": "txt", "csv": "txt"}
+COMPRESSION_SUFFIXES = (".gz", ".bz2", ".zst")
+
+
+def user_cache_dir():
+    """Složka pro lokální cache aplikace (~/.cache/pipeline_builder)"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pipeline_builder")
+
+
+class ModuleSpec:
+    """Normalizovaná definice modulu.
+
+    inputs  -- n-tice (id, variable)
+    outputs -- n-tice (path, emit); emit je None u starého formátu
+    params  -- n-tice (id, type, default, description)
+    resources     -- {"cpus": 4, "memory": "8 GB", "time": "2h"} (vše volitelné)
+    threads_param -- id parametru, který se váže na ${task.cpus} (u -@ na ${task.cpus - 1})
+    scatter       -- {"input": ..., "output": ..., "gather": {...}} nebo None,
+                     pokud modul neumí běžet po částech vstupu
+    streaming     -- {"stdin": id vstupu, "stdout": cesta výstupu}: které soubory
+                     umí příkaz číst ze stdin ('-') a psát na stdout (bez '> {cesta}')
+    compression   -- {"accepts": {id vstupu: ["sam", "bam", "cram"]},
+                      "bam_args": {cesta SAM výstupu: argumenty, se kterými nástroj zapíše BAM}}
+    cost          -- nákladový model pro simulaci rozvrhu: {"seconds_per_gb": 900, "threads": 4,
+                     "overhead": 30, "output_ratio": 1.2} (vše volitelné, viz schedule_sim.py)
+    """
+    __slots__ = (
+        "name", "description", "url", "container", "command",
+        "inputs", "outputs", "params", "workflow_input", "resources", "threads_param",
+        "scatter", "streaming", "compression", "cost", "path", "digest",
+    )
+
+    def __init__(self, name, description="", url="", container="", command="",
+                 inputs=(), outputs=(), params=(), workflow_input=None, resources=None,
+                 threads_param=None, scatter=None, streaming=None, compression=None, cost=None, path="",
+                 digest=""):
+        self.name = name
+        self.description = description
+        self.url = url
+        self.container = container
+        self.command = command
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.params = tuple(params)
+        self.workflow_input = workflow_input or {}
+        self.resources = resources or {}
+        self.threads_param = threads_param
+        self.scatter = scatter
+        self.streaming = streaming or {}
+        self.compression = compression or {}
+        self.cost = cost or {}
+        self.path = path
+        self.digest = digest
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+    def __repr__(self):
+        return f"ModuleSpec({self.name!r})"
+
+    @property
+    def input_ids(self):
+        return [input_id for input_id, _ in self.inputs]
+
+    @property
+    def param_ids(self):
+        return [param_id for param_id, _, _, _ in self.params]
+
+    @property
+    def extra_threads(self):
+        """True, pokud threads_param udává vlákna navíc k hlavnímu (-@ 3 = 4 jádra)."""
+        return self.threads_param in EXTRA_THREAD_PARAM_IDS
+
+    def param_defaults(self):
+        return {param_id: default for param_id, _, default, _ in self.params}
+
+
+def file_type(path):
+    """Typ souboru podle přípony ('reads.fq.gz' -> 'fastq'); None pro '*' a neznámé, 'dir' pro složku."""
+    name = str(path or "").strip().lower()
+    if name.endswith("/"):
+        return "dir"
+    name = os.path.basename(name)
+    for suffix in COMPRESSION_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    if "." not in name:
+        return None
+    ext = name.rsplit(".", 1)[1]
+    if not ext or any(ch in ext for ch in "*?[{"):
+        return None
+    return TYPE_ALIASES.get(ext, ext)
+
+
+def variable_for(input_id):
+    """Název Nextflow proměnné odvozený z id vstupu ('reads.fastq.gz' -> 'reads_fastq_gz')"""
+    name = re.sub(r"\W+", "_", input_id).strip("_")
+    if not name or name[0].isdigit():
+        name = f"in_{name}"
+    return name
+
+
+def detect_threads_param(params):
+    """Najde parametr s počtem vláken podle id nebo popisu (None, pokud žádný není)."""
+    for param_id, _, _, description in params:
+        if param_id in THREAD_PARAM_IDS:
+            return param_id
+    for param_id, _, _, description in params:
+        text = str(description).lower()
+        if "thread" in text or "vláken" in text or "vlákna" in text:
+            return param_id
+    return None
+
+
+def normalize_module(data, path="", digest=""):
+    """Převede JSON definici (starý i nový formát) na ModuleSpec."""
+    inputs = []
+    input_defs = data.get("input", [])
+    for input_def in input_defs:
+        if isinstance(input_def, dict):  # {"id": "...", "variable": "..."}
+            inputs.append((input_def.get("id"), input_def.get("variable", "input_files")))
+        elif len(input_defs) == 1:  # Starý formát "input_id"
+            inputs.append((input_def, "input_files"))
+        else:
+            # Více vstupů ve starém formátu potřebuje různé proměnné
+            inputs.append((input_def, variable_for(input_def)))
+
+    outputs = []
+    for output_def in data.get("output", []):
+        if isinstance(output_def, dict):  # {"path": "...", "emit": "..."}
+            outputs.append((output_def.get("path"), output_def.get("emit")))
+        else:
+            outputs.append((output_def, None))
+
+    params = []
+    # Nový formát: seznam slovníků s "id"
+    for param in data.get("params", []):
+        params.append((param.get("id"), param.get("type", "str"),
+                       param.get("default", ""), param.get("description", "")))
+    # Starý formát: slovník {"-t": {"description": ..., "default": ...}}
+    for param_id, pinfo in data.get("parameters", {}).items():
+        params.append((param_id, pinfo.get("type", "str"),
+                       pinfo.get("default", ""), pinfo.get("description", "")))
+
+    resources = dict(data.get("resources", {}))
+    if "threads_param" in resources:  # "threads_param": null vazbu vypne
+        threads_param = resources.pop("threads_param") or None
+    else:
+        threads_param = detect_threads_param(params)
+
+    return ModuleSpec(
+        name=data["name"],
+        description=data.get("description", ""),
+        url=data.get("url", ""),
+        container=data.get("container") or data.get("docker_image", ""),
+        command=data.get("command", ""),
+        inputs=inputs,
+        outputs=outputs,
+        params=params,
+        workflow_input=data.get("workflow_input"),
+        resources=resources,
+        threads_param=threads_param,
+        scatter=data.get("scatter"),
+        streaming=data.get("streaming"),
+        compression=data.get("compression"),
+        cost=data.get("cost"),
+        path=path,
+        digest=digest,
+    )
+
+
+class ModuleRegistry:
+    """Drží normalizované moduly jedné složky a jejich diskovou cache."""
+
+    def __init__(self, modules_dir=DEFAULT_MODULES_DIR, cache_path=None):
+        self.modules_dir = modules_dir
+        if cache_path is None:
+            key = hashlib.sha1(os.path.abspath(modules_dir).encode("utf-8")).hexdigest()[:16]
+            cache_path = os.path.join(user_cache_dir(), f"registry-{key}.pickle")
+        self.cache_path = cache_path
+        self.modules = {}   # název modulu -> ModuleSpec
+        self._entries = {}  # cesta -> (mtime_ns, size, ModuleSpec)
+        self.errors = {}    # cesta -> text chyby u JSON, který nejde načíst
+        self._dirty = False
+
+    # ---------- Načítání ----------
+
+    def load(self):
+        """Načte celou složku (s využitím cache) a vrátí {název: ModuleSpec}."""
+        if not os.path.exists(self.modules_dir):
+            os.makedirs(self.modules_dir)
+        self._entries = self._read_cache()
+        self.modules = {}
+        self.errors = {}
+        self.refresh()
+        return self.modules
+
+    def refresh(self, paths=None):
+        """Aktualizuje jen změněné soubory.
+
+        Bez argumentu projde stat() všech JSON ve složce (bez parsování),
+        jinak zpracuje jen zadané cesty. Vrací (změněné názvy, odebrané názvy);
+        soubory, které nejde načíst, zůstanou v self.errors.
+        """
+        if paths is None:
+            current = set(self._scan_paths())
+            paths = current | set(self._entries)
+        changed, removed = set(), set()
+        for path in sorted(paths):
+            old = self._entries.get(path)
+            spec = self._update_entry(path)
+            if old is not None and (spec is None or old[2].name != spec.name):
+                if self.modules.get(old[2].name) is old[2]:
+                    del self.modules[old[2].name]
+                    removed.add(old[2].name)
+            if spec is not None and self.modules.get(spec.name) is not spec:
+                self.modules[spec.name] = spec
+                changed.add(spec.name)
+                removed.discard(spec.name)
+        if self._dirty:
+            self._write_cache()
+        return changed, removed
+
+    def _scan_paths(self):
+        with os.scandir(self.modules_dir) as it:
+            return [entry.path for entry in it if entry.name.endswith(".json") and entry.is_file()]
+
+    def _update_entry(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.errors.pop(path, None)
+            if self._entries.pop(path, None) is not None:
+                self._dirty = True
+            return None
+
+        cached = self._entries.get(path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            digest = hashlib.sha1(raw).hexdigest()
+            if cached and cached[2].digest == digest:
+                # Soubor byl jen "touchnut", obsah je stejný
+                spec = cached[2]
+            else:
+                spec = normalize_module(json.loads(raw), path=path, digest=digest)
+        except (OSError, ValueError, KeyError, AttributeError, TypeError) as e:
+            # Rozepsaný nebo chybný JSON - modul zmizí z katalogu, chyba zůstane v errors
+            self.errors[path] = f"{type(e).__name__}: {e}"
+            self._entries.pop(path, None)
+            self._dirty = True
+            return None
+        self.errors.pop(path, None)
+        self._entries[path] = (st.st_mtime_ns, st.st_size, spec)
+        self._dirty = True
+        return spec
+
+    # ---------- Cache na disku ----------
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, "rb") as f:
+                version, entries = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError, AttributeError,
+                ImportError, ModuleNotFoundError):
+            # Cache ze starší verze může odkazovat na třídu nebo modul, který už neexistuje
+            return {}
+        return entries if version == CACHE_VERSION else {}
+
+    def _write_cache(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump((CACHE_VERSION, self._entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            return  # Cache je jen optimalizace, bez ní se vše načte z JSON
+        self._dirty = False
+
+
+def load_modules(modules_dir=DEFAULT_MODULES_DIR):
+    """Načte všechny JSON moduly ze složky modules/"""
+    return ModuleRegistry(modules_dir).load()
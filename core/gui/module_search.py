@@ -0,0 +1,192 @@
+"""Vyhledávání v katalogu modulů: invertovaný index s prefixy a překlepy.
+
+Index se postaví jednou při načtení katalogu a při změně modulu se
+aktualizuje jen ten modul. Hledá se v názvu, popisu, vstupech/výstupech
+a containeru; každé slovo dotazu musí sedět (přesně, jako prefix, nebo
+s jedním překlepem) a výsledky se řadí podle váhy pole, kde se našlo.
+
+Překlepy řeší předpočítané varianty slov bez jednoho znaku (jako SymSpell),
+takže se neprochází celý slovník.
+
+Bez GUI (ze složky core/gui):
+
+    python -m module_search "samtols sort"
+"""
+import re
+import sys
+import time
+import bisect
+
+
+# Váha pole, ve kterém se slovo našlo
+NAME_WEIGHT, IO_WEIGHT, CONTAINER_WEIGHT, DESCRIPTION_WEIGHT = 8.0, 3.0, 2.0, 1.0
+PREFIX_FACTOR = 0.7  # dotaz je začátek slova
+FUZZY_FACTOR = 0.4   # jeden překlep
+SEARCH_LIMIT = 200    # víc výsledků v seznamu nikdo neprochází
+FUZZY_MIN_LENGTH = 4  # kratší slova se opravují špatně (bwa -> bwt, bam -> bed ...)
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def _deletes(token):
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def edit_distance(a, b, limit=1):
+    """Damerau-Levenshteinova vzdálenost (se záměnou sousedních znaků); nad limit vrací limit + 1."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def module_fields(spec):
+    """[(text, váha)] prohledávaných polí modulu"""
+    fields = [(spec.name, NAME_WEIGHT), (spec.description, DESCRIPTION_WEIGHT),
+              (spec.container, CONTAINER_WEIGHT)]
+    fields += [(input_id, IO_WEIGHT) for input_id in spec.input_ids]
+    fields += [(path, IO_WEIGHT) for path, _ in spec.outputs]
+    return fields
+
+
+class ModuleIndex:
+    def __init__(self, modules=None):
+        self.postings = {}   # {slovo: {modul: váha}}
+        self.deletes = {}    # {slovo bez jednoho znaku: {slovo}}
+        self.names = {}      # {modul: slova modulu} - pro aktualizaci
+        self._sorted = []    # seřazená slova pro hledání prefixů
+        self._dirty = False
+        for spec in (modules or {}).values():
+            self.update(spec)
+
+    def __len__(self):
+        return len(self.names)
+
+    def update(self, spec):
+        """Přidá nebo přeindexuje modul."""
+        self.remove(spec.name)
+        weights = {}
+        for text, weight in module_fields(spec):
+            for token in tokenize(text):
+                if weights.get(token, 0) < weight:
+                    weights[token] = weight
+        for token, weight in weights.items():
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = {}
+                self._add_word(token)
+            postings[spec.name] = weight
+        self.names[spec.name] = tuple(weights)
+
+    def remove(self, name):
+        for token in self.names.pop(name, ()):
+            postings = self.postings[token]
+            del postings[name]
+            if not postings:
+                del self.postings[token]
+                self._remove_word(token)
+
+    def _add_word(self, token):
+        self._dirty = True
+        if len(token) >= FUZZY_MIN_LENGTH:
+            for variant in _deletes(token) | {token}:
+                self.deletes.setdefault(variant, set()).add(token)
+
+    def _remove_word(self, token):
+        self._dirty = True
+        if len(token) >= FUZZY_MIN_LENGTH:
+            for variant in _deletes(token) | {token}:
+                words = self.deletes.get(variant)
+                if words is not None:
+                    words.discard(token)
+                    if not words:
+                        del self.deletes[variant]
+
+    def _words(self):
+        if self._dirty:
+            self._sorted = sorted(self.postings)
+            self._dirty = False
+        return self._sorted
+
+    def _term_scores(self, term):
+        """{modul: skóre} pro jedno slovo dotazu (nejlepší shoda v modulu)."""
+        scores = {}
+
+        def add(token, factor):
+            for name, weight in self.postings[token].items():
+                score = weight * factor
+                if scores.get(name, 0) < score:
+                    scores[name] = score
+
+        words = self._words()
+        for i in range(bisect.bisect_left(words, term), len(words)):
+            token = words[i]
+            if not token.startswith(term):
+                break
+            add(token, 1.0 if token == term else PREFIX_FACTOR)
+        if len(term) >= FUZZY_MIN_LENGTH:
+            candidates = set()
+            for variant in _deletes(term) | {term}:
+                candidates |= self.deletes.get(variant, set())
+            for token in candidates:
+                if token != term and not token.startswith(term) and edit_distance(term, token) <= 1:
+                    add(token, FUZZY_FACTOR)
+        return scores
+
+    def search(self, query, limit=None):
+        """Názvy modulů seřazené podle relevance; prázdný dotaz vrací None (bez filtru)."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return None
+        total = None
+        for term in sorted(terms, key=len, reverse=True):  # delší slova mají méně shod
+            scores = self._term_scores(term)
+            if total is None:
+                total = scores
+            else:
+                total = {name: total[name] + score for name, score in scores.items() if name in total}
+            if not total:
+                return []
+        needle = query.strip().lower()
+        ranked = sorted(total, key=lambda name: (-total[name] - (name.lower().startswith(needle)), name))
+        return ranked[:limit] if limit else ranked
+
+
+def main(argv=None):
+    import argparse
+    from module_registry import ModuleRegistry, DEFAULT_MODULES_DIR
+
+    parser = argparse.ArgumentParser(prog="module_search", description="Search the module catalog.")
+    parser.add_argument("query")
+    parser.add_argument("--modules", default=DEFAULT_MODULES_DIR, help="modules directory")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    modules = ModuleRegistry(args.modules).load()
+    start = time.perf_counter()
+    index = ModuleIndex(modules)
+    built = time.perf_counter()
+    results = index.search(args.query, args.limit) or []
+    done = time.perf_counter()
+    for name in results:
+        print(f"{name}: {modules[name].description.splitlines()[0] if modules[name].description else ''}")
+    print(f"{len(results)} results from {len(index)} modules "
+          f"(index {(built - start) * 1000:.0f} ms, search {(done - built) * 1000:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
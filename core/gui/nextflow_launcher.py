@@ -0,0 +1,154 @@
+"""Neblokující spouštění Nextflow přes QProcess.
+
+Výstup se čte po řádcích přes signály Qt, takže GUI nikdy nečeká
+na proces. Nextflow běží v nové session (vlastní skupina procesů),
+díky čemuž pauza/ukončení zasáhne i spuštěné tasky a po skončení
+nezůstanou osiřelé procesy.
+"""
+import os
+import signal
+
+from PySide6.QtCore import QObject, QProcess, QTimer, Signal
+
+
+NEXTFLOW_PROGRAM = os.environ.get("NEXTFLOW", "nextflow")
+# Vlastní skupinu procesů (a tedy pauzu/kill celé skupiny) umí jen POSIX s Qt >= 6.6
+NEW_SESSION = os.name == "posix" and hasattr(QProcess, "UnixProcessParameters")
+
+
+class NextflowLauncher(QObject):
+    output = Signal(str)        # řádek ze stdout
+    error_output = Signal(str)  # řádek ze stderr
+    state_changed = Signal(str)  # "running", "paused", "stopping", "finished"
+    finished = Signal(int)      # návratový kód
+
+    def __init__(self, parent=None, program=NEXTFLOW_PROGRAM, kill_timeout_ms=10000):
+        super().__init__(parent)
+        self.program = program
+        self.kill_timeout_ms = kill_timeout_ms
+        self.process = None
+        self.state = "finished"
+        self._pgid = None
+        self._buffers = {"out": b"", "err": b""}
+        self._kill_timer = QTimer(self)
+        self._kill_timer.setSingleShot(True)
+        self._kill_timer.timeout.connect(self._kill_group)
+
+    def is_running(self):
+        return self.process is not None and self.process.state() != QProcess.NotRunning
+
+    def start(self, script_path, args=(), work_dir=None, resume=True):
+        """Spustí `nextflow run <script_path> <args>`; vrací False, pokud už něco běží.
+
+        S resume=True (výchozí) se použije -resume: nezměněné tasky se vezmou z cache.
+        """
+        if self.is_running():
+            return False
+        process = QProcess(self)
+        if work_dir:
+            process.setWorkingDirectory(work_dir)
+        if NEW_SESSION:
+            # Nová session => pgid == pid, signály se dají poslat celé skupině
+            params = QProcess.UnixProcessParameters()
+            params.flags = QProcess.UnixProcessFlag.CreateNewSession
+            process.setUnixProcessParameters(params)
+        process.readyReadStandardOutput.connect(lambda: self._read("out"))
+        process.readyReadStandardError.connect(lambda: self._read("err"))
+        process.started.connect(self._on_started)
+        process.finished.connect(self._on_finished)
+        process.errorOccurred.connect(self._on_error)
+
+        self._buffers = {"out": b"", "err": b""}
+        self.process = process
+        resume_args = ["-resume"] if resume and "-resume" not in args else []
+        process.start(self.program, ["run", script_path, "-ansi-log", "false", *resume_args, *args])
+        return True
+
+    def pause(self):
+        if self.state == "running" and self._signal_group(signal.SIGSTOP):
+            self._set_state("paused")
+            return True
+        return False
+
+    def resume(self):
+        if self.state == "paused" and self._signal_group(signal.SIGCONT):
+            self._set_state("running")
+            return True
+        return False
+
+    def stop(self):
+        """SIGTERM pro Nextflow (sám ukončí své tasky), po timeoutu SIGKILL celé skupiny."""
+        if not self.is_running():
+            return False
+        if self.state == "paused":
+            self._signal_group(signal.SIGCONT)
+        self.process.terminate()
+        self._set_state("stopping")
+        self._kill_timer.start(self.kill_timeout_ms)
+        return True
+
+    def shutdown(self, timeout_ms=None):
+        """Blokující ukončení při zavírání aplikace."""
+        if not self.is_running():
+            return
+        self.stop()
+        if not self.process.waitForFinished(self.kill_timeout_ms if timeout_ms is None else timeout_ms):
+            self._kill_group()
+            self.process.waitForFinished(1000)
+
+    # ---------- Interní ----------
+
+    def _set_state(self, state):
+        self.state = state
+        self.state_changed.emit(state)
+
+    def _signal_group(self, sig):
+        if self._pgid is None:
+            return False
+        try:
+            os.killpg(self._pgid, sig)
+        except (ProcessLookupError, PermissionError):
+            return False
+        return True
+
+    def _kill_group(self):
+        self._signal_group(signal.SIGKILL)
+
+    def _read(self, channel):
+        if channel == "out":
+            data = bytes(self.process.readAllStandardOutput())
+        else:
+            data = bytes(self.process.readAllStandardError())
+        lines = (self._buffers[channel] + data).split(b"\n")
+        self._buffers[channel] = lines.pop()  # Neúplný poslední řádek počká na další data
+        signal_out = self.output if channel == "out" else self.error_output
+        for line in lines:
+            signal_out.emit(line.rstrip(b"\r").decode("utf-8", errors="replace"))
+
+    def _flush_buffers(self):
+        for channel, signal_out in (("out", self.output), ("err", self.error_output)):
+            if self._buffers[channel]:
+                signal_out.emit(self._buffers[channel].decode("utf-8", errors="replace"))
+                self._buffers[channel] = b""
+
+    def _on_started(self):
+        pid = self.process.processId()
+        self._pgid = pid if NEW_SESSION and pid > 0 else None
+        self._set_state("running")
+
+    def _on_finished(self, exit_code, exit_status):
+        self._kill_timer.stop()
+        self._read("out")
+        self._read("err")
+        self._flush_buffers()
+        # Tasky, které Nextflow nestihl ukončit, nesmí přežít
+        self._kill_group()
+        self._pgid = None
+        self._set_state("finished")
+        self.finished.emit(exit_code if exit_status == QProcess.NormalExit else -1)
+
+    def _on_error(self, error):
+        if error == QProcess.FailedToStart:
+            self.error_output.emit(f"Failed to start {self.program}: {self.process.errorString()}")
+            self._set_state("finished")
+            self.finished.emit(-1)
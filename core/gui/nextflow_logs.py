@@ -0,0 +1,134 @@
+"""Přírůstkové čtení .nextflow.log* souborů.
+
+Nextflow při každém spuštění rotuje logy (.nextflow.log -> .nextflow.log.1
+-> ... -> .nextflow.log.9), takže se soubor nedá poznat podle názvu.
+Identifikuje se otiskem první řádky (čas spuštění + příkaz) a u každého
+otisku si čtenář pamatuje, kolik bajtů už zpracoval - při dalším čtení
+pokračuje od tohoto místa.
+"""
+import os
+import re
+import glob
+import time
+import hashlib
+
+
+LOG_GLOB = ".nextflow.log*"
+
+TIMESTAMP_RE = re.compile(r"^([A-Z][a-z]{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) \[")
+SESSION_RE = re.compile(r"Session UUID: ([0-9a-f-]+)")
+RUN_NAME_RE = re.compile(r"Run name: (\S+)")
+WORK_DIR_RE = re.compile(r"Work-dir: (.+?)(?: \[[^\]]*\])?\s*$")
+TASK_REF_RE = re.compile(r"\[([0-9a-f]{2}/[0-9a-f]{6})\] (Submitted|Cached) process > (.+?)\s*$")
+TASK_DONE_RE = re.compile(r"Task completed > TaskHandler\[(.*)\]\s*$")
+# Konec běhu; fatální chyba spouštěče (např. chyba kompilace skriptu) znamená neúspěch
+SESSION_END_RE = re.compile(r"Session (aborted|await > all barriers passed)|Goodbye|\] (ERROR) +nextflow\.cli\.Launcher ")
+# Aktuální log bez konce, do kterého se tak dlouho nezapsalo, patří ukončenému procesu
+# (běžící Nextflow vypisuje stav executoru nejméně každých 5 minut)
+STALE_AFTER = 3600  # s
+
+
+def log_files(launch_dir):
+    """Logy ve složce spuštění od nejstaršího (.nextflow.log.9) po aktuální."""
+    def rotation(path):
+        suffix = path.rsplit(".nextflow.log", 1)[-1].lstrip(".")
+        return -int(suffix) if suffix.isdigit() else 0
+    paths = [p for p in glob.glob(os.path.join(launch_dir, LOG_GLOB)) if os.path.isfile(p)]
+    return sorted(paths, key=rotation)
+
+
+def is_rotated(path):
+    """Log přejmenovaný při dalším spuštění (.nextflow.log.N) - jeho běh už skončil."""
+    return os.path.basename(path) != ".nextflow.log"
+
+
+def is_finished_log(path, now=None):
+    """Běh z tohoto logu už nemůže pokračovat: log je rotovaný nebo dlouho nezměněný."""
+    if is_rotated(path):
+        return True
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return True
+    return (time.time() if now is None else now) - mtime > STALE_AFTER
+
+
+def fingerprint(path):
+    """Otisk logu podle první řádky (None pro prázdný nebo nečitelný soubor)."""
+    try:
+        with open(path, "rb") as f:
+            first = f.readline()
+    except OSError:
+        return None
+    return hashlib.sha1(first).hexdigest() if first.endswith(b"\n") else None
+
+
+def read_new_lines(path, offset=0):
+    """Vrací (řádek, offset za řádkem) od daného bajtu; nedokončený poslední řádek vynechá."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                return  # Nextflow ho ještě zapisuje
+            offset += len(raw)
+            yield raw.decode("utf-8", errors="replace").rstrip("\r\n"), offset
+
+
+def parse_timestamp(line, reference=None):
+    """Čas z začátku řádky ('Oct-09 14:33:06.911'); rok se doplní podle reference (mtime souboru)."""
+    match = TIMESTAMP_RE.match(line)
+    if not match:
+        return None
+    reference = time.time() if reference is None else reference
+    year = time.localtime(reference).tm_year
+    try:
+        parsed = time.mktime(time.strptime(f"{year}-{match.group(1)[:-4]}", "%Y-%b-%d %H:%M:%S"))
+    except ValueError:
+        return None
+    if parsed > reference + 86400:  # Log z minulého roku
+        parsed = time.mktime(time.strptime(f"{year - 1}-{match.group(1)[:-4]}", "%Y-%b-%d %H:%M:%S"))
+    return parsed + int(match.group(1)[-3:]) / 1000
+
+
+def parse_task_handler(text):
+    """'id: 1; name: FASTQC (1); status: COMPLETED; exit: 0; ...' -> dict"""
+    fields = {}
+    for part in text.split("; "):
+        key, sep, value = part.partition(": ")
+        if sep:
+            fields[key.strip()] = value.strip()
+    return fields
+
+
+def parse_event(line):
+    """Rozpozná řádek logu důležitý pro historii běhů; vrací (druh, data) nebo None.
+
+    Druhy: "session", "run_name", "work_dir", "task_ref" (hash, Submitted/Cached,
+    název tasku), "task_done" (pole z TaskHandler[...]) a "end" ("aborted"/"completed";
+    "aborted" i pro ERROR z nextflow.cli.Launcher).
+    """
+    if "Session UUID:" in line:
+        match = SESSION_RE.search(line)
+        return ("session", match.group(1)) if match else None
+    if "Run name:" in line:
+        match = RUN_NAME_RE.search(line)
+        return ("run_name", match.group(1)) if match else None
+    if "Work-dir:" in line:
+        match = WORK_DIR_RE.search(line)
+        return ("work_dir", match.group(1)) if match else None
+    if " process > " in line:
+        match = TASK_REF_RE.search(line)
+        return ("task_ref", match.groups()) if match else None
+    if "Task completed > " in line:
+        match = TASK_DONE_RE.search(line)
+        return ("task_done", parse_task_handler(match.group(1))) if match else None
+    match = SESSION_END_RE.search(line)
+    if match:
+        return ("end", "aborted" if match.group(1) == "aborted" or match.group(2) else "completed")
+    return None
+
+
+def process_of(task_name):
+    """Název procesu z názvu tasku ('FASTQC (3)' -> 'FASTQC', 'WF:ALIGN (1)' -> 'ALIGN')"""
+    name = task_name.split(" (", 1)[0].strip()
+    return name.rsplit(":", 1)[-1]
@@ -0,0 +1,1259 @@
+"""Překladač workflow do Nextflow DSL2 skriptu bez závislosti na Qt.
+
+Použití z příkazové řádky (ze složky core/gui):
+
+    python -m pipeline_compiler workflow.json -o workflows/main.nf
+
+Soubor workflow.json obsahuje seznam modulů, volitelně hrany mezi nimi
+(DAG, viz workflow_graph.py) a parametry:
+
+    {"modules": ["FASTQC", "MultiQC"],
+     "edges": [{"source": "FASTQC", "target": "MultiQC", "emit": "zip", "collect": true}],
+     "params": {"FASTQC": {"*.fastq.gz": "reads.fastq.gz"}}}
+"""
+import sys
+import os
+import re
+import copy
+import json
+import hashlib
+
+from module_registry import DEFAULT_MODULES_DIR, ModuleSpec, load_modules, user_cache_dir
+from workflow_graph import Edge, WorkflowGraph, WorkflowCycleError
+from sample_sheet import SampleSheetError, validate_sample_sheet
+
+
+DEFAULT_PIPELINE_PATH = os.path.join("core", "gui", "workflows", "main.nf")
+IMPLICIT_INPUT = "upstream_files"
+SAMPLE_CHANNEL = "SAMPLES"
+HASH_PREFIX = "// process-hash: "
+CONFIG_NAME = "nextflow.config"  # Nextflow ho načte sám ze složky spuštění
+EXECUTOR_PROFILES = ("local", "slurm", "pbs", "k8s")
+STAGE_IN_MODES = ("symlink", "rellink", "link", "copy")
+CONTAINER_ENGINES = ("docker", "singularity")
+STAGE_OUT_MODES = ("copy", "move", "rsync", "rclone", "fcp")
+
+# I/O profil: komprimované mezivýsledky, publishDir jen pro koncové výstupy,
+# 'local-scratch' navíc pouští tasky na lokálním disku uzlu
+IO_PROFILES = ("compressed", "local-scratch")
+INTERMEDIATE_FORMATS = ("bam", "cram")
+ALIGNMENT_FORMATS = ("sam", "bam", "cram")
+COMPRESSION_THREADS = 2
+COMPRESSION_LEVEL = 1  # mezivýsledek se čte jen jednou - stačí rychlá komprese
+PUBLISH_MODE = "copy"
+SCRATCH_DEFAULTS = {"_general_scratch": "true", "_general_stage_in_mode": "symlink",
+                    "_general_stage_out_mode": "move"}
+
+# Scatter/gather: odhad velikosti jednoho FASTQ záznamu pro dělení podle bajtů
+GZ_BYTES_PER_READ = 80
+FASTQ_BYTES_PER_READ = 320
+GATHER_CPUS = 4
+SAMTOOLS_CONTAINER = "quay.io/biocontainers/samtools:1.17--h00cdaf9_1"
+
+
+class PipelineError(Exception):
+    """Chyba při sestavování pipeline (prázdné workflow, neznámý modul...)."""
+
+
+def process_name_for(module_name):
+    """Název Nextflow procesu pro daný modul (např. 'BWA MEM' -> 'BWA_MEM')"""
+    return module_name.upper().replace(" ", "_")
+
+
+_MEMORY_UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4}
+_MEMORY_RE = re.compile(r"^\s*([0-9]*\.?[0-9]+)\s*\.?\s*([KMGT]?B)?\s*$", re.IGNORECASE)
+
+
+def parse_memory(value):
+    """'8 GB' / '512.MB' / '8GB' -> počet bajtů (None pro prázdnou nebo neplatnou hodnotu)"""
+    if value in (None, ""):
+        return None
+    match = _MEMORY_RE.match(str(value))
+    if not match:
+        return None
+    unit = (match.group(2) or "GB").upper()
+    return int(float(match.group(1)) * _MEMORY_UNITS[unit])
+
+
+def format_memory(size):
+    """Počet bajtů -> zápis pro Nextflow ('8 GB', '512 MB')"""
+    for unit in ("TB", "GB", "MB", "KB"):
+        if size >= _MEMORY_UNITS[unit] and size % _MEMORY_UNITS[unit] == 0:
+            return f"{size // _MEMORY_UNITS[unit]} {unit}"
+    return f"{size} B"
+
+
+def _positive_int(value):
+    try:
+        number = int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+def threads_cpus(spec, value):
+    """Počet jader podle hodnoty parametru s vlákny ('-@ 3' = hlavní vlákno + 3 navíc)."""
+    if not spec.extra_threads:
+        return _positive_int(value)
+    extra = 0 if str(value).strip() == "0" else _positive_int(value)
+    return None if extra is None else extra + 1
+
+
+def process_resources(spec, params, workflow_params):
+    """Zdroje procesu po uplatnění hodnot z GUI a rozpočtu pipeline.
+
+    Hodnota parametru s vlákny zadaná v GUI má přednost před 'cpus'
+    z JSON definice; obojí se ořízne rozpočtem _general_max_cpus/_memory.
+    """
+    resources = {}
+    cpus = None
+    if spec.threads_param:
+        default = spec.param_defaults().get(spec.threads_param)
+        # Dialog ukládá i nezměněné defaulty - za volbu uživatele bereme jen jinou hodnotu
+        if str(params.get(spec.threads_param, "")).strip() != str(default).strip():
+            cpus = threads_cpus(spec, params.get(spec.threads_param))
+    if cpus is None:
+        cpus = _positive_int(spec.resources.get("cpus"))
+    if cpus is None and spec.threads_param:
+        cpus = threads_cpus(spec, spec.param_defaults().get(spec.threads_param))
+    max_cpus = _positive_int(workflow_params.get("_general_max_cpus"))
+    if cpus is not None:
+        resources["cpus"] = min(cpus, max_cpus) if max_cpus else cpus
+
+    memory = parse_memory(spec.resources.get("memory"))
+    max_memory = parse_memory(workflow_params.get("_general_max_memory"))
+    if memory is not None:
+        resources["memory"] = format_memory(min(memory, max_memory) if max_memory else memory)
+
+    if spec.resources.get("time"):
+        resources["time"] = str(spec.resources["time"])
+    return resources
+
+
+def as_graph(workflow, module_info, workflow_params=None):
+    """Seznam modulů (starý lineární model) převede na WorkflowGraph."""
+    if isinstance(workflow, WorkflowGraph):
+        return workflow
+    return WorkflowGraph.from_modules(list(workflow), module_info, workflow_params)
+
+
+def output_index(spec, emit):
+    """Pořadí výstupu modulu podle emit/cesty (None = první výstup, None když neexistuje)."""
+    for i, (path, emit_name) in enumerate(spec.outputs):
+        if emit is None or emit in (emit_name, path):
+            return i
+    return None
+
+
+def output_channel(process_name, spec, emit):
+    """Výraz kanálu pro výstup modulu podle emit/cesty (None = první výstup)."""
+    i = output_index(spec, emit)
+    if i is not None:
+        emit_name = spec.outputs[i][1]
+        if emit_name:
+            return f"{process_name}.out.{emit_name}"
+        return f"{process_name}.out[{i}]"
+    if emit and not spec.outputs:
+        return f"{process_name}.out"
+    raise PipelineError(f"Module {spec.name} has no output '{emit}'")
+
+
+def bind_inputs(node, spec, params, upstream):
+    """Přiřadí každému vstupu modulu zdroj.
+
+    Vrací seznam (input_id, variable, hrany, uživatelská cesta). Pořadí
+    přednosti: hrana s explicitním vstupem > cesta zadaná v GUI > hrana
+    bez určeného vstupu (dřívější 'workflow_input').
+    """
+    inputs = list(spec.inputs)
+    if not inputs and upstream:
+        # Modul bez deklarovaných vstupů (např. MultiQC) dostane vše z předchozích kroků
+        inputs = [(None, IMPLICIT_INPUT)]
+
+    bindings = {input_id: [] for input_id, _ in inputs}
+    loose = []
+    for edge in upstream:
+        if edge.input_id is not None:
+            if edge.input_id not in bindings:
+                raise PipelineError(f"Module {node} has no input '{edge.input_id}'")
+            bindings[edge.input_id].append(edge)
+        else:
+            loose.append(edge)
+
+    result = []
+    for input_id, var_name in inputs:
+        edges = bindings[input_id]
+        user_path = params.get(input_id) if input_id is not None else None
+        if edges:
+            user_path = None
+        elif not user_path and loose:
+            edges, loose = loose, []
+        result.append((input_id, var_name, edges, user_path or None))
+    return result
+
+
+def input_channel_expr(channels, collect=False):
+    """Sloučí více vstupních kanálů do jednoho (fan-in).
+
+    Bez .collect() zpracuje cíl každou položku zvlášť, jakmile dorazí,
+    takže větve nečekají jedna na druhou.
+    """
+    expr = channels[0] + "".join(f".mix({ch})" for ch in channels[1:])
+    if collect:
+        expr += ".collect()"
+    return expr
+
+
+def scatter_settings(spec, params, user_path=None):
+    """Nastavení scatter módu modulu z GUI, nebo None, pokud je vypnutý.
+
+    _scatter_by   -- "reads" (velikost části v počtu čtení) nebo "bytes"
+    _scatter_size -- počet čtení, resp. velikost části ('500 MB')
+    """
+    if not spec.scatter:
+        return None
+    by = str(params.get("_scatter_by", "")).strip().lower()
+    size = str(params.get("_scatter_size", "")).strip()
+    if by not in ("reads", "bytes") or not size:
+        return None
+    input_id = spec.scatter.get("input") or spec.input_ids[0]
+    if by == "reads":
+        reads = _positive_int(size)
+    else:
+        # splitFastq dělí podle záznamů - velikost v bajtech převedeme odhadem
+        chunk_bytes = parse_memory(size)
+        compressed = str(user_path or input_id).endswith(".gz")
+        per_read = GZ_BYTES_PER_READ if compressed else FASTQ_BYTES_PER_READ
+        reads = max(1, chunk_bytes // per_read) if chunk_bytes else None
+    if not reads:
+        raise PipelineError(f"Invalid scatter chunk size for {spec.name}: '{size}'")
+    outputs = [path for path, _ in spec.outputs]
+    output = spec.scatter.get("output") or (outputs[0] if outputs else None)
+    if output not in outputs:
+        raise PipelineError(f"Module {spec.name} has no scatter output '{output}'")
+    return {"input": input_id, "output": output, "reads": reads,
+            "compress": str(user_path or input_id).endswith(".gz")}
+
+
+def gather_definition(spec, output):
+    """Container a příkaz slučovacího kroku (z JSON 'scatter.gather' nebo výchozí)."""
+    gather = dict(spec.scatter.get("gather") or {})
+    if "command" not in gather:
+        ext = output.rsplit(".", 1)[-1].lower()
+        if ext in ("sam", "bam"):
+            gather["command"] = f"samtools merge -@ ${{task.cpus - 1}} -O {ext.upper()} -o {{output}} {{chunks}}"
+            gather.setdefault("container", SAMTOOLS_CONTAINER)
+        else:
+            gather["command"] = "cat {chunks} > {output}"
+    return gather.get("container", ""), gather["command"]
+
+
+def render_command(spec, params, input_vars, resources, command=None, threads=None,
+                   output_names=None):
+    """Dosadí do šablony příkazu výstupy, proměnné vstupů, parametry a ${task.cpus}.
+
+    threads -- jádra pro nástroj (spojený proces je dělí mezi členy), jinak ${task.cpus}
+    """
+    if command is None:
+        command = spec.command
+    if output_names is None:
+        output_names = {path: path for path, _ in spec.outputs if not has_glob(path)}
+    for path, name in output_names.items():
+        command = command.replace(f"{{{path}}}", name)
+    # Počet vláken nástroje = počet jader, která Nextflow tasku skutečně přidělil
+    if spec.threads_param and "cpus" in resources:
+        if threads is None:
+            threads = "${task.cpus - 1}" if spec.extra_threads else "${task.cpus}"
+        elif spec.extra_threads:
+            threads = max(0, int(threads) - 1)
+        command = command.replace(f"{{{spec.threads_param}}}", str(threads))
+    # Nahrazení zástupných symbolů pro vstupy
+    for input_id, var_name in input_vars.items():
+        command = command.replace(f"{{{input_id}}}", f"${{{var_name}}}")
+    # Nahrazení parametrů (seřazeně a bez okrajových mezer, aby text nezávisel na pořadí v dict);
+    # parametr, který workflow neuložilo, dostane výchozí hodnotu z definice modulu
+    params = {**spec.param_defaults(), **params}
+    for pname in sorted(params, key=str):
+        if f"{{{pname}}}" in command:
+            value = params[pname]
+            command = command.replace(f"{{{pname}}}", str(value if value is not None else "").strip())
+
+    # Nahrazení obecných zástupných symbolů (např. pro multiqc)
+    command = command.replace("{*}", ".")
+    command = command.replace("{results}", ".")
+    return command
+
+
+def _stdout_redirect(output_path):
+    return re.compile(r"\s*>\s*" + re.escape(f"{{{output_path}}}"))
+
+
+def _fusion_problem(graph, module_info, bindings, scatter, edge):
+    """Důvod, proč hranu nelze nahradit rourou (None = lze)."""
+    source, target = module_info[edge.source], module_info[edge.target]
+    if edge.source in scatter or edge.target in scatter:
+        return "modules split into chunks cannot be piped"
+    stdout = source.streaming.get("stdout")
+    index = output_index(source, edge.emit)
+    if not stdout or index is None or source.outputs[index][0] != stdout:
+        return f"{edge.source} cannot write '{edge.emit or 'its output'}' to stdout"
+    if not _stdout_redirect(stdout).search(source.command):
+        return f"command of {edge.source} does not redirect {{{stdout}}}"
+    if len(graph.downstream(edge.source)) > 1:
+        return f"output of {edge.source} is read by other modules too"
+    stdin = target.streaming.get("stdin")
+    binding = next((b for b in bindings[edge.target] if edge in b[2]), None)
+    if not stdin or binding is None or binding[0] != stdin:
+        return f"{edge.target} cannot read this input from stdin"
+    if len(binding[2]) > 1:
+        return f"input {stdin} of {edge.target} has more than one source"
+    return None
+
+
+def fusion_chains(graph, module_info, bindings, scatter=()):
+    """Najde řetězce modulů spojených hranami s 'fuse' (producent | konzument | ...).
+
+    Vrací {první modul: [moduly řetězce]}. Hrana, kterou nelze nahradit
+    rourou (chybí 'streaming' v JSON, výstup čte i jiný modul...), je PipelineError.
+    """
+    following, preceding = {}, {}
+    for edge in graph.edges:
+        if not edge.fuse:
+            continue
+        problem = _fusion_problem(graph, module_info, bindings, scatter, edge)
+        if problem:
+            raise PipelineError(f"Cannot pipe {edge.source} into {edge.target}: {problem}")
+        following[edge.source] = edge.target
+        preceding[edge.target] = edge.source
+    chains = {}
+    for node in graph.nodes:
+        if node in following and node not in preceding:
+            chain = [node]
+            while chain[-1] in following:
+                chain.append(following[chain[-1]])
+            chains[node] = chain
+    return chains
+
+
+_DURATION_RE = re.compile(r"([0-9]*\.?[0-9]+)\s*(ms|d|h|m|s)", re.IGNORECASE)
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value):
+    """'8h' / '1d 2h' / '30 min' -> počet sekund (0 pro neplatnou hodnotu)"""
+    return sum(float(number) * _DURATION_UNITS[unit.lower()]
+               for number, unit in _DURATION_RE.findall(str(value)))
+
+
+def merge_resources(resources, workflow_params):
+    """Zdroje spojeného procesu: části roury běží současně, cpus a paměť se sčítají."""
+    merged = {}
+    cpus = sum(r.get("cpus", 0) for r in resources)
+    max_cpus = _positive_int(workflow_params.get("_general_max_cpus"))
+    if cpus:
+        merged["cpus"] = min(cpus, max_cpus) if max_cpus else cpus
+    memory = sum(parse_memory(r["memory"]) for r in resources if "memory" in r)
+    max_memory = parse_memory(workflow_params.get("_general_max_memory"))
+    if memory:
+        merged["memory"] = format_memory(min(memory, max_memory) if max_memory else memory)
+    times = [r["time"] for r in resources if "time" in r]
+    if times:
+        merged["time"] = max(times, key=parse_duration)
+    return merged
+
+
+def fused_container(chain, module_info, workflow_params):
+    """Container pro spojený proces: '_fused_container' některého modulu, jinak společný."""
+    for node in chain:
+        container = workflow_params.get(node, {}).get("_fused_container")
+        if container:
+            return container
+    containers = {module_info[node].container for node in chain} - {""}
+    if len(containers) > 1:
+        raise PipelineError(
+            f"Piped modules {', '.join(chain)} use different containers; "
+            f"set '_fused_container' to an image with all the tools"
+        )
+    return containers.pop() if containers else ""
+
+
+def io_profile(workflow_params):
+    """Zvolený I/O profil ('' = vypnutý)."""
+    return _config_setting(workflow_params, "_general_io_profile", IO_PROFILES.__contains__,
+                           "I/O profile must be one of " + ", ".join(IO_PROFILES) + ", got '{value}'")
+
+
+def alignment_format(path):
+    """'sam' / 'bam' / 'cram' podle přípony (None pro jiné soubory)."""
+    ext = str(path or "").rsplit(".", 1)[-1].lower()
+    return ext if ext in ALIGNMENT_FORMATS else None
+
+
+def accepted_formats(spec, input_id):
+    """Formáty zarovnání, které vstup přečte ('compression.accepts' v JSON, jinak podle přípony)."""
+    accepts = spec.compression.get("accepts", {})
+    if input_id in accepts:
+        return set(accepts[input_id])
+    return {alignment_format(input_id)} - {None}
+
+
+def compressed_intermediates(graph, module_info, workflow_params):
+    """Nahradí SAM mezivýsledky za BAM/CRAM tam, kde je všichni konzumenti přečtou.
+
+    Vrací (graph, module_info, [zpráva]) - upravené kopie, původní objekty
+    zůstanou beze změny. Nástroj zapíše BAM sám ('compression.bam_args'
+    v JSON), nebo se jeho stdout převede přes samtools view; to potřebuje
+    samtools v containeru ('_io_container' modulu, pokud ho image nemá).
+    Výstup spojený rourou ani koncový výstup se nemění.
+    """
+    if not io_profile(workflow_params):
+        return graph, module_info, []
+    target_format = _config_setting(
+        workflow_params, "_general_intermediate_format", INTERMEDIATE_FORMATS.__contains__,
+        "Intermediate format must be one of " + ", ".join(INTERMEDIATE_FORMATS) + ", got '{value}'") or "bam"
+    reference = str(workflow_params.get("_general_reference", "") or "").strip()
+    if target_format == "cram" and not reference:
+        raise PipelineError("CRAM intermediates need a reference FASTA (Reference for CRAM)")
+    threads = _config_setting(workflow_params, "_general_compression_threads", _positive_int,
+                              "Compression threads must be a positive number, got '{value}'")
+    level = _config_setting(workflow_params, "_general_compression_level",
+                            lambda value: value.isdigit() and int(value) <= 9,
+                            "Compression level must be 0-9, got '{value}'")
+    threads, level = threads or str(COMPRESSION_THREADS), level or str(COMPRESSION_LEVEL)
+
+    consumers = {}  # (modul, pořadí výstupu) -> [(hrana, id vstupu cíle)]
+    for node in graph.nodes:
+        upstream = graph.upstream(node)
+        for input_id, _, edges, _ in bind_inputs(node, module_info[node], workflow_params.get(node, {}), upstream):
+            for edge in edges:
+                index = output_index(module_info[edge.source], edge.emit)
+                consumers.setdefault((edge.source, index), []).append((edge, input_id))
+    piped = {node for edge in graph.edges if edge.fuse for node in (edge.source, edge.target)}
+
+    specs, renamed, notes = {}, {}, []
+    for node in graph.nodes:
+        spec = module_info[node]
+        params = workflow_params.get(node, {})
+        for index, (path, _) in enumerate(spec.outputs):
+            readers = consumers.get((node, index))
+            if alignment_format(path) != "sam" or not readers or any(e.fuse for e, _ in readers):
+                continue
+            accepted = set(ALIGNMENT_FORMATS)
+            for edge, input_id in readers:
+                accepted &= accepted_formats(module_info[edge.target], input_id) if input_id else set()
+            native = spec.compression.get("bam_args", {}).get(path)
+            stdout = spec.streaming.get("stdout") == path and _stdout_redirect(path).search(spec.command)
+            container = params.get("_io_container") or (spec.container if "samtools" in spec.container else "")
+            if target_format == "cram" and "cram" in accepted and stdout and container:
+                fmt = "cram"
+            elif "bam" in accepted and (native or stdout and container):
+                fmt = "bam"
+            else:
+                if "bam" not in accepted:
+                    reason = "not every module reading it accepts BAM"
+                else:
+                    reason = "set an I/O container with samtools for it"
+                notes.append(f"{path} of {node} stays SAM: {reason}")
+                continue
+
+            new_path = f"{path[:-len('.sam')]}.{fmt}"
+            new_spec = specs.get(node) or copy.copy(spec)
+            if fmt == "bam" and native:
+                new_spec.command = f"{new_spec.command.strip()} {native.replace('{level}', level)}"
+            else:
+                options = f"{fmt},level={level}"
+                if fmt == "cram":
+                    # Reference uvnitř CRAM - konzumenti ji nepotřebují
+                    options += f",embed_ref=1 -T {_groovy_str(os.path.abspath(reference))}"
+                convert = f" | samtools view -@ {threads} -O {options} -o {{{new_path}}} -"
+                new_spec.command = _stdout_redirect(path).sub(lambda _: convert, new_spec.command)
+                if node not in piped:  # spojený proces má pipefail sám
+                    new_spec.command = "set -o pipefail; " + new_spec.command
+                new_spec.container = container
+            new_spec.outputs = tuple((new_path if p == path else p, e) for p, e in new_spec.outputs)
+            if new_spec.scatter and new_spec.scatter.get("output") == path:
+                new_spec.scatter = {**new_spec.scatter, "output": new_path}
+            specs[node] = new_spec
+            renamed[(node, path)] = new_path
+            notes.append(f"{path} of {node} is written as {new_path}")
+
+    if not specs:
+        return graph, module_info, notes
+    edges = [Edge(e.source, e.target, renamed.get((e.source, e.emit), e.emit), e.input_id, e.collect, e.fuse)
+             for e in graph.edges]
+    return WorkflowGraph(graph.nodes, edges), {**module_info, **specs}, notes
+
+
+def final_outputs(graph, module_info):
+    """{modul: [(cesta, emit)]} výstupů, které nečte žádný další modul."""
+    consumed = {(edge.source, output_index(module_info[edge.source], edge.emit)) for edge in graph.edges}
+    return {node: [o for i, o in enumerate(module_info[node].outputs) if (node, i) not in consumed]
+            for node in graph.nodes}
+
+
+def publish_directives(outputs, finals, names=None, meta=False):
+    """publishDir do params.outdir jen pro koncové výstupy procesu (mezivýsledky zůstanou ve work/).
+
+    Soubor vzorku s pevným názvem (bez ${meta.id} i bez masky) jde do params.outdir/<vzorek>,
+    jinak by se vzorky navzájem přepsaly.
+    """
+    if not finals:
+        return []
+    names = names or {}
+    fixed = [path for path, _ in finals if meta and path not in names and not has_glob(path)]
+    if len(finals) == len(outputs) and not fixed:
+        return [f"publishDir params.outdir, mode: '{PUBLISH_MODE}'"]
+    directives = [f"publishDir params.outdir, mode: '{PUBLISH_MODE}', "
+                  f"pattern: {_groovy_str(names[path].replace('${meta.id}', '*'))}"
+                  for path, _ in finals if path in names]
+    directives += [f"publishDir params.outdir, mode: '{PUBLISH_MODE}', pattern: {_groovy_str(path)}"
+                   for path, _ in finals if path not in names and path not in fixed]
+    directives += [f"publishDir \"${{params.outdir}}/${{meta.id}}\", mode: '{PUBLISH_MODE}', "
+                   f"pattern: {_groovy_str(path)}" for path in fixed]
+    return directives
+
+
+def process_block(process_name, container, resources, input_lines, output_lines, command, directives=()):
+    """Řádky jedné definice 'process' v Nextflow skriptu (directives = další řádky, např. publishDir)."""
+    lines = [f"process {process_name} {{"]
+    if container:
+        lines.append(f"    container '{container}'")
+    if "cpus" in resources:
+        lines.append(f"    cpus {resources['cpus']}")
+    if "memory" in resources:
+        lines.append(f"    memory '{resources['memory']}'")
+    if "time" in resources:
+        lines.append(f"    time '{resources['time']}'")
+    lines.extend(f"    {line}" for line in directives)
+    lines.append("    input:")
+    lines.extend(f"    {line}" for line in input_lines)
+    lines.append("    output:")
+    lines.extend(f"    {line}" for line in output_lines)
+    lines.append("    script:")
+    lines.append('    """')
+    lines.append(f"    {command.strip()}")
+    lines.append('    """')
+    lines.append("}")
+    # Hash obsahu bloku - podle něj se pozná, které procesy se změnily (a Nextflow je přepočítá)
+    digest = hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()[:16]
+    return [f"{HASH_PREFIX}{digest}"] + lines + [""]
+
+
+def output_lines_for(outputs, meta=False, names=None):
+    """Řádky output: sekce; names = {výstup: název podle vzorku} (jen soubory, které příkaz pojmenuje)."""
+    names = names or {}
+    lines = []
+    for path, emit_name in outputs:
+        if meta:
+            # Výstup nese meta mapu vzorku dál
+            line = f'tuple val(meta), path("{names.get(path, path)}")'
+        else:
+            line = f"path '{path}'"
+        # Starý formát bez 'emit'
+        lines.append(f"{line}, emit: {emit_name}" if emit_name else line)
+    return lines
+
+
+def input_line(var_name, meta=False):
+    return f"tuple val(meta), path({var_name})" if meta else f"path {var_name}"
+
+
+def sample_output_name(path):
+    """Výstup tasku pojmenovaný podle vzorku ('aligned.sam' -> '${meta.id}.aligned.sam')"""
+    return path if has_glob(path) else f"${{meta.id}}.{path}"
+
+
+def sample_output_names(spec, command=None):
+    """Výstupy, které příkaz pojmenuje ({cesta} v šabloně), s názvem podle vzorku.
+
+    Soubor, který nástroj zapíše pod pevným názvem (STAR: Aligned.out.sam),
+    se přejmenovat nedá - zůstane, jak je, každý task má vlastní složku.
+    """
+    command = spec.command if command is None else command
+    return {path: sample_output_name(path) for path, _ in spec.outputs
+            if not has_glob(path) and f"{{{path}}}" in command}
+
+
+def is_reads_input(input_id):
+    """Vstup se sekvenačními čteními - dostane vzorky ze sample sheetu."""
+    text = str(input_id or "").lower()
+    return "fastq" in text or text.endswith((".fq", ".fq.gz"))
+
+
+def _groovy_str(value):
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def sample_source(sheet):
+    """Zdroj vzorků pro kanál SAMPLES: CSV/TSV sample sheet nebo vzor párů souborů.
+
+    Vrací (řádky před workflow blokem, výraz kanálu, paired); paired je
+    None, pokud sheet míchá single-end a paired-end vzorky. Sheet se
+    jen ověří po řádcích; na řádky ho rozdělí až Nextflow (splitCsv),
+    takže velikost kohorty nehraje při generování roli.
+    """
+    if has_glob(sheet):
+        # data/*_R{1,2}.fastq.gz -> (id, [R1, R2])
+        channel = (f"Channel.fromFilePairs({_groovy_str(sheet)})"
+                   "\n        .map { id, reads -> tuple([id: id], reads) }")
+        return [], channel, True
+    try:
+        summary = validate_sample_sheet(sheet, check_files=False)
+    except SampleSheetError as e:
+        raise PipelineError(str(e)) from e
+    if not summary.valid:
+        problems = summary.errors[:3] or [summary.describe()]
+        raise PipelineError(f"Invalid sample sheet {sheet}: " + "; ".join(problems))
+
+    path = os.path.abspath(sheet)
+    columns = summary.columns
+    # Relativní cesty v sheetu platí vůči jeho složce (stejně jako při kontrole v GUI)
+    base_dir = _groovy_str(os.path.dirname(path) + "/")
+    helper = [
+        "def sample_file(path) {",
+        f"    path.startsWith('/') || path.contains('://') ? file(path) : file({base_dir} + path)",
+        "}",
+        "",
+    ]
+    meta = f"[id: row[{_groovy_str(columns['sample'])}]]"
+    if summary.metadata:
+        meta += f" + row.subMap([{', '.join(_groovy_str(c) for c in summary.metadata)}])"
+    read1 = f"sample_file(row[{_groovy_str(columns['read1'])}])"
+    if columns["read2"]:
+        read2_col = f"row[{_groovy_str(columns['read2'])}]"
+        reads = f"{read2_col} ? [{read1}, sample_file({read2_col})] : {read1}"
+    else:
+        reads = read1
+    sep = "\\t" if summary.delimiter == "\t" else summary.delimiter
+    channel = (f"Channel.fromPath({_groovy_str(path)})"
+               f"\n        .splitCsv(header: true, sep: '{sep}')"
+               f"\n        .map {{ row -> tuple({meta}, {reads}) }}")
+    paired = summary.paired == summary.samples or (None if summary.paired else False)
+    return helper, channel, paired
+
+
+def file_samples(pattern):
+    """Kanál (meta, reads) ze vzoru souborů mimo sample sheet; vrací (výraz kanálu, paired).
+
+    Páry (S1_R{1,2}.fastq.gz) se čtou přes fromFilePairs, aby R1 a R2
+    zůstaly spolu; jinak je každý soubor samostatný vzorek.
+    """
+    if re.search(r"\{1,2\}|\[12\]", pattern):
+        return (f"Channel.fromFilePairs({_groovy_str(pattern)})"
+                "\n        .map { id, reads -> tuple([id: id], reads) }"), True
+    return (f"Channel.fromPath({_groovy_str(pattern)})"
+            "\n        .map { reads -> tuple([id: reads.simpleName], reads) }"), False
+
+
+def compile_pipeline(workflow, module_info, workflow_params):
+    """Vrátí text Nextflow DSL2 skriptu pro workflow (seznam modulů nebo WorkflowGraph)."""
+    graph = as_graph(workflow, module_info, workflow_params)
+    if not graph.nodes:
+        raise PipelineError("Workflow is empty.")
+    unknown = [m for m in graph.nodes if m not in module_info]
+    if unknown:
+        raise PipelineError(f"Unknown modules in workflow: {', '.join(unknown)}")
+    try:
+        order = graph.topological_order()
+    except WorkflowCycleError as e:
+        raise PipelineError(str(e)) from e
+    # I/O profil: SAM mezivýsledky jako BAM/CRAM (kopie grafu a definic modulů)
+    graph, module_info, _ = compressed_intermediates(graph, module_info, workflow_params)
+
+    upstream = {node: [] for node in graph.nodes}
+    for edge in graph.edges:
+        upstream[edge.target].append(edge)
+    process_names = {node: process_name_for(node) for node in order}
+    bindings = {
+        node: bind_inputs(node, module_info[node], workflow_params.get(node, {}), upstream[node])
+        for node in order
+    }
+    scatter = {}  # modul -> nastavení scatter/gather
+    for node in order:
+        params = workflow_params.get(node, {})
+        spec = module_info[node]
+        user_path = next((b[3] for b in bindings[node] if spec.scatter and b[0] == spec.scatter.get("input")), None)
+        settings = scatter_settings(spec, params, user_path)
+        if settings:
+            settings["process"] = f"{process_names[node]}_GATHER"
+            scatter[node] = settings
+
+    # Rozdělovaný vzor souborů: každý soubor (pár) se dělí a slučuje zvlášť, jako vzorek ze sample sheetu
+    file_sample_inputs = {}  # (modul, id vstupu) -> (výraz kanálu, paired)
+    for node, settings in scatter.items():
+        user_path = next((b[3] for b in bindings[node] if b[0] == settings["input"]), None)
+        if user_path and has_glob(user_path):
+            file_sample_inputs[(node, settings["input"])] = file_samples(user_path)
+
+    # Řetězce spojené rourou tvoří jeden proces; ostatní moduly jsou skupina samy pro sebe
+    chains = fusion_chains(graph, module_info, bindings, scatter)
+    group_of = {node: [node] for node in order}
+    for chain in chains.values():
+        for node in chain:
+            group_of[node] = chain
+    group_names = {node: "_".join(process_names[n] for n in group_of[node]) for node in order}
+
+    def group_bindings(group):
+        # Vstupy procesu: vstupy všech modulů skupiny kromě těch, které čtou ze stdin
+        result = []
+        for i, node in enumerate(group):
+            stdin = module_info[node].streaming.get("stdin") if i else None
+            result.extend((node, b) for b in bindings[node] if not (i and b[0] == stdin))
+        return result
+
+    fused_outputs = {}  # poslední modul řetězce -> výstupy spojeného procesu
+    for chain in chains.values():
+        outputs = []
+        for node in chain:
+            stdout = module_info[node].streaming.get("stdout") if node != chain[-1] else None
+            outputs.extend(o for o in module_info[node].outputs if o[0] != stdout)
+        fused_outputs[chain[-1]] = outputs
+
+    # Sample sheet: čtení bez jiného zdroje dostanou kanál (meta, reads) a meta
+    # se pak nese všemi moduly, které zpracovávají jednotlivé vzorky
+    sheet = str(workflow_params.get("_general_sample_sheet", "")).strip()
+    sheet_helper, sheet_channel, paired = sample_source(sheet) if sheet else ([], None, False)
+    sample_inputs = set()  # (modul, id vstupu) napojené přímo na SAMPLES
+    tuple_inputs = set()   # (modul, id vstupu) ve tvaru tuple val(meta), path(...)
+    per_sample = set()     # moduly, jejichž výstupy nesou meta
+    for node in order if sheet or file_sample_inputs else ():
+        group = group_of[node]
+        if node != group[-1]:
+            continue
+        found = []
+        for member, (input_id, var_name, edges, user_path) in group_bindings(group):
+            if (member, input_id) in file_sample_inputs:
+                found.append((member, input_id))
+            elif sheet and not edges and not user_path and is_reads_input(input_id):
+                sample_inputs.add((member, input_id))
+                found.append((member, input_id))
+            elif edges and var_name != IMPLICIT_INPUT and not any(e.collect for e in edges):
+                kinds = {e.source in per_sample for e in edges}
+                if len(kinds) > 1:
+                    raise PipelineError(f"Input {input_id} of {member} mixes per-sample and shared files")
+                if kinds == {True}:
+                    found.append((member, input_id))
+        if len(found) > 1:
+            raise PipelineError(
+                f"Module {node} has several per-sample inputs ({', '.join(i for _, i in found)}); "
+                "only one input can carry samples"
+            )
+        if found:
+            tuple_inputs.update(found)
+            per_sample.update(group)
+
+    def source_channel(edge):
+        spec = module_info[edge.source]
+        if edge.source in fused_outputs:
+            # Výstup posledního modulu roury je výstupem spojeného procesu
+            index = output_index(spec, edge.emit)
+            emit = spec.outputs[index][0] if index is not None else edge.emit
+            fused_spec = ModuleSpec(spec.name, outputs=fused_outputs[edge.source])
+            return output_channel(group_names[edge.source], fused_spec, emit)
+        # Výstup rozděleného modulu čtou další kroky až ze slučovacího procesu
+        settings = scatter.get(edge.source)
+        if settings:
+            channel = output_channel(process_names[edge.source], spec, edge.emit)
+            gathered = output_channel(process_names[edge.source], spec, settings["output"])
+            if channel == gathered:
+                return channel.replace(process_names[edge.source], settings["process"], 1)
+            return channel
+        return output_channel(process_names[edge.source], spec, edge.emit)
+
+    script_lines = [
+        "#!/usr/bin/env nextflow",
+        "",
+        "nextflow.enable.dsl=2",
+        ""
+    ]
+
+    # --- Parametry a kanály pro workflow blok ---
+    workflow_params_lines = []
+    input_channels = {}  # (modul, id vstupu) -> název kanálu
+    value_channels = set()
+    general_output_dir = workflow_params.get("_general_output_dir", "")
+
+    for module_name in order:
+        user_inputs = [b for b in bindings[module_name] if b[3]]
+        process_inputs = len(group_bindings(group_of[module_name]))
+        for input_id, var_name, _, user_path in user_inputs:
+            if len(module_info[module_name].inputs) == 1:
+                channel_name = f"{process_names[module_name]}_IN"
+            else:
+                channel_name = f"{process_names[module_name]}_{var_name.upper()}"
+            scattered = module_name in scatter and scatter[module_name]["input"] == input_id
+            if (module_name, input_id) in file_sample_inputs:
+                channel = file_sample_inputs[(module_name, input_id)][0]
+            elif process_inputs > 1 and not has_glob(user_path) and not scattered:
+                # Jediný soubor (např. reference) jako value kanál - použije se pro každý task
+                channel = f"Channel.value(file('{user_path}'))"
+                value_channels.add(channel_name)
+            else:
+                channel = f"Channel.fromPath('{user_path}')"
+            workflow_params_lines.append(f"    {channel_name} = {channel}")
+            input_channels[(module_name, input_id)] = channel_name
+
+    if sample_inputs:
+        workflow_params_lines.append(f"    {SAMPLE_CHANNEL} = {sheet_channel}")
+        script_lines.extend(sheet_helper)
+
+    if general_output_dir:
+        workflow_params_lines.append(f"    params.outdir = '{general_output_dir}'")
+
+    # Do params.outdir se publikují jen výstupy, které už nikdo nečte
+    finals = final_outputs(graph, module_info) if general_output_dir and io_profile(workflow_params) else None
+
+    # --- Procesy ---
+    for module_name in order:
+        spec = module_info[module_name]
+        params = workflow_params.get(module_name, {})
+        meta = module_name in per_sample
+        if len(group_of[module_name]) > 1:
+            if module_name == group_of[module_name][-1]:
+                outputs = fused_outputs[module_name]
+                published = [o for o in outputs if any(o in finals[n] for n in group_of[module_name])] if finals else []
+                names = {}
+                for node in group_of[module_name] if meta else ():
+                    names.update(sample_output_names(module_info[node]))
+                script_lines.extend(fused_process_block(
+                    group_of[module_name], group_names[module_name], module_info,
+                    workflow_params, group_bindings(group_of[module_name]), outputs,
+                    tuple_inputs, meta, publish_directives(outputs, published, names, meta)
+                ))
+            continue
+        resources = process_resources(spec, params, workflow_params)
+        published = finals[module_name] if finals else []
+        if module_name in scatter:
+            # Části se publikují až sloučené
+            published = [o for o in published if o[0] != scatter[module_name]["output"]]
+
+        input_lines = []
+        input_vars = {}  # Mapování id vstupu na proměnnou (např. 'reads')
+        for input_id, var_name, _, _ in bindings[module_name]:
+            input_lines.append(input_line(var_name, (module_name, input_id) in tuple_inputs))
+            if input_id is not None:
+                input_vars[input_id] = var_name
+
+        output_names = sample_output_names(spec) if meta else None
+        script_lines.extend(process_block(
+            process_names[module_name], spec.container, resources, input_lines,
+            output_lines_for(spec.outputs, meta, output_names),
+            render_command(spec, params, input_vars, resources, output_names=output_names),
+            publish_directives(spec.outputs, published, output_names, meta)
+        ))
+
+        if module_name in scatter:
+            # Slučovací krok: části ze všech tasků -> jeden výstup se stejným názvem
+            settings = scatter[module_name]
+            container, command = gather_definition(spec, settings["output"])
+            output_name = sample_output_name(settings["output"]) if meta else settings["output"]
+            names = {settings["output"]: output_name}
+            command = command.replace("{output}", output_name).replace("{chunks}", "${chunks}")
+            gather_resources = process_resources(
+                ModuleSpec(spec.name, resources={"cpus": GATHER_CPUS}), {}, workflow_params)
+            output = [(path, emit) for path, emit in spec.outputs if path == settings["output"]]
+            published = [o for o in output if o in finals[module_name]] if finals else []
+            script_lines.extend(process_block(
+                settings["process"], container, gather_resources,
+                [input_line("chunks, stageAs: 'chunk_*/*'", meta)], output_lines_for(output, meta, names), command,
+                publish_directives(output, published, names, meta)
+            ))
+
+    # --- Workflow blok ---
+    # Procesy se volají v topologickém pořadí; nezávislé větve nesdílí kanály,
+    # takže je Nextflow spouští souběžně (fan-out/fan-in přes .mix()).
+    script_lines.append("workflow {")
+    script_lines.extend(workflow_params_lines)
+
+    for module_name in order:
+        group = group_of[module_name]
+        if module_name != group[-1]:
+            continue  # Spojený proces se volá až na místě posledního modulu roury
+        settings = scatter.get(module_name)
+        args = []
+        for node, (input_id, var_name, edges, user_path) in group_bindings(group):
+            if edges:
+                collect = var_name == IMPLICIT_INPUT or any(e.collect for e in edges)
+                channels = []
+                for e in edges:
+                    channel = source_channel(e)
+                    if e.source in per_sample and (node, input_id) not in tuple_inputs:
+                        # Sdílený vstup (např. MultiQC) dostane jen soubory bez meta
+                        channel += ".map { meta, files -> files }"
+                    channels.append(channel)
+                arg = input_channel_expr(channels, collect)
+            elif user_path:
+                arg = input_channels[(node, input_id)]
+            elif (node, input_id) in sample_inputs:
+                arg = SAMPLE_CHANNEL
+            else:
+                continue
+            if settings and input_id == settings["input"]:
+                # Každá část vstupu je samostatný task
+                compress = ", compress: true" if settings["compress"] else ""
+                pe = file_sample_inputs[(node, input_id)][1] if (node, input_id) in file_sample_inputs else paired
+                if (node, input_id) in tuple_inputs:
+                    if pe is None:
+                        raise PipelineError(f"Cannot split mixed single-end and paired-end samples for {node}")
+                    compress += ", elem: 1" + (", pe: true" if pe else "")
+                    # Počet částí vzorku jde s meta až ke sloučení (groupKey)
+                    arg += (".map { meta, reads -> tuple(meta + [_chunks: Math.ceil((reads instanceof List ? "
+                            f"reads[0] : reads).countFastq() / {settings['reads']}) as int], reads) }}")
+                arg += f".splitFastq(by: {settings['reads']}, file: true{compress})"
+                if (node, input_id) in tuple_inputs and pe:
+                    arg += ".map { meta, read1, read2 -> tuple(meta, [read1, read2]) }"
+            elif settings and not arg.endswith(".collect()") and arg not in value_channels:
+                # Ostatní vstupy (reference, index...) musí být k dispozici pro každou část
+                arg += ".collect()"
+            args.append(arg)
+        script_lines.append(f"    {group_names[module_name]}({', '.join(args)})")
+        if settings:
+            chunks = output_channel(process_names[module_name], module_info[module_name], settings["output"])
+            # Části jednoho vzorku (souboru, páru) se sloučí zvlášť, jinak všechny dohromady;
+            # groupKey s počtem částí pustí vzorek dál hned, jak má všechny
+            grouped = (".map { meta, chunk -> tuple(groupKey(meta.findAll { k, v -> k != '_chunks' }, "
+                       "meta._chunks), chunk) }.groupTuple().map { key, chunks -> tuple(key.getGroupTarget(), "
+                       "chunks) }") if module_name in per_sample else ".collect()"
+            script_lines.append(f"    {settings['process']}({chunks}{grouped})")
+
+    script_lines.append("}")
+    return "\n".join(script_lines)
+
+
+def fused_process_block(chain, process_name, module_info, workflow_params, inputs, outputs,
+                        tuple_inputs=(), meta=False, directives=()):
+    """Jeden proces pro řetězec modulů: příkazy spojené rourou, mezivýstupy se nezapisují."""
+    member_resources = [
+        process_resources(module_info[node], workflow_params.get(node, {}), workflow_params)
+        for node in chain
+    ]
+    resources = merge_resources(member_resources, workflow_params)
+    requested = sum(r.get("cpus", 0) for r in member_resources)
+
+    input_lines, input_vars, used = [], {node: {} for node in chain}, set()
+    for node, (input_id, var_name, _, _) in inputs:
+        if var_name in used:  # Např. dva moduly se starým 'input_files'
+            var_name = f"{process_name_for(node).lower()}_{var_name}"
+        used.add(var_name)
+        input_lines.append(input_line(var_name, (node, input_id) in tuple_inputs))
+        if input_id is not None:
+            input_vars[node][input_id] = var_name
+
+    commands, names = [], {}
+    for i, node in enumerate(chain):
+        spec = module_info[node]
+        command = spec.command
+        if i:
+            command = command.replace(f"{{{spec.streaming['stdin']}}}", "-")
+        if node != chain[-1]:
+            command = _stdout_redirect(spec.streaming["stdout"]).sub("", command)
+        cpus = member_resources[i].get("cpus")
+        if cpus and resources.get("cpus", requested) < requested:
+            # Rozpočet pipeline nestačí na součet - vlákna se rozdělí poměrně
+            cpus = max(1, cpus * resources["cpus"] // requested)
+        output_names = sample_output_names(spec, command) if meta else None
+        commands.append(render_command(spec, workflow_params.get(node, {}), input_vars[node],
+                                       member_resources[i], command=command, threads=cpus,
+                                       output_names=output_names).strip())
+        names.update(output_names or {})
+
+    return process_block(
+        process_name, fused_container(chain, module_info, workflow_params), resources,
+        input_lines, output_lines_for(outputs, meta, names), "set -o pipefail; " + " | ".join(commands),
+        directives
+    )
+
+
+def has_glob(path):
+    return any(ch in path for ch in "*?[{")
+
+
+_HASH_RE = re.compile(r"^" + re.escape(HASH_PREFIX) + r"([0-9a-f]+)\s*\nprocess\s+(\w+)", re.MULTILINE)
+_CALL_RE = re.compile(r"^    (\w+)\((.*)\)\s*$", re.MULTILINE)
+_ASSIGN_RE = re.compile(r"^    (\w+) = (.*(?:\n        .*)*)", re.MULTILINE)
+_OUT_RE = re.compile(r"\b(\w+)\.out\b")
+
+
+def process_hashes(script):
+    """{název procesu: hash bloku} podle komentářů ve vygenerovaném skriptu."""
+    return {name: digest for digest, name in _HASH_RE.findall(script or "")}
+
+
+def _workflow_body(script):
+    parts = (script or "").split("\nworkflow {", 1)
+    return parts[1] if len(parts) == 2 else ""
+
+
+def process_calls(script):
+    """{proces: argumenty volání}; názvy kanálů jsou nahrazené jejich definicí (cesty k datům)."""
+    body = _workflow_body(script)
+    channels = dict(_ASSIGN_RE.findall(body))
+    return {
+        name: re.sub(r"\b\w+\b", lambda m: channels.get(m.group(0), m.group(0)), args)
+        for name, args in _CALL_RE.findall(body)
+    }
+
+
+def process_dependencies(script):
+    """{proces: procesy, jejichž výstupy čte} podle volání ve workflow bloku."""
+    return {name: set(_OUT_RE.findall(args)) for name, args in _CALL_RE.findall(_workflow_body(script))}
+
+
+def diff_pipelines(old_script, new_script):
+    """Porovná dvě verze skriptu; vrací (změněné, odebrané, přepočítané) názvy procesů.
+
+    Přepočítají se změněné procesy a vše, co z nich (i nepřímo) čte -
+    jejich vstupy budou mít nový obsah, takže -resume cache nepoužije.
+    """
+    old, new = process_hashes(old_script), process_hashes(new_script)
+    old_calls, new_calls = process_calls(old_script), process_calls(new_script)
+    # Změna bloku procesu nebo jeho vstupů (jiná cesta, jiný zdrojový kanál)
+    changed = [name for name, digest in new.items()
+               if old.get(name) != digest or old_calls.get(name) != new_calls.get(name)]
+    removed = [name for name in old if name not in new]
+    dependencies = process_dependencies(new_script)
+    rerun = set(changed)
+    grew = True
+    while grew:
+        grew = False
+        for name, sources in dependencies.items():
+            if name not in rerun and sources & rerun:
+                rerun.add(name)
+                grew = True
+    return changed, removed, [name for name in new if name in rerun]
+
+
+_RATE_RE = re.compile(r"^\d+\s*(/\s*\d*\s*)?[a-z]+$", re.IGNORECASE)
+
+
+def image_cache_dir(workflow_params):
+    """Složka se SIF image (_general_image_cache, jinak ~/.cache/pipeline_builder/images)."""
+    path = str(workflow_params.get("_general_image_cache", "") or "").strip()
+    return os.path.abspath(os.path.expanduser(path)) if path else os.path.join(user_cache_dir(), "images")
+
+
+def config_path_for(nf_path):
+    return os.path.join(os.path.dirname(nf_path), CONFIG_NAME)
+
+
+def _config_setting(workflow_params, key, check, message):
+    value = str(workflow_params.get(key, "") or "").strip()
+    if value and not check(value):
+        raise PipelineError(message.format(value=value))
+    return value
+
+
+def _fused_members(process, names):
+    """Rozloží název procesu na názvy modulů spojených '_' (['BWA_MEM', 'SAMTOOLS_SORT'])."""
+    if process in names:
+        return [process]
+    for name in names:
+        if process.startswith(name + "_"):
+            rest = _fused_members(process[len(name) + 1:], names)
+            if rest:
+                return [name] + rest
+    return []
+
+
+def compile_config(workflow_params, modules=(), processes=None):
+    """Vrátí text nextflow.config z nastavení _general_* a '_max_forks' modulů.
+
+    Všechny profily (local, slurm, pbs, k8s) mají stejné omezení odesílání
+    (queueSize, submitRateLimit, pollInterval); vybraný profil se navíc
+    zopakuje jako 'standard', který Nextflow použije bez -profile.
+    I/O profil 'local-scratch' doplní scratch, stageInMode a stageOutMode
+    (SCRATCH_DEFAULTS), pokud je uživatel nenastavil jinak.
+    processes -- procesy vygenerovaného skriptu; maxForks se zapíše jen
+    k existujícím (modul spojený rourou vlastní proces nemá).
+    """
+    if io_profile(workflow_params) == "local-scratch":
+        # Profil doplní jen nastavení, která uživatel nechal prázdná
+        workflow_params = {**workflow_params, **{key: value for key, value in SCRATCH_DEFAULTS.items()
+                                                 if not str(workflow_params.get(key, "") or "").strip()}}
+    profile = str(workflow_params.get("_general_executor", "") or "local")
+    if profile not in EXECUTOR_PROFILES:
+        raise PipelineError(f"Unknown executor profile '{profile}', use one of: {', '.join(EXECUTOR_PROFILES)}")
+    queue_size = _config_setting(workflow_params, "_general_queue_size", _positive_int,
+                                 "Queue size must be a positive number, got '{value}'")
+    rate = _config_setting(workflow_params, "_general_submit_rate", _RATE_RE.match,
+                           "Submit rate limit must look like '10/1min' or '50 sec', got '{value}'")
+    poll = _config_setting(workflow_params, "_general_poll_interval", parse_duration,
+                           "Poll interval must be a duration like '30 sec', got '{value}'")
+    stage_in = _config_setting(workflow_params, "_general_stage_in_mode", STAGE_IN_MODES.__contains__,
+                               "Stage-in mode must be one of " + ", ".join(STAGE_IN_MODES) + ", got '{value}'")
+    stage_out = _config_setting(workflow_params, "_general_stage_out_mode", STAGE_OUT_MODES.__contains__,
+                                "Stage-out mode must be one of " + ", ".join(STAGE_OUT_MODES) + ", got '{value}'")
+    engine = _config_setting(workflow_params, "_general_container_engine", CONTAINER_ENGINES.__contains__,
+                             "Container engine must be one of " + ", ".join(CONTAINER_ENGINES) + ", got '{value}'")
+    scratch = str(workflow_params.get("_general_scratch", "") or "").strip()
+    queue = str(workflow_params.get("_general_queue", "") or "").strip()
+
+    lines = [
+        "// Generated by Pipeline Builder from Pipeline Settings, manual changes will be overwritten.",
+        f"// Without -profile Nextflow uses 'standard' = '{profile}'.",
+        "",
+    ]
+
+    process_lines = []
+    if scratch:
+        process_lines.append(f"    scratch = {scratch.lower() if scratch.lower() in ('true', 'false') else _groovy_str(scratch)}")
+    if stage_in:
+        process_lines.append(f"    stageInMode = '{stage_in}'")
+    if stage_out:
+        process_lines.append(f"    stageOutMode = '{stage_out}'")
+    forks = {}  # proces -> maxForks
+    module_processes = {process_name_for(m) for m in modules}
+    for module_name in modules:
+        max_forks = workflow_params.get(module_name, {}).get("_max_forks", "")
+        if str(max_forks).strip() and not _positive_int(max_forks):
+            raise PipelineError(f"maxForks for {module_name} must be a positive number, got '{max_forks}'")
+        if max_forks:
+            forks[process_name_for(module_name)] = int(max_forks)
+    for process in (processes if processes is not None else list(forks)):
+        # Spojený proces (A_B) dostane nejnižší maxForks ze svých modulů
+        limits = [forks[name] for name in _fused_members(process, module_processes) if name in forks]
+        if limits:
+            process_lines += [f"    withName: '{process}' {{", f"        maxForks = {min(limits)}", "    }"]
+    if process_lines:
+        lines += ["process {", *process_lines, "}", ""]
+
+    executor_lines = []
+    if queue_size:
+        executor_lines.append(f"    queueSize = {int(queue_size)}")
+    if rate:
+        executor_lines.append(f"    submitRateLimit = '{rate}'")
+    if poll:
+        executor_lines.append(f"    pollInterval = '{poll}'")
+    if executor_lines:
+        lines += ["executor {", *executor_lines, "}", ""]
+
+    def profile_lines(name):
+        result = [f"        process.executor = '{name}'"]
+        if name == "local":
+            # Lokální executor si vezme jen rozpočet z Pipeline Settings
+            max_cpus = _positive_int(workflow_params.get("_general_max_cpus"))
+            max_memory = parse_memory(workflow_params.get("_general_max_memory"))
+            if max_cpus:
+                result.append(f"        executor.cpus = {max_cpus}")
+            if max_memory:
+                result.append(f"        executor.memory = '{format_memory(max_memory)}'")
+        elif queue and name in ("slurm", "pbs"):
+            result.append(f"        process.queue = {_groovy_str(queue)}")
+        return result
+
+    # Image předstažené do cache (image_cache.py) Nextflow najde a znovu nestahuje
+    if engine == "docker":
+        lines += ["docker {", "    enabled = true", "}", ""]
+    elif engine == "singularity":
+        lines += ["singularity {", "    enabled = true", "    autoMounts = true",
+                  f"    cacheDir = {_groovy_str(image_cache_dir(workflow_params))}", "}", ""]
+
+    lines.append("profiles {")
+    for name in ("standard",) + EXECUTOR_PROFILES:
+        lines += [f"    {name} {{", *profile_lines(profile if name == "standard" else name), "    }"]
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def read_pipeline(nf_path=DEFAULT_PIPELINE_PATH):
+    """Obsah dříve vygenerovaného skriptu ('' pokud zatím neexistuje)."""
+    try:
+        with open(nf_path, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def write_pipeline(script, nf_path=DEFAULT_PIPELINE_PATH):
+    """Uloží skript atomicky a jen při změně obsahu (mtime se jinak nemění); vrátí cestu."""
+    if read_pipeline(nf_path) == script:
+        return nf_path
+    output_dir = os.path.dirname(nf_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    tmp_path = f"{nf_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(script)
+        os.replace(tmp_path, nf_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return nf_path
+
+
+def load_workflow(path):
+    """Načte popis workflow z JSON souboru a vrátí (workflow, workflow_params).
+
+    S klíčem "edges" vrací WorkflowGraph, jinak seznam modulů.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):  # Stačí i holý seznam modulů
+        return data, {}
+    if "edges" in data:
+        try:
+            return WorkflowGraph.from_dict(data), data.get("params", {})
+        except WorkflowCycleError as e:
+            raise PipelineError(str(e)) from e
+        except KeyError as e:
+            raise PipelineError(e.args[0]) from e
+    return data.get("modules", []), data.get("params", {})
+
+
+def main(argv=None):
+    import argparse
+    from preflight import check_script, errors
+
+    parser = argparse.ArgumentParser(
+        prog="pipeline_compiler",
+        description="Generate a Nextflow DSL2 script from a workflow description."
+    )
+    parser.add_argument("workflow", help="workflow JSON ({'modules': [...], 'edges': [...], 'params': {...}})")
+    parser.add_argument("-p", "--params", help="JSON file with workflow_params (overrides 'params' in workflow)")
+    parser.add_argument("-m", "--modules-dir", default=DEFAULT_MODULES_DIR, help="directory with module JSON definitions")
+    parser.add_argument("-o", "--output", default=DEFAULT_PIPELINE_PATH, help="output main.nf path, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        modules, workflow_params = load_workflow(args.workflow)
+        if args.params:
+            with open(args.params, "r", encoding="utf-8") as f:
+                workflow_params = json.load(f)
+        module_info = load_modules(args.modules_dir)
+        script = compile_pipeline(modules, module_info, workflow_params)
+        graph = as_graph(modules, module_info, workflow_params)
+        config = compile_config(workflow_params, graph.nodes, process_hashes(script))
+        _, _, io_notes = compressed_intermediates(graph, module_info, workflow_params)
+    except (OSError, ValueError, PipelineError) as e:
+        print(f"pipeline_compiler: {e}", file=sys.stderr)
+        return 1
+    for note in io_notes:
+        print(f"I/O profile: {note}", file=sys.stderr)
+    # Rozbitý skript (proces bez vstupních kanálů, nedosazené symboly) se nezapíše
+    problems = errors(check_script(script))
+    if problems:
+        for issue in problems:
+            print(f"pipeline_compiler: {issue}", file=sys.stderr)
+        return 1
+
+    if args.output == "-":
+        sys.stdout.write(script + "\n")
+        return 0
+    previous = read_pipeline(args.output)
+    if previous == script:
+        print(f"Pipeline script {args.output} is up to date", file=sys.stderr)
+        write_pipeline(config, config_path_for(args.output))
+        return 0
+    changed, removed, _ = diff_pipelines(previous, script)
+    print(f"Pipeline script generated at {write_pipeline(script, args.output)}", file=sys.stderr)
+    print(f"Config generated at {write_pipeline(config, config_path_for(args.output))}", file=sys.stderr)
+    if changed:
+        print(f"Changed processes: {', '.join(changed)}", file=sys.stderr)
+    if removed:
+        print(f"Removed processes: {', '.join(removed)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+"""Statická kontrola workflow před generováním a spuštěním (preflight).
+
+Chyby, které by jinak Nextflow našel až po startu JVM, stažení image
+a odeslání tasků, se najdou tady v řádu milisekund:
+
+- šablona příkazu: každý {zástupný symbol} musí být vstup, výstup nebo
+  parametr modulu; kontrola definice modulu se pamatuje podle jejího
+  hashe (digest JSON), takže se při dalších kontrolách neopakuje,
+- zapojení: každý vstup má zdroj (hrana, soubor z GUI, sample sheet),
+  hrany vedou na existující výstupy a vstupy, typy souborů na hraně
+  sedí (podle přípony, u zarovnání podle 'compression.accepts'),
+- vygenerovaný skript: žádné nedosazené {symboly}, výstupy pojmenované
+  podle vzorku (${meta.id}) příkaz opravdu zapíše a každý proces se
+  volá se všemi vstupními kanály.
+
+Chyba (ERROR) zablokuje vytvoření i spuštění pipeline, varování jen upozorní.
+
+Bez GUI (ze složky core/gui):
+
+    python -m preflight workflow.json
+    python -m preflight --script workflows/main.nf
+"""
+import os
+import re
+import sys
+import time
+
+from pipeline_compiler import (
+    PipelineError, IMPLICIT_INPUT, as_graph, bind_inputs, output_index, scatter_settings,
+    compressed_intermediates, accepted_formats, alignment_format, is_reads_input, has_glob, compile_pipeline,
+    _stdout_redirect,
+)
+from module_registry import file_type
+from sample_sheet import REMOTE_PREFIXES
+from schedule_sim import COST_KEYS, cost_model
+from workflow_graph import WorkflowCycleError
+
+
+ERROR, WARNING = "error", "warning"
+BUILTIN_PLACEHOLDERS = ("*", "results")  # render_command je nahradí '.'
+
+# {symbol} bez '$' před sebou a bez čárky uvnitř ({1,2} je expanze v bashi)
+_PLACEHOLDER_RE = re.compile(r"(?<![$\w])\{([^{}\s,]+)\}")
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_]\w*$")
+_PROCESS_RE = re.compile(r"^process\s+(\w+)\s*\{\n(.*?)^\}", re.MULTILINE | re.DOTALL)
+_SECTION_RE = re.compile(r"^\s*(input|output|script|shell|exec|when):\s*$", re.MULTILINE)
+_CALL_RE = re.compile(r"^\s+(\w+)\((.*)\)\s*$", re.MULTILINE)
+_OUT_DIR_RE = re.compile(r"(?:--out\w*|-o)[ =](\S+)")  # --outdir X, --outFileNamePrefix X, -o X
+_OUTPUT_PATH_RE = re.compile(r"""path\(?\s*(["'])(.*?)\1""")
+_BRACKETS = {"(": ")", "[": "]", "{": "}"}
+
+_module_cache = {}  # (název, digest) -> [Issue]
+
+
+class Issue:
+    __slots__ = ("level", "module", "message")
+
+    def __init__(self, level, module, message):
+        self.level = level      # ERROR / WARNING
+        self.module = module    # modul nebo proces ('' = celé workflow)
+        self.message = message
+
+    def __str__(self):
+        return f"{self.module}: {self.message}" if self.module else self.message
+
+    def __repr__(self):
+        return f"Issue({self.level!r}, {str(self)!r})"
+
+
+def errors(issues):
+    return [issue for issue in issues if issue.level == ERROR]
+
+
+def placeholders(command):
+    """Zástupné symboly šablony v pořadí výskytu ('{-t}' -> '-t'); ${...} se nepočítá."""
+    return list(dict.fromkeys(_PLACEHOLDER_RE.findall(command or "")))
+
+
+def _module_key(spec):
+    # Moduly z katalogu mají digest JSON; ostatní (vytvořené v kódu) se kontrolují vždy znovu
+    return (spec.name, spec.digest) if spec.digest else None
+
+
+def check_module(spec):
+    """[Issue] definice modulu (šablona příkazu, streaming, scatter, cost); výsledek se cachuje podle digestu."""
+    key = _module_key(spec)
+    if key is not None and key in _module_cache:
+        return _module_cache[key]
+    issues = []
+
+    def add(level, message):
+        issues.append(Issue(level, spec.name, message))
+
+    outputs = [path for path, _ in spec.outputs]
+    known = set(spec.input_ids) | set(outputs) | set(spec.param_ids) | set(BUILTIN_PLACEHOLDERS)
+    used = placeholders(spec.command)
+    if not spec.command.strip():
+        add(ERROR, "module has no command")
+    for name in used:
+        if name not in known:
+            add(ERROR, f"command uses {{{name}}}, which is not an input, output or parameter of the module")
+    scatter_input = (spec.scatter.get("input") or (spec.input_ids[0] if spec.input_ids else None)
+                     if spec.scatter else None)
+    for input_id in spec.input_ids:
+        if input_id == scatter_input and input_id not in used:
+            # Části by se rozeslaly do tasků, které je nečtou (a sloučil by se prázdný výsledek)
+            add(ERROR, f"scatter input {input_id} is never used in the command")
+        elif input_id not in used:
+            add(WARNING, f"input {input_id} is never used in the command (the file is staged but not read)")
+    out_dirs = [d for d in _OUT_DIR_RE.findall(spec.command) if d not in (".", "./") and not d.startswith("{")]
+    for path in outputs:
+        # Soubor, který příkaz nepojmenuje, musí nástroj zapsat přímo do složky tasku
+        if path not in used and path not in spec.command and out_dirs:
+            add(ERROR, f"output {path} is not named in the command, which writes into {out_dirs[0]} "
+                       f"instead of the task directory")
+    variables = {}
+    for input_id, var_name in spec.inputs:
+        if var_name in variables:
+            add(ERROR, f"inputs {variables[var_name]} and {input_id} share the variable '{var_name}'")
+        variables.setdefault(var_name, input_id)
+    for path, emit in spec.outputs:
+        if emit and not _IDENTIFIER_RE.match(emit):
+            add(ERROR, f"output {path} has an invalid emit name '{emit}'")
+    if spec.threads_param and spec.threads_param not in spec.param_ids:
+        add(WARNING, f"threads parameter {spec.threads_param} is not a parameter of the module")
+
+    stdin, stdout = spec.streaming.get("stdin"), spec.streaming.get("stdout")
+    if stdin and stdin not in spec.input_ids:
+        add(ERROR, f"streaming stdin '{stdin}' is not an input")
+    if stdout and stdout not in outputs:
+        add(ERROR, f"streaming stdout '{stdout}' is not an output")
+    elif stdout and not _stdout_redirect(stdout).search(spec.command):
+        add(WARNING, f"streaming stdout '{stdout}' is set but the command does not redirect > {{{stdout}}}")
+    if spec.scatter:
+        if scatter_input not in spec.input_ids:
+            add(ERROR, f"scatter input '{scatter_input}' is not an input")
+        if spec.scatter.get("output") and spec.scatter["output"] not in outputs:
+            add(ERROR, f"scatter output '{spec.scatter['output']}' is not an output")
+    for input_id in spec.compression.get("accepts", {}):
+        if input_id not in spec.input_ids:
+            add(WARNING, f"compression.accepts names '{input_id}', which is not an input")
+    for path in spec.compression.get("bam_args", {}):
+        if path not in outputs:
+            add(WARNING, f"compression.bam_args names '{path}', which is not an output")
+    for key in spec.cost:
+        if key not in COST_KEYS:
+            add(WARNING, f"cost key '{key}' is unknown, use {', '.join(COST_KEYS)}")
+    try:
+        cost_model(spec.name, spec.cost)
+    except PipelineError as e:
+        add(WARNING, str(e))
+
+    if key is not None:
+        _module_cache[key] = issues
+    return issues
+
+
+def _compatible(output_path, spec, input_id):
+    """Přečte vstup input_id soubor output_path? (neznámý typ na kterékoli straně = ano)"""
+    source_type, target_type = file_type(output_path), file_type(input_id)
+    if source_type is None or target_type is None or source_type == target_type:
+        return True
+    if alignment_format(output_path):
+        return alignment_format(output_path) in accepted_formats(spec, input_id)
+    return False
+
+
+def check_workflow(workflow, module_info, workflow_params):
+    """[Issue] pro workflow (seznam modulů nebo WorkflowGraph) bez generování skriptu."""
+    issues = []
+    graph = as_graph(workflow, module_info, workflow_params)
+    if not graph.nodes:
+        return [Issue(ERROR, "", "Workflow is empty.")]
+    unknown = [m for m in graph.nodes if m not in module_info]
+    if unknown:
+        return [Issue(ERROR, "", f"Unknown modules in workflow: {', '.join(unknown)}")]
+    try:
+        graph.topological_order()
+    except WorkflowCycleError as e:
+        return [Issue(ERROR, "", str(e))]
+    for node in graph.nodes:
+        issues.extend(check_module(module_info[node]))
+    try:
+        # Zapojení se kontroluje tak, jak ho uvidí překladač (i s BAM místo SAM z I/O profilu)
+        graph, module_info, _ = compressed_intermediates(graph, module_info, workflow_params)
+    except PipelineError as e:
+        issues.append(Issue(ERROR, "", str(e)))
+
+    sheet = str(workflow_params.get("_general_sample_sheet", "") or "").strip()
+    incoming = {node: [] for node in graph.nodes}  # graph.upstream() prochází všechny hrany
+    for edge in graph.edges:
+        incoming[edge.target].append(edge)
+    for node in graph.nodes:
+        spec = module_info[node]
+        params = workflow_params.get(node, {})
+
+        def add(level, message):
+            issues.append(Issue(level, node, message))
+
+        for edge in incoming[node]:
+            source = module_info[edge.source]
+            if output_index(source, edge.emit) is None and (edge.emit or source.outputs):
+                add(ERROR, f"reads output '{edge.emit}' of {edge.source}, which has no such output")
+        try:
+            bindings = bind_inputs(node, spec, params, incoming[node])
+        except PipelineError as e:
+            add(ERROR, str(e))
+            continue
+        for input_id, var_name, edges, user_path in bindings:
+            if var_name == IMPLICIT_INPUT:
+                continue
+            if edges:
+                for edge in edges:
+                    source = module_info[edge.source]
+                    index = output_index(source, edge.emit)
+                    if index is not None and not _compatible(source.outputs[index][0], spec, input_id):
+                        add(WARNING, f"input {input_id} reads {source.outputs[index][0]} from {edge.source} "
+                                     f"({file_type(source.outputs[index][0])} instead of {file_type(input_id)})")
+            elif user_path:
+                path = str(user_path).strip()
+                if not has_glob(path) and not path.startswith(REMOTE_PREFIXES) and not os.path.exists(path):
+                    add(WARNING, f"input {input_id}: {path} does not exist here (fine if it exists on the cluster)")
+            elif sheet and is_reads_input(input_id):
+                if input_id not in placeholders(spec.command):
+                    add(ERROR, f"input {input_id} gets the sample sheet reads, but the command never uses it")
+            else:
+                add(ERROR, f"input {input_id} has no source: connect a module, set a file in Pipeline Settings"
+                           + (" or select a sample sheet" if is_reads_input(input_id) else ""))
+        defaults = spec.param_defaults()
+        for name in placeholders(spec.command):
+            if name in defaults and name != spec.threads_param:
+                value = params.get(name, defaults[name])
+                if not str(value if value is not None else "").strip():
+                    add(WARNING, f"parameter {name} is empty, the command will contain nothing in its place")
+        if spec.scatter:
+            user_path = next((b[3] for b in bindings if b[0] == (spec.scatter.get("input") or spec.input_ids[0])),
+                             None)
+            try:
+                scatter_settings(spec, params, user_path)
+            except PipelineError as e:
+                add(ERROR, str(e))
+    return issues
+
+
+def _sections(body):
+    """{'input': text, 'output': text, 'script': text} jedné definice procesu"""
+    sections, matches = {}, list(_SECTION_RE.finditer(body))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(body)
+        sections[match.group(1)] = body[match.end():end]
+    return sections
+
+
+def split_arguments(args):
+    """Argumenty volání procesu rozdělené čárkami na nejvyšší úrovni.
+
+    Čárky uvnitř závorek, seznamů, closure ({ meta, files -> files })
+    a řetězců argumenty nedělí.
+    """
+    parts, current, closing, quote = [], [], [], None
+    escaped = False
+    for char in args:
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char in _BRACKETS:
+            closing.append(_BRACKETS[char])
+        elif closing and char == closing[-1]:
+            closing.pop()
+        elif char == "," and not closing:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+
+def check_script(script):
+    """[Issue] vygenerovaného (nebo ručně upraveného) main.nf: nedosazené {symboly}, nezapsané výstupy
+    a chybějící kanály."""
+    issues = []
+    inputs = {}  # proces -> počet vstupů
+    for match in _PROCESS_RE.finditer(script or ""):
+        name, sections = match.group(1), _sections(match.group(2))
+        inputs[name] = sum(1 for line in sections.get("input", "").splitlines() if line.strip())
+        command = sections.get("script", sections.get("shell", ""))
+        for placeholder in placeholders(command):
+            issues.append(Issue(ERROR, name, f"script still contains the placeholder {{{placeholder}}}"))
+        for _, path in _OUTPUT_PATH_RE.findall(sections.get("output", "")):
+            # Název s proměnnou vymyslel překladač - příkaz ho musí použít, jinak task skončí bez výstupu
+            if "${" in path and path not in command:
+                issues.append(Issue(ERROR, name, f"output {path} is declared but the script never writes it"))
+    workflow = script.split("\nworkflow {", 1)[1] if "\nworkflow {" in (script or "") else ""
+    for name, args in _CALL_RE.findall(workflow):
+        if name not in inputs:
+            continue
+        given = len(split_arguments(args))
+        if given != inputs[name]:
+            issues.append(Issue(ERROR, name, f"process expects {inputs[name]} input channel(s) "
+                                             f"but is called with {given}"))
+    return issues
+
+
+def preflight(workflow, module_info, workflow_params):
+    """Kontrola workflow a (pokud nejsou chyby) i skriptu, který z něj vznikne; vrací [Issue]."""
+    issues = check_workflow(workflow, module_info, workflow_params)
+    if errors(issues):
+        return issues
+    try:
+        script = compile_pipeline(workflow, module_info, workflow_params)
+    except PipelineError as e:
+        return issues + [Issue(ERROR, "", str(e))]
+    return issues + check_script(script)
+
+
+def main(argv=None):
+    import argparse
+    from module_registry import DEFAULT_MODULES_DIR, load_modules
+    from pipeline_compiler import load_workflow
+
+    parser = argparse.ArgumentParser(prog="preflight", description="Check a workflow or a generated main.nf.")
+    parser.add_argument("path", help="workflow JSON, or main.nf with --script")
+    parser.add_argument("--script", action="store_true", help="check a generated Nextflow script")
+    parser.add_argument("-m", "--modules-dir", default=DEFAULT_MODULES_DIR, help="directory with module JSON definitions")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        if args.script:
+            with open(args.path, "r", encoding="utf-8") as f:
+                issues = check_script(f.read())
+        else:
+            modules, workflow_params = load_workflow(args.path)
+            issues = preflight(modules, load_modules(args.modules_dir), workflow_params)
+    except (OSError, ValueError, PipelineError) as e:
+        print(f"preflight: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    for issue in issues:
+        print(f"{issue.level.upper()}: {issue}")
+    print(f"{len(errors(issues))} errors, {len(issues) - len(errors(issues))} warnings "
+          f"({elapsed * 1000:.1f} ms)")
+    return 1 if errors(issues) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Panel s průběhem běžící pipeline (z -with-weblog událostí).
+
+Události se z přijímače vybírají časovačem po dávkách a panel se
+překresluje nejvýš jednou za tik, takže ani tisíce tasků najednou
+nezablokují Qt smyčku.
+"""
+import time
+
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QListWidget,
+    QAbstractItemView, QHeaderView
+)
+
+from weblog import ProgressModel, ProcessProgress
+from run_history import format_seconds
+
+
+COLUMNS = ("Process", "Submitted", "Running", "Completed", "Cached", "Failed")
+
+
+class ProgressPanel(QWidget):
+    def __init__(self, parent=None, interval_ms=500, batch=20000):
+        super().__init__(parent)
+        self.model = ProgressModel()
+        self.receiver = None
+        self.batch = batch  # max. událostí za tik, zbytek počká na další
+        self._dirty = False
+
+        self.summary_label = QLabel("No pipeline running.")
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionMode(QAbstractItemView.NoSelection)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in range(1, len(COLUMNS)):
+            self.table.horizontalHeader().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        self.slowest_list = QListWidget()
+        self.slowest_list.setMaximumHeight(110)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(QLabel("Progress"))
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.table, 3)
+        layout.addWidget(QLabel("Slowest running tasks"))
+        layout.addWidget(self.slowest_list, 1)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.poll)
+
+    def attach(self, receiver):
+        """Začne sledovat nový běh (stav z minulého běhu se zahodí)."""
+        self.receiver = receiver
+        receiver.drain()  # zbytky po předchozím běhu
+        self.model.reset()
+        self._dirty = True
+        self.refresh()
+        self.timer.start()
+
+    def detach(self):
+        """Po skončení běhu: dočte zbývající události a zastaví časovač."""
+        if self.receiver is not None:
+            self.model.apply_all(self.receiver.drain())
+        self.timer.stop()
+        self._dirty = True
+        self.refresh()
+
+    def replay(self, events):
+        """Zobrazí zaznamenané události (bez Nextflow)."""
+        self.model.reset()
+        self.model.apply_all(events)
+        self._dirty = True
+        self.refresh()
+
+    def poll(self):
+        if self.receiver is not None:
+            self._dirty = self.model.apply_all(self.receiver.drain(self.batch)) or self._dirty
+        # Běžící tasky stárnou i bez nových událostí
+        self._dirty = self._dirty or bool(self.model.running)
+        self.refresh()
+
+    def refresh(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        model = self.model
+        live = self.timer.isActive()
+        now = time.time() if live else None
+
+        total = model.totals()
+        status = model.status or ("waiting for events" if live else "idle")
+        done = total.completed + total.cached
+        tasks = done + total.submitted + total.running + total.failed
+        self.summary_label.setText(
+            f"{model.run_name or 'Run'}: {status} - {done} of {tasks} tasks done, {total.running} running, "
+            f"{total.failed} failed, {model.throughput(now):.1f} tasks/min")
+
+        processes = sorted(model.processes.items())
+        self.table.setRowCount(len(processes))
+        for row, (name, progress) in enumerate(processes):
+            self._set_cell(row, 0, name)
+            for column, field in enumerate(ProcessProgress.__slots__, start=1):
+                self._set_cell(row, column, str(getattr(progress, field)), Qt.AlignRight | Qt.AlignVCenter)
+
+        self.slowest_list.clear()
+        for name, seconds in model.slowest_running(now=now):
+            self.slowest_list.addItem(f"{format_seconds(seconds):>8}  {name}")
+
+    def _set_cell(self, row, column, text, alignment=None):
+        item = self.table.item(row, column)
+        if item is None:
+            item = QTableWidgetItem()
+            if alignment is not None:
+                item.setTextAlignment(alignment)
+            self.table.setItem(row, column, item)
+        if item.text() != text:
+            item.setText(text)
@@ -0,0 +1,374 @@
+"""Uložení a načtení projektu a průběžný deník změn pro obnovu po pádu.
+
+Projekt je jeden kompaktní JSON ve stejném tvaru, jaký čte
+pipeline_compiler (modules, edges, params), navíc s verzemi modulů
+(digest JSON definice a container), se kterými byl uložen:
+
+    {"format": 1, "modules": [...], "edges": [...], "params": {...},
+     "module_versions": {"FASTQC": {"digest": "...", "container": "..."}}}
+
+Deník (autosave) je append-only soubor JSON řádků: hlavička s cestou
+k uloženému projektu a za ní jen změny od posledního zápisu (přidané /
+odebrané moduly a hrany, změněné klíče workflow_params). Po pádu se
+projekt obnoví přehráním deníku nad uloženým souborem. Uložení projektu
+připíše novou hlavičku, platí záznamy za poslední z nich.
+
+Každá běžící instance má vlastní deník (journals/<pid>.journal) a drží
+zámek na <pid>.lock. Deník bez drženého zámku patří instanci, která
+spadla - jen ten se nabízí k obnově, deníky jiných oken se nečtou ani
+nepřepisují.
+
+Bez GUI (ze složky core/gui):
+
+    python -m project_store project.json            # shrnutí a čas načtení
+    python -m project_store --replay ~/.cache/pipeline_builder/journals/1234.journal -o recovered.json
+"""
+import os
+import sys
+import json
+import time
+import fcntl
+
+from module_registry import user_cache_dir
+from workflow_graph import WorkflowGraph, WorkflowCycleError
+
+
+FORMAT_VERSION = 1
+PROJECT_FILTER = "Pipeline projects (*.json)"
+JOURNAL_DIR = "journals"
+JOURNAL_SUFFIX = ".journal"
+
+
+class ProjectError(Exception):
+    """Soubor projektu nebo deníku nejde načíst."""
+
+
+def journal_dir():
+    return os.path.join(user_cache_dir(), JOURNAL_DIR)
+
+
+def default_journal_path():
+    """Deník této instance (podle pid)."""
+    return os.path.join(journal_dir(), f"{os.getpid()}{JOURNAL_SUFFIX}")
+
+
+def _lock_path(journal_path):
+    return journal_path[:-len(JOURNAL_SUFFIX)] + ".lock" if journal_path.endswith(JOURNAL_SUFFIX) \
+        else journal_path + ".lock"
+
+
+def _try_lock(path):
+    """Otevřený soubor se zámkem, nebo None, pokud zámek drží jiný proces."""
+    f = open(path, "a")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def orphaned_journals(directory=None):
+    """Deníky instancí, které skončily bez úklidu (nikdo nedrží jejich zámek), od nejnovějšího."""
+    directory = directory or journal_dir()
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith(JOURNAL_SUFFIX)]
+    except OSError:
+        return []
+    orphans = []
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            lock = _try_lock(_lock_path(path))
+        except OSError:
+            continue
+        if lock is not None:
+            lock.close()
+            orphans.append(path)
+    return sorted(orphans, key=lambda path: os.path.getmtime(path) if os.path.exists(path) else 0,
+                  reverse=True)
+
+
+def remove_journal(path):
+    for name in (path, _lock_path(path)):
+        try:
+            os.remove(name)
+        except OSError:
+            pass
+
+
+def _dumps(data):
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def _edge_key(edge):
+    return (edge["source"], edge["target"], edge.get("emit"), edge.get("input"),
+            edge.get("collect", False), edge.get("fuse", False))
+
+
+def module_versions(graph, module_info):
+    return {name: {"digest": module_info[name].digest, "container": module_info[name].container}
+            for name in graph.nodes if name in module_info}
+
+
+def check_versions(saved_versions, module_info):
+    """[zpráva] pro moduly, které v katalogu chybí nebo se od uložení změnily."""
+    warnings = []
+    for name, version in saved_versions.items():
+        spec = module_info.get(name)
+        if spec is None:
+            warnings.append(f"Module {name} is not in the catalog.")
+        elif version.get("digest") and spec.digest and version["digest"] != spec.digest:
+            container = version.get("container")
+            if container and container != spec.container:
+                warnings.append(f"Module {name} changed since the project was saved "
+                                f"(container {container} -> {spec.container or 'none'}).")
+            else:
+                warnings.append(f"Module {name} changed since the project was saved.")
+    return warnings
+
+
+def project_data(graph, workflow_params, module_info=None):
+    data = {"format": FORMAT_VERSION, **graph.to_dict(), "params": workflow_params}
+    if module_info is not None:
+        data["module_versions"] = module_versions(graph, module_info)
+    return data
+
+
+def save_project(path, graph, workflow_params, module_info=None):
+    """Atomicky zapíše projekt (dočasný soubor + os.replace); vrací cestu."""
+    text = _dumps(project_data(graph, workflow_params, module_info))
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def graph_from_data(data):
+    try:
+        return WorkflowGraph.from_dict(data)
+    except WorkflowCycleError as e:
+        raise ProjectError(str(e)) from e
+    except KeyError as e:
+        raise ProjectError(e.args[0]) from e
+
+
+def load_project(path):
+    """(WorkflowGraph, workflow_params, module_versions) ze souboru projektu."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ProjectError(f"Cannot read project {path}: {e}") from e
+    if not isinstance(data, dict) or data.get("format", FORMAT_VERSION) > FORMAT_VERSION:
+        raise ProjectError(f"{path} is not a supported project file")
+    return graph_from_data(data), data.get("params", {}), data.get("module_versions", {})
+
+
+class ProjectJournal:
+    """Append-only deník změn projektu.
+
+    record() porovná aktuální stav s naposledy zapsaným a připíše jen
+    rozdíl - volá se po každé úpravě workflow nebo parametrů.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_journal_path()
+        self._file = None
+        self._lock = None
+        self._nodes = []
+        self._edges = []
+        self._params = {}
+        self.changes = 0  # zapsaných změn od hlavičky
+
+    def start(self, base_path, graph, workflow_params):
+        """Začne nový deník nad uloženým projektem (nebo prázdným, base_path None)."""
+        self.close(remove=False)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if self._lock is None:
+            self._lock = _try_lock(_lock_path(self.path))
+            if self._lock is None:
+                raise ProjectError(f"Journal {self.path} is used by another instance")
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() and not _ends_with_newline(self.path):
+            self._file.write("\n")  # neúplný řádek z pádu se nespojí s hlavičkou
+        self._write({"journal": FORMAT_VERSION, "base": os.path.abspath(base_path) if base_path else None,
+                     "started": time.time()})
+        self._remember(graph, workflow_params)
+        self.changes = 0
+
+    def _remember(self, graph, workflow_params):
+        self._nodes = list(graph.nodes)
+        self._edges = [e.to_dict() for e in graph.edges]
+        # Kopie o úroveň níž - dialog nahrazuje celé slovníky modulů, nemění je na místě
+        self._params = {key: dict(value) if isinstance(value, dict) else value
+                        for key, value in workflow_params.items()}
+
+    def _write(self, entry):
+        self._file.write(_dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def record(self, graph, workflow_params):
+        """Připíše změny od posledního zápisu; vrací počet zapsaných záznamů."""
+        if self._file is None:
+            return 0
+        entries = []
+        nodes = list(graph.nodes)
+        if nodes != self._nodes:
+            entries.append(_list_change("nodes", self._nodes, nodes, key=lambda node: node))
+        edges = [e.to_dict() for e in graph.edges]
+        if edges != self._edges:
+            entries.append(_list_change("edges", self._edges, edges, key=_edge_key))
+        changed = {key: value for key, value in workflow_params.items() if self._params.get(key) != value}
+        removed = [key for key in self._params if key not in workflow_params]
+        if changed or removed:
+            entry = {"op": "params", "set": changed}
+            if removed:
+                entry["remove"] = removed
+            entries.append(entry)
+        for entry in entries:
+            self._write(entry)
+        if entries:
+            self._remember(graph, workflow_params)
+            self.changes += len(entries)
+        return len(entries)
+
+    def close(self, remove=True):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if remove:
+            remove_journal(self.path)
+            if self._lock is not None:
+                self._lock.close()
+                self._lock = None
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _list_change(op, old, new, key):
+    """Záznam změny seznamu: odebrané + přidané na konec, změněné na místě, jinak celý seznam."""
+    new_keys = {key(item) for item in new}
+    old_keys = {key(item) for item in old}
+    remove = [item for item in old if key(item) not in new_keys]
+    add = [item for item in new if key(item) not in old_keys]
+    kept = [item for item in old if key(item) in new_keys]
+    if kept + add != new:
+        if len(old) == len(new):  # změna na místě (např. fuse u hrany)
+            replace = [[i, item] for i, (before, item) in enumerate(zip(old, new)) if before != item]
+            if len(replace) <= len(new) // 2:
+                return {"op": op, "replace": replace}
+        return {"op": op, "all": new}
+    entry = {"op": op}
+    if add:
+        entry["add"] = add
+    if remove:
+        entry["remove"] = remove
+    return entry
+
+
+def _apply_list(entry, items, key):
+    if "all" in entry:
+        return list(entry["all"])
+    if "replace" in entry:
+        items = list(items)
+        for i, item in entry["replace"]:
+            items[i] = item
+        return items
+    removed = {key(item) for item in entry.get("remove", ())}
+    return [item for item in items if key(item) not in removed] + list(entry.get("add", ()))
+
+
+def read_journal(path):
+    """(poslední hlavička, [záznamy za ní]) - neúplný řádek (pád při zápisu) se vynechá."""
+    header, entries = None, []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and "journal" in entry:
+                    header, entries = entry, []
+                elif header is not None:
+                    entries.append(entry)
+    except OSError as e:
+        raise ProjectError(f"Cannot read journal {path}: {e}") from e
+    if not isinstance(header, dict) or "journal" not in header:
+        raise ProjectError(f"{path} is not a project journal")
+    return header, entries
+
+
+def replay_journal(path):
+    """Obnoví stav z deníku: (WorkflowGraph, workflow_params, cesta projektu nebo None, počet změn)."""
+    header, entries = read_journal(path)
+    base = header.get("base")
+    if base:
+        graph, workflow_params, _ = load_project(base)
+        data = graph.to_dict()
+    else:
+        data, workflow_params = {"modules": [], "edges": []}, {}
+    nodes, edges = data["modules"], data["edges"]
+    for entry in entries:
+        op = entry.get("op")
+        if op == "nodes":
+            nodes = _apply_list(entry, nodes, key=lambda node: node)
+        elif op == "edges":
+            edges = _apply_list(entry, edges, key=_edge_key)
+        elif op == "params":
+            workflow_params.update(entry.get("set", {}))
+            for key in entry.get("remove", ()):
+                workflow_params.pop(key, None)
+    return graph_from_data({"modules": nodes, "edges": edges}), workflow_params, base, len(entries)
+
+
+def has_changes(path):
+    """True, pokud deník obsahuje neuložené změny (po pádu)."""
+    try:
+        return bool(read_journal(path)[1])
+    except ProjectError:
+        return False
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="project_store", description="Inspect or recover a pipeline project.")
+    parser.add_argument("path", help="project file, or journal with --replay")
+    parser.add_argument("--replay", action="store_true", help="replay an autosave journal")
+    parser.add_argument("-o", "--output", help="write the (recovered) project here")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        if args.replay:
+            graph, workflow_params, base, changes = replay_journal(args.path)
+            print(f"Replayed {changes} changes on {base or 'an empty project'}")
+        else:
+            graph, workflow_params, _ = load_project(args.path)
+    except ProjectError as e:
+        print(f"project_store: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"{len(graph.nodes)} modules, {len(graph.edges)} edges, {len(workflow_params)} parameter sets "
+          f"loaded in {elapsed * 1000:.1f} ms")
+    if args.output:
+        print(f"Project written to {save_project(args.output, graph, workflow_params)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
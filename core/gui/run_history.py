@@ -0,0 +1,346 @@
+"""Historie běhů pipeline v SQLite (~/.cache/pipeline_builder/run_history.sqlite).
+
+Zdroje se čtou přírůstkově od posledního zpracovaného bajtu:
+- .nextflow.log* -> běhy (session, název, stav) a tasky (stav, exit, časy),
+- trace soubory (-with-trace) -> realtime, %cpu, peak_rss, peak_vmem.
+Trace soubor se přiřadí k běhu (session) podle času spuštění a task
+v něm podle hashe ('2d/f202dc'), takže trace doplní údaje k tasku,
+který už přišel z logu. Běh, jehož log skončil bez řádku o konci
+(rotovaný nebo dlouho nezměněný), má stav 'unknown'. Trace soubory se
+nerotují (mají v názvu čas spuštění), proto se pamatují podle cesty
+a nezměněné se ani neotevřou.
+
+Použití bez GUI (ze složky core/gui):
+
+    python -m run_history workflows
+"""
+import os
+import re
+import sys
+import glob
+import sqlite3
+import hashlib
+import statistics
+import time
+
+import nextflow_logs
+from module_registry import user_cache_dir
+from pipeline_compiler import parse_duration, parse_memory
+
+
+TRACE_GLOBS = ("trace*.txt", os.path.join("pipeline_info", "execution_trace*.txt"))
+TRACE_CLOCK_SLACK = 60  # s, čas v názvu trace souboru může o kousek předběhnout první řádek logu
+
+_TRACE_NAME_TIME_RE = re.compile(r"(\d{4})-?(\d{2})-?(\d{2})[_-](\d{2})-?(\d{2})-?(\d{2})")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    session TEXT PRIMARY KEY, name TEXT, launch_dir TEXT,
+    started REAL, last_seen REAL, status TEXT
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    session TEXT, hash TEXT, process TEXT, name TEXT, status TEXT, exit INTEGER,
+    submitted REAL, completed REAL, realtime REAL, cpu REAL, peak_rss INTEGER, peak_vmem INTEGER,
+    PRIMARY KEY (session, hash)
+);
+CREATE INDEX IF NOT EXISTS tasks_process ON tasks(process);
+CREATE INDEX IF NOT EXISTS tasks_hash ON tasks(hash);
+CREATE TABLE IF NOT EXISTS sources (
+    fingerprint TEXT PRIMARY KEY, path TEXT, offset INTEGER, session TEXT, header TEXT
+);
+"""
+
+
+def default_db_path():
+    return os.path.join(user_cache_dir(), "run_history.sqlite")
+
+
+def trace_files(launch_dir):
+    paths = set()
+    for pattern in TRACE_GLOBS:
+        paths.update(glob.glob(os.path.join(launch_dir, pattern)))
+    return sorted(p for p in paths if os.path.isfile(p))
+
+
+def trace_started(path):
+    """Čas spuštění z názvu trace souboru (trace-20241009-14330761.txt,
+    execution_trace_2024-10-09_14-33-07.txt) jako epoch sekundy, jinak None."""
+    match = _TRACE_NAME_TIME_RE.search(os.path.basename(path))
+    if not match:
+        return None
+    try:
+        return time.mktime(time.strptime("".join(match.groups()), "%Y%m%d%H%M%S"))
+    except ValueError:
+        return None
+
+
+def _parse_trace_time(value):
+    """'2024-10-09 14:33:08.123' -> epoch sekundy"""
+    try:
+        return time.mktime(time.strptime(value[:19], "%Y-%m-%d %H:%M:%S"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _trace_seconds(value):
+    """'1m 2s' / '350ms' / raw milisekundy -> sekundy"""
+    if not value or value == "-":
+        return None
+    if value.isdigit():  # trace.raw = true
+        return int(value) / 1000
+    return parse_duration(value) or None
+
+
+def _trace_bytes(value):
+    if not value or value == "-":
+        return None
+    if value.isdigit():
+        return int(value)
+    return parse_memory(value)
+
+
+def _trace_percent(value):
+    try:
+        return float(value.rstrip("%"))
+    except (AttributeError, ValueError):
+        return None
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return "-"
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+
+class ModuleStats:
+    """Souhrn minulých běhů jednoho procesu (jen úspěšně dokončené tasky)."""
+    __slots__ = ("process", "tasks", "median_realtime", "last_realtime", "peak_rss", "median_rss")
+
+    def __init__(self, process, tasks, median_realtime, last_realtime, peak_rss, median_rss):
+        self.process = process
+        self.tasks = tasks
+        self.median_realtime = median_realtime
+        self.last_realtime = last_realtime
+        self.peak_rss = peak_rss
+        self.median_rss = median_rss
+
+    def describe(self):
+        from work_cache import format_size
+        text = f"median {format_seconds(self.median_realtime)} (last {format_seconds(self.last_realtime)})"
+        if self.peak_rss:
+            text += f", peak RSS {format_size(self.peak_rss)}"
+        return f"{text}, {self.tasks} tasks"
+
+
+class RunHistory:
+    def __init__(self, db_path=None):
+        self.db_path = db_path or default_db_path()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def ingest(self, launch_dir):
+        """Načte nové řádky logů a trace souborů; vrací počet zpracovaných řádků."""
+        launch_dir = os.path.abspath(launch_dir)
+        count = 0
+        with self.conn:
+            for path in nextflow_logs.log_files(launch_dir):
+                count += self._ingest_log(path, launch_dir)
+        # Trace soubor = jeden běh, každý ve vlastní transakci (velká historie se ukládá průběžně)
+        for path in trace_files(launch_dir):
+            with self.conn:
+                count += self._ingest_trace(path, launch_dir)
+        return count
+
+    def _source(self, fp):
+        row = self.conn.execute("SELECT offset, session, header FROM sources WHERE fingerprint = ?", (fp,)).fetchone()
+        return row if row else (0, None, None)
+
+    def _save_source(self, fp, path, offset, session, header=None):
+        self.conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)", (fp, path, offset, session, header))
+
+    def _ingest_log(self, path, launch_dir):
+        fp = nextflow_logs.fingerprint(path)
+        if fp is None:
+            return 0
+        offset, session, _ = self._source(fp)
+        mtime = os.path.getmtime(path)
+        count = 0
+        started = None  # čas první řádky = začátek běhu
+        for line, offset in nextflow_logs.read_new_lines(path, offset):
+            count += 1
+            if count == 1 and session is None:
+                started = nextflow_logs.parse_timestamp(line, mtime)
+            event = nextflow_logs.parse_event(line)
+            if event is None:
+                continue
+            kind, data = event
+            when = nextflow_logs.parse_timestamp(line, mtime) or mtime
+            if kind == "session":
+                session = data
+                self.conn.execute(
+                    "INSERT INTO runs (session, launch_dir, started, last_seen, status) VALUES (?, ?, ?, ?, 'running') "
+                    "ON CONFLICT(session) DO UPDATE SET last_seen = excluded.last_seen, status = 'running'",
+                    (session, launch_dir, started or when, when))
+            elif session is None:
+                continue
+            elif kind == "run_name":
+                self.conn.execute("UPDATE runs SET name = ? WHERE session = ?", (data, session))
+            elif kind == "end":
+                # Po 'aborted' Nextflow ještě hlásí konec - chyba má přednost
+                self.conn.execute(
+                    "UPDATE runs SET status = CASE WHEN status = 'failed' THEN 'failed' ELSE ? END, "
+                    "last_seen = ? WHERE session = ?",
+                    ("failed" if data == "aborted" else "completed", when, session))
+            elif kind == "task_ref":
+                ref, how, task_name = data
+                self.conn.execute(
+                    "INSERT INTO tasks (session, hash, process, name, status, submitted) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(session, hash) DO NOTHING",
+                    (session, ref, nextflow_logs.process_of(task_name), task_name,
+                     "CACHED" if how == "Cached" else "SUBMITTED", when))
+            elif kind == "task_done":
+                ref = "/".join(data.get("workDir", "").rstrip("/").split("/")[-2:])[:9]
+                if len(ref) != 9:
+                    continue
+                exit_code = int(data["exit"]) if data.get("exit", "").lstrip("-").isdigit() else None
+                status = data.get("status", "")
+                if status == "COMPLETED" and exit_code not in (None, 0):
+                    status = "FAILED"
+                name = data.get("name", "")
+                self.conn.execute(
+                    "INSERT INTO tasks (session, hash, process, name, status, exit, completed) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(session, hash) DO UPDATE SET "
+                    "status = excluded.status, exit = excluded.exit, completed = excluded.completed, "
+                    "realtime = COALESCE(realtime, excluded.completed - submitted)",
+                    (session, ref, nextflow_logs.process_of(name), name, status, exit_code, when))
+        if session is not None and nextflow_logs.is_finished_log(path):
+            # Log skončil bez řádku o konci běhu (kill -9, pád JVM) - výsledek není známý
+            self.conn.execute("UPDATE runs SET status = 'unknown' WHERE session = ? AND status = 'running'",
+                              (session,))
+        self._save_source(fp, path, offset, session)
+        return count
+
+    def _trace_session(self, path, launch_dir, row):
+        """Session běhu, ke kterému trace soubor patří, podle času spuštění (None = neznámý).
+
+        Čas je v názvu souboru (trace-20241009-14330761.txt), jinak se vezme
+        čas odeslání prvního tasku; patří k poslednímu běhu ze stejné složky,
+        který začal nejpozději v tu chvíli. Podle hashe tasku párovat nejde -
+        s -resume má stejný task stejný hash ve více bězích.
+        """
+        started = trace_started(path)
+        if started is None:
+            submit = row.get("submit", "")
+            started = int(submit) / 1000 if submit.isdigit() else _parse_trace_time(submit)
+        if started is None:
+            return None
+        found = self.conn.execute(
+            "SELECT session FROM runs WHERE launch_dir = ? AND started <= ? ORDER BY started DESC LIMIT 1",
+            (launch_dir, started + TRACE_CLOCK_SLACK)).fetchone()
+        return found[0] if found else None
+
+    def _ingest_trace(self, path, launch_dir):
+        fp = "trace:" + os.path.abspath(path)
+        offset, session, header = self._source(fp)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return 0
+        if size == offset:
+            return 0
+        if size < offset:  # Přepsaný soubor (trace.overwrite) - znovu od začátku
+            offset, session, header = 0, None, None
+        columns = header.split("\t") if header else None
+        count = 0
+        for line, offset in nextflow_logs.read_new_lines(path, offset):
+            if columns is None:
+                columns = line.split("\t")
+                continue
+            count += 1
+            row = dict(zip(columns, line.split("\t")))
+            ref = row.get("hash", "")
+            if len(ref) != 9:
+                continue
+            if session is None:
+                # Session z logu, jinak vlastní "běh" za trace soubor
+                session = self._trace_session(path, launch_dir, row)
+                if session is None:
+                    session = "trace:" + hashlib.sha1(fp.encode("utf-8")).hexdigest()[:12]
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO runs (session, name, launch_dir, status) VALUES (?, ?, ?, 'completed')",
+                        (session, os.path.basename(path), launch_dir))
+            name = row.get("name", "")
+            exit_code = int(row["exit"]) if row.get("exit", "").lstrip("-").isdigit() else None
+            self.conn.execute(
+                "INSERT INTO tasks (session, hash, process, name, status, exit, realtime, cpu, peak_rss, peak_vmem) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(session, hash) DO UPDATE SET "
+                "status = excluded.status, exit = COALESCE(excluded.exit, exit), "
+                "realtime = COALESCE(excluded.realtime, realtime), cpu = excluded.cpu, "
+                "peak_rss = excluded.peak_rss, peak_vmem = excluded.peak_vmem",
+                (session, ref, nextflow_logs.process_of(name), name, row.get("status", ""), exit_code,
+                 _trace_seconds(row.get("realtime")), _trace_percent(row.get("%cpu")),
+                 _trace_bytes(row.get("peak_rss")), _trace_bytes(row.get("peak_vmem"))))
+        self._save_source(fp, path, offset, session, "\t".join(columns) if columns else None)
+        return count
+
+    # ---------- Dotazy ----------
+
+    def module_stats(self):
+        """{proces: ModuleStats} ze všech úspěšně dokončených tasků."""
+        rows = self.conn.execute(
+            "SELECT process, realtime, peak_rss FROM tasks "
+            "WHERE status = 'COMPLETED' AND (exit IS NULL OR exit = 0) "
+            "ORDER BY COALESCE(completed, submitted, 0)").fetchall()
+        grouped = {}
+        for process, realtime, peak_rss in rows:
+            grouped.setdefault(process, []).append((realtime, peak_rss))
+        stats = {}
+        for process, values in grouped.items():
+            times = [t for t, _ in values if t is not None]
+            rss = [r for _, r in values if r is not None]
+            stats[process] = ModuleStats(
+                process, len(values),
+                statistics.median(times) if times else None, times[-1] if times else None,
+                max(rss) if rss else None, statistics.median(rss) if rss else None,
+            )
+        return stats
+
+    def runs(self, limit=20):
+        return self.conn.execute(
+            "SELECT session, name, status, started FROM runs ORDER BY COALESCE(started, last_seen) DESC LIMIT ?",
+            (limit,)).fetchall()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="run_history", description="Ingest Nextflow logs and trace files.")
+    parser.add_argument("launch_dir", nargs="?", default="workflows", help="directory nextflow was launched from")
+    parser.add_argument("--db", help="history database path")
+    args = parser.parse_args(argv)
+
+    history = RunHistory(args.db)
+    try:
+        start = time.perf_counter()
+        lines = history.ingest(args.launch_dir)
+        print(f"Ingested {lines} new lines in {time.perf_counter() - start:.2f} s")
+        for session, name, status, _ in history.runs():
+            print(f"{name or '-':<24} {status or '-':<10} {session}")
+        for process, stats in sorted(history.module_stats().items()):
+            print(f"{process}: {stats.describe()}")
+    finally:
+        history.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
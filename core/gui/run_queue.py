@@ -0,0 +1,286 @@
+"""Fronta běhů více pipeline se společným rozpočtem CPU a paměti.
+
+Každý běh má svůj požadavek (cpus, paměť), který se Nextflow předá jako
+limit lokálního executoru (executor.cpus / executor.memory v malém
+configu vedle skriptu), takže běh si víc nevezme. Běhy se spouštějí
+podle priority (vyšší dřív, jinak v pořadí přidání); co se do zbytku
+rozpočtu nevejde, čeká - a čekají i všechny za ním, aby velký běh
+nepředbíhaly pořád menší. Pozastavení běh ukončí a uvolní rozpočet,
+obnovení ho vrátí do fronty a spustí s -resume.
+
+Každý běh potřebuje vlastní složku spuštění (Nextflow si ji zamyká).
+
+Bez GUI (ze složky core/gui):
+
+    python -m run_queue a/main.nf b/main.nf,cpus=8,memory=16GB,priority=1 --cpus 16 --memory 64GB
+"""
+import os
+import sys
+import time
+import signal
+import itertools
+import subprocess
+
+from pipeline_compiler import parse_memory, format_memory
+
+
+BUDGET_CONFIG = "run_budget.config"
+
+QUEUED, RUNNING, PAUSED, STOPPING, COMPLETED, FAILED, CANCELLED = (
+    "queued", "running", "paused", "stopping", "completed", "failed", "cancelled")
+FINAL_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+def machine_cpus():
+    return os.cpu_count() or 1
+
+
+def machine_memory():
+    """Fyzická paměť v bajtech (None, pokud ji systém neprozradí)."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class QueuedRun:
+    __slots__ = ("id", "name", "script", "launch_dir", "cpus", "memory", "priority",
+                 "state", "resume", "exit_code", "seq", "started", "finished", "after_stop")
+
+    def __init__(self, run_id, script, cpus, memory=None, priority=0, name=None, resume=False, seq=0):
+        self.id = run_id
+        self.script = os.path.abspath(script)
+        self.launch_dir = os.path.dirname(self.script)
+        self.name = name or os.path.basename(self.launch_dir) or os.path.basename(self.script)
+        self.cpus = cpus
+        self.memory = memory      # bajty nebo None (bez limitu paměti)
+        self.priority = priority
+        self.state = QUEUED
+        self.resume = resume
+        self.exit_code = None
+        self.seq = seq            # pořadí přidání (FIFO v rámci priority)
+        self.started = None
+        self.finished = None
+        self.after_stop = None    # stav po ukončení procesu (paused / cancelled)
+
+    def describe(self):
+        memory = format_memory(self.memory) if self.memory else "-"
+        return f"{self.name}: {self.state}, priority {self.priority}, {self.cpus} cpus, {memory}"
+
+
+class RunQueue:
+    """Plánovač bez vazby na způsob spouštění (QProcess v GUI, subprocess bez GUI)."""
+
+    def __init__(self, max_cpus=None, max_memory=None):
+        self.max_cpus = max_cpus or machine_cpus()
+        self.max_memory = max_memory if max_memory is not None else machine_memory()
+        self.runs = {}
+        self._ids = itertools.count(1)
+
+    def add(self, script, cpus=None, memory=None, priority=0, name=None, resume=False):
+        """Přidá běh; požadavek větší než celý rozpočet se zmenší na rozpočet.
+
+        Bez zadané paměti dostane běh podíl paměti odpovídající jeho cpus.
+        """
+        cpus = min(cpus or self.max_cpus, self.max_cpus)
+        if self.max_memory:
+            share = self.max_memory * cpus // self.max_cpus // 2 ** 20 * 2 ** 20  # zaokrouhleno na MB
+            memory = min(memory, self.max_memory) if memory else share
+        run_id = next(self._ids)
+        run = QueuedRun(run_id, script, cpus, memory, priority, name, resume, seq=run_id)
+        if any(r.launch_dir == run.launch_dir and r.state not in FINAL_STATES for r in self.runs.values()):
+            raise ValueError(f"Another run already uses {run.launch_dir}")
+        self.runs[run_id] = run
+        return run
+
+    def ordered(self):
+        return sorted(self.runs.values(), key=lambda r: (-r.priority, r.seq))
+
+    def used(self):
+        """(cpus, paměť) obsazené běžícími (i právě ukončovanými) běhy"""
+        active = [r for r in self.runs.values() if r.state in (RUNNING, STOPPING)]
+        return sum(r.cpus for r in active), sum(r.memory or 0 for r in active)
+
+    def fits(self, run):
+        cpus, memory = self.used()
+        if cpus + run.cpus > self.max_cpus:
+            return False
+        return not self.max_memory or memory + (run.memory or 0) <= self.max_memory
+
+    def schedule(self):
+        """Vrátí běhy, které se mají teď spustit (a označí je jako běžící)."""
+        to_start = []
+        for run in self.ordered():
+            if run.state != QUEUED:
+                continue
+            if not self.fits(run):
+                break  # Přísné pořadí - menší běhy velký nepředbíhají
+            run.state = RUNNING
+            run.started = time.time()
+            to_start.append(run)
+        return to_start
+
+    def set_priority(self, run_id, priority):
+        self.runs[run_id].priority = priority
+
+    def pause(self, run_id):
+        """Vrací True, pokud se má ukončit běžící proces."""
+        run = self.runs[run_id]
+        if run.state == QUEUED:
+            run.state = PAUSED
+        elif run.state == RUNNING:
+            run.state, run.after_stop = STOPPING, PAUSED
+            return True
+        return False
+
+    def resume(self, run_id):
+        run = self.runs[run_id]
+        if run.state == PAUSED:
+            run.state = QUEUED
+            run.resume = True  # Hotové tasky se vezmou z cache
+            return True
+        return False
+
+    def cancel(self, run_id):
+        """Vrací True, pokud se má ukončit běžící proces."""
+        run = self.runs[run_id]
+        if run.state in (QUEUED, PAUSED):
+            run.state = CANCELLED
+        elif run.state == RUNNING:
+            run.state, run.after_stop = STOPPING, CANCELLED
+            return True
+        elif run.state == STOPPING:
+            run.after_stop = CANCELLED
+        return False
+
+    def finish(self, run_id, exit_code):
+        run = self.runs[run_id]
+        run.exit_code = exit_code
+        run.finished = time.time()
+        if run.state == STOPPING:
+            run.state, run.after_stop = run.after_stop, None
+        else:
+            run.state = COMPLETED if exit_code == 0 else FAILED
+        return run
+
+    def remove(self, run_id):
+        if self.runs[run_id].state in FINAL_STATES + (PAUSED,):
+            del self.runs[run_id]
+            return True
+        return False
+
+    def is_idle(self):
+        return not any(r.state in (QUEUED, RUNNING, STOPPING) for r in self.runs.values())
+
+
+def write_budget_config(run):
+    """Config s limity lokálního executoru vedle skriptu; vrací jeho cestu."""
+    # Executor vybírá profil z nextflow.config; cpus/memory platí pro lokální
+    lines = ["executor {", f"    cpus = {run.cpus}"]
+    if run.memory:
+        lines.append(f"    memory = '{format_memory(run.memory)}'")
+    lines.append("}")
+    path = os.path.join(run.launch_dir, BUDGET_CONFIG)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def run_args(run):
+    """Argumenty pro `nextflow run <script>` (za skriptem)."""
+    args = ["-c", write_budget_config(run)]
+    if run.resume:
+        args.append("-resume")
+    return args
+
+
+def parse_run_spec(spec):
+    """'main.nf,cpus=4,memory=8GB,priority=1' -> (skript, {cpus, memory, priority})"""
+    script, *options = spec.split(",")
+    values = {}
+    for option in options:
+        key, _, value = option.partition("=")
+        key = key.strip()
+        if key == "cpus" or key == "priority":
+            values[key] = int(value)
+        elif key == "memory":
+            values[key] = parse_memory(value)
+        else:
+            raise ValueError(f"Unknown run option '{key}' in {spec}")
+    return script, values
+
+
+def run_headless(queue, program="nextflow", poll=0.5, log=print):
+    """Spouští běhy z fronty přes subprocess, dokud fronta není prázdná; vrací počet neúspěšných."""
+    processes = {}
+    stopping = []
+
+    def interrupt(signum, frame):
+        stopping.append(signum)
+
+    previous = signal.signal(signal.SIGINT, interrupt)
+    try:
+        while True:
+            if stopping:
+                stopping.clear()
+                log("Interrupted, stopping all runs...")
+                for run_id in list(processes):
+                    queue.cancel(run_id)
+                    processes[run_id].terminate()
+                for run in queue.runs.values():
+                    if run.state in (QUEUED, PAUSED):
+                        queue.cancel(run.id)
+            for run in queue.schedule():
+                command = [program, "run", run.script, "-ansi-log", "false", *run_args(run)]
+                log(f"Starting {run.name} ({run.cpus} cpus"
+                    f"{', ' + format_memory(run.memory) if run.memory else ''}): {' '.join(command)}")
+                with open(os.path.join(run.launch_dir, "run_queue.log"), "ab") as output:
+                    processes[run.id] = subprocess.Popen(
+                        command, cwd=run.launch_dir, stdout=output, stderr=subprocess.STDOUT,
+                        start_new_session=True)
+            for run_id, process in list(processes.items()):
+                code = process.poll()
+                if code is None:
+                    continue
+                del processes[run_id]
+                run = queue.finish(run_id, code)
+                log(f"{run.name} {run.state} (exit code {code})")
+            if queue.is_idle() and not processes:
+                break
+            time.sleep(poll)
+    finally:
+        signal.signal(signal.SIGINT, previous)
+    return sum(1 for r in queue.runs.values() if r.state == FAILED)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="run_queue", description="Run several pipelines under a CPU/memory budget.")
+    parser.add_argument("runs", nargs="+", help="script.nf[,cpus=N][,memory=8GB][,priority=N]")
+    parser.add_argument("--cpus", type=int, help="CPU budget for all runs (default: all CPUs)")
+    parser.add_argument("--memory", help="memory budget for all runs (default: physical memory)")
+    parser.add_argument("--nextflow", default=os.environ.get("NEXTFLOW", "nextflow"), help="nextflow executable")
+    parser.add_argument("--resume", action="store_true", help="run every pipeline with -resume")
+    args = parser.parse_args(argv)
+
+    memory = parse_memory(args.memory)
+    if args.memory and memory is None:
+        parser.error(f"Invalid memory budget: {args.memory}")
+    queue = RunQueue(args.cpus, memory)
+    try:
+        for spec in args.runs:
+            script, options = parse_run_spec(spec)
+            queue.add(script, resume=args.resume, **options)
+    except ValueError as e:
+        parser.error(str(e))
+    budget = f"{queue.max_cpus} cpus" + (f", {format_memory(queue.max_memory)}" if queue.max_memory else "")
+    print(f"Budget: {budget}")
+    failed = run_headless(queue, args.nextflow)
+    for run in queue.ordered():
+        print(run.describe())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""Panel fronty běhů: více pipeline najednou pod společným rozpočtem CPU/paměti.
+
+Plánování dělá RunQueue (run_queue.py), každý běžící běh má vlastní
+NextflowLauncher, takže pauza/ukončení zasáhne celou skupinu procesů.
+"""
+import os
+
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QPushButton, QSpinBox, QLineEdit,
+    QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView, QFileDialog
+)
+
+from nextflow_launcher import NextflowLauncher, NEXTFLOW_PROGRAM
+from pipeline_compiler import parse_memory, format_memory
+from run_queue import RunQueue, RUNNING, STOPPING, run_args
+
+
+COLUMNS = ("Pipeline", "Priority", "CPUs", "Memory", "State", "Exit")
+
+
+class RunQueuePanel(QWidget):
+    log = Signal(str)  # výstup běhů s prefixem [název]
+
+    def __init__(self, parent=None, program=NEXTFLOW_PROGRAM):
+        super().__init__(parent)
+        self.program = program
+        self.queue = RunQueue()
+        self.launchers = {}  # {id běhu: NextflowLauncher}
+
+        # ---- Rozpočet ----
+        self.cpus_spin = QSpinBox()
+        self.cpus_spin.setRange(1, 4096)
+        self.cpus_spin.setValue(self.queue.max_cpus)
+        self.cpus_spin.valueChanged.connect(self.update_budget)
+        self.memory_edit = QLineEdit(format_memory(self.queue.max_memory // 2 ** 30 * 2 ** 30)
+                                     if self.queue.max_memory else "")
+        self.memory_edit.setPlaceholderText("e.g. 64 GB (empty = no limit)")
+        self.memory_edit.editingFinished.connect(self.update_budget)
+        self.run_cpus_spin = QSpinBox()
+        self.run_cpus_spin.setRange(1, 4096)
+        self.run_cpus_spin.setValue(max(1, self.queue.max_cpus // 2))
+        self.run_memory_edit = QLineEdit()
+        self.run_memory_edit.setPlaceholderText("empty = share of budget by CPUs")
+        self.budget_label = QLabel()
+
+        form = QFormLayout()
+        form.addRow("CPU budget:", self.cpus_spin)
+        form.addRow("Memory budget:", self.memory_edit)
+        form.addRow("CPUs per added run:", self.run_cpus_spin)
+        form.addRow("Memory per added run:", self.run_memory_edit)
+
+        # ---- Tabulka běhů ----
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+
+        buttons = QHBoxLayout()
+        for label, slot in (("Add Pipeline...", self.select_pipeline), ("Priority +", lambda: self.change_priority(1)),
+                            ("Priority -", lambda: self.change_priority(-1)), ("Pause", self.pause_selected),
+                            ("Resume", self.resume_selected), ("Cancel", self.cancel_selected),
+                            ("Remove", self.remove_selected)):
+            button = QPushButton(label)
+            button.clicked.connect(slot)
+            buttons.addWidget(button)
+
+        layout = QVBoxLayout()
+        layout.addLayout(form)
+        layout.addWidget(self.budget_label)
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+        self.refresh()
+
+    # ---------- Přidání a ovládání běhů ----------
+
+    def select_pipeline(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Add Pipeline to Queue", "", "Nextflow scripts (*.nf)")
+        if path:
+            self.add_pipeline(path, self.run_cpus_spin.value(), parse_memory(self.run_memory_edit.text()))
+
+    def add_pipeline(self, script, cpus=None, memory=None, priority=0, name=None, resume=False):
+        """Zařadí zkompilovanou pipeline; vrací běh nebo None (složka už je ve frontě)."""
+        try:
+            run = self.queue.add(script, cpus, memory, priority, name, resume)
+        except ValueError as e:
+            self.log.emit(str(e))
+            return None
+        self.log.emit(f"Queued {run.describe()}")
+        self.schedule()
+        return run
+
+    def uses_launch_dir(self, launch_dir):
+        launch_dir = os.path.abspath(launch_dir)
+        return any(r.launch_dir == launch_dir and r.state in (RUNNING, STOPPING) for r in self.queue.runs.values())
+
+    def selected_run(self):
+        row = self.table.currentRow()
+        item = self.table.item(row, 0) if row >= 0 else None
+        return self.queue.runs.get(item.data(Qt.UserRole)) if item else None
+
+    def change_priority(self, delta):
+        run = self.selected_run()
+        if run:
+            self.queue.set_priority(run.id, run.priority + delta)
+            self.schedule()
+
+    def pause_selected(self):
+        run = self.selected_run()
+        if run and self.queue.pause(run.id):
+            self.launchers[run.id].stop()  # Obnovení pak poběží s -resume
+        self.refresh()
+
+    def resume_selected(self):
+        run = self.selected_run()
+        if run and self.queue.resume(run.id):
+            self.schedule()
+
+    def cancel_selected(self):
+        run = self.selected_run()
+        if run and self.queue.cancel(run.id):
+            self.launchers[run.id].stop()
+        self.refresh()
+
+    def remove_selected(self):
+        run = self.selected_run()
+        if run and self.queue.remove(run.id):
+            self.refresh()
+
+    def update_budget(self):
+        memory_text = self.memory_edit.text().strip()
+        memory = parse_memory(memory_text)
+        if memory_text and memory is None:
+            self.log.emit(f"Invalid memory budget: {memory_text}")
+            return
+        self.queue.max_cpus = self.cpus_spin.value()
+        self.queue.max_memory = memory
+        self.schedule()
+
+    # ---------- Spouštění ----------
+
+    def schedule(self):
+        for run in self.queue.schedule():
+            launcher = NextflowLauncher(self, self.program)
+            launcher.output.connect(lambda line, name=run.name: self.log.emit(f"[{name}] {line}"))
+            launcher.error_output.connect(lambda line, name=run.name: self.log.emit(f"[{name}] [stderr] {line}"))
+            launcher.finished.connect(lambda code, run_id=run.id: self.on_run_finished(run_id, code))
+            self.launchers[run.id] = launcher
+            # -resume řeší run_args podle stavu běhu, launcher ho sám nepřidává
+            launcher.start(run.script, args=run_args(run), work_dir=run.launch_dir, resume=False)
+            self.log.emit(f"Started {run.describe()}")
+        self.refresh()
+
+    def on_run_finished(self, run_id, code):
+        launcher = self.launchers.pop(run_id, None)
+        if launcher is not None:
+            launcher.deleteLater()
+        run = self.queue.finish(run_id, code)
+        self.log.emit(f"{run.name} {run.state} (exit code {code})")
+        self.schedule()
+
+    def shutdown(self):
+        """Blokující ukončení všech běhů při zavírání aplikace."""
+        for launcher in list(self.launchers.values()):
+            launcher.shutdown()
+
+    # ---------- Zobrazení ----------
+
+    def refresh(self):
+        cpus, memory = self.queue.used()
+        budget = f"{cpus} of {self.queue.max_cpus} CPUs"
+        if self.queue.max_memory:
+            budget += f", {format_memory(memory // 2 ** 20 * 2 ** 20)} of {format_memory(self.queue.max_memory)}"
+        self.budget_label.setText(f"In use: {budget}")
+
+        selected = self.selected_run()
+        runs = self.queue.ordered()
+        self.table.setRowCount(len(runs))
+        for row, run in enumerate(runs):
+            values = (run.name, str(run.priority), str(run.cpus),
+                      format_memory(run.memory) if run.memory else "-", run.state,
+                      "" if run.exit_code is None else str(run.exit_code))
+            for column, text in enumerate(values):
+                item = QTableWidgetItem(text)
+                if column == 0:
+                    item.setData(Qt.UserRole, run.id)
+                    item.setToolTip(run.script)
+                self.table.setItem(row, column, item)
+            if run is selected:
+                self.table.selectRow(row)
@@ -0,0 +1,159 @@
+"""Sample sheet (CSV/TSV) pro běh celé kohorty v jednom Nextflow běhu.
+
+Formát odpovídá zvyklostem nf-core: sloupec se jménem vzorku, cesta
+k read1, volitelně read2 a libovolné další sloupce s metadaty:
+
+    sample,fastq_1,fastq_2,condition
+    S1,data/S1_R1.fastq.gz,data/S1_R2.fastq.gz,control
+
+Soubor se čte po řádcích, v paměti zůstávají jen id vzorků (kontrola
+duplicit) a souhrn - i sheet s desítkami tisíc vzorků se ověří rychle.
+Samotné řádky do kanálů převádí až Nextflow (splitCsv).
+"""
+import os
+import csv
+
+
+# Přípustné názvy sloupců -> kanonický název
+COLUMN_ALIASES = {
+    "sample": ("sample", "sample_id", "id"),
+    "read1": ("fastq_1", "read1", "r1", "fastq1"),
+    "read2": ("fastq_2", "read2", "r2", "fastq2"),
+}
+REMOTE_PREFIXES = ("s3://", "gs://", "az://", "http://", "https://", "ftp://")
+
+
+class SampleSheetError(Exception):
+    """Sample sheet nelze použít (chybí soubor nebo povinné sloupce)."""
+
+
+class SampleSheetSummary:
+    """Výsledek kontroly sample sheetu.
+
+    columns  -- {"sample": ..., "read1": ..., "read2": ...} skutečné názvy sloupců
+    metadata -- ostatní sloupce (přenesou se do meta mapy)
+    errors   -- prvních max_errors chyb jako text s číslem řádku
+    """
+
+    def __init__(self, path, delimiter, columns, metadata):
+        self.path = path
+        self.delimiter = delimiter
+        self.columns = columns
+        self.metadata = metadata
+        self.samples = 0
+        self.paired = 0
+        self.errors = []
+        self.error_count = 0
+
+    @property
+    def single(self):
+        return self.samples - self.paired
+
+    @property
+    def valid(self):
+        return self.error_count == 0 and self.samples > 0
+
+    def describe(self):
+        if not self.samples:
+            return "Sample sheet contains no samples."
+        if self.paired == self.samples:
+            layout = "paired-end"
+        elif self.paired:
+            layout = f"{self.paired} paired-end, {self.single} single-end"
+        else:
+            layout = "single-end"
+        text = f"{self.samples} samples ({layout})"
+        if self.metadata:
+            text += f", metadata: {', '.join(self.metadata)}"
+        if self.error_count:
+            text += f"; {self.error_count} problems"
+        return text
+
+
+def sheet_delimiter(path, first_line=""):
+    """Oddělovač podle přípony (.tsv/.txt => tab), jinak podle první řádky."""
+    if path.lower().endswith((".tsv", ".txt")):
+        return "\t"
+    if path.lower().endswith(".csv"):
+        return ","
+    return "\t" if first_line.count("\t") > first_line.count(",") else ","
+
+
+def _resolve_columns(header):
+    lowered = {name.strip().lower(): name for name in header}
+    columns = {}
+    for key, aliases in COLUMN_ALIASES.items():
+        columns[key] = next((lowered[a] for a in aliases if a in lowered), None)
+    return columns
+
+
+def read_header(path):
+    """Načte jen hlavičku: vrací (oddělovač, sloupce, sloupce s metadaty)."""
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            first_line = f.readline()
+    except OSError as e:
+        raise SampleSheetError(f"Cannot read sample sheet {path}: {e.strerror}") from e
+    delimiter = sheet_delimiter(path, first_line)
+    header = next(csv.reader([first_line], delimiter=delimiter), [])
+    columns = _resolve_columns(header)
+    if not columns["sample"] or not columns["read1"]:
+        raise SampleSheetError(
+            f"Sample sheet {path} needs a sample column (sample/id) and a read1 column (fastq_1/read1)"
+        )
+    used = {name for name in columns.values() if name}
+    metadata = [name for name in header if name not in used and name.strip()]
+    return delimiter, columns, metadata
+
+
+def iter_samples(path):
+    """Postupně vrací (číslo řádku, záznam) - záznam je dict podle hlavičky."""
+    delimiter, _, _ = read_header(path)
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f, delimiter=delimiter)
+        for row in reader:
+            if not any((value or "").strip() for value in row.values()):
+                continue  # Prázdný řádek
+            yield reader.line_num, row
+
+
+def _missing_file(value, base_dir):
+    if value.startswith(REMOTE_PREFIXES):
+        return False
+    path = value if os.path.isabs(value) else os.path.join(base_dir, value)
+    return not os.path.exists(path)
+
+
+def validate_sample_sheet(path, check_files=True, max_errors=20):
+    """Projde sheet po řádcích a vrátí SampleSheetSummary (bez načtení do paměti)."""
+    delimiter, columns, metadata = read_header(path)
+    summary = SampleSheetSummary(path, delimiter, columns, metadata)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    seen = set()
+
+    def problem(line, message):
+        summary.error_count += 1
+        if len(summary.errors) < max_errors:
+            summary.errors.append(f"line {line}: {message}")
+
+    for line, row in iter_samples(path):
+        sample = (row.get(columns["sample"]) or "").strip()
+        read1 = (row.get(columns["read1"]) or "").strip()
+        read2 = (row.get(columns["read2"]) or "").strip() if columns["read2"] else ""
+        summary.samples += 1
+        if None in row:
+            problem(line, "more fields than columns in header")
+        if not sample:
+            problem(line, "missing sample id")
+        elif sample in seen:
+            problem(line, f"duplicate sample id '{sample}'")
+        seen.add(sample)
+        if not read1:
+            problem(line, f"missing {columns['read1']}")
+        if read2:
+            summary.paired += 1
+        if check_files:
+            for value in (read1, read2):
+                if value and _missing_file(value, base_dir):
+                    problem(line, f"file not found: {value}")
+    return summary
@@ -0,0 +1,171 @@
+"""Panel simulace rozvrhu: kolik to poběží na N jádrech, kde se čeká a na kolik částí dělit.
+
+Simulace (schedule_sim.py) běží v BackgroundJob nad kopií workflow,
+takže GUI nečeká ani u desetitisíců vzorků a úpravy workflow během
+simulace výsledek nerozbijí.
+"""
+import copy
+
+from PySide6.QtCore import Signal
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QPushButton, QSpinBox, QLineEdit, QCheckBox,
+    QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView, QFileDialog
+)
+
+from background_job import BackgroundJob
+from pipeline_compiler import PipelineError, parse_memory, format_memory
+from run_history import format_seconds
+from schedule_sim import DEFAULT_SAMPLE_SIZE, load_costs, run_simulation
+from workflow_graph import WorkflowGraph
+
+
+COLUMNS = ("Process", "Tasks", "CPUs", "Memory", "maxForks", "Busy", "Mean wait", "Max wait", "Started", "Done at")
+
+
+class SchedulePanel(QWidget):
+    log = Signal(str)
+    cost_model_changed = Signal(str)  # cesta k souboru s nákladovým modelem (_general_cost_model)
+    apply_chunks = Signal(dict)       # {modul: čtení na část, 0 = nedělit}
+
+    def __init__(self, snapshot, parent=None):
+        """snapshot() -> (WorkflowGraph, module_info, workflow_params) aktuálního workflow"""
+        super().__init__(parent)
+        self.snapshot = snapshot
+        self.job = None
+        self.result = None
+
+        self.cores_spin = QSpinBox()
+        self.cores_spin.setRange(0, 1000000)
+        self.cores_spin.setSpecialValueText("from Pipeline Settings")
+        self.memory_edit = QLineEdit()
+        self.memory_edit.setPlaceholderText("e.g. 256 GB (empty = Pipeline Settings / no limit)")
+        self.samples_spin = QSpinBox()
+        self.samples_spin.setRange(0, 10000000)
+        self.samples_spin.setSpecialValueText("from sample sheet / input files")
+        self.sample_size_edit = QLineEdit(format_memory(DEFAULT_SAMPLE_SIZE))
+        self.sample_size_edit.setToolTip("Size of each sample when the number of samples is set here")
+        self.costs_edit = QLineEdit()
+        self.costs_edit.setPlaceholderText("optional JSON {module: {seconds_per_gb, threads, overhead, output_ratio}}")
+        costs_button = QPushButton("Browse...")
+        costs_button.clicked.connect(self.select_costs)
+        costs_row = QHBoxLayout()
+        costs_row.addWidget(self.costs_edit)
+        costs_row.addWidget(costs_button)
+        self.chunks_checkbox = QCheckBox("Find the best chunk count for modules that can be split")
+
+        form = QFormLayout()
+        form.addRow("CPUs:", self.cores_spin)
+        form.addRow("Memory:", self.memory_edit)
+        form.addRow("Samples:", self.samples_spin)
+        form.addRow("Sample size:", self.sample_size_edit)
+        form.addRow("Cost model:", costs_row)
+        form.addRow("", self.chunks_checkbox)
+
+        self.summary_label = QLabel("Simulate the workflow to see the predicted schedule.")
+        self.summary_label.setWordWrap(True)
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionMode(QAbstractItemView.NoSelection)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in range(1, len(COLUMNS)):
+            self.table.horizontalHeader().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+
+        self.btn_simulate = QPushButton("Simulate")
+        self.btn_simulate.clicked.connect(self.simulate)
+        self.btn_apply = QPushButton("Apply Chunk Sizes")
+        self.btn_apply.setToolTip("Set the scatter chunk size of each module to the best one found")
+        self.btn_apply.setEnabled(False)
+        self.btn_apply.clicked.connect(self.apply_best_chunks)
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.btn_simulate)
+        buttons.addWidget(self.btn_apply)
+        buttons.addStretch(1)
+
+        layout = QVBoxLayout()
+        layout.addLayout(form)
+        layout.addLayout(buttons)
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+    def load_settings(self, workflow_params):
+        """Předvyplní soubor s nákladovým modelem z nastavení pipeline."""
+        self.costs_edit.setText(str(workflow_params.get("_general_cost_model", "") or ""))
+
+    def select_costs(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Select Cost Model", "", "JSON files (*.json)")
+        if path:
+            self.costs_edit.setText(path)
+
+    # ---------- Simulace ----------
+
+    def simulate(self):
+        if self.job is not None and self.job.is_running():
+            return
+        graph, module_info, workflow_params = self.snapshot()
+        if not graph.nodes:
+            self.summary_label.setText("Workflow is empty.")
+            return
+        memory = parse_memory(self.memory_edit.text()) if self.memory_edit.text().strip() else None
+        samples = None
+        if self.samples_spin.value():
+            size = parse_memory(self.sample_size_edit.text())
+            if not size:
+                self.summary_label.setText(f"Invalid sample size '{self.sample_size_edit.text()}'.")
+                return
+            samples = [size] * self.samples_spin.value()
+        costs_path = self.costs_edit.text().strip()
+        if costs_path != str(workflow_params.get("_general_cost_model", "") or ""):
+            self.cost_model_changed.emit(costs_path)
+        # Vlákno dostane vlastní kopii - workflow se mezitím může měnit
+        graph = WorkflowGraph.from_dict(graph.to_dict())
+        workflow_params = copy.deepcopy(workflow_params)
+        cores = self.cores_spin.value() or None
+        find_chunks = self.chunks_checkbox.isChecked()
+
+        def work():
+            try:
+                costs = load_costs(costs_path) if costs_path else {}
+                return run_simulation(graph, module_info, workflow_params, cores, memory, samples, costs,
+                                      find_chunks)
+            except PipelineError as e:
+                return str(e)  # chyba workflow nebo modelu, ne programu
+
+        self.btn_simulate.setEnabled(False)
+        self.summary_label.setText("Simulating...")
+        self.job = BackgroundJob(work, self)
+        self.job.done.connect(self.show_result)
+        self.job.failed.connect(self.on_failed)
+        self.job.start()
+
+    def on_failed(self, message):
+        self.btn_simulate.setEnabled(True)
+        self.summary_label.setText(f"Simulation failed: {message}")
+        self.log.emit(f"Schedule simulation failed: {message}")
+
+    def show_result(self, result):
+        if isinstance(result, str):
+            self.on_failed(result)
+            return
+        self.btn_simulate.setEnabled(True)
+        self.result = result
+        lines = result.describe()
+        self.summary_label.setText("\n".join(lines))
+        for line in lines[:1]:
+            self.log.emit(f"Schedule simulation: {line} (simulated in {result.elapsed * 1000:.0f} ms)")
+        self.table.setRowCount(len(result.processes))
+        for row, stats in enumerate(result.processes):
+            values = (stats.name, str(stats.tasks), str(stats.cpus),
+                      format_memory(stats.memory) if stats.memory else "-",
+                      str(stats.max_forks) if stats.max_forks else "-",
+                      format_seconds(stats.busy), format_seconds(stats.mean_wait), format_seconds(stats.max_wait),
+                      format_seconds(stats.first_start), format_seconds(stats.last_end))
+            for column, text in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(text))
+        self.btn_apply.setEnabled(bool(result.chunks))
+
+    def apply_best_chunks(self):
+        if self.result is not None and self.result.chunks:
+            self.apply_chunks.emit({module: reads for module, (_, reads, _) in self.result.chunks.items()})
@@ -0,0 +1,641 @@
+"""Simulace rozvrhu pipeline před spuštěním (dry run bez Nextflow).
+
+Diskrétní simulace událostí nad procesy, které vzniknou překladem
+workflow: řetězec spojený rourou je jeden proces, modul ve scatter
+módu se rozpadne na části a slučovací proces. Task trvá podle
+nákladového modelu modulu
+
+    čas = overhead + GB vstupu * seconds_per_gb * threads / přidělená CPU
+
+'threads' je počet vláken, se kterým byla rychlost změřena (výchozí =
+cpus z JSON); nástroj bez threads_param běží se svými vlákny, takže
+mu víc CPU nepomůže. Model se zadává v JSON modulu
+
+    "cost": {"seconds_per_gb": 900, "threads": 4, "overhead": 30, "output_ratio": 1.2}
+
+nebo v souboru {"název modulu": {...}} (_general_cost_model), který
+má přednost. output_ratio = kolik GB výstupu vznikne z 1 GB vstupu.
+
+Plánuje se jako v executoru Nextflow: připravený task se spustí,
+jakmile se vejde do volných CPU a paměti, pod maxForks procesu
+a queueSize (jen cluster executory); dřív připravené mají přednost.
+Vzorky ze sample sheetu (nebo souborů globu) mají velikost podle
+souborů na disku, sdílené vstupy (reference) čas tasků nemění.
+
+Bez GUI (ze složky core/gui):
+
+    python -m schedule_sim workflow.json --cores 64 --samples 10000 --sample-size "2 GB"
+    python -m schedule_sim workflow.json --costs costs.json --best-chunks
+"""
+import os
+import sys
+import glob
+import json
+import math
+import heapq
+import time
+from collections import deque
+
+from pipeline_compiler import (
+    PipelineError, IMPLICIT_INPUT, GATHER_CPUS, GZ_BYTES_PER_READ, FASTQ_BYTES_PER_READ,
+    as_graph, bind_inputs, compressed_intermediates, fusion_chains, has_glob, is_reads_input,
+    parse_memory, format_memory, process_name_for, process_resources, scatter_settings, _positive_int,
+)
+from module_registry import ModuleSpec
+from run_history import format_seconds
+from sample_sheet import REMOTE_PREFIXES, SampleSheetError, read_header, iter_samples
+from workflow_graph import WorkflowCycleError
+
+
+GB = 2 ** 30
+COST_KEYS = ("seconds_per_gb", "threads", "overhead", "output_ratio")
+DEFAULT_COST = {"seconds_per_gb": 60.0, "overhead": 10.0, "output_ratio": 1.0}
+GATHER_COST = {"seconds_per_gb": 20.0, "overhead": 5.0, "output_ratio": 1.0}  # samtools merge / cat
+DEFAULT_SAMPLE_SIZE = 2 * GB
+DEFAULT_QUEUE_SIZE = 100  # executor.queueSize Nextflow pro cluster executory
+CHUNK_CANDIDATES = (1, 2, 4, 8, 16, 32, 64)
+CHUNK_ROUNDS = 3
+
+# Vztah mezi procesy (jednotka = vzorek, u procesu bez vzorků jediná)
+SAME, ALL, ONE = "same", "all", "one"  # stejný vzorek / všechny vzorky (collect) / jediný task
+
+
+def load_costs(path):
+    """{název modulu: nákladový model} ze souboru JSON."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except OSError as e:
+        raise PipelineError(f"Cannot read cost model {path}: {e.strerror}") from e
+    except ValueError as e:
+        raise PipelineError(f"Cost model {path} is not valid JSON: {e}") from e
+    if not isinstance(data, dict) or not all(isinstance(v, dict) for v in data.values()):
+        raise PipelineError(f"Cost model {path} must map module names to {{\"seconds_per_gb\": ...}} objects")
+    return data
+
+
+def cost_model(name, cost, defaults=DEFAULT_COST):
+    """Ověřený model {klíč: float} z JSON 'cost' doplněný výchozími hodnotami."""
+    model = {}
+    for key in COST_KEYS:
+        value = cost.get(key, defaults.get(key))
+        if value is None or value == "":
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            number = -1
+        if number < 0 or (key == "threads" and number == 0):
+            raise PipelineError(f"Invalid cost '{key}' for {name}: '{value}'")
+        model[key] = number
+    return model
+
+
+def _file_size(path, base_dir=""):
+    path = str(path or "").strip()
+    if not path or path.startswith(REMOTE_PREFIXES):
+        return None
+    if base_dir and not os.path.isabs(path):
+        path = os.path.join(base_dir, path)
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def sample_sizes(workflow_params, graph=(), module_info=None):
+    """Velikosti vzorků v bajtech: ze sample sheetu (read1 + read2), jinak ze souborů
+    globu na vstupu čtení; [] = nic lokálně dostupného (použije se výchozí velikost)."""
+    sheet = str(workflow_params.get("_general_sample_sheet", "") or "").strip()
+    if sheet:
+        try:
+            _, columns, _ = read_header(sheet)
+            base_dir = os.path.dirname(os.path.abspath(sheet))
+            sizes = []
+            for _, row in iter_samples(sheet):
+                found = [_file_size(row.get(columns[key]), base_dir) for key in ("read1", "read2") if columns[key]]
+                found = [size for size in found if size is not None]
+                sizes.append(sum(found) if found else DEFAULT_SAMPLE_SIZE)
+            return sizes
+        except (OSError, SampleSheetError):
+            return []
+    for node in getattr(graph, "nodes", graph):
+        spec = module_info.get(node) if module_info else None
+        params = workflow_params.get(node, {})
+        for input_id in (spec.input_ids if spec else ()):
+            path = str(params.get(input_id, "") or "").strip()
+            if is_reads_input(input_id) and has_glob(path) and not path.startswith(REMOTE_PREFIXES):
+                sizes = [os.path.getsize(p) for p in sorted(glob.glob(path)) if os.path.isfile(p)]
+                if sizes:
+                    return sizes
+    return []
+
+
+class SimProcess:
+    """Proces přeloženého workflow tak, jak ho vidí simulace."""
+    __slots__ = ("name", "modules", "cpus", "memory", "max_forks", "per_sample", "stages",
+                 "sample_inputs", "deps", "reads_per_chunk", "bytes_per_read", "default_cost")
+
+    def __init__(self, name, modules, cpus, memory, max_forks=None):
+        self.name = name
+        self.modules = modules            # moduly procesu (víc = roura)
+        self.cpus = cpus
+        self.memory = memory              # bajty (0 = bez omezení)
+        self.max_forks = max_forks
+        self.per_sample = False           # jeden task na vzorek
+        self.stages = []                  # (overhead, s/GB při přidělených CPU, output_ratio) pro každý modul
+        self.sample_inputs = 0            # kolik vstupů čte přímo soubory vzorku
+        self.deps = []                    # (index procesu, SAME / ALL / ONE)
+        self.reads_per_chunk = None       # scatter: velikost části v počtu čtení
+        self.bytes_per_read = GZ_BYTES_PER_READ
+        self.default_cost = []            # moduly bez nákladového modelu
+
+    def runtime(self, gb):
+        """Doba tasku s gb vstupu; části roury běží současně, rozhoduje nejpomalejší."""
+        longest = 0.0
+        for overhead, per_gb, ratio in self.stages:
+            longest = max(longest, overhead + gb * per_gb)
+            gb *= ratio
+        return longest
+
+    @property
+    def output_ratio(self):
+        return math.prod(ratio for _, _, ratio in self.stages)
+
+    def chunks(self, gb):
+        if not self.reads_per_chunk:
+            return 1
+        return max(1, math.ceil(gb * GB / self.bytes_per_read / self.reads_per_chunk))
+
+
+def _stage(spec, resources, cost):
+    model = cost_model(spec.name, cost)
+    cpus = resources.get("cpus") or 1
+    threads = model.get("threads", cpus)
+    # Nástroj s threads_param dostane ${task.cpus} vláken, ostatní běží se svými
+    speedup = cpus / threads if spec.threads_param else 1.0
+    return model["overhead"], model["seconds_per_gb"] / speedup, model["output_ratio"]
+
+
+def build_processes(workflow, module_info, workflow_params, costs=None, chunks=None):
+    """[SimProcess] v topologickém pořadí - stejné procesy, jaké vytvoří compile_pipeline.
+
+    costs  -- {modul: model} s předností před 'cost' v JSON modulu
+    chunks -- {modul: čtení na část} místo _scatter_size z GUI (0 = bez scatter)
+    """
+    costs, chunks = costs or {}, chunks or {}
+    graph = as_graph(workflow, module_info, workflow_params)
+    if not graph.nodes:
+        raise PipelineError("Workflow is empty.")
+    unknown = [m for m in graph.nodes if m not in module_info]
+    if unknown:
+        raise PipelineError(f"Unknown modules in workflow: {', '.join(unknown)}")
+    try:
+        order = graph.topological_order()
+    except WorkflowCycleError as e:
+        raise PipelineError(str(e)) from e
+    graph, module_info, _ = compressed_intermediates(graph, module_info, workflow_params)
+
+    upstream = {node: [] for node in graph.nodes}
+    for edge in graph.edges:
+        upstream[edge.target].append(edge)
+    bindings = {node: bind_inputs(node, module_info[node], workflow_params.get(node, {}), upstream[node])
+                for node in order}
+    scatter = {}
+    for node in order:
+        spec, params = module_info[node], workflow_params.get(node, {})
+        if not spec.scatter:
+            continue
+        scatter_input = spec.scatter.get("input") or spec.input_ids[0]
+        user_path = next((b[3] for b in bindings[node] if b[0] == scatter_input), None)
+        if node in chunks:
+            settings = {"reads": chunks[node], "input": scatter_input} if chunks[node] else None
+        else:
+            settings = scatter_settings(spec, params, user_path)
+        if settings:
+            settings["compress"] = str(user_path or scatter_input).endswith(".gz")
+            scatter[node] = settings
+    group_of = {node: [node] for node in order}
+    for chain in fusion_chains(graph, module_info, bindings, scatter).values():
+        for node in chain:
+            group_of[node] = chain
+    sheet = str(workflow_params.get("_general_sample_sheet", "") or "").strip()
+
+    processes, index_of = [], {}  # index_of: modul -> index procesu s jeho výstupy
+    for node in order:
+        group = group_of[node]
+        if node != group[-1]:
+            continue
+        resources = [process_resources(module_info[m], workflow_params.get(m, {}), workflow_params)
+                     for m in group]
+        forks = [_positive_int(workflow_params.get(m, {}).get("_max_forks")) for m in group]
+        forks = [f for f in forks if f]
+        process = SimProcess(
+            "_".join(process_name_for(m) for m in group), group,
+            sum(r.get("cpus") or 1 for r in resources),
+            sum(parse_memory(r["memory"]) for r in resources if "memory" in r),
+            min(forks) if forks else None,
+        )
+        for member, res in zip(group, resources):
+            spec = module_info[member]
+            cost = {**spec.cost, **costs.get(member, {})}
+            if not cost:
+                process.default_cost.append(member)
+            process.stages.append(_stage(spec, res, cost))
+
+        for i, member in enumerate(group):
+            stdin = module_info[member].streaming.get("stdin") if i else None
+            for input_id, var_name, edges, user_path in bindings[member]:
+                if i and input_id == stdin:
+                    continue  # čte z roury uvnitř procesu
+                if edges:
+                    collect = var_name == IMPLICIT_INPUT or any(e.collect for e in edges)
+                    for edge in edges:
+                        source = index_of[edge.source]
+                        if not processes[source].per_sample:
+                            kind = ONE
+                        else:
+                            kind = ALL if collect else SAME
+                        process.deps.append((source, kind))
+                elif (user_path and has_glob(str(user_path))) or (sheet and not user_path and is_reads_input(input_id)):
+                    process.sample_inputs += 1
+        process.per_sample = bool(process.sample_inputs) or any(kind == SAME for _, kind in process.deps)
+        processes.append(process)
+        for member in group:
+            index_of[member] = len(processes) - 1
+
+        settings = scatter.get(node)
+        if settings:
+            process.reads_per_chunk = settings["reads"]
+            process.bytes_per_read = GZ_BYTES_PER_READ if settings["compress"] else FASTQ_BYTES_PER_READ
+            spec = module_info[node]
+            gather = spec.scatter.get("gather") or {}
+            gather_res = process_resources(ModuleSpec(spec.name, resources={"cpus": GATHER_CPUS}), {},
+                                           workflow_params)
+            merge = SimProcess(f"{process_name_for(node)}_GATHER", [node], gather_res.get("cpus") or 1, 0)
+            model = cost_model(merge.name, gather.get("cost", {}), GATHER_COST)
+            merge.stages.append((model["overhead"], model["seconds_per_gb"], model["output_ratio"]))
+            merge.per_sample = process.per_sample
+            merge.deps.append((len(processes) - 1, SAME if process.per_sample else ONE))
+            processes.append(merge)
+            index_of[node] = len(processes) - 1
+    return processes
+
+
+class ProcessStats:
+    __slots__ = ("name", "tasks", "cpus", "memory", "max_forks", "busy", "total_wait", "max_wait",
+                 "first_start", "last_end")
+
+    def __init__(self, process):
+        self.name = process.name
+        self.tasks = 0
+        self.cpus = process.cpus
+        self.memory = process.memory
+        self.max_forks = process.max_forks
+        self.busy = 0.0           # součet dob tasků
+        self.total_wait = 0.0     # součet čekání připravených tasků na volné zdroje
+        self.max_wait = 0.0
+        self.first_start = None
+        self.last_end = 0.0
+
+    @property
+    def mean_wait(self):
+        return self.total_wait / self.tasks if self.tasks else 0.0
+
+
+class SimulationResult:
+    """Výsledek jedné simulace (časy v sekundách, paměť v bajtech)."""
+
+    def __init__(self, makespan, cores, memory, samples, processes, peak_cpus, peak_memory, cpu_seconds,
+                 elapsed=0.0, notes=()):
+        self.makespan = makespan
+        self.cores = cores
+        self.memory = memory
+        self.samples = samples
+        self.processes = processes  # [ProcessStats]
+        self.peak_cpus = peak_cpus
+        self.peak_memory = peak_memory
+        self.cpu_seconds = cpu_seconds
+        self.elapsed = elapsed
+        self.notes = list(notes)
+        self.unlimited = None       # SimulationResult bez omezení CPU a paměti
+        self.chunks = {}            # modul -> (počet částí, čtení na část, makespan)
+
+    @property
+    def utilization(self):
+        return self.cpu_seconds / (self.cores * self.makespan) if self.makespan and self.cores else 0.0
+
+    def describe(self):
+        """Řádky souhrnu pro log a CLI."""
+        budget = f"{self.cores} CPUs" + (f", {format_memory(self.memory)}" if self.memory else "")
+        lines = [
+            f"Makespan: {format_seconds(self.makespan)} for {self.samples} sample(s) on {budget}",
+            f"Peak use: {self.peak_cpus} CPUs, {format_memory(self.peak_memory) if self.peak_memory else 'no memory'}"
+            f" reserved; CPU utilisation {self.utilization:.0%}",
+        ]
+        if self.unlimited is not None:
+            lines.append(f"Without limits: {format_seconds(self.unlimited.makespan)} using up to "
+                         f"{self.unlimited.peak_cpus} CPUs (more cores than that will not help)")
+        for module, (count, reads, makespan) in self.chunks.items():
+            if count == 1:
+                lines.append(f"Best chunking for {module}: do not split (makespan {format_seconds(makespan)})")
+            else:
+                lines.append(f"Best chunking for {module}: {count} chunks per sample = scatter by {reads} reads "
+                             f"(makespan {format_seconds(makespan)})")
+        lines += self.notes
+        return lines
+
+
+def _run(processes, sizes, cores, memory, queue_size):
+    """Vlastní simulace; sizes = velikosti vzorků v GB. Vrací (makespan, [ProcessStats], peak CPU, peak paměť, CPU-s)."""
+    count = len(processes)
+    samples = len(sizes)
+    units = [samples if p.per_sample else 1 for p in processes]
+    cpus = [min(p.cpus, cores) for p in processes]
+    mem = [min(p.memory, memory) if memory else p.memory for p in processes]
+    forks = [p.max_forks or math.inf for p in processes]
+
+    # Velikost vstupu, počet tasků a doba tasku každé jednotky (nezávisí na rozvrhu)
+    runtimes, tasks, outputs = [], [], []
+    for p in processes:
+        n = samples if p.per_sample else 1
+        gb = [0.0] * n
+        if p.sample_inputs:
+            if p.per_sample:
+                gb = [size * p.sample_inputs for size in sizes]
+            else:
+                gb[0] = sum(sizes) * p.sample_inputs
+        for q, kind in p.deps:
+            if kind == SAME:
+                gb = [a + b for a, b in zip(gb, outputs[q])]
+            else:
+                extra = sum(outputs[q]) if kind == ALL else outputs[q][0]
+                gb = [a + extra for a in gb]
+        chunks = [p.chunks(x) for x in gb]
+        runtimes.append([p.runtime(x / k) for x, k in zip(gb, chunks)])
+        tasks.append(chunks)
+        ratio = p.output_ratio
+        outputs.append([x * ratio for x in gb])
+
+    dependents = [[] for _ in range(count)]
+    all_left = []  # zbývající jednotky zdroje pro závislosti ALL
+    waiting = []
+    for i, p in enumerate(processes):
+        for q, kind in p.deps:
+            dependents[q].append((i, kind, len(all_left)))
+            all_left.append(units[q])
+        waiting.append([len(p.deps)] * units[i])
+    left = [list(t) for t in tasks]
+
+    pending = [deque() for _ in range(count)]  # [čas připravení, jednotka, zbývající tasky]
+    stats = [ProcessStats(p) for p in processes]
+    events, seq = [], 0
+    free_cpus, free_mem = cores, memory or math.inf
+    running, total_running = [0] * count, 0
+    used_cpus = used_mem = peak_cpus = peak_mem = 0
+    cpu_seconds = 0.0
+    now = 0.0
+
+    def release(p, unit):
+        waiting[p][unit] -= 1
+        if not waiting[p][unit]:
+            pending[p].append([now, unit, tasks[p][unit]])
+
+    for p in range(count):
+        for unit in range(units[p]):
+            if not waiting[p][unit]:
+                pending[p].append([0.0, unit, tasks[p][unit]])
+
+    while True:
+        # Spuštění všeho, co se vejde; dřív připravený task má přednost
+        while total_running < queue_size:
+            best, best_ready = -1, math.inf
+            for p in range(count):
+                queue = pending[p]
+                if queue and queue[0][0] < best_ready and running[p] < forks[p] \
+                        and cpus[p] <= free_cpus and mem[p] <= free_mem:
+                    best, best_ready = p, queue[0][0]
+            if best < 0:
+                break
+            entry = pending[best][0]
+            unit = entry[1]
+            entry[2] -= 1
+            if not entry[2]:
+                pending[best].popleft()
+            duration = runtimes[best][unit]
+            stat = stats[best]
+            wait = now - best_ready
+            stat.tasks += 1
+            stat.busy += duration
+            stat.total_wait += wait
+            if wait > stat.max_wait:
+                stat.max_wait = wait
+            if stat.first_start is None:
+                stat.first_start = now
+            free_cpus -= cpus[best]
+            free_mem -= mem[best]
+            used_cpus += cpus[best]
+            used_mem += mem[best]
+            peak_cpus = max(peak_cpus, used_cpus)
+            peak_mem = max(peak_mem, used_mem)
+            cpu_seconds += duration * cpus[best]
+            running[best] += 1
+            total_running += 1
+            seq += 1
+            heapq.heappush(events, (now + duration, seq, best, unit))
+        if not events:
+            break
+        # Dokončení všech tasků se stejným časem, pak znovu plánování
+        now = events[0][0]
+        while events and events[0][0] == now:
+            _, _, p, unit = heapq.heappop(events)
+            free_cpus += cpus[p]
+            free_mem += mem[p]
+            used_cpus -= cpus[p]
+            used_mem -= mem[p]
+            running[p] -= 1
+            total_running -= 1
+            stats[p].last_end = now
+            left[p][unit] -= 1
+            if left[p][unit]:
+                continue
+            for target, kind, dep in dependents[p]:
+                if kind == SAME:
+                    release(target, unit)
+                elif kind == ONE:
+                    for j in range(units[target]):
+                        release(target, j)
+                else:
+                    all_left[dep] -= 1
+                    if not all_left[dep]:
+                        for j in range(units[target]):
+                            release(target, j)
+
+    stuck = [processes[p].name for p in range(count) if any(waiting[p]) or pending[p]]
+    if stuck:
+        raise PipelineError(f"Simulation stalled, these processes never ran: {', '.join(stuck)}")
+    return now, stats, peak_cpus, peak_mem, cpu_seconds
+
+
+def resolve_samples(workflow, module_info, workflow_params):
+    """(velikosti vzorků, poznámky) - bez lokálních souborů jeden vzorek výchozí velikosti."""
+    samples = sample_sizes(workflow_params, as_graph(workflow, module_info, workflow_params), module_info)
+    if samples:
+        return samples, []
+    return [DEFAULT_SAMPLE_SIZE], [f"No local input files found, simulated 1 sample of "
+                                   f"{format_memory(DEFAULT_SAMPLE_SIZE)}."]
+
+
+def _limits(workflow_params, cores, memory):
+    """(CPU, paměť v B nebo None, queueSize) simulovaného stroje/clusteru."""
+    if cores is None:
+        cores = _positive_int(workflow_params.get("_general_max_cpus")) or os.cpu_count() or 1
+    if memory is None:
+        memory = parse_memory(workflow_params.get("_general_max_memory"))
+    queue_size = math.inf
+    if str(workflow_params.get("_general_executor", "") or "local") != "local":
+        queue_size = _positive_int(workflow_params.get("_general_queue_size")) or DEFAULT_QUEUE_SIZE
+    return cores, memory, queue_size
+
+
+def simulate(workflow, module_info, workflow_params, cores=None, memory=None, samples=None, costs=None,
+             chunks=None, processes=None):
+    """Simuluje běh workflow; samples = velikosti vzorků v bajtech (None = ze sample sheetu/globu).
+
+    cores/memory -- rozpočet (None = _general_max_cpus/_memory, jinak CPU tohoto stroje)
+    """
+    start = time.perf_counter()
+    cores, memory, queue_size = _limits(workflow_params, cores, memory)
+    notes = []
+    if samples is None:
+        samples, notes = resolve_samples(workflow, module_info, workflow_params)
+    if processes is None:
+        processes = build_processes(workflow, module_info, workflow_params, costs, chunks)
+    makespan, stats, peak_cpus, peak_mem, cpu_seconds = _run(
+        processes, [size / GB for size in samples], cores, memory, queue_size)
+    defaults = sorted({m for p in processes for m in p.default_cost})
+    if defaults:
+        notes.append(f"No cost model for {', '.join(defaults)}: assumed {DEFAULT_COST['seconds_per_gb']:g} s/GB "
+                     f"+ {DEFAULT_COST['overhead']:g} s per task.")
+    for p in processes:
+        if p.cpus > cores or (memory and p.memory > memory):
+            notes.append(f"{p.name} asks for more than the simulated budget, simulated with "
+                         f"{min(p.cpus, cores)} CPUs" + (f", {format_memory(min(p.memory, memory))}" if memory else ""))
+    return SimulationResult(makespan, cores, memory, len(samples), stats, peak_cpus, peak_mem, cpu_seconds,
+                            time.perf_counter() - start, notes)
+
+
+def best_chunks(workflow, module_info, workflow_params, samples, cores=None, memory=None, costs=None,
+                candidates=CHUNK_CANDIDATES):
+    """Nejkratší makespan přes počty částí modulů, které umí scatter a nejsou v rouře
+    (po jednom modulu, zdvojnásobuje se, dokud to zkracuje běh).
+
+    Vrací {modul: (počet částí, čtení na část, makespan)}; počet částí
+    je pro vzorek mediánové velikosti, do _scatter_size jde počet čtení.
+    """
+    graph = as_graph(workflow, module_info, workflow_params)
+    piped = {node for edge in graph.edges if edge.fuse for node in (edge.source, edge.target)}
+    scatterable = [node for node in graph.nodes
+                   if node in module_info and module_info[node].scatter and node not in piped]
+    if not scatterable or not samples:
+        return {}
+    median = sorted(samples)[len(samples) // 2]
+    chosen, counts, makespan = {}, {}, None
+    # Zkrácení jedné větve může udělat kritickou jinou - proto víc kol, dokud se volba mění
+    for _ in range(CHUNK_ROUNDS):
+        changed = False
+        for node in scatterable:
+            spec = module_info[node]
+            scatter_input = spec.scatter.get("input") or spec.input_ids[0]
+            path = str(workflow_params.get(node, {}).get(scatter_input, "") or scatter_input)
+            reads = max(1, median // (GZ_BYTES_PER_READ if path.endswith(".gz") else FASTQ_BYTES_PER_READ))
+            best = None
+            for count in candidates:
+                reads_per_chunk = 0 if count == 1 else math.ceil(reads / count)
+                trial = {**chosen, node: reads_per_chunk}
+                result = simulate(graph, module_info, workflow_params, cores, memory, samples, costs, trial)
+                if best is not None and result.makespan >= best[2] * 0.99:
+                    break  # víc částí už znatelně nezrychlí, jen přidá režii tasků
+                best = (count, reads_per_chunk, result.makespan)
+            changed |= chosen.get(node) != best[1]
+            chosen[node], counts[node], makespan = best[1], best[0], best[2]
+        if not changed:
+            break
+    return {node: (counts[node], chosen[node], makespan) for node in scatterable}
+
+
+def run_simulation(workflow, module_info, workflow_params, cores=None, memory=None, samples=None, costs=None,
+                   find_chunks=False):
+    """Simulace s rozpočtem, bez omezení (kolik jader ještě pomůže) a případně hledání částí."""
+    if costs is None:
+        path = str(workflow_params.get("_general_cost_model", "") or "").strip()
+        costs = load_costs(path) if path else {}
+    notes = []
+    if samples is None:
+        samples, notes = resolve_samples(workflow, module_info, workflow_params)
+    processes = build_processes(workflow, module_info, workflow_params, costs)
+    result = simulate(workflow, module_info, workflow_params, cores, memory, samples, processes=processes)
+    result.notes[:0] = notes
+    result.unlimited = simulate(workflow, module_info, workflow_params, math.inf, 0, samples, processes=processes)
+    if find_chunks:
+        result.chunks = best_chunks(workflow, module_info, workflow_params, samples, result.cores, result.memory,
+                                    costs)
+    return result
+
+
+def format_table(result):
+    """Tabulka procesů pro CLI."""
+    rows = [("process", "tasks", "cpus", "memory", "busy", "mean wait", "max wait", "done at")]
+    for s in result.processes:
+        rows.append((s.name, str(s.tasks), str(s.cpus), format_memory(s.memory) if s.memory else "-",
+                     format_seconds(s.busy), format_seconds(s.mean_wait), format_seconds(s.max_wait),
+                     format_seconds(s.last_end)))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join("  ".join(cell.ljust(w) if i == 0 else cell.rjust(w) for i, (cell, w) in
+                               enumerate(zip(row, widths))) for row in rows)
+
+
+def main(argv=None):
+    import argparse
+    from module_registry import DEFAULT_MODULES_DIR, load_modules
+    from pipeline_compiler import load_workflow
+
+    parser = argparse.ArgumentParser(prog="schedule_sim", description="Simulate how a workflow schedules on N cores.")
+    parser.add_argument("workflow", help="workflow JSON (see pipeline_compiler)")
+    parser.add_argument("-m", "--modules-dir", default=DEFAULT_MODULES_DIR, help="directory with module JSON definitions")
+    parser.add_argument("--cores", type=int, help="CPUs available (default _general_max_cpus or this machine)")
+    parser.add_argument("--memory", help="memory available, e.g. '256 GB' (default _general_max_memory)")
+    parser.add_argument("--samples", type=int, help="number of samples (default from the sample sheet)")
+    parser.add_argument("--sample-size", default=format_memory(DEFAULT_SAMPLE_SIZE),
+                        help="size of each sample with --samples (default %(default)s)")
+    parser.add_argument("--costs", help="cost model JSON {module: {seconds_per_gb, threads, overhead, output_ratio}}")
+    parser.add_argument("--best-chunks", action="store_true", help="search the best chunk count for scatter modules")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        workflow, workflow_params = load_workflow(args.workflow)
+        module_info = load_modules(args.modules_dir)
+        samples = None
+        if args.samples:
+            size = parse_memory(args.sample_size)
+            if not size:
+                parser.error(f"invalid sample size '{args.sample_size}'")
+            samples = [size] * args.samples
+        memory = parse_memory(args.memory) if args.memory else None
+        costs = load_costs(args.costs) if args.costs else None
+        result = run_simulation(workflow, module_info, workflow_params, args.cores, memory, samples, costs,
+                                args.best_chunks)
+    except (OSError, ValueError, PipelineError) as e:
+        print(f"schedule_sim: {e}", file=sys.stderr)
+        return 1
+    print(format_table(result))
+    print()
+    for line in result.describe():
+        print(line)
+    print(f"Simulated in {result.elapsed * 1000:.0f} ms ({(time.perf_counter() - start) * 1000:.0f} ms in total)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""Model nastavení modulů pro PipelineSettingsDialog (model/view místo widgetů).
+
+Strom: moduly -> jejich vstupy, parametry, scatter, I/O container a maxForks. Editor
+(QLineEdit, výběr souboru, combo) vytvoří delegát až pro právě
+editovanou buňku, takže dialog otevře i workflow s tisíci parametry.
+"""
+import os
+
+from PySide6.QtCore import Qt, QAbstractItemModel, QModelIndex, QPersistentModelIndex, QSortFilterProxyModel
+from PySide6.QtGui import QFont
+from PySide6.QtWidgets import (
+    QStyledItemDelegate, QWidget, QHBoxLayout, QLineEdit, QToolButton, QComboBox, QFileDialog
+)
+
+from input_manifest import input_pattern
+
+
+INPUT, PARAM, SCATTER_BY, SCATTER_SIZE, MAX_FORKS = "input", "param", "_scatter_by", "_scatter_size", "_max_forks"
+IO_CONTAINER = "_io_container"
+SCATTER_MODES = (("Off", ""), ("Split by read count", "reads"), ("Split by bytes", "bytes"))
+COLUMNS = ("Setting", "Value", "Info")
+SETTING, VALUE, INFO = range(3)
+
+
+class SettingRow:
+    """Jedna editovatelná hodnota; u modulu (parent None) drží seznam řádků."""
+    __slots__ = ("module", "key", "kind", "value", "info", "tooltip", "parent", "children", "row")
+
+    def __init__(self, module, key="", kind="", value="", info="", tooltip="", parent=None, row=0):
+        self.module = module
+        self.key = key
+        self.kind = kind
+        self.value = value
+        self.info = info
+        self.tooltip = tooltip
+        self.parent = parent
+        self.children = []
+        self.row = row
+
+    def display_value(self):
+        if self.kind == SCATTER_BY:
+            return next((label for label, mode in SCATTER_MODES if mode == self.value), self.value)
+        return self.value
+
+
+def build_rows(modules, module_info, workflow_params):
+    """Řádky modelu z definic modulů a uložených hodnot."""
+    roots = []
+    for module_name in modules:
+        spec = module_info.get(module_name)
+        if spec is None:
+            continue
+        saved = workflow_params.get(module_name, {})
+        root = SettingRow(module_name, row=len(roots))
+        children = root.children
+
+        def add(key, kind, value, info="", tooltip=""):
+            children.append(SettingRow(module_name, key, kind, str(value), info, tooltip, root, len(children)))
+
+        for input_id in spec.input_ids:
+            add(input_id, INPUT, saved.get(input_id, ""), "input file")
+        for param_id, param_type, default_value, description in spec.params:
+            add(param_id, PARAM, saved.get(param_id, default_value),
+                f"{param_type}, default: {default_value}", description)
+        if spec.scatter:
+            add("Scatter mode", SCATTER_BY, saved.get("_scatter_by", ""), "split input into chunks")
+            add("Chunk size", SCATTER_SIZE, saved.get("_scatter_size", ""), "e.g. 2000000 reads or 500 MB")
+        stdout = spec.streaming.get("stdout", "")
+        if stdout.endswith(".sam"):
+            # SAM ze stdout převede na BAM/CRAM samtools view (I/O profil) - musí být v image
+            add("I/O container", IO_CONTAINER, saved.get(IO_CONTAINER, ""), f"image with samtools for {stdout}")
+        add("Max parallel tasks", MAX_FORKS, saved.get("_max_forks", ""), "maxForks, empty = no limit")
+        roots.append(root)
+    return roots
+
+
+class SettingsModel(QAbstractItemModel):
+    def __init__(self, modules, module_info, workflow_params, parent=None):
+        super().__init__(parent)
+        self.roots = build_rows(modules, module_info, workflow_params)
+        self._bold = QFont()
+        self._bold.setBold(True)
+
+    # ---------- Struktura ----------
+
+    def _row(self, index):
+        return index.internalPointer() if index.isValid() else None
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        item = self._row(parent)
+        rows = self.roots if item is None else item.children
+        return self.createIndex(row, column, rows[row])
+
+    def parent(self, index=QModelIndex()):
+        item = self._row(index)
+        if item is None or item.parent is None:
+            return QModelIndex()
+        return self.createIndex(item.parent.row, 0, item.parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        item = self._row(parent)
+        return len(self.roots) if item is None else len(item.children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    # ---------- Data ----------
+
+    def data(self, index, role=Qt.DisplayRole):
+        item = self._row(index)
+        if item is None:
+            return None
+        column = index.column()
+        if not item.kind:  # řádek modulu
+            if role == Qt.DisplayRole and column == SETTING:
+                return item.module
+            if role == Qt.DisplayRole and column == INFO:
+                return f"{len(item.children)} settings"
+            if role == Qt.FontRole and column == SETTING:
+                return self._bold
+            return None
+        if role == Qt.DisplayRole:
+            return (item.key, item.display_value(), item.info)[column]
+        if role == Qt.EditRole and column == VALUE:
+            return item.value
+        if role == Qt.ToolTipRole and item.tooltip:
+            return item.tooltip
+        return None
+
+    def flags(self, index):
+        item = self._row(index)
+        if item is None:
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if item.kind and index.column() == VALUE:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        item = self._row(index)
+        if item is None or not item.kind or role != Qt.EditRole or index.column() != VALUE:
+            return False
+        item.value = str(value)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        return True
+
+    def row_of(self, index):
+        return self._row(index)
+
+    def set_info(self, item, text):
+        """Změní text ve sloupci Info (např. souhrn prohledané vstupní složky)."""
+        if item.info == text:
+            return
+        item.info = text
+        index = self.createIndex(item.row, INFO, item)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+    def set_for_all(self, key, kind, value, modules=None):
+        """Nastaví hodnotu stejného nastavení ve všech modulech (nebo jen ve vybraných); vrací počet."""
+        changed = 0
+        for root in self.roots:
+            if modules is not None and root.module not in modules:
+                continue
+            for item in root.children:
+                if item.key == key and item.kind == kind and item.value != value:
+                    item.value = str(value)
+                    index = self.createIndex(item.row, VALUE, item)
+                    self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+                    changed += 1
+        return changed
+
+    def values(self):
+        """{modul: {id: hodnota}} ve stejném tvaru, jaký ukládal původní dialog."""
+        result = {}
+        for root in self.roots:
+            values = result[root.module] = {}
+            for item in root.children:
+                key = item.key if item.kind in (INPUT, PARAM) else item.kind
+                values[key] = item.value if item.kind in (INPUT, PARAM) else item.value.strip()
+        return result
+
+
+class SettingsFilterModel(QSortFilterProxyModel):
+    """Filtr podle názvu modulu nebo nastavení; u shody modulu zůstanou vidět všechny jeho řádky.
+
+    Shody se spočítají najednou v Pythonu (set_filter_text), filterAcceptsRow
+    už jen hledá v množině - Qt ho volá pro každý řádek.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._text = ""
+        self._modules = set()   # moduly, které mají být vidět
+        self._matched = set()   # moduly, jejichž název odpovídá (vidět všechny řádky)
+        self._rows = set()      # id() odpovídajících řádků nastavení
+
+    def set_filter_text(self, text):
+        # Reset místo invalidateFilter: přefiltrování rozbaleného stromu
+        # by view posílalo tisíce jednotlivých odebrání/vložení řádků
+        self.beginResetModel()
+        self._text = text = text.strip().lower()
+        self._modules.clear()
+        self._matched.clear()
+        self._rows.clear()
+        if text:
+            for root in self.sourceModel().roots:
+                if text in root.module.lower():
+                    self._matched.add(root.module)
+                    self._modules.add(root.module)
+                    continue
+                for item in root.children:
+                    if text in item.key.lower():
+                        self._rows.add(id(item))
+                        self._modules.add(root.module)
+        self.endResetModel()
+
+    def matches_settings(self):
+        return bool(self._rows)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self._text:
+            return True
+        parent = source_parent.internalPointer() if source_parent.isValid() else None
+        if parent is None:
+            return self.sourceModel().roots[source_row].module in self._modules
+        return parent.module in self._matched or id(parent.children[source_row]) in self._rows
+
+
+class FileEditor(QWidget):
+    """Řádkový editor s tlačítky pro výběr souboru nebo složky (jen pro editovanou buňku)."""
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = QPersistentModelIndex(index)
+        self.line_edit = QLineEdit()
+        button = QToolButton()
+        button.setText("...")
+        button.setToolTip("Select a file")
+        button.clicked.connect(self.select_file)
+        dir_button = QToolButton()
+        dir_button.setText("Dir")
+        dir_button.setToolTip("Use all matching files in a directory")
+        dir_button.clicked.connect(self.select_directory)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        layout.addWidget(self.line_edit)
+        layout.addWidget(button)
+        layout.addWidget(dir_button)
+        self.setFocusProxy(self.line_edit)
+
+    def select_file(self):
+        file_path, _ = QFileDialog.getOpenFileName(self.window(), "Select Input File", self.line_edit.text())
+        if file_path:
+            self.set_value(file_path)
+
+    def select_directory(self):
+        # Vzor podle id vstupu ('reads.fastq.gz' -> složka/*.fastq.gz); počty souborů ukáže dialog po skenu
+        index = self.index
+        if not index.isValid():
+            return
+        input_id = index.model().index(index.row(), SETTING, index.parent()).data()
+        start = os.path.dirname(self.line_edit.text().split("*", 1)[0])
+        directory = QFileDialog.getExistingDirectory(self.window(), "Select Input Directory", start)
+        if directory:
+            pattern = input_pattern(input_id)
+            self.set_value(os.path.join(directory, pattern) if pattern else directory)
+
+    def set_value(self, file_path):
+        index = self.index
+        # Modální dialog editoru vezme fokus a view ho mezitím může zavřít - zapíše se rovnou do modelu
+        if index.isValid():
+            index.model().setData(index, file_path)
+        try:
+            self.line_edit.setText(file_path)
+        except RuntimeError:
+            pass
+
+
+class SettingsDelegate(QStyledItemDelegate):
+    def _item(self, index):
+        proxy = index.model()
+        source = proxy.mapToSource(index) if isinstance(proxy, QSortFilterProxyModel) else index
+        return source.model().row_of(source)
+
+    def createEditor(self, parent, option, index):
+        item = self._item(index)
+        if item is None:
+            return None
+        if item.kind == INPUT:
+            return FileEditor(index, parent)
+        if item.kind == SCATTER_BY:
+            combo = QComboBox(parent)
+            for label, mode in SCATTER_MODES:
+                combo.addItem(label, mode)
+            return combo
+        return QLineEdit(parent)
+
+    def setEditorData(self, editor, index):
+        value = index.data(Qt.EditRole) or ""
+        if isinstance(editor, FileEditor):
+            editor.line_edit.setText(value)
+        elif isinstance(editor, QComboBox):
+            editor.setCurrentIndex(max(0, editor.findData(value)))
+        else:
+            editor.setText(value)
+
+    def setModelData(self, editor, model, index):
+        if isinstance(editor, FileEditor):
+            model.setData(index, editor.line_edit.text())
+        elif isinstance(editor, QComboBox):
+            model.setData(index, editor.currentData())
+        else:
+            model.setData(index, editor.text())
@@ -0,0 +1,336 @@
+"""Příjem událostí Nextflow -with-weblog a jejich agregace po procesech.
+
+Nextflow posílá každou událost (started, process_submitted, process_started,
+process_completed, error, completed) jako HTTP POST s JSON tělem. Přijímač
+běží v asyncio smyčce ve vlastním vlákně a události jen řadí do fronty;
+GUI si je vybírá časovačem (drain) a skládá do ProgressModel. Nic se
+nezahazuje - co se nestihne v jednom kroku, zpracuje se v dalším.
+
+Záznam a přehrání událostí (ze složky core/gui):
+
+    python -m weblog listen --port 8765 --record events.jsonl
+    python -m weblog replay events.jsonl
+"""
+import sys
+import json
+import time
+import asyncio
+import threading
+import collections
+from datetime import datetime
+
+
+MAX_BODY = 16 * 1024 * 1024
+THROUGHPUT_WINDOW = 60  # s
+
+_RESPONSE_OK = b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n"
+_RESPONSE_BAD = b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+
+class WeblogReceiver:
+    """Minimální HTTP server pro -with-weblog; přijaté události drží ve frontě."""
+
+    def __init__(self, host="127.0.0.1", port=0, record_path=None):
+        self.host = host
+        self.port = port
+        self.record_path = record_path
+        self.events = collections.deque()  # append/popleft jsou bezpečné mezi vlákny
+        self.received = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._record = None
+        self._writers = set()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, timeout=5):
+        """Spustí server ve vlákně; vrací URL pro -with-weblog."""
+        if self.is_running():
+            return self.url
+        if self.record_path:
+            self._record = open(self.record_path, "a", encoding="utf-8")
+        ready = threading.Event()
+        errors = []
+        self._thread = threading.Thread(target=self._serve, args=(ready, errors), name="WeblogReceiver", daemon=True)
+        self._thread.start()
+        ready.wait(timeout)
+        if errors:
+            raise errors[0]
+        return self.url
+
+    def stop(self):
+        if self._loop is not None and self.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
+        if self._record is not None:
+            self._record.close()
+            self._record = None
+
+    def drain(self, limit=None):
+        """Vybere čekající události (nejvýš limit), nejstarší první."""
+        events = self.events
+        count = len(events) if limit is None else min(limit, len(events))
+        return [events.popleft() for _ in range(count)]
+
+    # ---------- Vlákno serveru ----------
+
+    def _serve(self, ready, errors):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as e:
+            errors.append(e)
+            ready.set()
+            self._loop.close()
+            return
+        ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            # Otevřená keep-alive spojení se ukončí před zavřením smyčky
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            pending = asyncio.all_tasks(self._loop)
+            if pending:
+                self._loop.run_until_complete(asyncio.wait(pending, timeout=1))
+            self._loop.close()
+
+    async def _handle(self, reader, writer):
+        # Nextflow drží spojení otevřené (keep-alive) - čte se požadavek po požadavku
+        self._writers.add(writer)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = {}
+                for line in head.decode("latin-1").split("\r\n")[1:]:
+                    key, sep, value = line.partition(":")
+                    if sep:
+                        headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", "0") or 0)
+                if length > MAX_BODY:
+                    writer.write(_RESPONSE_BAD)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                if body:
+                    self._accept(body)
+                writer.write(_RESPONSE_OK)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _accept(self, body):
+        try:
+            event = json.loads(body)
+        except ValueError:
+            return
+        if not isinstance(event, dict):
+            return
+        self.events.append(event)
+        self.received += 1
+        if self._record is not None:
+            self._record.write(json.dumps(event, separators=(",", ":")) + "\n")
+            self._record.flush()
+
+
+def read_events(path):
+    """Události ze záznamu (JSON na řádek) pro přehrání bez Nextflow."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _event_time(event):
+    """utcTime události ('2024-05-02T10:11:12Z') -> epoch sekundy"""
+    value = event.get("utcTime")
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _millis(value):
+    return value / 1000 if isinstance(value, (int, float)) and value > 0 else None
+
+
+class ProcessProgress:
+    __slots__ = ("submitted", "running", "completed", "cached", "failed")
+
+    def __init__(self):
+        self.submitted = self.running = self.completed = self.cached = self.failed = 0
+
+
+class ProgressModel:
+    """Agregace weblog událostí: počty tasků po procesech, propustnost a nejpomalejší běžící tasky.
+
+    Stav každého tasku se drží podle task_id, takže opakovaná nebo
+    přeházená událost počty nerozbije.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.run_name = None
+        self.status = None   # "running" / "completed" / "failed"
+        self.processes = {}  # {proces: ProcessProgress}
+        self.tasks = {}      # {task_id: (proces, stav)}
+        self.running = {}    # {task_id: (název tasku, začátek)}
+        self.finished_at = collections.deque()  # časy dokončení pro propustnost
+        self.clock = None    # čas poslední události
+        self.errors = []
+
+    def _process(self, name):
+        progress = self.processes.get(name)
+        if progress is None:
+            progress = self.processes[name] = ProcessProgress()
+        return progress
+
+    def _move(self, task_id, process, state):
+        """Přesun tasku do nového stavu; vrací False pro zastaralou událost."""
+        order = ("submitted", "running", "completed", "cached", "failed")
+        previous = self.tasks.get(task_id)
+        progress = self._process(process)
+        if previous is not None:
+            old_state = previous[1]
+            if old_state in ("completed", "cached", "failed") or order.index(old_state) >= order.index(state):
+                return False
+            setattr(progress, old_state, getattr(progress, old_state) - 1)
+        setattr(progress, state, getattr(progress, state) + 1)
+        self.tasks[task_id] = (process, state)
+        return True
+
+    def apply(self, event):
+        """Zapracuje jednu událost; vrací True, pokud se něco změnilo."""
+        kind = event.get("event")
+        when = _event_time(event)
+        if when is not None and (self.clock is None or when > self.clock):
+            self.clock = when
+        if kind == "started":
+            self.run_name = event.get("runName")
+            self.status = "running"
+            return True
+        if kind in ("completed", "error"):
+            if kind == "error" or (event.get("metadata", {}).get("workflow", {}).get("success") is False):
+                self.status = "failed"
+            elif self.status != "failed":
+                self.status = "completed"
+            message = event.get("metadata", {}).get("workflow", {}).get("errorMessage")
+            if message:
+                self.errors.append(message)
+            return True
+        trace = event.get("trace")
+        if not kind or not kind.startswith("process_") or not isinstance(trace, dict):
+            return False
+        task_id = trace.get("task_id")
+        process = trace.get("process") or str(trace.get("name", "")).split(" (", 1)[0]
+        if task_id is None or not process:
+            return False
+        process = process.rsplit(":", 1)[-1]
+        if kind == "process_submitted":
+            return self._move(task_id, process, "submitted")
+        if kind == "process_started":
+            if not self._move(task_id, process, "running"):
+                return False
+            self.running[task_id] = (trace.get("name", process), _millis(trace.get("start")) or when or time.time())
+            return True
+        if kind == "process_completed":
+            status = trace.get("status")
+            state = "cached" if status == "CACHED" else "completed" if status == "COMPLETED" else "failed"
+            if not self._move(task_id, process, state):
+                return False
+            self.running.pop(task_id, None)
+            if state == "completed":
+                self.finished_at.append(_millis(trace.get("complete")) or when or time.time())
+            return True
+        return False
+
+    def apply_all(self, events):
+        changed = False
+        for event in events:
+            changed = self.apply(event) or changed
+        return changed
+
+    def now(self, now=None):
+        return now if now is not None else (self.clock or time.time())
+
+    def throughput(self, now=None, window=THROUGHPUT_WINDOW):
+        """Dokončené tasky za minutu v posledním okně."""
+        now = self.now(now)
+        finished = self.finished_at
+        while finished and finished[0] < now - window:
+            finished.popleft()
+        return len(finished) * 60 / window
+
+    def slowest_running(self, count=5, now=None):
+        """[(název tasku, běží sekund)] od nejdéle běžícího."""
+        now = self.now(now)
+        oldest = sorted(self.running.values(), key=lambda item: item[1])[:count]
+        return [(name, max(0.0, now - started)) for name, started in oldest]
+
+    def totals(self):
+        total = ProcessProgress()
+        for progress in self.processes.values():
+            for field in ProcessProgress.__slots__:
+                setattr(total, field, getattr(total, field) + getattr(progress, field))
+        return total
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="weblog", description="Receive or replay Nextflow weblog events.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    listen = sub.add_parser("listen", help="receive events and print progress")
+    listen.add_argument("--port", type=int, default=0)
+    listen.add_argument("--record", help="append received events to this JSON lines file")
+    replay = sub.add_parser("replay", help="aggregate recorded events")
+    replay.add_argument("path")
+    args = parser.parse_args(argv)
+
+    model = ProgressModel()
+    if args.command == "replay":
+        start = time.perf_counter()
+        count = 0
+        for event in read_events(args.path):
+            model.apply(event)
+            count += 1
+        print(f"Replayed {count} events in {time.perf_counter() - start:.2f} s")
+    else:
+        receiver = WeblogReceiver(port=args.port, record_path=args.record)
+        print(f"Listening on {receiver.start()} (use -with-weblog), Ctrl+C to stop")
+        try:
+            while model.status not in ("completed", "failed"):
+                time.sleep(0.5)
+                model.apply_all(receiver.drain())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            receiver.stop()
+    print(f"Run {model.run_name or '-'}: {model.status or 'unknown'}")
+    for process, p in sorted(model.processes.items()):
+        print(f"{process}: {p.submitted} submitted, {p.running} running, {p.completed} completed, "
+              f"{p.cached} cached, {p.failed} failed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+"""Správa work/ složky Nextflow: index tasků, využití disku a LRU úklid.
+
+Index je v SQLite (~/.cache/pipeline_builder/work_cache.sqlite), společný
+pro všechny projekty; každý dotaz i úklid se ale omezí na běhy jedné
+složky spuštění a jejich work-dir. Obnovuje se přírůstkově:
+- logy se čtou od posledního zpracovaného bajtu (nextflow_logs),
+- work/ se prochází po dvouznakových složkách (work/2d/...); složka,
+  jejíž mtime se nezměnil, neobsahuje nové ani smazané tasky a vůbec
+  se nelistuje. Velikost tasku se počítá jen jednou, po jeho dokončení
+  (.exitcode) nebo po skončení běhu, který ho nechal nedokončený.
+
+Použití bez GUI (ze složky core/gui):
+
+    python -m work_cache workflows --cap "200 GB" [--keep-runs 1] [--dry-run]
+"""
+import os
+import sys
+import time
+import shutil
+import sqlite3
+
+import nextflow_logs
+from module_registry import user_cache_dir
+
+
+SCHEMA_VERSION = 2  # jiná verze = index se zahodí a postaví znovu (je to jen cache)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    path TEXT PRIMARY KEY, work_dir TEXT, bucket TEXT, ref TEXT, process TEXT,
+    size INTEGER, mtime REAL,
+    complete INTEGER  -- 0 = může ještě běžet, 1 = má .exitcode, 2 = nedokončený task skončeného běhu
+);
+CREATE INDEX IF NOT EXISTS tasks_bucket ON tasks(bucket);
+CREATE INDEX IF NOT EXISTS tasks_ref ON tasks(ref);
+CREATE INDEX IF NOT EXISTS tasks_work_dir ON tasks(work_dir);
+CREATE TABLE IF NOT EXISTS buckets (path TEXT PRIMARY KEY, work_dir TEXT, mtime_ns INTEGER);
+CREATE TABLE IF NOT EXISTS runs (
+    session TEXT PRIMARY KEY, launch_dir TEXT, name TEXT, work_dir TEXT, last_seen REAL
+);
+CREATE TABLE IF NOT EXISTS run_tasks (
+    session TEXT, ref TEXT, process TEXT, last_seen REAL, PRIMARY KEY (session, ref)
+);
+CREATE TABLE IF NOT EXISTS logs (fingerprint TEXT PRIMARY KEY, offset INTEGER, session TEXT);
+CREATE TABLE IF NOT EXISTS finished_runs (session TEXT PRIMARY KEY);
+"""
+
+
+def default_db_path():
+    return os.path.join(user_cache_dir(), "work_cache.sqlite")
+
+
+def dir_size(path):
+    """Místo obsazené složkou na disku (symlinky na vstupy se nepočítají dvakrát)."""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        st = entry.stat(follow_symlinks=False)
+                        total += st.st_blocks * 512 if hasattr(st, "st_blocks") else st.st_size
+        except OSError:
+            continue
+    return total
+
+
+def task_process(path):
+    """Název procesu z hlavičky .command.run ('# NEXTFLOW TASK: FASTQC (1)')."""
+    try:
+        with open(os.path.join(path, ".command.run"), "r", encoding="utf-8", errors="replace") as f:
+            for _ in range(5):
+                line = f.readline()
+                if line.startswith("# NEXTFLOW TASK:"):
+                    return nextflow_logs.process_of(line.split(":", 1)[1])
+    except OSError:
+        pass
+    return ""
+
+
+def format_size(size):
+    for unit, factor in (("TB", 1024 ** 4), ("GB", 1024 ** 3), ("MB", 1024 ** 2), ("KB", 1024)):
+        if size >= factor:
+            return f"{size / factor:.1f} {unit}"
+    return f"{size} B"
+
+
+class WorkCache:
+    """Index work/ složek jednoho místa spuštění (launch dir) a jejich úklid."""
+
+    def __init__(self, launch_dir, db_path=None):
+        self.launch_dir = os.path.abspath(launch_dir)
+        self.db_path = db_path or default_db_path()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            with self.conn:
+                for (table,) in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+                    self.conn.execute(f"DROP TABLE {table}")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ---------- Logy: běhy a tasky, na které odkazují ----------
+
+    def ingest_logs(self):
+        """Zpracuje nové řádky všech .nextflow.log* ve složce spuštění; vrátí jejich počet."""
+        processed = 0
+        with self.conn:
+            for path in nextflow_logs.log_files(self.launch_dir):
+                processed += self._ingest_log(path)
+        return processed
+
+    def _ingest_log(self, path):
+        fp = nextflow_logs.fingerprint(path)
+        if fp is None:
+            return 0
+        row = self.conn.execute("SELECT offset, session FROM logs WHERE fingerprint = ?", (fp,)).fetchone()
+        offset, session = row if row else (0, None)
+        mtime = os.path.getmtime(path)
+        last_time = None
+        count = 0
+        for line, offset in nextflow_logs.read_new_lines(path, offset):
+            count += 1
+            event = nextflow_logs.parse_event(line)
+            if event is None:
+                continue
+            kind, data = event
+            last_time = nextflow_logs.parse_timestamp(line, mtime) or last_time or mtime
+            if kind == "session":
+                session = data
+                self.conn.execute(
+                    "INSERT INTO runs (session, launch_dir, last_seen) VALUES (?, ?, ?) "
+                    "ON CONFLICT(session) DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen)",
+                    (session, self.launch_dir, last_time))
+            elif session is None:
+                continue
+            elif kind == "run_name":
+                self.conn.execute("UPDATE runs SET name = ? WHERE session = ?", (data, session))
+            elif kind == "work_dir":
+                self.conn.execute("UPDATE runs SET work_dir = ? WHERE session = ?", (data, session))
+            elif kind == "end":
+                self.conn.execute("INSERT OR IGNORE INTO finished_runs VALUES (?)", (session,))
+            elif kind in ("task_ref", "task_done"):
+                if kind == "task_ref":
+                    ref, _, task_name = data
+                else:
+                    work_dir = data.get("workDir", "").rstrip("/")
+                    ref = "/".join(work_dir.split("/")[-2:])[:9]
+                    task_name = data.get("name", "")
+                if len(ref) != 9:
+                    continue
+                self.conn.execute(
+                    "INSERT INTO run_tasks (session, ref, process, last_seen) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(session, ref) DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen)",
+                    (session, ref, nextflow_logs.process_of(task_name), last_time))
+        if session is not None and last_time is not None:
+            self.conn.execute("UPDATE runs SET last_seen = MAX(last_seen, ?) WHERE session = ?",
+                              (last_time, session))
+        if session is not None and nextflow_logs.is_finished_log(path):
+            # Bez řádku o konci (kill -9, pád JVM), ale log je rotovaný nebo dlouho nezměněný
+            self.conn.execute("INSERT OR IGNORE INTO finished_runs VALUES (?)", (session,))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO logs (fingerprint, offset, session) VALUES (?, ?, ?)", (fp, offset, session))
+        return count
+
+    # ---------- work/ složky ----------
+
+    def work_dirs(self):
+        """Work-dir všech známých běhů (z logů) + výchozí <launch_dir>/work, jen existující."""
+        dirs = {os.path.join(self.launch_dir, "work")}
+        dirs.update(d for (d,) in self.conn.execute(
+            "SELECT DISTINCT work_dir FROM runs WHERE launch_dir = ?", (self.launch_dir,)) if d)
+        return sorted(d for d in dirs if os.path.isdir(d))
+
+    def _in_work_dirs(self, column="work_dir"):
+        """(SQL podmínka, parametry) - jen tasky ve work-dir této složky spuštění."""
+        dirs = self.work_dirs()
+        return f"{column} IN ({', '.join('?' * len(dirs)) or 'NULL'})", dirs
+
+    def abandoned_refs(self):
+        """Tasky, na které odkazují jen skončené běhy - bez .exitcode už nikdy nedoběhnou."""
+        return {ref for (ref,) in self.conn.execute(
+            "SELECT ref FROM run_tasks WHERE session IN (SELECT session FROM runs WHERE launch_dir = ?) "
+            "GROUP BY ref HAVING MIN(session IN (SELECT session FROM finished_runs)) = 1", (self.launch_dir,))}
+
+    def scan(self):
+        """Přírůstkově aktualizuje index tasků; vrací (přidané, odebrané) počty."""
+        added = removed = 0
+        known = dict(self.conn.execute("SELECT path, mtime_ns FROM buckets"))
+        abandoned = self.abandoned_refs()
+        with self.conn:
+            for work_dir in self.work_dirs():
+                seen = set()
+                with os.scandir(work_dir) as it:
+                    buckets = [e for e in it if len(e.name) == 2 and e.is_dir(follow_symlinks=False)]
+                for bucket in buckets:
+                    seen.add(bucket.path)
+                    mtime_ns = bucket.stat().st_mtime_ns
+                    if known.get(bucket.path) == mtime_ns:
+                        continue  # Žádný task nepřibyl ani nezmizel
+                    a, r = self._scan_bucket(bucket.path, abandoned)
+                    added, removed = added + a, removed + r
+                    self.conn.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                                      (bucket.path, work_dir, mtime_ns))
+                for path in [p for (p,) in self.conn.execute("SELECT path FROM buckets WHERE work_dir = ?",
+                                                              (work_dir,)) if p not in seen]:
+                    removed += self.conn.execute("DELETE FROM tasks WHERE bucket = ?", (path,)).rowcount
+                    self.conn.execute("DELETE FROM buckets WHERE path = ?", (path,))
+            # Nedokončené tasky (mohly ještě běžet) se přepočítají
+            where, params = self._in_work_dirs()
+            for (path,) in self.conn.execute(
+                    f"SELECT path FROM tasks WHERE complete = 0 AND {where}", params).fetchall():
+                if os.path.isdir(path):
+                    self._index_task(path, os.path.dirname(path), abandoned)
+                else:
+                    removed += self.conn.execute("DELETE FROM tasks WHERE path = ?", (path,)).rowcount
+        return added, removed
+
+    def _scan_bucket(self, bucket, abandoned):
+        try:
+            with os.scandir(bucket) as it:
+                present = {e.path for e in it if e.is_dir(follow_symlinks=False)}
+        except OSError:
+            present = set()
+        indexed = {p for (p,) in self.conn.execute("SELECT path FROM tasks WHERE bucket = ?", (bucket,))}
+        for path in present - indexed:
+            self._index_task(path, bucket, abandoned)
+        for path in indexed - present:
+            self.conn.execute("DELETE FROM tasks WHERE path = ?", (path,))
+        return len(present - indexed), len(indexed - present)
+
+    def _index_task(self, path, bucket, abandoned):
+        ref = f"{os.path.basename(bucket)}/{os.path.basename(path)[:6]}"
+        if os.path.exists(os.path.join(path, ".exitcode")):
+            complete = 1
+        else:
+            complete = 2 if ref in abandoned else 0
+        self.conn.execute(
+            "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, os.path.dirname(bucket), bucket, ref, task_process(path), dir_size(path),
+             os.path.getmtime(path), complete))
+
+    def refresh(self):
+        self.ingest_logs()
+        return self.scan()
+
+    # ---------- Přehled a úklid ----------
+
+    def total_size(self):
+        where, params = self._in_work_dirs()
+        return self.conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM tasks WHERE {where}", params).fetchone()[0]
+
+    def usage_by_process(self):
+        """[(proces, počet tasků, bajty)] od největšího."""
+        where, params = self._in_work_dirs()
+        return self.conn.execute(
+            f"SELECT COALESCE(NULLIF(process, ''), '?'), COUNT(*), SUM(size) FROM tasks WHERE {where} "
+            "GROUP BY 1 ORDER BY 3 DESC", params).fetchall()
+
+    def protected_refs(self, keep_runs=1):
+        """Tasky, které mohou znovu použít poslední běhy této složky (session = řada -resume běhů)."""
+        return {ref for (ref,) in self.conn.execute(
+            "SELECT ref FROM run_tasks WHERE session IN (SELECT session FROM runs WHERE launch_dir = ? "
+            "ORDER BY last_seen DESC LIMIT ?)", (self.launch_dir, max(0, keep_runs)))}
+
+    def eviction_candidates(self, keep_runs=1):
+        """Dokončené a opuštěné tasky mimo chráněné běhy, od nejdéle nepoužitého."""
+        protected = self.protected_refs(keep_runs)
+        where, params = self._in_work_dirs("t.work_dir")
+        rows = self.conn.execute(
+            "SELECT t.path, t.ref, t.size, MAX(t.mtime, COALESCE(MAX(r.last_seen), 0)) AS last_used "
+            "FROM tasks t LEFT JOIN run_tasks r ON r.ref = t.ref "
+            "AND r.session IN (SELECT session FROM runs WHERE launch_dir = ?) "
+            f"WHERE t.complete > 0 AND {where} GROUP BY t.path ORDER BY last_used",
+            [self.launch_dir] + params).fetchall()
+        return [(path, size, last_used) for path, ref, size, last_used in rows if ref not in protected]
+
+    def evict(self, cap_bytes, keep_runs=1, dry_run=False):
+        """Maže nejdéle nepoužité tasky, dokud obsazené místo nepřesáhne cap; vrací [(cesta, bajty)]."""
+        total = self.total_size()
+        evicted = []
+        for path, size, _ in self.eviction_candidates(keep_runs):
+            if total <= cap_bytes:
+                break
+            if not dry_run:
+                shutil.rmtree(path, ignore_errors=True)
+                if os.path.exists(path):
+                    continue
+                with self.conn:
+                    self.conn.execute("DELETE FROM tasks WHERE path = ?", (path,))
+            evicted.append((path, size))
+            total -= size
+        return evicted
+
+
+def main(argv=None):
+    import argparse
+    from pipeline_compiler import parse_memory
+
+    parser = argparse.ArgumentParser(prog="work_cache", description="Inspect and prune Nextflow work directories.")
+    parser.add_argument("launch_dir", nargs="?", default="workflows", help="directory nextflow was launched from")
+    parser.add_argument("--cap", help="evict least recently used tasks until work/ is below this size (e.g. '200 GB')")
+    parser.add_argument("--keep-runs", type=int, default=1, help="never evict tasks of the N most recent runs")
+    parser.add_argument("--dry-run", action="store_true", help="only list what would be evicted")
+    parser.add_argument("--db", help="index database path")
+    args = parser.parse_args(argv)
+
+    cap = parse_memory(args.cap) if args.cap else None
+    if args.cap and cap is None:
+        print(f"work_cache: invalid size '{args.cap}'", file=sys.stderr)
+        return 1
+    cache = WorkCache(args.launch_dir, args.db)
+    try:
+        start = time.perf_counter()
+        added, removed = cache.refresh()
+        print(f"Indexed {added} new, {removed} removed tasks in {time.perf_counter() - start:.2f} s")
+        for process, tasks, size in cache.usage_by_process():
+            print(f"{format_size(size):>10}  {tasks:>6} tasks  {process}")
+        print(f"{format_size(cache.total_size()):>10}  total")
+        if cap is not None:
+            evicted = cache.evict(cap, args.keep_runs, args.dry_run)
+            verb = "Would evict" if args.dry_run else "Evicted"
+            print(f"{verb} {len(evicted)} tasks ({format_size(sum(s for _, s in evicted))})")
+    finally:
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""Workflow jako orientovaný acyklický graf (DAG) modulů.
+
+Uzly jsou názvy modulů, hrany vedou od výstupu jednoho modulu
+do vstupu jiného. Modul může mít libovolný počet vstupních hran
+(fan-in) a jeho výstup může číst více modulů (fan-out).
+"""
+import heapq
+
+from module_registry import file_type
+
+
+class WorkflowCycleError(Exception):
+    """Workflow obsahuje cyklus - nelze ho seřadit."""
+
+    def __init__(self, cycle):
+        self.cycle = list(cycle)
+        super().__init__("Workflow contains a cycle: " + " -> ".join(self.cycle))
+
+
+class Edge:
+    """Hrana source[.emit] -> target[input_id].
+
+    emit     -- emit nebo cesta výstupu zdroje (None = první výstup)
+    input_id -- id vstupu cíle (None = první volný vstup)
+    collect  -- sloučit všechny položky kanálu do jedné (.collect())
+    fuse     -- spojit oba moduly do jednoho procesu přes rouru (stdout | stdin)
+    """
+    __slots__ = ("source", "target", "emit", "input_id", "collect", "fuse")
+
+    def __init__(self, source, target, emit=None, input_id=None, collect=False, fuse=False):
+        self.source = source
+        self.target = target
+        self.emit = emit
+        self.input_id = input_id
+        self.collect = collect
+        self.fuse = fuse
+
+    def __eq__(self, other):
+        return isinstance(other, Edge) and self.to_dict() == other.to_dict()
+
+    def __hash__(self):
+        return hash((self.source, self.target, self.emit, self.input_id, self.collect, self.fuse))
+
+    def __repr__(self):
+        return f"Edge({self.source!r} -> {self.target!r})"
+
+    def to_dict(self):
+        data = {"source": self.source, "target": self.target}
+        if self.emit:
+            data["emit"] = self.emit
+        if self.input_id:
+            data["input"] = self.input_id
+        if self.collect:
+            data["collect"] = True
+        if self.fuse:
+            data["fuse"] = True
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["source"], data["target"], data.get("emit"),
+                   data.get("input"), data.get("collect", False), data.get("fuse", False))
+
+
+class WorkflowGraph:
+    def __init__(self, nodes=(), edges=()):
+        self.nodes = []
+        self.edges = []
+        self._index = {}
+        for node in nodes:
+            self.add_node(node)
+        for edge in edges:
+            self.add_edge(edge.source, edge.target, edge.emit, edge.input_id, edge.collect, edge.fuse)
+
+    def __contains__(self, node):
+        return node in self._index
+
+    def __len__(self):
+        return len(self.nodes)
+
+    # ---------- Úpravy ----------
+
+    def add_node(self, node):
+        if node in self._index:
+            return False
+        self._index[node] = len(self.nodes)
+        self.nodes.append(node)
+        return True
+
+    def remove_node(self, node):
+        if node not in self._index:
+            return False
+        self.nodes.remove(node)
+        self._index = {n: i for i, n in enumerate(self.nodes)}
+        self.edges = [e for e in self.edges if e.source != node and e.target != node]
+        return True
+
+    def add_edge(self, source, target, emit=None, input_id=None, collect=False, fuse=False):
+        """Přidá hranu; oba uzly musí v grafu existovat a hrana nesmí vytvořit cyklus."""
+        for node in (source, target):
+            if node not in self._index:
+                raise KeyError(f"Module {node} is not in workflow")
+        if self.has_path(target, source):
+            raise WorkflowCycleError(self._find_path(target, source) + [target])
+        edge = Edge(source, target, emit, input_id, collect, fuse)
+        if edge not in self.edges:
+            self.edges.append(edge)
+        return edge
+
+    def remove_edge(self, source, target):
+        before = len(self.edges)
+        self.edges = [e for e in self.edges if not (e.source == source and e.target == target)]
+        return len(self.edges) != before
+
+    def set_fuse(self, source, target, fuse=True):
+        """Zapne/vypne spojení source -> target do jednoho procesu (roura místo souboru)."""
+        changed = False
+        for e in self.edges:
+            if e.source == source and e.target == target and e.fuse != fuse:
+                e.fuse = fuse
+                changed = True
+        return changed
+
+    def clear(self):
+        self.nodes, self.edges, self._index = [], [], {}
+
+    # ---------- Dotazy ----------
+
+    def upstream(self, node):
+        return [e for e in self.edges if e.target == node]
+
+    def downstream(self, node):
+        return [e for e in self.edges if e.source == node]
+
+    def _successors(self):
+        succ = {node: [] for node in self.nodes}
+        for e in self.edges:
+            succ[e.source].append(e.target)
+        return succ
+
+    def has_path(self, start, goal):
+        return bool(self._find_path(start, goal))
+
+    def _find_path(self, start, goal):
+        if start == goal:
+            return [start]
+        succ = self._successors()
+        stack, parent = [start], {start: None}
+        while stack:
+            node = stack.pop()
+            for nxt in succ.get(node, ()):
+                if nxt in parent:
+                    continue
+                parent[nxt] = node
+                if nxt == goal:
+                    path = [nxt]
+                    while parent[path[-1]] is not None:
+                        path.append(parent[path[-1]])
+                    return path[::-1]
+                stack.append(nxt)
+        return []
+
+    def topological_order(self):
+        """Kahnův algoritmus; shody se řeší pořadím přidání uzlů (stabilní výstup)."""
+        return [node for level in self.levels() for node in level]
+
+    def levels(self):
+        """Rozdělí uzly do vrstev: moduly v jedné vrstvě na sobě nezávisí a běží paralelně."""
+        indegree = {node: 0 for node in self.nodes}
+        succ = self._successors()
+        for e in self.edges:
+            indegree[e.target] += 1
+        depth = {}
+        ready = [(self._index[n], n) for n, d in indegree.items() if d == 0]
+        heapq.heapify(ready)
+        for _, node in ready:
+            depth[node] = 0
+        seen = 0
+        while ready:
+            _, node = heapq.heappop(ready)
+            seen += 1
+            for nxt in succ[node]:
+                depth[nxt] = max(depth.get(nxt, 0), depth[node] + 1)
+                indegree[nxt] -= 1
+                if indegree[nxt] == 0:
+                    heapq.heappush(ready, (self._index[nxt], nxt))
+        if seen != len(self.nodes):
+            raise WorkflowCycleError(self._cycle_among([n for n, d in indegree.items() if d > 0]))
+
+        levels = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for node in self.nodes:
+            levels[depth[node]].append(node)
+        return levels
+
+    def _cycle_among(self, nodes):
+        # Každý nezpracovaný uzel má nezpracovaného předchůdce -> jdeme proti směru hran
+        remaining = set(nodes)
+        pred = {node: [] for node in self.nodes}
+        for e in self.edges:
+            pred[e.target].append(e.source)
+        node = nodes[0]
+        path, position = [], {}
+        while node not in position:
+            position[node] = len(path)
+            path.append(node)
+            node = next(n for n in pred[node] if n in remaining)
+        cycle = path[position[node]:] + [node]
+        return cycle[::-1]
+
+    # ---------- Serializace ----------
+
+    def to_dict(self):
+        return {"modules": list(self.nodes), "edges": [e.to_dict() for e in self.edges]}
+
+    @classmethod
+    def from_dict(cls, data):
+        graph = cls(data.get("modules", []))
+        seen = set()
+        for edge in data.get("edges", []):
+            e = Edge.from_dict(edge)
+            for node in (e.source, e.target):
+                if node not in graph:
+                    raise KeyError(f"Module {node} is not in workflow")
+            if e not in seen:
+                seen.add(e)
+                graph.edges.append(e)
+        graph.levels()  # Cyklus se ověří jednou pro celý graf
+        return graph
+
+    @classmethod
+    def from_modules(cls, modules, module_info, workflow_params=None):
+        """Lineární seznam modulů -> graf podle 'workflow_input' v JSON definicích.
+
+        Moduly bez 'workflow_input' se napojí podle typu souborů (link_by_file_type).
+        """
+        graph = cls(modules)
+        for target in modules:
+            source = module_info[target].workflow_input.get("process") if target in module_info else None
+            if source in graph and source != target:
+                try:
+                    graph.add_edge(source, target, module_info[target].workflow_input.get("emit"),
+                                   collect=module_info[target].workflow_input.get("collect", False))
+                except WorkflowCycleError:
+                    continue
+        link_by_file_type(graph, module_info, workflow_params)
+        return graph
+
+
+def link_declared_inputs(graph, node, module_info):
+    """Doplní hrany podle 'workflow_input' modulu node i modulů, které na něj odkazují."""
+    added = []
+    candidates = [(node, module_info[node].workflow_input)] if node in module_info else []
+    candidates += [(other, module_info[other].workflow_input)
+                   for other in graph.nodes if other != node and other in module_info]
+    for target, source_def in candidates:
+        source = source_def.get("process")
+        if not source or source not in graph or (target != node and source != node):
+            continue
+        if any(e.source == source for e in graph.upstream(target)):
+            continue
+        try:
+            added.append(graph.add_edge(source, target, source_def.get("emit"),
+                                        collect=source_def.get("collect", False)))
+        except WorkflowCycleError:
+            continue
+    return added
+
+
+def link_by_file_type(graph, module_info, workflow_params=None, nodes=None):
+    """Napojí moduly bez vstupních hran na dřívější moduly (pořadí v graph.nodes) podle přípon souborů.
+
+    Každý vstup bez souboru zadaného v GUI čte nejbližší předchozí modul,
+    který soubor toho typu vytváří. Modul bez deklarovaných vstupů
+    (MultiQC) posbírá výstupy všech dřívějších modulů, které zatím nikdo
+    nečte. Jeden průchod, takže i seznam s tisíci moduly se napojí hned.
+    nodes omezí napojování na tyto moduly (GUI napojuje jen nově přidaný,
+    hrany smazané uživatelem se nevrací).
+    """
+    workflow_params = workflow_params or {}
+    linked = {e.target for e in graph.edges}
+    read = {e.source for e in graph.edges}
+    forward_only = not graph.edges  # hrany jen dopředu v pořadí uzlů cyklus nevytvoří
+    producers = {}  # typ souboru -> (modul, cesta), poslední modul, který ho vytváří
+    unread = {}     # dřívější moduly s výstupy, které nikdo nečte (dict kvůli pořadí)
+    added = []
+    for node in graph.nodes:
+        spec = module_info.get(node)
+        if spec is None:
+            continue
+        if node not in linked and (nodes is None or node in nodes):
+            if spec.inputs:
+                links, params = [], workflow_params.get(node, {})
+                for input_id, _ in spec.inputs:
+                    producer = producers.get(file_type(input_id))
+                    if producer is not None and not params.get(input_id):
+                        links.append(Edge(producer[0], node, producer[1], input_id))
+            else:
+                links = [Edge(source, node, collect=True) for source in unread]
+            for edge in links:
+                if forward_only:
+                    graph.edges.append(edge)
+                else:
+                    try:
+                        edge = graph.add_edge(edge.source, edge.target, edge.emit, edge.input_id, edge.collect)
+                    except WorkflowCycleError:
+                        continue
+                added.append(edge)
+                read.add(edge.source)
+                unread.pop(edge.source, None)
+        for path, _ in reversed(spec.outputs):  # při shodě typu vyhrává první výstup
+            kind = file_type(path)
+            if kind is not None and kind != "dir":
+                producers[kind] = (node, path)
+        if spec.outputs and node not in read:
+            unread[node] = None
+    return added
@@ -0,0 +1,66 @@
+"""Společné fixtures testů; moduly GUI se importují přímo ze složky core/gui."""
+import os
+import sys
+import time
+
+import pytest
+
+GUI_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core", "gui")
+MODULES_DIR = os.path.join(GUI_DIR, "modules")
+sys.path.insert(0, GUI_DIR)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Každý test má vlastní ~/.cache/pipeline_builder (registr modulů, autosave, historie)."""
+    path = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(path))
+    return path
+
+
+@pytest.fixture
+def module_info():
+    from module_registry import load_modules
+    return load_modules(MODULES_DIR)
+
+
+@pytest.fixture
+def sample_sheet(tmp_path):
+    path = tmp_path / "samples.csv"
+    path.write_text("sample,fastq_1,fastq_2\n"
+                    "S1,/data/S1_R1.fastq.gz,/data/S1_R2.fastq.gz\n"
+                    "S2,/data/S2_R1.fastq.gz,/data/S2_R2.fastq.gz\n")
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """QCoreApplication pro testy se signály a QProcess (bez okna)."""
+    from PySide6.QtCore import QCoreApplication
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def wait_until(condition, timeout=10.0):
+    """Točí smyčku událostí Qt, dokud condition() neplatí; vrací její poslední hodnotu."""
+    from PySide6.QtCore import QCoreApplication, QEventLoop
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        QCoreApplication.processEvents(QEventLoop.AllEvents, 20)
+        time.sleep(0.005)
+    return condition()
+
+
+@pytest.fixture
+def stub_program(tmp_path, monkeypatch):
+    """Vytvoří spustitelný shell skript name v bin/ na začátku PATH; vrací jeho cestu."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+
+    def make(name, body):
+        path = bin_dir / name
+        path.write_text("#!/bin/sh\n" + body)
+        path.chmod(0o755)
+        return str(path)
+    return make
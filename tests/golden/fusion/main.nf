@@ -0,0 +1,44 @@
+#!/usr/bin/env nextflow
+
+nextflow.enable.dsl=2
+
+// process-hash: b1dc1c2f9f5a91c0
+process BWA_MEM_SAMTOOLS_SORT {
+    container 'quay.io/biocontainers/mulled-v2-bwa-samtools:latest'
+    cpus 8
+    memory '12 GB'
+    time '8h'
+    input:
+    path reference_fasta
+    path reads_fastq_gz
+    output:
+    path 'sorted.bam'
+    script:
+    """
+    set -o pipefail; bwa mem -t 4 ${reference_fasta} ${reads_fastq_gz} | samtools sort -@ 3 - -o sorted.bam
+    """
+}
+
+// process-hash: ff3f2a0a35e426c0
+process PICARD_MARKDUPLICATES {
+    container 'quay.io/biocontainers/picard:2.27.4--hdfd78af_0'
+    cpus 1
+    memory '8 GB'
+    input:
+    path input_files
+    output:
+    path 'dedup.bam'
+    path 'metrics.txt'
+    script:
+    """
+    picard MarkDuplicates I=${input_files} O=dedup.bam M=metrics.txt REMOVE_DUPLICATES=true
+    """
+}
+
+workflow {
+    BWA_MEM_REFERENCE_FASTA = Channel.value(file('/ref/hg38.fa'))
+    BWA_MEM_READS_FASTQ_GZ = Channel.value(file('/data/S1.fastq.gz'))
+    params.outdir = 'results'
+    BWA_MEM_SAMTOOLS_SORT(BWA_MEM_REFERENCE_FASTA, BWA_MEM_READS_FASTQ_GZ)
+    PICARD_MARKDUPLICATES(BWA_MEM_SAMTOOLS_SORT.out[0])
+}
\ No newline at end of file
@@ -0,0 +1,101 @@
+#!/usr/bin/env nextflow
+
+nextflow.enable.dsl=2
+
+// process-hash: fecfb182e1788c00
+process BWA_MEM {
+    container 'quay.io/biocontainers/mulled-v2-bwa-samtools:latest'
+    cpus 4
+    memory '8 GB'
+    time '8h'
+    input:
+    path reference_fasta
+    path reads_fastq_gz
+    output:
+    path 'aligned.bam'
+    script:
+    """
+    set -o pipefail; bwa mem -t ${task.cpus} ${reference_fasta} ${reads_fastq_gz} | samtools view -@ 4 -O bam,level=1 -o aligned.bam -
+    """
+}
+
+// process-hash: 43db067b221a3919
+process STAR {
+    container 'quay.io/biocontainers/star:2.7.10a--h9ee0642_0'
+    cpus 8
+    memory '32 GB'
+    time '8h'
+    input:
+    path fastq_gz
+    path genome_index
+    output:
+    path 'Aligned.out.bam'
+    script:
+    """
+    STAR --genomeDir ${genome_index} --readFilesIn ${fastq_gz} --readFilesCommand zcat --runThreadN ${task.cpus} --outFileNamePrefix ./ --outSAMtype BAM Unsorted --outBAMcompression 1
+    """
+}
+
+// process-hash: 0df7ad1987a0c272
+process SAMTOOLS_SORT {
+    container 'quay.io/biocontainers/samtools:1.17--h00cdaf9_1'
+    cpus 4
+    memory '4 GB'
+    publishDir params.outdir, mode: 'copy'
+    input:
+    path input_files
+    output:
+    path 'sorted.bam'
+    script:
+    """
+    samtools sort -@ ${task.cpus - 1} ${input_files} -o sorted.bam
+    """
+}
+
+// process-hash: 4ed95f468820da43
+process FEATURECOUNTS {
+    container 'quay.io/biocontainers/subread:2.0.1--h9a82719_0'
+    cpus 4
+    memory '4 GB'
+    publishDir params.outdir, mode: 'copy'
+    input:
+    path aligned_bam
+    path annotation_gtf
+    output:
+    path 'counts.txt'
+    script:
+    """
+    featureCounts -T ${task.cpus} -a ${annotation_gtf} -o counts.txt ${aligned_bam}
+    """
+}
+
+// process-hash: c18d488866c4fe6a
+process PICARD_MARKDUPLICATES {
+    container 'quay.io/biocontainers/picard:2.27.4--hdfd78af_0'
+    cpus 1
+    memory '8 GB'
+    publishDir params.outdir, mode: 'copy'
+    input:
+    path input_files
+    output:
+    path 'dedup.bam'
+    path 'metrics.txt'
+    script:
+    """
+    picard MarkDuplicates I=${input_files} O=dedup.bam M=metrics.txt REMOVE_DUPLICATES=true
+    """
+}
+
+workflow {
+    BWA_MEM_REFERENCE_FASTA = Channel.value(file('/ref/hg38.fa'))
+    BWA_MEM_READS_FASTQ_GZ = Channel.fromPath('/data/*.fastq.gz')
+    STAR_FASTQ_GZ = Channel.fromPath('/data/*.fastq.gz')
+    STAR_GENOME_INDEX = Channel.value(file('/ref/star_index'))
+    FEATURECOUNTS_ANNOTATION_GTF = Channel.value(file('/ref/genes.gtf'))
+    params.outdir = 'results'
+    BWA_MEM(BWA_MEM_REFERENCE_FASTA, BWA_MEM_READS_FASTQ_GZ)
+    STAR(STAR_FASTQ_GZ, STAR_GENOME_INDEX)
+    SAMTOOLS_SORT(BWA_MEM.out[0])
+    FEATURECOUNTS(STAR.out[0], FEATURECOUNTS_ANNOTATION_GTF)
+    PICARD_MARKDUPLICATES(STAR.out[0])
+}
\ No newline at end of file
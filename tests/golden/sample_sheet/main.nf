@@ -0,0 +1,83 @@
+#!/usr/bin/env nextflow
+
+nextflow.enable.dsl=2
+
+def sample_file(path) {
+    path.startsWith('/') || path.contains('://') ? file(path) : file('@CASE_DIR@/' + path)
+}
+
+// process-hash: 7cefb9ece8887490
+process FASTQC {
+    container 'quay.io/biocontainers/fastqc:0.11.9--0'
+    cpus 2
+    memory '2 GB'
+    input:
+    tuple val(meta), path(reads)
+    output:
+    tuple val(meta), path("*_fastqc.zip"), emit: zip
+    tuple val(meta), path("*_fastqc.html"), emit: html
+    script:
+    """
+    fastqc --threads ${task.cpus} ${reads} --outdir .
+    """
+}
+
+// process-hash: 5c0ff23aafeb310d
+process STAR {
+    container 'quay.io/biocontainers/star:2.7.10a--h9ee0642_0'
+    cpus 8
+    memory '32 GB'
+    time '8h'
+    input:
+    tuple val(meta), path(fastq_gz)
+    path genome_index
+    output:
+    tuple val(meta), path("Aligned.out.sam")
+    script:
+    """
+    STAR --genomeDir ${genome_index} --readFilesIn ${fastq_gz} --readFilesCommand zcat --runThreadN ${task.cpus} --outFileNamePrefix ./
+    """
+}
+
+// process-hash: df041d7034b59ca8
+process FEATURECOUNTS {
+    container 'quay.io/biocontainers/subread:2.0.1--h9a82719_0'
+    cpus 4
+    memory '4 GB'
+    input:
+    tuple val(meta), path(aligned_bam)
+    path annotation_gtf
+    output:
+    tuple val(meta), path("${meta.id}.counts.txt")
+    script:
+    """
+    featureCounts -T ${task.cpus} -a ${annotation_gtf} -o ${meta.id}.counts.txt ${aligned_bam}
+    """
+}
+
+// process-hash: 711729b327a1bb65
+process MULTIQC {
+    container 'quay.io/biocontainers/multiqc:1.13--pyhdfd78af_0'
+    cpus 1
+    memory '2 GB'
+    input:
+    path upstream_files
+    output:
+    path 'multiqc_report.html'
+    script:
+    """
+    multiqc . --outdir .
+    """
+}
+
+workflow {
+    STAR_GENOME_INDEX = Channel.value(file('/ref/star_index'))
+    FEATURECOUNTS_ANNOTATION_GTF = Channel.value(file('/ref/genes.gtf'))
+    SAMPLES = Channel.fromPath('@CASE_DIR@/samples.csv')
+        .splitCsv(header: true, sep: ',')
+        .map { row -> tuple([id: row['sample']] + row.subMap(['condition']), row['fastq_2'] ? [sample_file(row['fastq_1']), sample_file(row['fastq_2'])] : sample_file(row['fastq_1'])) }
+    FASTQC(SAMPLES)
+    STAR(SAMPLES, STAR_GENOME_INDEX)
+    FEATURECOUNTS(STAR.out[0], FEATURECOUNTS_ANNOTATION_GTF)
+    MULTIQC(FASTQC.out.zip.map { meta, files -> files }.mix(FEATURECOUNTS.out[0].map { meta, files -> files }).collect())
+}
\ No newline at end of file
@@ -0,0 +1,58 @@
+#!/usr/bin/env nextflow
+
+nextflow.enable.dsl=2
+
+// process-hash: 1ceb1a35a1edcfd7
+process BWA_MEM {
+    container 'quay.io/biocontainers/bwa:0.7.17--hed695b0_7'
+    cpus 4
+    memory '8 GB'
+    time '8h'
+    input:
+    path reference_fasta
+    tuple val(meta), path(reads_fastq_gz)
+    output:
+    tuple val(meta), path("${meta.id}.aligned.sam")
+    script:
+    """
+    bwa mem -t ${task.cpus} ${reference_fasta} ${reads_fastq_gz} > ${meta.id}.aligned.sam
+    """
+}
+
+// process-hash: d1d772ddcc570600
+process BWA_MEM_GATHER {
+    container 'quay.io/biocontainers/samtools:1.17--h00cdaf9_1'
+    cpus 4
+    input:
+    tuple val(meta), path(chunks, stageAs: 'chunk_*/*')
+    output:
+    tuple val(meta), path("${meta.id}.aligned.sam")
+    script:
+    """
+    samtools merge -@ ${task.cpus - 1} -O SAM -o ${meta.id}.aligned.sam ${chunks}
+    """
+}
+
+// process-hash: cfe83ce8c45dd107
+process SAMTOOLS_SORT {
+    container 'quay.io/biocontainers/samtools:1.17--h00cdaf9_1'
+    cpus 4
+    memory '4 GB'
+    input:
+    tuple val(meta), path(input_files)
+    output:
+    tuple val(meta), path("${meta.id}.sorted.bam")
+    script:
+    """
+    samtools sort -@ ${task.cpus - 1} ${input_files} -o ${meta.id}.sorted.bam
+    """
+}
+
+workflow {
+    BWA_MEM_REFERENCE_FASTA = Channel.value(file('/ref/hg38.fa'))
+    BWA_MEM_READS_FASTQ_GZ = Channel.fromFilePairs('/data/S1_R{1,2}.fastq.gz')
+        .map { id, reads -> tuple([id: id], reads) }
+    BWA_MEM(BWA_MEM_REFERENCE_FASTA, BWA_MEM_READS_FASTQ_GZ.map { meta, reads -> tuple(meta + [_chunks: Math.ceil((reads instanceof List ? reads[0] : reads).countFastq() / 4000000) as int], reads) }.splitFastq(by: 4000000, file: true, compress: true, elem: 1, pe: true).map { meta, read1, read2 -> tuple(meta, [read1, read2]) })
+    BWA_MEM_GATHER(BWA_MEM.out[0].map { meta, chunk -> tuple(groupKey(meta.findAll { k, v -> k != '_chunks' }, meta._chunks), chunk) }.groupTuple().map { key, chunks -> tuple(key.getGroupTarget(), chunks) })
+    SAMTOOLS_SORT(BWA_MEM_GATHER.out[0])
+}
\ No newline at end of file
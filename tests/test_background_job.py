@@ -0,0 +1,19 @@
+import gc
+import threading
+
+from conftest import wait_until
+from background_job import BackgroundJob
+
+
+def test_job_without_owner_outlives_its_reference(qapp):
+    release = threading.Event()
+    results = []
+    job = BackgroundJob(lambda: release.wait(5) and "sheet checked")
+    job.done.connect(results.append)
+    job.start()
+    # Dialog, který úlohu spustil, se zavřel - jediný odkaz zmizí dřív, než vlákno skončí
+    del job
+    gc.collect()
+    release.set()
+    assert wait_until(lambda: results == ["sheet checked"])
+    assert wait_until(lambda: not BackgroundJob.active)
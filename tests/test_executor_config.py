@@ -0,0 +1,115 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from module_registry import ModuleSpec
+from pipeline_compiler import (
+    PipelineError, compile_config, compile_pipeline, process_hashes, process_resources, render_command
+)
+from workflow_graph import WorkflowGraph
+
+SLURM_PARAMS = {"_general_executor": "slurm", "_general_queue": "short", "_general_queue_size": "50",
+                "_general_submit_rate": "10/1min", "_general_poll_interval": "30 sec",
+                "_general_stage_in_mode": "symlink", "_general_scratch": "/local/tmp"}
+
+
+def profile(config, name):
+    """Řádky jednoho profilu v bloku profiles."""
+    block = config.split(f"\n    {name} {{\n", 1)[1].split("\n    }", 1)[0]
+    return [line.strip() for line in block.splitlines()]
+
+
+def test_selected_profile_is_standard_and_throttled():
+    config = compile_config(SLURM_PARAMS)
+    assert "// Without -profile Nextflow uses 'standard' = 'slurm'." in config
+    assert "executor {\n    queueSize = 50\n    submitRateLimit = '10/1min'\n    pollInterval = '30 sec'\n}" in config
+    assert "process {\n    scratch = '/local/tmp'\n    stageInMode = 'symlink'\n}" in config
+    assert profile(config, "standard") == ["process.executor = 'slurm'", "process.queue = 'short'"]
+    assert profile(config, "pbs") == ["process.executor = 'pbs'", "process.queue = 'short'"]
+    assert profile(config, "k8s") == ["process.executor = 'k8s'"]
+    assert profile(config, "local") == ["process.executor = 'local'"]
+
+
+def test_local_profile_gets_budget():
+    config = compile_config({"_general_max_cpus": "16", "_general_max_memory": "64 GB"})
+    assert profile(config, "standard") == ["process.executor = 'local'", "executor.cpus = 16",
+                                           "executor.memory = '64 GB'"]
+
+
+def test_max_forks_only_for_generated_processes():
+    params = {"BWA MEM": {"_max_forks": "8"}, "Samtools Sort": {"_max_forks": "3"}, "FASTQC": {"_max_forks": "2"}}
+    config = compile_config(params, ["BWA MEM", "Samtools Sort", "FASTQC"], ["BWA_MEM_SAMTOOLS_SORT", "MULTIQC"])
+    # Spojený proces dostane nejnižší limit svých modulů, FASTQC ve skriptu není
+    assert "    withName: 'BWA_MEM_SAMTOOLS_SORT' {\n        maxForks = 3\n    }" in config
+    assert "FASTQC" not in config
+
+
+def test_samtools_threads_count_extra_threads(module_info):
+    spec = module_info["Samtools Sort"]
+    # -@ 7 = hlavní vlákno + 7 navíc; v příkazu zase jádra tasku minus hlavní vlákno
+    resources = process_resources(spec, {"-@": "7"}, {"_general_max_cpus": "16"})
+    assert resources["cpus"] == 8
+    assert process_resources(spec, {"-@": "0"}, {})["cpus"] == 1
+    command = render_command(spec, {}, {"input.sam": "bam"}, resources)
+    assert command == "samtools sort -@ ${task.cpus - 1} ${bam} -o sorted.bam"
+
+
+@pytest.mark.parametrize("key, value", [
+    ("_general_executor", "lsf"), ("_general_queue_size", "-1"), ("_general_submit_rate", "fast"),
+    ("_general_poll_interval", "often"), ("_general_stage_in_mode", "hardlink"),
+    ("_general_container_engine", "podman"),
+])
+def test_invalid_settings_raise(key, value):
+    with pytest.raises(PipelineError):
+        compile_config({key: value})
+
+
+# Stub SLURM: sbatch spustí .command.run na pozadí, squeue hlásí R/CD podle značky dokončení
+SBATCH = """
+id=$(( $(cat "$SLURM_STUB/next" 2>/dev/null || echo 100) + 1 ))
+echo $id > "$SLURM_STUB/next"
+cp "$1" "$SLURM_STUB/job_$id.sh"
+( bash "$1" > /dev/null 2>&1; touch "$SLURM_STUB/$id.done" ) &
+echo "Submitted batch job $id"
+"""
+SQUEUE = """
+for f in "$SLURM_STUB"/job_*.sh; do
+    [ -e "$f" ] || continue
+    id=${f##*/job_}; id=${id%.sh}
+    if [ -e "$SLURM_STUB/$id.done" ]; then echo "$id CD"; else echo "$id R"; fi
+done
+"""
+
+
+@pytest.mark.skipif(shutil.which("nextflow") is None, reason="needs nextflow (and java) on PATH")
+def test_slurm_profile_submits_through_sbatch(tmp_path, stub_program, monkeypatch):
+    stub_dir = tmp_path / "slurm"
+    stub_dir.mkdir()
+    monkeypatch.setenv("SLURM_STUB", str(stub_dir))
+    stub_program("sbatch", SBATCH)
+    stub_program("squeue", SQUEUE)
+    stub_program("scancel", "exit 0\n")
+
+    module_info = {
+        "HELLO": ModuleSpec("HELLO", command="echo hello > {hello.txt}", outputs=[("hello.txt", None)],
+                            resources={"cpus": 2, "memory": "1 GB"}),
+        "COUNT": ModuleSpec("COUNT", command="wc -c {hello.txt} > {count.txt}", inputs=[("hello.txt", "hello")],
+                            outputs=[("count.txt", None)]),
+    }
+    graph = WorkflowGraph.from_modules(["HELLO", "COUNT"], module_info)
+    params = {**SLURM_PARAMS, "_general_scratch": "", "_general_poll_interval": "1 sec"}
+    script = compile_pipeline(graph, module_info, params)
+    (tmp_path / "main.nf").write_text(script)
+    (tmp_path / "nextflow.config").write_text(compile_config(params, graph.nodes, process_hashes(script)))
+
+    result = subprocess.run(["nextflow", "run", "main.nf", "-ansi-log", "false"], cwd=tmp_path,
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout + result.stderr
+    jobs = sorted(stub_dir.glob("job_*.sh"))
+    assert len(jobs) == 2
+    hello = next(job.read_text() for job in jobs if "HELLO" in job.read_text())
+    assert "#SBATCH -p short" in hello
+    assert "#SBATCH -c 2" in hello
+    assert os.path.exists(stub_dir / "101.done")
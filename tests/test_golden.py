@@ -0,0 +1,54 @@
+"""Vygenerovaný main.nf a nextflow.config proti uloženým (golden) verzím.
+
+Každá složka v golden/ obsahuje workflow.json a očekávaný výstup CLI.
+Golden soubor musí být funkční skript: preflight bez chyb a každý proces
+čte všechny své vstupy a zapisuje výstupy pojmenované podle vzorku.
+Po záměrné změně generátoru se soubory přepíšou přes
+
+    UPDATE_GOLDEN=1 python -m pytest tests/test_golden.py
+"""
+import os
+import re
+
+import pytest
+
+from conftest import MODULES_DIR
+from pipeline_compiler import IMPLICIT_INPUT, main
+from preflight import check_script, errors
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+CASE_DIR_MARKER = "@CASE_DIR@"  # absolutní cesta ke složce případu (sample sheet)
+_PROCESS_RE = re.compile(r"^process (\w+) \{\n(.*?)^\}", re.MULTILINE | re.DOTALL)
+_INPUT_VAR_RE = re.compile(r"^\s+(?:tuple val\(meta\), )?path\(?(\w+)", re.MULTILINE)
+CASES = sorted(name for name in os.listdir(GOLDEN_DIR) if os.path.isdir(os.path.join(GOLDEN_DIR, name)))
+
+
+def unread_inputs(script):
+    """[(proces, proměnná)] vstupů, které příkaz procesu nepoužije (kromě implicitních)."""
+    unread = []
+    for name, body in _PROCESS_RE.findall(script):
+        inputs = body.split("input:", 1)[1].split("output:", 1)[0] if "input:" in body else ""
+        command = body.split("script:", 1)[1]
+        unread += [(name, var) for var in _INPUT_VAR_RE.findall(inputs)
+                   if var != IMPLICIT_INPUT and "${" + var + "}" not in command]
+    return unread
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_generated_files_match_golden(case, tmp_path, monkeypatch):
+    case_dir = os.path.join(GOLDEN_DIR, case)
+    monkeypatch.chdir(case_dir)  # relativní cesty ve workflow.json platí vůči složce případu
+    nf_path = tmp_path / "main.nf"
+    assert main(["workflow.json", "-m", MODULES_DIR, "-o", str(nf_path)]) == 0
+    script = nf_path.read_text(encoding="utf-8")
+    assert errors(check_script(script)) == []
+    assert unread_inputs(script) == []
+
+    for name in ("main.nf", "nextflow.config"):
+        generated = (tmp_path / name).read_text(encoding="utf-8").replace(case_dir, CASE_DIR_MARKER)
+        golden_path = os.path.join(case_dir, name)
+        if os.environ.get("UPDATE_GOLDEN"):
+            with open(golden_path, "w", encoding="utf-8") as f:
+                f.write(generated)
+        with open(golden_path, "r", encoding="utf-8") as f:
+            assert generated == f.read(), f"{case}/{name} differs from the golden file"
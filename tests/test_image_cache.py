@@ -0,0 +1,144 @@
+import os
+
+import pytest
+
+from image_cache import ImageCache, images_in_script, main, sif_name
+
+# Stub docker: image = soubor s velikostí v $STUB_DIR/images, každé volání se zapíše do calls
+DOCKER = """
+for image; do :; done
+f="$STUB_DIR/images/$(echo "$image" | tr '/:' '__')"
+echo "$*" >> "$STUB_DIR/calls"
+case "$1" in
+    image)
+        [ -e "$f" ] || { echo "Error: No such image: $image"; exit 1; }
+        [ "$3" = "--format" ] && cat "$f"
+        exit 0;;
+    pull)
+        case "$image" in *missing*) echo "Error response from daemon: manifest unknown"; exit 1;; esac
+        touch "$STUB_DIR/active.$$"
+        ls "$STUB_DIR" | grep -c '^active\\.' >> "$STUB_DIR/concurrency"
+        sleep 0.3
+        rm "$STUB_DIR/active.$$"
+        echo 1000 > "$f";;
+    rmi)
+        [ -e "$f" ] || { echo "Error: No such image: $image"; exit 1; }
+        rm "$f";;
+esac
+"""
+# Stub singularity: pull --force <cíl> <zdroj> zapíše 2000 bajtů do cíle
+SINGULARITY = """
+echo "$*" >> "$STUB_DIR/calls"
+case "$4" in *missing*) echo "FATAL: no such image"; exit 1;; esac
+head -c 2000 /dev/zero > "$3"
+"""
+
+SCRIPT = """
+process A {
+    container 'quay.io/biocontainers/bwa:0.7.17--hed695b0_7'
+}
+process B {
+    container 'quay.io/biocontainers/samtools:1.17--h00cdaf9_1'
+}
+process C {
+    container 'quay.io/biocontainers/bwa:0.7.17--hed695b0_7'
+}
+"""
+
+
+@pytest.fixture
+def stub_dir(tmp_path, monkeypatch, stub_program):
+    """Stub CLI se podvrhne proměnnými DOCKER a SINGULARITY."""
+    path = tmp_path / "stub"
+    (path / "images").mkdir(parents=True)
+    monkeypatch.setenv("STUB_DIR", str(path))
+    monkeypatch.setenv("DOCKER", stub_program("docker-stub", DOCKER))
+    monkeypatch.setenv("SINGULARITY", stub_program("singularity-stub", SINGULARITY))
+    return path
+
+
+def calls(stub_dir):
+    return (stub_dir / "calls").read_text().splitlines()
+
+
+def test_images_in_script_are_unique_in_order():
+    assert images_in_script(SCRIPT) == ["quay.io/biocontainers/bwa:0.7.17--hed695b0_7",
+                                        "quay.io/biocontainers/samtools:1.17--h00cdaf9_1"]
+    assert sif_name("docker://quay.io/biocontainers/bwa:0.7.17") == "quay.io-biocontainers-bwa-0.7.17.img"
+
+
+def test_docker_pulls_concurrently_and_skips_cached(tmp_path, stub_dir):
+    (stub_dir / "images" / "cached_image_1").write_text("500\n")
+    images = ["cached/image:1", "a/one:1", "a/two:1", "a/three:1", "a/four:1"]
+    cache = ImageCache("docker", db_path=str(tmp_path / "images.sqlite"))
+    try:
+        reported = []
+        results = cache.prefetch(images, workers=2, on_result=reported.append)
+        assert reported == results
+        assert {r.image: r.status for r in results} == {"cached/image:1": "cached", "a/one:1": "pulled",
+                                                        "a/two:1": "pulled", "a/three:1": "pulled",
+                                                        "a/four:1": "pulled"}
+        assert not [line for line in calls(stub_dir) if line == "pull cached/image:1"]
+        concurrency = [int(n) for n in (stub_dir / "concurrency").read_text().split()]
+        assert max(concurrency) == 2  # nejvýš workers stahování najednou
+        assert cache.total_size() == 500 + 4 * 1000
+        assert len(cache.images()) == 5
+    finally:
+        cache.close()
+
+
+def test_failed_pull_is_reported_and_not_indexed(tmp_path, stub_dir):
+    cache = ImageCache("docker", db_path=str(tmp_path / "images.sqlite"))
+    try:
+        results = cache.prefetch(["a/missing:1", "a/one:1"])
+        failed = next(r for r in results if r.status == "failed")
+        assert failed.error == "Error response from daemon: manifest unknown"
+        assert [image for image, _, _ in cache.images()] == ["a/one:1"]
+    finally:
+        cache.close()
+
+
+def test_singularity_writes_sif_atomically(tmp_path, stub_dir):
+    image_dir = tmp_path / "sif"
+    cache = ImageCache("singularity", str(image_dir), str(tmp_path / "images.sqlite"))
+    try:
+        results = cache.prefetch(["quay.io/x/tool:1", "docker://quay.io/x/missing:1"])
+        assert sorted(r.status for r in results) == ["failed", "pulled"]
+        assert sorted(os.listdir(image_dir)) == ["quay.io-x-tool-1.img"]  # žádné *.pulling
+        assert any(line.startswith("pull --force ") and line.endswith(".pulling docker://quay.io/x/tool:1")
+                   for line in calls(stub_dir))
+        assert cache.prefetch(["quay.io/x/tool:1"])[0].status == "cached"
+        assert cache.images()[0][:2] == ("quay.io/x/tool:1", 2000)
+    finally:
+        cache.close()
+
+
+def test_evict_least_recently_used_except_protected(tmp_path, stub_dir):
+    image_dir = tmp_path / "sif"
+    cache = ImageCache("singularity", str(image_dir), str(tmp_path / "images.sqlite"))
+    try:
+        for image in ("x/old:1", "x/used:1", "x/new:1"):
+            cache.prefetch([image])
+        with cache.conn:
+            for age, image in enumerate(("x/new:1", "x/used:1", "x/old:1")):
+                cache.conn.execute("UPDATE images SET last_used = ? WHERE image = ?", (1000 - age, image))
+        assert cache.evict(3000, dry_run=True) == [("x/old:1", 2000), ("x/used:1", 2000)]
+        assert len(os.listdir(image_dir)) == 3
+        assert cache.evict(3000, protect={"x/old:1"}) == [("x/used:1", 2000), ("x/new:1", 2000)]
+        assert os.listdir(image_dir) == ["x-old-1.img"]
+        assert [image for image, _, _ in cache.images()] == ["x/old:1"]
+    finally:
+        cache.close()
+
+
+def test_cli_prefetches_images_of_script(tmp_path, stub_dir, capsys):
+    script = tmp_path / "main.nf"
+    script.write_text(SCRIPT)
+    db = str(tmp_path / "images.sqlite")
+    assert main([str(script), "--engine", "docker", "--db", db]) == 0
+    out = capsys.readouterr().out
+    assert "2 of 2 images ready" in out
+    script.write_text(SCRIPT + "process D {\n    container 'a/missing:1'\n}\n")
+    assert main([str(script), "--engine", "docker", "--db", db, "--cap", "1KB"]) == 1
+    out = capsys.readouterr().out
+    assert "failed  a/missing:1: Error response from daemon: manifest unknown" in out
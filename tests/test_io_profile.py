@@ -0,0 +1,26 @@
+from pipeline_compiler import compile_pipeline, compressed_intermediates
+from preflight import placeholders
+from workflow_graph import WorkflowGraph
+
+
+def test_rewritten_commands_keep_all_inputs(module_info):
+    graph = WorkflowGraph.from_dict({
+        "modules": ["BWA MEM", "Samtools Sort", "STAR", "FeatureCounts"],
+        "edges": [{"source": "BWA MEM", "target": "Samtools Sort"},
+                  {"source": "STAR", "target": "FeatureCounts", "input": "aligned.bam"}],
+    })
+    workflow_params = {
+        "_general_io_profile": "local-scratch",
+        "BWA MEM": {"reference.fasta": "/ref/hg38.fa", "reads.fastq.gz": "/data/*.fastq.gz"},
+        "STAR": {"*.fastq.gz": "/data/*.fastq.gz", "genome_index/": "/ref/star_index"},
+        "FeatureCounts": {"annotation.gtf": "/ref/genes.gtf"},
+    }
+    _, rewritten, _ = compressed_intermediates(graph, module_info, workflow_params)
+    assert rewritten["STAR"].command != module_info["STAR"].command
+    for node in graph.nodes:
+        # Přepis na BAM nesmí ztratit žádný vstup (dřív zůstal STAR s prázdným --readFilesIn)
+        assert set(rewritten[node].input_ids) <= set(placeholders(rewritten[node].command))
+
+    script = compile_pipeline(graph, module_info, workflow_params)
+    assert ("STAR --genomeDir ${genome_index} --readFilesIn ${fastq_gz} --readFilesCommand zcat "
+            "--runThreadN ${task.cpus} --outFileNamePrefix ./ --outSAMtype BAM Unsorted") in script
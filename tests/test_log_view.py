@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from log_view import INFO, WARNING, LogBuffer, LogModel, classify, prune_spill_files
+
+
+def entries(*texts):
+    return [(INFO, text) for text in texts]
+
+
+def spilled_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.rstrip("\n").split("\t", 1)[1] for line in f]
+
+
+@pytest.fixture
+def buffer(tmp_path):
+    log_buffer = LogBuffer(3, str(tmp_path / "logs" / "spill.log"))
+    yield log_buffer
+    log_buffer.close()
+
+
+def rows(log_buffer):
+    return [log_buffer[row][1] for row in range(len(log_buffer))]
+
+
+def test_extend_spills_old_rows_before_batch_overflow(buffer):
+    buffer.extend(entries("old1", "old2", "old3"))
+    assert buffer.extend(entries("new1", "new2", "new3", "new4", "new5")) == 3
+    buffer.flush()
+    assert spilled_lines(buffer.spill_path) == ["old1", "old2", "old3", "new1", "new2"]
+    assert rows(buffer) == ["new3", "new4", "new5"]
+    assert (buffer.total, buffer.spilled) == (8, 5)
+
+
+def test_extend_spills_partly_evicted_buffer_in_order(buffer):
+    buffer.extend(entries("old1", "old2"))
+    assert buffer.extend(entries("new1", "new2", "new3", "new4")) == 2
+    buffer.flush()
+    assert spilled_lines(buffer.spill_path) == ["old1", "old2", "new1"]
+    assert rows(buffer) == ["new2", "new3", "new4"]
+
+
+def test_extend_wraps_around_ring(buffer):
+    for text in ("a", "b", "c", "d", "e"):
+        buffer.extend(entries(text))
+    assert rows(buffer) == ["c", "d", "e"]
+    buffer.flush()
+    assert spilled_lines(buffer.spill_path) == ["a", "b"]
+
+
+def test_model_append_batch_spills_in_order(buffer):
+    model = LogModel(buffer)
+    removed = []
+    model.rowsAboutToBeRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+    model.append_batch(entries("old1", "old2", "old3"))
+    model.append_batch(entries("new1", "new2", "new3", "new4", "new5"))
+    buffer.flush()
+    assert spilled_lines(buffer.spill_path) == ["old1", "old2", "old3", "new1", "new2"]
+    assert [model.data(model.index(row)) for row in range(model.rowCount())] == ["new3", "new4", "new5"]
+    assert removed == [(0, 2)]
+
+
+def test_clear_resets_counters_and_spill_file(buffer):
+    buffer.extend(entries("a", "b", "c", "d"))
+    buffer.clear()
+    assert (len(buffer), buffer.total, buffer.spilled) == (0, 0, 0)
+    assert not os.path.exists(buffer.spill_path)
+    buffer.extend(entries("e", "f", "g", "h"))
+    buffer.flush()
+    assert spilled_lines(buffer.spill_path) == ["e"]
+    buffer.close(remove=True)
+    assert not os.path.exists(buffer.spill_path)
+
+
+def test_old_spill_files_are_pruned(tmp_path):
+    old, recent = tmp_path / "session-20260101-100000-1.log", tmp_path / "session-20260110-100000-2.log"
+    for path in (old, recent, tmp_path / "other.log"):
+        path.write_text("INFO\tx\n")
+    now = os.path.getmtime(recent)
+    os.utime(old, (now - 8 * 24 * 3600, now - 8 * 24 * 3600))
+    assert prune_spill_files(str(tmp_path), now=now) == [str(old)]
+    assert sorted(os.listdir(tmp_path)) == ["other.log", recent.name]
+
+
+def test_classify():
+    assert classify("ERROR ~ Process failed") != INFO
+    assert classify("[stderr] something") == WARNING
+    assert classify("executor >  local (3)") == INFO
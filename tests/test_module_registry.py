@@ -0,0 +1,27 @@
+import json
+
+from module_registry import ModuleRegistry
+
+
+def test_malformed_module_is_reported_until_fixed(tmp_path):
+    modules = tmp_path / "modules"
+    modules.mkdir()
+    path = modules / "fastqc.json"
+    path.write_text('{"name": "FastQC", "command": "fastqc",')
+    registry = ModuleRegistry(str(modules), str(tmp_path / "registry.pickle"))
+    assert registry.load() == {}
+    assert list(registry.errors) == [str(path)]
+    assert registry.errors[str(path)].startswith("JSONDecodeError: ")
+
+    path.write_text(json.dumps({"name": "FastQC", "command": "fastqc"}))
+    assert registry.refresh() == ({"FastQC"}, set())
+    assert registry.errors == {}
+
+
+def test_cache_referring_to_a_missing_module_is_ignored(tmp_path):
+    modules = tmp_path / "modules"
+    modules.mkdir()
+    (modules / "fastqc.json").write_text(json.dumps({"name": "FastQC", "command": "fastqc"}))
+    cache = tmp_path / "registry.pickle"
+    cache.write_bytes(b"cremoved_module\nModuleSpec\n.")  # pickle s třídou z modulu, který už není
+    assert list(ModuleRegistry(str(modules), str(cache)).load()) == ["FastQC"]
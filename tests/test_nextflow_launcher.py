@@ -0,0 +1,129 @@
+import os
+
+import pytest
+
+from conftest import wait_until
+from nextflow_launcher import NEW_SESSION, NextflowLauncher
+
+needs_groups = pytest.mark.skipif(not NEW_SESSION, reason="process groups need POSIX and Qt >= 6.6")
+
+# Stub nextflow: zapíše argumenty, spustí "task" na pozadí a běží, dokud ho něco neukončí
+STUB = """
+echo "$@" > "$STUB_DIR/args"
+sleep 300 &
+echo $! > "$STUB_DIR/task.pid"
+{trap}
+echo started
+while :; do sleep 0.1; done
+"""
+
+
+def process_state(pid):
+    """Stav procesu z /proc ('T' = zastavený); None pro ukončený nebo zombie."""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            state = f.read().rsplit(")", 1)[1].split()[0]
+    except OSError:
+        return None
+    return None if state in ("Z", "X") else state
+
+
+@pytest.fixture
+def launcher(qapp, tmp_path, monkeypatch):
+    monkeypatch.setenv("STUB_DIR", str(tmp_path))
+    nextflow = NextflowLauncher(program="nextflow", kill_timeout_ms=300)
+    codes, states, out, err = [], [], [], []
+    nextflow.finished.connect(codes.append)
+    nextflow.state_changed.connect(states.append)
+    nextflow.output.connect(out.append)
+    nextflow.error_output.connect(err.append)
+    nextflow.codes, nextflow.states, nextflow.out, nextflow.err = codes, states, out, err
+    yield nextflow
+    nextflow.shutdown(1000)
+
+
+def start(launcher, tmp_path):
+    assert launcher.start(str(tmp_path / "main.nf"), work_dir=str(tmp_path))
+    assert wait_until(lambda: (tmp_path / "task.pid").exists() and launcher.state == "running")
+    return int((tmp_path / "task.pid").read_text())
+
+
+@needs_groups
+def test_pause_and_resume_stop_the_whole_group(launcher, stub_program, tmp_path):
+    stub_program("nextflow", STUB.format(trap=""))
+    task = start(launcher, tmp_path)
+    leader = launcher.process.processId()
+    assert os.getpgid(task) == leader  # task je ve skupině Nextflow
+
+    assert launcher.pause()
+    assert wait_until(lambda: process_state(task) == "T" and process_state(leader) == "T", 5)
+    assert not launcher.pause()
+    assert launcher.resume()
+    assert wait_until(lambda: process_state(task) not in ("T", None) and process_state(leader) != "T", 5)
+    assert launcher.states == ["running", "paused", "running"]
+
+    # Nextflow skončí na SIGTERM, task na pozadí nesmí přežít
+    assert launcher.stop()
+    assert wait_until(lambda: launcher.codes)
+    assert wait_until(lambda: process_state(task) is None, 5)
+    assert launcher.states[-2:] == ["stopping", "finished"]
+
+
+@needs_groups
+def test_stop_kills_group_when_nextflow_ignores_sigterm(launcher, stub_program, tmp_path):
+    stub_program("nextflow", STUB.format(trap="trap '' TERM"))
+    task = start(launcher, tmp_path)
+    assert launcher.stop()
+    assert wait_until(lambda: launcher.codes, 5)
+    assert launcher.codes == [-1]
+    assert wait_until(lambda: process_state(task) is None, 5)
+    assert launcher.state == "finished"
+
+
+@needs_groups
+def test_stop_of_paused_run_continues_it_first(launcher, stub_program, tmp_path):
+    stub_program("nextflow", STUB.format(trap=""))
+    task = start(launcher, tmp_path)
+    assert launcher.pause()
+    assert launcher.stop()  # zastavený proces by SIGTERM nezpracoval
+    assert wait_until(lambda: launcher.codes, 5)
+    assert wait_until(lambda: process_state(task) is None, 5)
+
+
+def test_output_is_streamed_line_by_line(launcher, stub_program, tmp_path):
+    stub_program("nextflow", """
+echo "$@" > "$STUB_DIR/args"
+printf 'N E X T F L O W\\n[ab/123456] process > FASTQC (1) [100%%]\\r\\n'
+printf 'WARN: slow\\n' >&2
+printf 'ha'
+sleep 0.2
+printf 'lf done'
+exit 3
+""")
+    assert launcher.start(str(tmp_path / "main.nf"), args=["-profile", "slurm"], work_dir=str(tmp_path))
+    assert not launcher.start(str(tmp_path / "main.nf"))  # jeden běh najednou
+    assert wait_until(lambda: launcher.codes)
+    assert launcher.codes == [3]
+    assert launcher.out == ["N E X T F L O W", "[ab/123456] process > FASTQC (1) [100%]", "half done"]
+    assert launcher.err == ["WARN: slow"]
+    assert (tmp_path / "args").read_text().split() == [
+        "run", str(tmp_path / "main.nf"), "-ansi-log", "false", "-resume", "-profile", "slurm"]
+    assert launcher.states == ["running", "finished"]
+    assert not launcher.is_running()
+
+
+def test_resume_can_be_turned_off(launcher, stub_program, tmp_path):
+    stub_program("nextflow", 'echo "$@" > "$STUB_DIR/args"\n')
+    assert launcher.start(str(tmp_path / "main.nf"), work_dir=str(tmp_path), resume=False)
+    assert wait_until(lambda: launcher.codes)
+    assert launcher.codes == [0]
+    assert "-resume" not in (tmp_path / "args").read_text().split()
+
+
+def test_missing_program_reports_failure(launcher, tmp_path):
+    launcher.program = str(tmp_path / "no-such-nextflow")
+    assert launcher.start(str(tmp_path / "main.nf"))
+    assert wait_until(lambda: launcher.codes)
+    assert launcher.codes == [-1]
+    assert launcher.err and launcher.err[0].startswith("Failed to start")
+    assert launcher.state == "finished"
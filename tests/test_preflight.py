@@ -0,0 +1,124 @@
+from module_registry import ModuleSpec
+from pipeline_compiler import compile_pipeline
+from preflight import ERROR, check_module, check_script, check_workflow, errors, preflight, split_arguments
+from workflow_graph import WorkflowGraph
+
+
+PROCESSES = """
+process FASTQC {
+    input:
+    tuple val(meta), path(reads)
+
+    script:
+    \"\"\"
+    fastqc ${reads}
+    \"\"\"
+}
+
+process MULTIQC {
+    input:
+    path results
+
+    script:
+    \"\"\"
+    multiqc .
+    \"\"\"
+}
+
+process BWA_MEM {
+    input:
+    path reference_fasta
+    tuple val(meta), path(reads_fastq_gz)
+
+    script:
+    \"\"\"
+    bwa mem ${reference_fasta} ${reads_fastq_gz}
+    \"\"\"
+}
+"""
+
+# Volání přesně tak, jak je generuje pipeline_compiler
+MULTIQC_CALL = ("MULTIQC(FASTQC.out.zip.map { meta, files -> files }"
+                ".mix(FEATURECOUNTS.out[0].map { meta, files -> files }).collect())")
+BWA_MEM_CALL = ("BWA_MEM(BWA_MEM_REFERENCE_FASTA, SAMPLES.map { meta, reads -> tuple(meta + [_chunks: "
+                "Math.ceil((reads instanceof List ? reads[0] : reads).countFastq() / 1000000) as int], reads) }"
+                ".splitFastq(by: 1000000, file: true, compress: true, elem: 1, pe: true)"
+                ".map { meta, read1, read2 -> tuple(meta, [read1, read2]) })")
+BWA_MEM_GATHER_CALL = ("BWA_MEM_GATHER(BWA_MEM.out[0].map { meta, chunk -> tuple(groupKey(meta.findAll "
+                       "{ k, v -> k != '_chunks' }, meta._chunks), chunk) }.groupTuple()"
+                       ".map { key, chunks -> tuple(key.getGroupTarget(), chunks) })")
+
+
+def script_with(*calls):
+    return PROCESSES + "\nworkflow {\n" + "".join(f"    {call}\n" for call in calls) + "}\n"
+
+
+def test_split_arguments_keeps_closures_lists_and_strings():
+    assert split_arguments("a, b") == ["a", "b"]
+    assert split_arguments("X.map { meta, files -> files }.collect()") == ["X.map { meta, files -> files }.collect()"]
+    assert split_arguments("f(1, 2), [a, b], 'x, y', \"p, q\"") == ["f(1, 2)", "[a, b]", "'x, y'", "\"p, q\""]
+    assert split_arguments("'it\\'s, quoted', b") == ["'it\\'s, quoted'", "b"]
+    assert split_arguments("") == []
+
+
+def test_closure_arguments_are_one_channel():
+    assert check_script(script_with(MULTIQC_CALL, BWA_MEM_CALL)) == []
+
+
+def test_missing_channel_is_reported():
+    issues = check_script(script_with("BWA_MEM(SAMPLES.map { meta, read1, read2 -> tuple(meta, [read1, read2]) })"))
+    assert [(issue.level, issue.module) for issue in issues] == [(ERROR, "BWA_MEM")]
+    assert "expects 2" in issues[0].message and "called with 1" in issues[0].message
+
+
+def test_unfilled_placeholder_is_reported():
+    issues = check_script(script_with(MULTIQC_CALL).replace("multiqc .", "multiqc {results}"))
+    assert [issue.module for issue in issues] == ["MULTIQC"]
+
+
+def test_output_the_script_never_writes_is_reported():
+    script = script_with(BWA_MEM_CALL).replace(
+        "    tuple val(meta), path(reads_fastq_gz)\n",
+        "    tuple val(meta), path(reads_fastq_gz)\n    output:\n    tuple val(meta), path(\"${meta.id}.Aligned.out.sam\")\n")
+    issues = check_script(script)
+    assert [(issue.level, issue.module) for issue in issues] == [(ERROR, "BWA_MEM")]
+    assert "${meta.id}.Aligned.out.sam" in issues[0].message
+
+
+def test_unused_scatter_and_sample_sheet_inputs_are_errors(sample_sheet):
+    spec = ModuleSpec("Count", command="wc -l > {counts.txt}", inputs=(("*.fastq.gz", "fastq_gz"),),
+                      outputs=(("counts.txt", None),), scatter={"input": "*.fastq.gz"})
+    assert [issue.message for issue in errors(check_module(spec))] == [
+        "scatter input *.fastq.gz is never used in the command"]
+    issues = check_workflow(["Count"], {"Count": spec}, {"_general_sample_sheet": sample_sheet})
+    assert "input *.fastq.gz gets the sample sheet reads, but the command never uses it" in [
+        issue.message for issue in errors(issues)]
+
+
+def test_output_outside_the_task_directory_is_an_error():
+    spec = ModuleSpec("Report", command="multiqc . --outdir ${task.process}", outputs=(("report.html", None),))
+    assert [issue.level for issue in check_module(spec)] == [ERROR]
+
+
+def test_compiled_sample_sheet_workflow_passes(module_info, sample_sheet):
+    graph = WorkflowGraph.from_dict({
+        "modules": ["FASTQC", "STAR", "FeatureCounts", "MultiQC", "BWA MEM", "Samtools Sort"],
+        "edges": [{"source": "FASTQC", "target": "MultiQC", "emit": "zip", "collect": True},
+                  {"source": "STAR", "target": "FeatureCounts", "input": "aligned.bam"},
+                  {"source": "FeatureCounts", "target": "MultiQC", "collect": True},
+                  {"source": "BWA MEM", "target": "Samtools Sort"}],
+    })
+    workflow_params = {
+        "_general_sample_sheet": sample_sheet,
+        "STAR": {"genome_index/": "/ref/idx"},
+        "FeatureCounts": {"annotation.gtf": "/ref/a.gtf"},
+        "BWA MEM": {"reference.fasta": "/ref/hg38.fa", "_scatter_by": "reads", "_scatter_size": "1000000"},
+    }
+    script = compile_pipeline(graph, module_info, workflow_params)
+    assert MULTIQC_CALL in script
+    assert BWA_MEM_CALL in script
+    assert BWA_MEM_GATHER_CALL in script
+    # STAR zapisuje pevný název, který se přejmenovat nedá
+    assert 'tuple val(meta), path("Aligned.out.sam")' in script
+    assert errors(check_script(script)) == []
+    assert errors(preflight(graph, module_info, workflow_params)) == []
@@ -0,0 +1,49 @@
+import os
+
+from project_store import (
+    ProjectJournal, has_changes, orphaned_journals, read_journal, remove_journal, replay_journal,
+)
+from workflow_graph import WorkflowGraph
+
+
+def test_second_instance_leaves_the_first_journal_alone(tmp_path):
+    first = ProjectJournal(str(tmp_path / "100.journal"))
+    first.start(None, WorkflowGraph(), {})
+    first.record(WorkflowGraph(["FASTQC"]), {})
+    # Druhá instance: jiný deník, první běží dál - žádný pád k obnově
+    second = ProjectJournal(str(tmp_path / "200.journal"))
+    second.start(None, WorkflowGraph(), {})
+    assert orphaned_journals(str(tmp_path)) == []
+    first.record(WorkflowGraph(["FASTQC", "MultiQC"]), {})
+    graph, _, _, changes = replay_journal(first.path)
+    assert graph.nodes == ["FASTQC", "MultiQC"] and changes == 2
+    with open(first.path, "rb") as f:
+        assert b"\0" not in f.read()
+    second.close()
+    assert not os.path.exists(second.path)
+
+
+def test_journal_of_crashed_instance_is_offered(tmp_path):
+    journal = ProjectJournal(str(tmp_path / "100.journal"))
+    journal.start(None, WorkflowGraph(), {})
+    journal.record(WorkflowGraph(["FASTQC"]), {})
+    journal.close(remove=False)
+    journal._lock.close()  # pád: zámek uvolní až konec procesu
+    assert orphaned_journals(str(tmp_path)) == [journal.path]
+    assert has_changes(journal.path)
+    remove_journal(journal.path)
+    assert os.listdir(tmp_path) == []
+
+
+def test_restart_appends_and_replays_from_last_header(tmp_path):
+    journal = ProjectJournal(str(tmp_path / "100.journal"))
+    journal.start(None, WorkflowGraph(), {})
+    journal.record(WorkflowGraph(["FASTQC"]), {})
+    with open(journal.path, "a") as f:
+        f.write('{"op": "nodes", "add": ["Mul')  # zápis přerušený pádem
+    journal.start(None, WorkflowGraph(), {})  # např. nový projekt
+    assert read_journal(journal.path)[1] == []
+    assert not has_changes(journal.path)
+    journal.record(WorkflowGraph(["STAR"]), {})
+    graph, _, _, changes = replay_journal(journal.path)
+    assert graph.nodes == ["STAR"] and changes == 1
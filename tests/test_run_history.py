@@ -0,0 +1,65 @@
+import os
+import shutil
+import time
+
+from conftest import GUI_DIR
+from run_history import RunHistory
+
+LOGS = os.path.join(GUI_DIR, "workflows")
+TRACE_COLUMNS = ("task_id", "hash", "native_id", "name", "status", "exit", "submit", "realtime", "%cpu",
+                 "peak_rss", "peak_vmem")
+
+
+def write_log(path, session, name, clock, finished=True):
+    lines = [
+        f"Sep-29 {clock}.000 [main] DEBUG nextflow.Session - Session UUID: {session}",
+        f"Sep-29 {clock}.001 [main] DEBUG nextflow.Session - Run name: {name}",
+        f"Sep-29 {clock}.100 [Task submitter] INFO  nextflow.Session - [2d/f202dc] Submitted process > FASTQC",
+    ]
+    if finished:
+        lines.append(f"Sep-29 {clock}.900 [main] DEBUG nextflow.util.ThreadPoolManager - Goodbye")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def statuses(history):
+    return {name: status for _, name, status, _ in history.runs()}
+
+
+def test_compile_error_is_failed_not_running(tmp_path):
+    shutil.copy(os.path.join(LOGS, ".nextflow.log.5"), tmp_path / ".nextflow.log.1")
+    history = RunHistory(str(tmp_path / "history.sqlite"))
+    history.ingest(str(tmp_path))
+    assert statuses(history) == {"curious_edison": "failed"}
+
+
+def test_unterminated_log_is_unknown_once_rotated(tmp_path):
+    write_log(tmp_path / ".nextflow.log", "11111111-0000-0000-0000-000000000000", "live_run", "10:00:00",
+              finished=False)
+    history = RunHistory(str(tmp_path / "history.sqlite"))
+    history.ingest(str(tmp_path))
+    assert statuses(history) == {"live_run": "running"}
+    # Další běh log zrotoval, konec prvního se už neobjeví
+    os.rename(tmp_path / ".nextflow.log", tmp_path / ".nextflow.log.1")
+    write_log(tmp_path / ".nextflow.log", "22222222-0000-0000-0000-000000000000", "next_run", "11:00:00")
+    history.ingest(str(tmp_path))
+    assert statuses(history) == {"live_run": "unknown", "next_run": "completed"}
+
+
+def test_resumed_task_trace_goes_to_its_own_session(tmp_path):
+    first, second = "11111111-0000-0000-0000-000000000000", "22222222-0000-0000-0000-000000000000"
+    # -resume: stejný task (stejný hash) ve dvou bězích
+    write_log(tmp_path / ".nextflow.log.1", first, "first_run", "10:00:00")
+    write_log(tmp_path / ".nextflow.log", second, "resumed_run", "11:00:00")
+    history = RunHistory(str(tmp_path / "history.sqlite"))
+    history.ingest(str(tmp_path))
+    started = dict((session, started) for session, _, _, started in history.runs())
+    name = time.strftime("trace-%Y%m%d-%H%M%S.txt", time.localtime(started[first] + 1))
+    with open(tmp_path / name, "w") as f:
+        f.write("\t".join(TRACE_COLUMNS) + "\n")
+        f.write("\t".join(("1", "2d/f202dc", "123", "FASTQC", "COMPLETED", "0", "-", "42s", "99.0%", "1 GB",
+                           "2 GB")) + "\n")
+    history.ingest(str(tmp_path))
+    realtime = dict(history.conn.execute("SELECT session, realtime FROM tasks WHERE hash = '2d/f202dc'"))
+    assert realtime == {first: 42.0, second: None}
+    assert len(history.runs()) == 2
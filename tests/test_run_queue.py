@@ -0,0 +1,97 @@
+import pytest
+
+from run_queue import (
+    BUDGET_CONFIG, CANCELLED, COMPLETED, FAILED, PAUSED, QUEUED, RUNNING, STOPPING, RunQueue, main, parse_run_spec,
+    run_args, run_headless, write_budget_config,
+)
+
+GB = 2 ** 30
+
+# Stub nextflow: zapíše začátek a konec běhu (složka = název běhu) a argumenty
+STUB = """
+run=$(basename "$PWD")
+echo "start $run" >> "$STUB_LOG"
+echo "$@" > args
+sleep 0.2
+echo "end $run" >> "$STUB_LOG"
+[ "$run" != "bad" ]
+"""
+
+
+def script(tmp_path, name):
+    directory = tmp_path / name
+    directory.mkdir()
+    path = directory / "main.nf"
+    path.write_text("workflow {}\n")
+    return str(path)
+
+
+def test_budget_config_limits_local_executor(tmp_path):
+    queue = RunQueue(max_cpus=16, max_memory=64 * GB)
+    run = queue.add(script(tmp_path, "a"), cpus=4)
+    assert run.memory == 16 * GB  # podíl paměti podle cpus
+    path = write_budget_config(run)
+    assert path == str(tmp_path / "a" / BUDGET_CONFIG)
+    assert (tmp_path / "a" / BUDGET_CONFIG).read_text() == "executor {\n    cpus = 4\n    memory = '16 GB'\n}\n"
+    assert run_args(run) == ["-c", path]
+    run.resume = True
+    assert run_args(run) == ["-c", path, "-resume"]
+
+
+def test_budget_config_without_memory_limit(tmp_path):
+    queue = RunQueue(max_cpus=8, max_memory=0)
+    run = queue.add(script(tmp_path, "a"), cpus=32)
+    assert run.cpus == 8 and run.memory is None
+    assert open(write_budget_config(run)).read() == "executor {\n    cpus = 8\n}\n"
+
+
+def test_schedule_keeps_priority_order_within_budget(tmp_path):
+    queue = RunQueue(max_cpus=8, max_memory=32 * GB)
+    big = queue.add(script(tmp_path, "big"), cpus=6)
+    urgent = queue.add(script(tmp_path, "urgent"), cpus=4, priority=1)
+    small = queue.add(script(tmp_path, "small"), cpus=2)
+    # urgent se vejde, big ne - a small ho nesmí předběhnout
+    assert queue.schedule() == [urgent]
+    assert (big.state, small.state) == (QUEUED, QUEUED)
+    queue.finish(urgent.id, 0)
+    assert queue.schedule() == [big, small]
+    assert urgent.state == COMPLETED
+
+
+def test_pause_resume_and_cancel(tmp_path):
+    queue = RunQueue(max_cpus=4, max_memory=None)
+    run = queue.add(script(tmp_path, "a"), cpus=4)
+    queue.schedule()
+    assert queue.pause(run.id) and run.state == STOPPING
+    queue.finish(run.id, 143)
+    assert run.state == PAUSED and queue.used() == (0, 0)
+    assert queue.resume(run.id) and run.resume
+    assert queue.schedule() == [run] and run.state == RUNNING
+    assert queue.cancel(run.id)
+    queue.finish(run.id, 143)
+    assert run.state == CANCELLED
+    with pytest.raises(ValueError):
+        parse_run_spec("main.nf,threads=2")
+
+
+def test_headless_runs_stub_nextflow_within_budget(tmp_path, stub_program, monkeypatch):
+    log = tmp_path / "stub.log"
+    monkeypatch.setenv("STUB_LOG", str(log))
+    stub_program("nextflow", STUB)
+    queue = RunQueue(max_cpus=2, max_memory=8 * GB)
+    runs = [queue.add(script(tmp_path, name), cpus=2) for name in ("a", "bad")]
+    assert run_headless(queue, "nextflow", poll=0.02, log=lambda message: None) == 1
+    # Každý běh si bere celý rozpočet, takže běží jeden po druhém
+    assert log.read_text().split("\n") == ["start a", "end a", "start bad", "end bad", ""]
+    assert [run.state for run in runs] == [COMPLETED, FAILED]
+    args = (tmp_path / "a" / "args").read_text().split()
+    assert args[:4] == ["run", str(tmp_path / "a" / "main.nf"), "-ansi-log", "false"]
+    assert args[4:] == ["-c", str(tmp_path / "a" / BUDGET_CONFIG)]
+
+
+def test_cli_exit_code(tmp_path, stub_program, monkeypatch, capsys):
+    monkeypatch.setenv("STUB_LOG", str(tmp_path / "stub.log"))
+    stub_program("nextflow", STUB)
+    assert main([script(tmp_path, "a") + ",cpus=1,memory=1GB", "--cpus", "2", "--memory", "4GB", "--resume"]) == 0
+    assert (tmp_path / "a" / "args").read_text().split()[-1] == "-resume"
+    assert "a: completed" in capsys.readouterr().out
@@ -0,0 +1,104 @@
+import http.client
+import json
+import os
+import time
+
+import pytest
+
+from weblog import MAX_BODY, ProgressModel, WeblogReceiver, main, read_events
+
+EVENTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "weblog_events.jsonl")
+
+
+def counts(progress):
+    return (progress.submitted, progress.running, progress.completed, progress.cached, progress.failed)
+
+
+def test_replay_aggregates_per_process():
+    model = ProgressModel()
+    assert model.apply_all(read_events(EVENTS))
+    assert model.run_name == "curious_edison"
+    assert model.status == "failed"
+    assert set(model.processes) == {"FASTQC", "BWA_MEM"}
+    # Opakovaná a přeházená událost tasku 1 se nezapočítá dvakrát
+    assert counts(model.processes["FASTQC"]) == (0, 0, 2, 1, 0)
+    assert counts(model.processes["BWA_MEM"]) == (0, 1, 0, 0, 1)
+    assert counts(model.totals()) == (0, 1, 2, 1, 1)
+    assert model.errors == ["Process `ALIGN:BWA_MEM (S2)` terminated with an error exit status (137)"]
+
+
+def test_replay_throughput_and_slowest_tasks():
+    model = ProgressModel()
+    model.apply_all(read_events(EVENTS))
+    # Čas modelu je čas poslední události (o 90 s po startu): FASTQC skončil v 40. a 45. s
+    assert model.throughput(window=60) == 2.0
+    assert model.throughput(window=30) == 0.0
+    assert model.slowest_running() == [("ALIGN:BWA_MEM (S1)", 43.0)]
+
+
+def test_replay_cli(capsys):
+    assert main(["replay", EVENTS]) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert out[0].startswith("Replayed 17 events")
+    assert out[1:] == ["Run curious_edison: failed",
+                       "BWA_MEM: 0 submitted, 1 running, 0 completed, 0 cached, 1 failed",
+                       "FASTQC: 0 submitted, 0 running, 2 completed, 1 cached, 0 failed"]
+
+
+@pytest.fixture
+def receiver(tmp_path):
+    server = WeblogReceiver(record_path=str(tmp_path / "record.jsonl"))
+    server.start()
+    yield server
+    server.stop()
+
+
+def post(connection, body, headers=None):
+    connection.request("POST", "/", body=body, headers={"Content-Type": "application/json", **(headers or {})})
+    response = connection.getresponse()
+    response.read()
+    return response.status
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_receiver_records_events_over_keep_alive(receiver, tmp_path):
+    with open(EVENTS, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    connection = http.client.HTTPConnection(receiver.host, receiver.port, timeout=5)
+    try:
+        for line in lines:
+            assert post(connection, line) == 200
+        assert post(connection, "not json") == 200  # neplatné tělo se tiše zahodí
+        assert post(connection, "[1, 2]") == 200
+    finally:
+        connection.close()
+    assert wait_for(lambda: receiver.received == len(lines))
+    events = receiver.drain(limit=5) + receiver.drain()
+    assert events == [json.loads(line) for line in lines]
+    assert receiver.drain() == []
+    receiver.stop()
+    assert (tmp_path / "record.jsonl").read_text().splitlines() == lines
+
+    # Záznam se přehraje stejně jako živé události
+    live, replayed = ProgressModel(), ProgressModel()
+    live.apply_all(events)
+    replayed.apply_all(read_events(str(tmp_path / "record.jsonl")))
+    assert {p: counts(c) for p, c in live.processes.items()} == {p: counts(c) for p, c in replayed.processes.items()}
+
+
+def test_receiver_rejects_oversized_body(receiver):
+    connection = http.client.HTTPConnection(receiver.host, receiver.port, timeout=5)
+    try:
+        connection.putrequest("POST", "/")
+        connection.putheader("Content-Length", str(MAX_BODY + 1))
+        connection.endheaders()
+        assert connection.getresponse().status == 400
+    finally:
+        connection.close()
+    assert receiver.received == 0
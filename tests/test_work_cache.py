@@ -0,0 +1,81 @@
+import os
+
+import work_cache
+from work_cache import WorkCache
+
+KILLED = "11111111-0000-0000-0000-000000000000"
+LIVE = "22222222-0000-0000-0000-000000000000"
+
+
+def write_log(path, session, clock, task):
+    with open(path, "w") as f:
+        f.write(f"Sep-29 {clock}.000 [main] DEBUG nextflow.Session - Session UUID: {session}\n"
+                f"Sep-29 {clock}.100 [Task submitter] INFO  nextflow.Session - [{task[:9]}] Submitted process > FASTQC\n")
+
+
+def make_task(work, task):
+    path = os.path.join(work, task[:2], task[3:])
+    os.makedirs(path)
+    with open(os.path.join(path, "reads.fastq"), "wb") as f:
+        f.write(b"x" * 8192)
+    return path
+
+
+def test_unfinished_task_of_finished_run_is_evicted(tmp_path):
+    work = str(tmp_path / "work")
+    killed = make_task(work, "2d/f202dcd1c934a739fea3aa57c05e27")
+    running = make_task(work, "7a/0c1b2d3e4f5a6b7c8d9e0f1a2b3c4d")
+    # Běh ukončený kill -9: task bez .exitcode, log bez řádku o konci
+    write_log(tmp_path / ".nextflow.log", KILLED, "10:00:00", "2d/f202dc")
+    cache = WorkCache(str(tmp_path), str(tmp_path / "cache.sqlite"))
+    cache.refresh()
+    assert cache.eviction_candidates(keep_runs=0) == []
+
+    # Další spuštění log zrotuje a jeho task ještě běží
+    os.rename(tmp_path / ".nextflow.log", tmp_path / ".nextflow.log.1")
+    write_log(tmp_path / ".nextflow.log", LIVE, "11:00:00", "7a/0c1b2d")
+    cache.refresh()
+    assert [path for path, _, _ in cache.eviction_candidates(keep_runs=1)] == [killed]
+    assert [path for path, _ in cache.evict(0, keep_runs=1)] == [killed]
+    assert not os.path.exists(killed)
+    assert os.path.exists(running)
+
+
+def test_abandoned_task_size_is_cached(tmp_path, monkeypatch):
+    work = str(tmp_path / "work")
+    make_task(work, "2d/f202dcd1c934a739fea3aa57c05e27")
+    write_log(tmp_path / ".nextflow.log.1", KILLED, "10:00:00", "2d/f202dc")
+    walked = []
+    dir_size = work_cache.dir_size
+    monkeypatch.setattr(work_cache, "dir_size", lambda path: walked.append(path) or dir_size(path))
+    cache = WorkCache(str(tmp_path), str(tmp_path / "cache.sqlite"))
+    cache.refresh()
+    cache.refresh()
+    assert len(walked) == 1
+    assert cache.total_size() >= 8192
+
+
+def test_projects_sharing_the_index_are_kept_apart(tmp_path):
+    db = str(tmp_path / "cache.sqlite")
+    projects = {}
+    for name, session, clock, task in (("projB", LIVE, "11:00:00", "7a/0c1b2d3e4f5a6b7c8d9e0f1a2b3c4d"),
+                                       ("projA", KILLED, "10:00:00", "2d/f202dcd1c934a739fea3aa57c05e27")):
+        launch_dir = tmp_path / name
+        launch_dir.mkdir()
+        path = make_task(str(launch_dir / "work"), task)
+        with open(os.path.join(path, ".exitcode"), "w") as f:
+            f.write("0")
+        write_log(launch_dir / ".nextflow.log.1", session, clock, task)
+        cache = WorkCache(str(launch_dir), db)
+        cache.refresh()
+        projects[name] = (cache, path)
+
+    cache_a, task_a = projects["projA"]
+    cache_b, task_b = projects["projB"]
+    assert cache_a.total_size() == work_cache.dir_size(task_a)
+    assert [path for path, _, _ in cache_a.eviction_candidates(keep_runs=0)] == [task_a]
+    # Nejnovější běh projektu A je chráněný, i když B běžel později
+    assert cache_a.evict(0, keep_runs=1) == []
+    assert [path for path, _ in cache_a.evict(0, keep_runs=0)] == [task_a]
+    assert os.path.exists(task_b)
+    assert cache_b.total_size() == work_cache.dir_size(task_b)
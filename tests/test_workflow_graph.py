@@ -0,0 +1,171 @@
+import json
+import random
+import time
+
+import pytest
+
+from benchmarks.synthetic import make_workflow, workflow_params, write_catalog
+from module_registry import ModuleSpec, load_modules
+from pipeline_compiler import PipelineError, compile_pipeline, main
+from preflight import check_script, errors
+from workflow_graph import Edge, WorkflowCycleError, WorkflowGraph, link_by_file_type, link_declared_inputs
+
+from conftest import MODULES_DIR
+
+LIST_WORKFLOW = ["BWA MEM", "Samtools Sort", "Picard MarkDuplicates", "FASTQC", "MultiQC"]
+LIST_PARAMS = {"BWA MEM": {"reference.fasta": "/ref/hg38.fa", "reads.fastq.gz": "/data/*.fastq.gz"},
+               "FASTQC": {"*.fastq.gz": "/data/*.fastq.gz"}}
+
+
+def edges_of(graph):
+    return [(e.source, e.target, e.emit, e.input_id, e.collect) for e in graph.edges]
+
+
+def synthetic_spec(name, inputs, output):
+    command = f"{name.lower()} " + " ".join(f"{{{input_id}}}" for input_id in inputs) + f" > {{{output}}}"
+    return ModuleSpec(name, command=command, inputs=[(input_id, input_id.replace(".", "_")) for input_id in inputs],
+                      outputs=[(output, None)])
+
+
+def test_list_workflow_links_outputs_to_inputs_by_file_type(module_info):
+    graph = WorkflowGraph.from_modules(LIST_WORKFLOW, module_info, LIST_PARAMS)
+    assert edges_of(graph) == [
+        ("BWA MEM", "Samtools Sort", "aligned.sam", "input.sam", False),
+        ("Samtools Sort", "Picard MarkDuplicates", "sorted.bam", "input.bam", False),
+        ("Picard MarkDuplicates", "MultiQC", None, None, True),
+        ("FASTQC", "MultiQC", None, None, True),
+    ]
+    script = compile_pipeline(LIST_WORKFLOW, module_info, LIST_PARAMS)
+    assert "    SAMTOOLS_SORT(BWA_MEM.out[0])\n" in script
+    assert "    PICARD_MARKDUPLICATES(SAMTOOLS_SORT.out[0])\n" in script
+    assert "    MULTIQC(PICARD_MARKDUPLICATES.out[0].mix(FASTQC.out.zip).collect())\n" in script
+    assert errors(check_script(script)) == []
+
+
+def test_modules_added_one_by_one_link_like_the_cli(module_info):
+    # Tak přidává moduly GUI (add_module_to_workflow)
+    graph = WorkflowGraph()
+    for node in LIST_WORKFLOW:
+        graph.add_node(node)
+        link_declared_inputs(graph, node, module_info)
+        link_by_file_type(graph, module_info, LIST_PARAMS, nodes={node})
+    assert edges_of(graph) == edges_of(WorkflowGraph.from_modules(LIST_WORKFLOW, module_info, LIST_PARAMS))
+
+
+def test_file_type_link_leaves_other_modules_alone(module_info):
+    graph = WorkflowGraph(["BWA MEM", "Samtools Sort", "Picard MarkDuplicates"])
+    assert edges_of(graph) == []
+    link_by_file_type(graph, module_info, LIST_PARAMS, nodes={"Picard MarkDuplicates"})
+    assert edges_of(graph) == [("Samtools Sort", "Picard MarkDuplicates", "sorted.bam", "input.bam", False)]
+
+
+def test_file_set_in_settings_wins_over_file_type_link(module_info):
+    params = {**LIST_PARAMS, "Samtools Sort": {"input.sam": "/data/old.sam"}}
+    graph = WorkflowGraph.from_modules(LIST_WORKFLOW, module_info, params)
+    assert not graph.upstream("Samtools Sort")
+    assert [e.source for e in graph.upstream("Picard MarkDuplicates")] == ["Samtools Sort"]
+
+
+def test_declared_workflow_input_is_kept(module_info):
+    info = dict(module_info)
+    info["Picard MarkDuplicates"] = ModuleSpec("Picard MarkDuplicates", inputs=[("input.bam", "input_files")],
+                                               outputs=[("dedup.bam", None)],
+                                               workflow_input={"process": "BWA MEM"})
+    graph = WorkflowGraph.from_modules(LIST_WORKFLOW, info, LIST_PARAMS)
+    assert [e.source for e in graph.upstream("Picard MarkDuplicates")] == ["BWA MEM"]
+
+
+def test_cli_refuses_to_write_script_with_unconnected_inputs(tmp_path, capsys):
+    workflow = tmp_path / "workflow.json"
+    workflow.write_text(json.dumps({"modules": LIST_WORKFLOW}))
+    nf_path = tmp_path / "main.nf"
+    assert main([str(workflow), "-m", MODULES_DIR, "-o", str(nf_path)]) == 1
+    assert not nf_path.exists()
+    assert "BWA_MEM: process expects 2 input channel(s) but is called with 0" in capsys.readouterr().err
+
+    workflow.write_text(json.dumps({"modules": LIST_WORKFLOW, "params": LIST_PARAMS}))
+    assert main([str(workflow), "-m", MODULES_DIR, "-o", str(nf_path)]) == 0
+    assert nf_path.exists()
+
+
+def test_cycle_is_reported_with_path():
+    graph = WorkflowGraph(["A", "B", "C"])
+    graph.add_edge("A", "B")
+    graph.add_edge("B", "C")
+    with pytest.raises(WorkflowCycleError) as e:
+        graph.add_edge("C", "A")
+    assert e.value.cycle == ["A", "B", "C", "A"]
+    with pytest.raises(WorkflowCycleError):
+        WorkflowGraph.from_dict({"modules": ["A", "B"], "edges": [{"source": "A", "target": "B"},
+                                                                  {"source": "B", "target": "A"}]})
+
+
+def test_independent_branches_are_called_before_fan_in():
+    module_info = {"A": synthetic_spec("A", ["in.txt"], "a.txt"), "B": synthetic_spec("B", ["a.txt"], "b.txt"),
+                   "C": synthetic_spec("C", ["in.txt"], "c.txt"), "D": synthetic_spec("D", ["x.txt"], "d.txt")}
+    graph = WorkflowGraph.from_dict({"modules": ["A", "B", "C", "D"], "edges": [
+        {"source": "A", "target": "B"},
+        {"source": "B", "target": "D", "collect": True},
+        {"source": "C", "target": "D", "collect": True},
+    ]})
+    assert graph.levels() == [["A", "C"], ["B"], ["D"]]
+    script = compile_pipeline(graph, module_info, {"A": {"in.txt": "/data/in.txt"}, "C": {"in.txt": "/data/in.txt"}})
+    workflow = script.split("\nworkflow {", 1)[1]
+    calls = [line.strip() for line in workflow.splitlines() if "(" in line and " = " not in line]
+    # Nezávislé větve se volají dřív než moduly, které je slučují
+    assert [call.split("(", 1)[0] for call in calls] == ["A", "C", "B", "D"]
+    assert "D(B.out[0].mix(C.out[0]).collect())" in calls
+
+
+def test_large_random_dag_is_ordered_and_compiled():
+    count = 800
+    rng = random.Random(3)
+    module_info = {f"STEP {i}": synthetic_spec(f"STEP {i}", [f"in_{i}.txt"], f"out_{i}.txt") for i in range(count)}
+    edges = [{"source": f"STEP {rng.randrange(i)}", "target": f"STEP {i}", "input": f"in_{i}.txt"}
+             for i in range(1, count)]
+    rng.shuffle(edges)
+    start = time.perf_counter()
+    graph = WorkflowGraph.from_dict({"modules": list(module_info), "edges": edges})
+    order = graph.topological_order()
+    elapsed = time.perf_counter() - start
+    position = {node: i for i, node in enumerate(order)}
+    assert sorted(order) == sorted(module_info)
+    assert all(position[e.source] < position[e.target] for e in graph.edges)
+    assert elapsed < 1.0, f"ordering {count} modules took {elapsed:.2f} s"
+    script = compile_pipeline(graph, module_info, {"STEP 0": {"in_0.txt": "/data/in_0.txt"}})
+    assert script.count("\nprocess ") == count
+
+
+def test_large_list_workflow_links_in_one_pass():
+    count = 5000
+    module_info = {
+        f"STEP {i}": ModuleSpec(f"STEP {i}", command=f"step{i} {{in_{i}.t{i % 7}}} > {{out_{i}.t{(i + 1) % 7}}}",
+                                inputs=[(f"in_{i}.t{i % 7}", "input_files")],
+                                outputs=[(f"out_{i}.t{(i + 1) % 7}", None)])
+        for i in range(count)
+    }
+    modules = list(module_info)
+    params = {"STEP 0": {"in_0.t0": "/data/first.t0"}}
+    start = time.perf_counter()
+    graph = WorkflowGraph.from_modules(modules, module_info, params)
+    elapsed = time.perf_counter() - start
+    assert len(graph.edges) == count - 1
+    assert all(e.source == f"STEP {i}" and e.target == f"STEP {i + 1}" for i, e in enumerate(graph.edges))
+    assert len(graph.levels()) == count
+    assert elapsed < 2.0, f"linking {count} modules took {elapsed:.2f} s"
+    script = compile_pipeline(modules, module_info, params)
+    assert errors(check_script(script)) == []
+
+
+def test_large_synthetic_dag_compiles_and_passes_preflight(tmp_path):
+    names = write_catalog(str(tmp_path / "modules"), 600)
+    module_info = load_modules(str(tmp_path / "modules"))
+    graph = make_workflow(names, 500, fan_in=0.3)
+    params = workflow_params(graph, module_info)
+    script = compile_pipeline(graph, module_info, params)
+    assert script.count("\nprocess ") == 500
+    assert errors(check_script(script)) == []
+    # Hrana přes neexistující vstup je chyba workflow, ne pádu generátoru
+    graph.edges.append(Edge(names[0], names[1], input_id="missing.txt"))
+    with pytest.raises(PipelineError):
+        compile_pipeline(graph, module_info, params)